@@ -0,0 +1,4 @@
+"""따릉이 원본 데이터 적재/집계 모듈 모음
+
+노트북(01~05)과 streamlit_app.py가 공통으로 사용하는 데이터 처리 코드를 모아둔다.
+"""
@@ -0,0 +1,38 @@
+"""오래 걸리는 계산을 스레드에서 돌리고 결과는 나중에 가져오기
+
+대시보드가 근사치를 먼저 보여 주고 정확한 전체 집계는 뒤에서 돌릴 때 쓴다.
+작업 함수는 report 키워드 인자(0~1 진행률을 받는 함수)를 받아 진행 상황을 알린다.
+"""
+import threading
+
+
+class BackgroundJob:
+    """함수 하나를 데몬 스레드에서 실행 - done/result/error/progress 로 상태 확인"""
+
+    def __init__(self, func, *args, **kwargs):
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(func, args, kwargs), daemon=True)
+        self._thread.start()
+
+    def _run(self, func, args, kwargs):
+        try:
+            self.result = func(*args, report=self.report, **kwargs)
+            self.progress = 1.0
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+    def report(self, progress):
+        self.progress = min(max(float(progress), 0.0), 1.0)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """끝날 때까지 (또는 timeout 초) 기다린 뒤 끝났는지 반환"""
+        return self._done.wait(timeout)
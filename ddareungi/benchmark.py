@@ -0,0 +1,240 @@
+"""적재/집계 벤치마크 (합성 데이터 1배/10배/50배)
+
+scale마다 합성 데이터를 만들고(synthetic 모듈), 측정 항목을 하나씩 새 프로세스에서 실행해
+실행 시간과 최대 메모리(RSS)를 잰다. 결과는 JSON Lines 파일에 계속 쌓이고,
+같은 scale/항목의 직전 기록보다 REGRESSION_RATIO 배 이상 느려지면 경고한다.
+
+    python -m ddareungi.benchmark --scales 1 10 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+from ddareungi import config, loaders
+from ddareungi.ingest import find_rental_files, ingest_rental_history, load_manifest, read_rentals
+from ddareungi.od import RAW_OD_COLUMNS, aggregate_od, iter_csv_batches, iter_store_batches
+from ddareungi.od_matrix import build_od_matrices
+from ddareungi.stations import StationDictionary
+from ddareungi.synthetic import generate
+
+BENCH_DATA_DIR = os.path.join(config.BASE_DIR, 'bench_data')
+RESULTS_PATH = os.path.join(config.BASE_DIR, 'benchmarks', 'results.jsonl')
+DEFAULT_SCALES = [1, 10, 50]
+
+# 직전 기록 대비 이 배율 이상, 이 초 이상 느려지면 회귀로 표시 (짧은 항목의 측정 잡음 제외)
+REGRESSION_RATIO = 1.2
+REGRESSION_MIN_SECONDS = 0.5
+
+
+def _peak_rss_mb():
+    """현재 프로세스 최대 RSS (MB) - 측정할 수 없으면 None
+
+    Linux의 ru_maxrss는 exec 이후에도 부모 프로세스 값이 남으므로 /proc의 VmHWM을 먼저 본다.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, 그 외는 KB 단위
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+# ---- 측정 항목: setup(data_dir, store_dir) → 상태, run(상태) → 처리 건수 (로더는 결과 항목 수) ----
+
+def _setup_dirs(data_dir, store_dir):
+    return data_dir, store_dir
+
+
+def _run_ingest(state):
+    data_dir, store_dir = state
+    ingest_rental_history(data_dir, store_dir, force=True)
+    return sum(entry['rows'] for entry in load_manifest(store_dir)['rentals'].values())
+
+
+def _setup_station_ids(data_dir, store_dir):
+    return list(iter_csv_batches(find_rental_files(data_dir)))
+
+
+def _run_station_ids(batches):
+    stations = StationDictionary()
+    rows = 0
+    for batch in batches:
+        for col in RAW_OD_COLUMNS:
+            stations.encode(batch[col])
+        rows += len(batch)
+    return rows
+
+
+def _run_od_from_store(state):
+    _, store_dir = state
+    return int(aggregate_od(iter_store_batches(store_dir=store_dir)).sum())
+
+
+def _run_od_from_csv(state):
+    data_dir, _ = state
+    return int(aggregate_od(iter_csv_batches(find_rental_files(data_dir)), StationDictionary()).sum())
+
+
+def _run_od_matrices(state):
+    _, store_dir = state
+    return len(build_od_matrices(store_dir, force=True))
+
+
+def _read_rentals_case(compact):
+    # 전체 스키마 / 축약 스키마로 전체 기간을 한 번에 읽을 때의 최대 메모리 비교
+    def run(state):
+        _, store_dir = state
+        return len(read_rentals(store_dir=store_dir, compact=compact))
+    return run
+
+
+def _loader_case(name):
+    def run(state):
+        data_dir, _ = state
+        return len(getattr(loaders, name)(data_dir))
+    return run
+
+
+# (이름, setup, run) - 순서대로 실행 (ingest 결과를 뒤 항목이 사용)
+CASES = [
+    ('ingest', _setup_dirs, _run_ingest),
+    ('station_ids', _setup_station_ids, _run_station_ids),
+    ('od_from_csv', _setup_dirs, _run_od_from_csv),
+    ('od_from_store', _setup_dirs, _run_od_from_store),
+    ('od_matrices', _setup_dirs, _run_od_matrices),
+    ('read_rentals', _setup_dirs, _read_rentals_case(False)),
+    ('read_rentals_compact', _setup_dirs, _read_rentals_case(True)),
+    ('load_foreign_usage', _setup_dirs, _loader_case('load_foreign_usage')),
+    ('load_foreign_ratio', _setup_dirs, _loader_case('load_foreign_ratio')),
+    ('load_station_pattern', _setup_dirs, _loader_case('load_station_pattern')),
+    ('load_tourist', _setup_dirs, _loader_case('load_tourist')),
+]
+CASE_NAMES = [name for name, _, _ in CASES]
+
+
+def _measure(case_name, data_dir, store_dir):
+    """작업자 프로세스: 항목 하나 실행 (출력은 버림)"""
+    _, setup, run = CASES[CASE_NAMES.index(case_name)]
+    state = setup(data_dir, store_dir)
+    setup_rss = _peak_rss_mb()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        rows = run(state)
+        seconds = time.perf_counter() - start
+    return {'seconds': round(seconds, 3), 'rows': rows, 'setup_rss_mb': setup_rss, 'peak_rss_mb': _peak_rss_mb()}
+
+
+def measure_in_subprocess(case_name, data_dir, store_dir):
+    # spawn: 이전 항목의 캐시/메모리가 측정에 섞이지 않도록 매번 새 인터프리터
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(_measure, case_name, data_dir, store_dir).result()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=config.BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_results(path=RESULTS_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_result(record, path=RESULTS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def previous_result(results, scale, case_name, machine):
+    """같은 장비/scale/항목의 가장 최근 기록 (없으면 None)"""
+    for record in reversed(results):
+        if (record['scale'] == scale and record['case'] == case_name
+                and record.get('machine') == machine):
+            return record
+    return None
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, cases=None, bench_dir=BENCH_DATA_DIR, results_path=RESULTS_PATH,
+                   seed=0):
+    """scale × 항목 전체 측정 - 회귀로 판정된 (scale, 항목) 목록 반환"""
+    cases = cases or CASE_NAMES
+    history = load_results(results_path)
+    run_info = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'machine': f'{platform.node()} ({platform.machine()}, {os.cpu_count()} cores)',
+        'python': platform.python_version(),
+    }
+
+    regressions = []
+    for scale in scales:
+        data_dir = os.path.join(bench_dir, f'scale_{scale}')
+        store_dir = os.path.join(bench_dir, f'store_{scale}')
+        generate(data_dir, scale, seed)
+        for case_name in cases:
+            try:
+                measured = measure_in_subprocess(case_name, data_dir, store_dir)
+            except Exception as e:
+                print(f'❌ scale {scale} {case_name} - 실패: {e}')
+                continue
+            record = {**run_info, 'scale': scale, 'case': case_name, **measured}
+            append_result(record, results_path)
+
+            previous = previous_result(history, scale, case_name, run_info['machine'])
+            note = ''
+            if previous and previous['seconds'] > 0:
+                ratio = measured['seconds'] / previous['seconds']
+                note = f' (직전 {previous["seconds"]:.2f}s, x{ratio:.2f})'
+                if (ratio >= REGRESSION_RATIO
+                        and measured['seconds'] - previous['seconds'] >= REGRESSION_MIN_SECONDS):
+                    regressions.append((scale, case_name))
+                    note += ' ⚠️ 느려짐'
+            rss = '-'
+            if measured['peak_rss_mb'] is not None:
+                # 괄호 안은 준비(import/setup) 이후 늘어난 양
+                rss = f'{measured["peak_rss_mb"]:,.0f}MB (+{measured["peak_rss_mb"] - measured["setup_rss_mb"]:,.0f}MB)'
+            print(f'✅ scale {scale} {case_name}: {measured["seconds"]:.2f}s, 최대 {rss}{note}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 데이터로 적재/집계 성능 측정')
+    parser.add_argument('--scales', type=float, nargs='+', default=DEFAULT_SCALES, help='데이터 배율 목록')
+    parser.add_argument('--cases', nargs='+', choices=CASE_NAMES, default=None, help='측정할 항목 (기본: 전체)')
+    parser.add_argument('--bench-dir', default=BENCH_DATA_DIR, help='합성 데이터/변환 결과 폴더')
+    parser.add_argument('--results', default=RESULTS_PATH, help='결과 기록 파일 (JSON Lines)')
+    parser.add_argument('--seed', type=int, default=0, help='합성 데이터 난수 시드')
+    args = parser.parse_args()
+
+    scales = [int(scale) if float(scale).is_integer() else scale for scale in args.scales]
+    regressions = run_benchmarks(scales, args.cases, args.bench_dir, args.results, args.seed)
+    if regressions:
+        print(f'\n⚠️ 느려진 항목 {len(regressions)}개: {regressions}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""데이터 경로 및 공통 설정"""
+import os
+
+# 저장소 루트 (streamlit_app.py 위치)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 원본 CSV 위치 - 노트북과 동일하게 저장소 상위 폴더('../')가 기본값
+DATA_DIR = os.environ.get('DDAREUNGI_DATA_DIR', os.path.dirname(BASE_DIR))
+
+# 변환된 데이터셋 저장 위치
+STORE_DIR = os.environ.get('DDAREUNGI_STORE_DIR', os.path.join(BASE_DIR, 'data_store'))
+
+# 디스크로 나눠 처리하는 집계/정렬(external 모듈)의 메모리 한도 (MB, 0이면 메모리 안에서만 처리)
+MEMORY_BUDGET_MB = float(os.environ.get('DDAREUNGI_MEMORY_BUDGET_MB', '0'))
+
+# 한도를 넘은 중간 결과를 내려쓰는 폴더 (작업이 끝나면 지움)
+SPILL_DIR = os.environ.get('DDAREUNGI_SPILL_DIR', os.path.join(STORE_DIR, '_spill'))
+
+# 대시보드 집계를 프로세스 간에 공유하는 메모리 맵 파일 폴더 (shared 모듈, 로컬 디스크여야 함)
+SHARED_DIR = os.environ.get('DDAREUNGI_SHARED_DIR', os.path.join(STORE_DIR, '_shared'))
+
+# 월별 대여이력 파일명 패턴 (서울특별시 공공자전거 대여이력 정보_YYMM.csv)
+RENTAL_HISTORY_GLOB = '서울특별시 공공자전거 대여이력 정보_*.csv'
+RENTAL_HISTORY_ENCODING = 'cp949'
+
+# 외국인/일반 이용 통계 파일명 패턴 (YY는 연도 두 자리)
+FOREIGN_MONTHLY_GLOB = 'Monthly_*년_외국인대여정보.csv'
+FOREIGN_DAILY_GLOB = 'Daily_*년_외국인이용정보.csv'
+GENERAL_MONTHLY_GLOB = 'General_*년*_이용정보_월별.csv'
+
+# 해외관광객 통계 (KOSIS 내려받기 형식)
+TOURIST_AGE_GLOB = '방문객_연령별_대륙별_전국외국인_*.csv'
+TOURIST_GENDER_GLOB = '방문객_성별_전국외국인_*.csv'
+TOURIST_CONTINENT_GLOB = '방문객_대륙별_전국외국인_*.csv'
+
+# 대여소 위치 정보 (공공자전거 대여소 정보(YY.MM월 기준).csv - 여러 개면 이름순 마지막 파일)
+STATION_INFO_GLOB = '공공자전거 대여소 정보*.csv'
+STATION_INFO_ENCODINGS = ('cp949', 'utf-8-sig')
@@ -0,0 +1,210 @@
+"""외국인 따릉이 이용 큐브 (연도 × 월 × 일 × 요일 × 대여소)
+
+01/03 노트북이 Monthly/Daily 파일을 각각 다시 groupby 하던 연도별/월별/요일별/대여소 순위/히트맵을
+하나의 집계 표에서 잘라 더하는 방식으로 계산한다.
+
+- 일별 파일(Daily_YY년)이 있는 연도는 일 단위(요일 포함)로,
+  없는 연도는 월별 파일(Monthly_YY년)로 채우고 일=0, 요일=-1(미상)로 둔다.
+- 원본 통계에는 시간대 정보가 없어 일 단위가 가장 세밀한 단위다.
+- 저장된 큐브는 입력 파일 해시가 바뀐 연도만 다시 집계해 갱신한다.
+
+    python -m ddareungi.cube --data-dir .. --store-dir data_store
+"""
+import argparse
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ddareungi import config
+from ddareungi.utils import first_column
+
+CUBE_FILE_NAME = 'foreign_cube.parquet'
+CUBE_DIMENSIONS = ['연도', '월', '일', '요일', '대여소']
+CUBE_MEASURES = ['대여건수', '반납건수']
+CUBE_COLUMNS = CUBE_DIMENSIONS + CUBE_MEASURES
+UNKNOWN_WEEKDAY = -1
+
+CUBE_DTYPES = {'연도': 'int16', '월': 'int8', '일': 'int8', '요일': 'int8',
+               '대여건수': 'int64', '반납건수': 'int64'}
+
+# parquet 메타데이터에 기록하는 입력 파일 해시 키
+INPUTS_METADATA_KEY = b'ddareungi.inputs'
+
+
+def _finalize(df):
+    df = df.groupby(CUBE_DIMENSIONS, sort=True, observed=True)[CUBE_MEASURES].sum().reset_index()
+    return df.astype(CUBE_DTYPES)
+
+
+def cube_from_monthly(file_path):
+    """Monthly_YY년_외국인대여정보 → 월 단위 큐브 조각 (일=0, 요일=-1)"""
+    df = pd.read_csv(file_path, encoding='utf-8-sig')
+    # 첫 번째 컬럼이 년월 (헤더명은 '일시' 또는 '년월', 값은 모두 YYYYMM)
+    year_month = df[df.columns[0]].astype(str)
+    # 2024년은 '대여소명', 다른 연도는 '대여소'
+    station_col = first_column(df, ['대여소', '대여소명'])
+    cube = pd.DataFrame({
+        '연도': year_month.str[:4].astype(int),
+        '월': year_month.str[-2:].astype(int),
+        '일': 0,
+        '요일': UNKNOWN_WEEKDAY,
+        '대여소': df[station_col].astype(str),
+        '대여건수': df[first_column(df, ['대여건수', '대여수'])],
+        '반납건수': df['반납건수']
+    })
+    return _finalize(cube)
+
+
+def cube_from_daily(file_path):
+    """Daily_YY년_외국인이용정보 → 일 단위 큐브 조각"""
+    df = pd.read_csv(file_path, encoding='utf-8-sig')
+    dates = pd.to_datetime(df[first_column(df, ['일시', '날짜'])], errors='coerce')
+    valid = dates.notna()
+    df, dates = df[valid], dates[valid]
+    cube = pd.DataFrame({
+        '연도': dates.dt.year,
+        '월': dates.dt.month,
+        '일': dates.dt.day,
+        '요일': dates.dt.dayofweek,
+        '대여소': df[first_column(df, ['대여소', '대여소명'])].astype(str),
+        '대여건수': df[first_column(df, ['대여건수', '대여수'])],
+        '반납건수': df['반납건수']
+    })
+    return _finalize(cube)
+
+
+def combine_cube(monthly_parts, daily_parts):
+    """연도별 조각 합치기 - 같은 연도는 일별 조각 우선
+
+    monthly_parts / daily_parts: {연도: 큐브 조각}
+    """
+    parts = [daily_parts.get(year, part) for year, part in monthly_parts.items()]
+    parts += [part for year, part in daily_parts.items() if year not in monthly_parts]
+    return merge_cubes(parts)
+
+
+def merge_cubes(parts):
+    """연도가 겹치지 않는 큐브 조각들을 하나로 (대여소 카테고리는 합집합)"""
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return empty_cube()
+    cube = pd.concat([part.astype({'대여소': str}) for part in parts], ignore_index=True)
+    cube['대여소'] = cube['대여소'].astype('category')
+    return cube.sort_values(CUBE_DIMENSIONS[:4], kind='stable', ignore_index=True)
+
+
+def empty_cube():
+    cube = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in CUBE_DTYPES.items()})
+    cube['대여소'] = pd.Series(dtype='category')
+    return cube[CUBE_COLUMNS]
+
+
+def slice_cube(cube, years=None, months=None, weekdays=None, stations=None):
+    """조건에 맞는 행만 (None 이면 전체)"""
+    mask = pd.Series(True, index=cube.index)
+    for col, values in (('연도', years), ('월', months), ('요일', weekdays), ('대여소', stations)):
+        if values is not None:
+            mask &= cube[col].isin(list(values))
+    return cube[mask]
+
+
+def rollup(cube, by, measure='대여건수', **filters):
+    """큐브를 잘라(filters) by 차원별로 합계 - by가 비어 있으면 전체 합계"""
+    sliced = slice_cube(cube, **filters)
+    if not by:
+        return int(sliced[measure].sum())
+    return sliced.groupby(by, observed=True, sort=True)[measure].sum()
+
+
+def weekday_years(cube):
+    """요일 정보(일별 원본)가 있는 연도 목록"""
+    return sorted(cube.loc[cube['요일'] != UNKNOWN_WEEKDAY, '연도'].unique().tolist())
+
+
+def station_month_matrix(cube, year, measure='대여건수', top_n=3):
+    """03 노트북 히트맵: 월별 상위 top_n 에 한 번이라도 든 대여소 × 1~12월 건수"""
+    monthly = rollup(cube, ['대여소', '월'], measure, years=[year]).unstack('월', fill_value=0)
+    monthly = monthly.reindex(columns=range(1, 13), fill_value=0)
+    top_stations = set()
+    for month in monthly.columns:
+        ranked = monthly[month][monthly[month] > 0].sort_values(ascending=False, kind='stable')
+        top_stations.update(ranked.index[:top_n])
+    matrix = monthly.loc[sorted(top_stations)]
+    return matrix.loc[matrix.sum(axis=1).sort_values(ascending=False, kind='stable').index]
+
+
+# ---- 저장 ----
+
+def cube_path(store_dir=None):
+    return os.path.join(store_dir or config.STORE_DIR, CUBE_FILE_NAME)
+
+
+def save_cube(cube, inputs, store_dir=None):
+    """큐브와 입력 파일 해시({파일명: 해시})를 함께 저장"""
+    path = cube_path(store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(cube, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[INPUTS_METADATA_KEY] = json.dumps(inputs, ensure_ascii=False).encode('utf-8')
+    tmp_path = path + '.tmp'
+    pq.write_table(table.replace_schema_metadata(metadata), tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+
+def load_cube(store_dir=None):
+    """저장된 큐브와 입력 파일 해시 (없으면 None, {})"""
+    path = cube_path(store_dir)
+    if not os.path.exists(path):
+        return None, {}
+    table = pq.read_table(path)
+    inputs = json.loads((table.schema.metadata or {}).get(INPUTS_METADATA_KEY, b'{}'))
+    return table.to_pandas(), inputs
+
+
+def changed_years(inputs, saved_inputs):
+    """입력 파일 해시가 달라진(추가/변경/삭제) 파일의 연도"""
+    from ddareungi.loaders import get_year_from_filename
+
+    names = {name for name in set(inputs) | set(saved_inputs) if inputs.get(name) != saved_inputs.get(name)}
+    return sorted({get_year_from_filename(name) for name in names} - {None})
+
+
+def build_cube(data_dir=None, store_dir=None, force=False):
+    """저장된 큐브를 증분 갱신 - 입력 파일이 바뀐 연도만 다시 집계해 나머지 연도 행과 합침
+
+    다시 집계한 연도 목록을 반환한다 (변경이 없으면 빈 목록).
+    """
+    from ddareungi import loaders
+
+    inputs = loaders.foreign_cube_inputs(data_dir)
+    saved_cube, saved_inputs = (None, {}) if force else load_cube(store_dir)
+    if saved_cube is None:
+        saved_cube, saved_inputs = empty_cube(), {}
+        years = sorted({loaders.get_year_from_filename(name) for name in inputs} - {None})
+    else:
+        years = changed_years(inputs, saved_inputs)
+    if not years and saved_inputs == inputs:
+        print('⏭️ 외국인 이용 큐브: 입력 변경 없음')
+        return []
+
+    kept = saved_cube[~saved_cube['연도'].isin(years)]
+    cube = merge_cubes([kept, loaders.load_foreign_cube(data_dir, years=years)])
+    save_cube(cube, inputs, store_dir)
+    print(f'✅ 외국인 이용 큐브: {", ".join(map(str, years))}년 갱신 → {len(cube):,}행 ({len(inputs)}개 파일)')
+    return years
+
+
+def main():
+    parser = argparse.ArgumentParser(description='외국인 따릉이 이용 큐브 생성')
+    parser.add_argument('--data-dir', default=None, help='원본 CSV 폴더 (기본: 저장소 상위 폴더)')
+    parser.add_argument('--store-dir', default=None, help='변환된 데이터셋 폴더')
+    parser.add_argument('--force', action='store_true', help='저장된 큐브를 무시하고 전체 다시 생성')
+    args = parser.parse_args()
+    build_cube(args.data_dir, args.store_dir, force=args.force)
+
+
+if __name__ == '__main__':
+    main()
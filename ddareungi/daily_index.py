@@ -0,0 +1,358 @@
+"""대여소별 일별 누적 건수(prefix sum) 인덱스 - 임의 기간 합계를 배열 두 번 조회로
+
+04 노트북은 6개월(data_files[:6]), 나머지는 연 단위로 비교 기간이 코드에 고정돼 있었다.
+대여소 × 날짜 일별 건수를 날짜 축으로 누적해 두면 [시작일, 종료일] 합계는
+cumulative[:, 종료일 + 1] - cumulative[:, 시작일] 한 번으로 전체 대여소에 대해 계산된다.
+
+- 대여건수/반납건수: 변환된 대여이력 (월별 일 단위 집계를 store/daily 에 저장, 바뀐 월만 다시 집계)
+- 외국인대여건수: 외국인 이용 큐브의 일별 행 (Daily 파일이 있는 연도만, 월 단위 연도는 제외)
+
+대여소 행은 대여소 사전 코드 순서이고, 외국인 큐브에만 있는 대여소번호는 뒤에 붙는다.
+
+    python -m ddareungi.daily_index --data-dir .. --store-dir data_store
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from ddareungi import config
+from ddareungi.cube import load_cube
+from ddareungi.growth import station_numbers
+from ddareungi.ingest import available_months, build_filter, partition_path, rental_dataset
+from ddareungi.od import DEFAULT_BATCH_SIZE, pair_keys, split_pair_keys
+from ddareungi.stations import load_station_dictionary
+from ddareungi.utils import sum_by_key
+
+DAILY_DIR_NAME = 'daily'
+INDEX_FILE_NAME = 'daily_index.npz'
+
+# 측정값 → 표시 이름
+MEASURES = {
+    'rentals': '대여건수',
+    'returns': '반납건수',
+    'foreign_rentals': '외국인대여건수',
+}
+
+# 측정값 → (시각 컬럼, 대여소코드 컬럼) - 대여이력에서 집계하는 항목
+RENTAL_MEASURES = {
+    'rentals': ('대여일시', '대여소코드'),
+    'returns': ('반납일시', '반납소코드'),
+}
+
+
+def daily_counts_path(year, month, store_dir=None):
+    return os.path.join(store_dir or config.STORE_DIR, DAILY_DIR_NAME, f'daily_{year}_{month:02d}.npz')
+
+
+def daily_index_path(store_dir=None):
+    return os.path.join(store_dir or config.STORE_DIR, INDEX_FILE_NAME)
+
+
+def _sum_counts(parts):
+    """(키, 건수) 조각들 → 키별 합계"""
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    keys = np.concatenate([keys for keys, _ in parts])
+    counts = np.concatenate([counts for _, counts in parts])
+    return sum_by_key(keys, counts)
+
+
+def _build_month_counts(task):
+    """한 달 대여이력 → 측정값별 (대여소코드, 월초 기준 일 오프셋, 건수) 저장
+
+    반납은 다음 달로 넘어갈 수 있으므로 일 오프셋이 그 달 일수보다 클 수 있다.
+    """
+    year, month, store_dir = task
+    month_start = np.datetime64(f'{year}-{month:02d}-01', 'D')
+    columns = sorted({col for pair in RENTAL_MEASURES.values() for col in pair})
+    scanner = rental_dataset(store_dir).scanner(columns=columns, filter=build_filter(year, [month]),
+                                                batch_size=DEFAULT_BATCH_SIZE)
+    parts = {measure: [] for measure in RENTAL_MEASURES}
+    for batch in scanner.to_batches():
+        if not batch.num_rows:
+            continue
+        frame = batch.to_pandas()
+        for measure, (time_col, code_col) in RENTAL_MEASURES.items():
+            days = frame[time_col].to_numpy(dtype='datetime64[D]')
+            codes = frame[code_col].to_numpy()
+            valid = ~np.isnat(days) & (codes >= 0)
+            offsets = (days[valid] - month_start).astype(np.int64)
+            codes = codes[valid]
+            keep = offsets >= 0
+            keys, counts = np.unique(pair_keys(codes[keep], offsets[keep]), return_counts=True)
+            parts[measure].append((keys, counts.astype(np.int64)))
+
+    arrays = {}
+    for measure, measure_parts in parts.items():
+        keys, counts = _sum_counts(measure_parts)
+        codes, offsets = split_pair_keys(keys)
+        arrays[f'{measure}_codes'] = codes
+        arrays[f'{measure}_offsets'] = offsets
+        arrays[f'{measure}_counts'] = counts
+
+    out_path = daily_counts_path(year, month, store_dir)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + '.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, out_path)
+    return int(arrays['rentals_counts'].sum())
+
+
+def _foreign_daily_rows(cube):
+    """외국인 큐브 → 일 단위 행의 (대여소번호, 대여소 라벨, 날짜, 대여건수)"""
+    if cube is None or cube.empty:
+        cube = pd.DataFrame({'연도': [], '월': [], '일': [], '대여소': [], '대여건수': []})
+    daily = cube[cube['일'] > 0]
+    dates = pd.to_datetime(pd.DataFrame({'year': daily['연도'], 'month': daily['월'], 'day': daily['일']}))
+    labels = daily['대여소'].astype(str)
+    return (station_numbers(labels).to_numpy(dtype=object), labels.to_numpy(dtype=object),
+            dates.to_numpy(dtype='datetime64[D]'), daily['대여건수'].to_numpy(dtype=np.int64))
+
+
+class DailyIndex:
+    """대여소 × 날짜 누적 건수 배열
+
+    cumulative[measure][i, d] 는 start 부터 (start + d - 1)일까지 대여소 i 건수 합계 (열 0은 0).
+    """
+
+    def __init__(self, start, keys, names, daily):
+        self.start = np.datetime64(start, 'D')
+        self.keys = np.asarray(keys, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+        self.n_days = next(iter(daily.values())).shape[1] if daily else 0
+        self.cumulative = {}
+        self.coverage = {}
+        for measure, counts in daily.items():
+            # 대여소별 누적 합계가 int32 범위면 int32로 (메모리 절반)
+            dtype = np.int32 if counts.sum() < np.iinfo(np.int32).max else np.int64
+            cumulative = np.zeros((counts.shape[0], self.n_days + 1), dtype=dtype)
+            np.cumsum(counts, axis=1, dtype=dtype, out=cumulative[:, 1:])
+            self.cumulative[measure] = cumulative
+            self._set_coverage(measure, counts.sum(axis=0))
+
+    def _set_coverage(self, measure, day_totals):
+        active_days = np.flatnonzero(day_totals)
+        if len(active_days):
+            self.coverage[measure] = (self.date_at(active_days[0]), self.date_at(active_days[-1]))
+
+    @classmethod
+    def from_cumulative(cls, start, keys, names, cumulative):
+        """이미 누적된 배열(메모리 맵 등)을 복사하지 않고 그대로 쓰는 인덱스"""
+        index = cls(start, keys, names, {})
+        index.cumulative = dict(cumulative)
+        index.n_days = next(iter(cumulative.values())).shape[1] - 1 if cumulative else 0
+        for measure, values in index.cumulative.items():
+            index._set_coverage(measure, np.diff(values.sum(axis=0)))
+        return index
+
+    @property
+    def end(self):
+        return self.date_at(self.n_days - 1)
+
+    def date_at(self, offset):
+        return (self.start + np.timedelta64(int(offset), 'D')).astype(object)
+
+    def _bounds(self, start=None, end=None):
+        """[start, end] 날짜 → 누적 배열 열 (시작, 끝+1), 범위 밖은 잘라냄"""
+        first = 0 if start is None else int((np.datetime64(start, 'D') - self.start).astype(np.int64))
+        last = self.n_days - 1 if end is None else int((np.datetime64(end, 'D') - self.start).astype(np.int64))
+        first, last = max(first, 0), min(last, self.n_days - 1)
+        if first > last:
+            return 0, 0
+        return first, last + 1
+
+    def range_counts(self, measure, start=None, end=None):
+        """전체 대여소의 [start, end] 기간 건수 배열"""
+        first, stop = self._bounds(start, end)
+        cumulative = self.cumulative[measure]
+        return cumulative[:, stop].astype(np.int64) - cumulative[:, first]
+
+    def total(self, measure, start=None, end=None):
+        return int(self.range_counts(measure, start, end).sum())
+
+    def covered_range(self, measures, start=None, end=None):
+        """measures 가 모두 데이터를 가진 날짜와 [start, end] 의 겹치는 구간 (없으면 None)"""
+        first = pd.Timestamp(start or self.start.astype(object)).date()
+        last = pd.Timestamp(end or self.end).date()
+        for measure in measures:
+            if measure not in self.coverage:
+                return None
+            first = max(first, self.coverage[measure][0])
+            last = min(last, self.coverage[measure][1])
+        return (first, last) if first <= last else None
+
+    def range_summary(self, start=None, end=None):
+        """기간 내 대여소별 대여/반납/외국인대여 건수와 외국인 비율
+
+        외국인 비율은 대여이력과 외국인 일별 데이터가 모두 있는 날짜만으로 계산한다.
+        """
+        table = pd.DataFrame({'대여소번호': self.keys, '대여소명': self.names})
+        for measure, label in MEASURES.items():
+            if measure in self.cumulative:
+                table[label] = self.range_counts(measure, start, end)
+        table['외국인비율(%)'] = np.nan
+        overlap = self.covered_range(['rentals', 'foreign_rentals'], start, end)
+        if overlap is not None:
+            rentals = self.range_counts('rentals', *overlap)
+            foreign = self.range_counts('foreign_rentals', *overlap)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                table['외국인비율(%)'] = np.where(rentals > 0, foreign / rentals * 100, np.nan)
+        return table
+
+    def ranking(self, measure, start=None, end=None, top_n=10):
+        """기간 내 건수 상위 대여소 (대여소번호, 대여소명, 건수)"""
+        counts = self.range_counts(measure, start, end)
+        order = np.lexsort((np.arange(len(counts)), -counts))[:top_n]
+        order = order[counts[order] > 0]
+        return pd.DataFrame({'대여소번호': self.keys[order], '대여소명': self.names[order],
+                             MEASURES[measure]: counts[order]})
+
+    def save(self, path):
+        """누적 배열 대신 일별 건수를 저장 (불러올 때 다시 누적)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        daily = {measure: np.diff(cumulative, axis=1) for measure, cumulative in self.cumulative.items()}
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, start=np.array(str(self.start)), keys=self.keys.astype(str),
+                 names=np.array(['' if name is None else str(name) for name in self.names]), **daily)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            daily = {measure: data[measure] for measure in MEASURES if measure in data.files}
+            names = [name or None for name in data['names'].tolist()]
+            return cls(str(data['start']), data['keys'].tolist(), names, daily)
+
+
+def build_daily_counts(store_dir=None, force=False, workers=1):
+    """변환된 월별 대여이력마다 일별 건수를 만들어 저장 - 새로 만든 (연도, 월) 목록 반환"""
+    store_dir = store_dir or config.STORE_DIR
+    tasks = []
+    for year, month in available_months(store_dir):
+        out_path = daily_counts_path(year, month, store_dir)
+        source_path = partition_path(year, month, store_dir)
+        if (not force and os.path.exists(out_path)
+                and os.path.getmtime(out_path) >= os.path.getmtime(source_path)):
+            continue
+        tasks.append((year, month, store_dir))
+
+    if workers != 1 and len(tasks) > 1:
+        from ddareungi.parallel import run_per_item
+        outcomes = run_per_item(_build_month_counts, tasks, workers)
+    else:
+        outcomes = []
+        for task in tasks:
+            try:
+                outcomes.append((task, _build_month_counts(task), None))
+            except Exception as e:
+                outcomes.append((task, None, e))
+
+    built = []
+    for (year, month, _), rows, error in outcomes:
+        if error is not None:
+            print(f'❌ {year}년 {month}월 일별 건수 생성 실패: {error}')
+            continue
+        built.append((year, month))
+        print(f'✅ {year}년 {month}월 일별 건수: {rows:,}건')
+    return built
+
+
+def assemble_daily_index(store_dir=None, foreign_cube=None):
+    """월별 일별 건수 + 외국인 큐브 일별 행 → DailyIndex (데이터가 없으면 None)"""
+    store_dir = store_dir or config.STORE_DIR
+    stations = load_station_dictionary(store_dir)
+    month_counts = []
+    for year, month in available_months(store_dir):
+        path = daily_counts_path(year, month, store_dir)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                month_counts.append((np.datetime64(f'{year}-{month:02d}-01', 'D'),
+                                     {name: data[name] for name in data.files}))
+    foreign_keys, foreign_labels, foreign_dates, foreign_counts = _foreign_daily_rows(foreign_cube)
+
+    # 날짜 축: 대여이력/외국인 일별 데이터 전체 범위
+    starts, ends = [], []
+    for month_start, arrays in month_counts:
+        for measure in RENTAL_MEASURES:
+            offsets = arrays[f'{measure}_offsets']
+            if len(offsets):
+                starts.append(month_start + np.timedelta64(int(offsets.min()), 'D'))
+                ends.append(month_start + np.timedelta64(int(offsets.max()), 'D'))
+    if len(foreign_dates):
+        starts.append(foreign_dates.min())
+        ends.append(foreign_dates.max())
+    if not starts:
+        return None
+    start, end = min(starts), max(ends)
+    n_days = int((end - start).astype(np.int64)) + 1
+
+    # 대여소 행: 사전 코드 순서 + 외국인 큐브에만 있는 번호
+    keys = list(stations.keys)
+    names = [stations.name_of(code) for code in range(len(keys))]
+    row_of = {key: code for code, key in enumerate(keys)}
+    for key, label in zip(foreign_keys, foreign_labels):
+        if key not in row_of:
+            row_of[key] = len(keys)
+            keys.append(key)
+            names.append(label)
+
+    daily = {}
+    for measure in RENTAL_MEASURES:
+        counts = np.zeros((len(keys), n_days), dtype=np.int64)
+        for month_start, arrays in month_counts:
+            shift = int((month_start - start).astype(np.int64))
+            np.add.at(counts, (arrays[f'{measure}_codes'], arrays[f'{measure}_offsets'] + shift),
+                      arrays[f'{measure}_counts'])
+        daily[measure] = counts
+    counts = np.zeros((len(keys), n_days), dtype=np.int64)
+    if len(foreign_keys):
+        rows = np.array([row_of[key] for key in foreign_keys], dtype=np.int64)
+        np.add.at(counts, (rows, (foreign_dates - start).astype(np.int64)), foreign_counts)
+    daily['foreign_rentals'] = counts
+    return DailyIndex(start, keys, names, daily)
+
+
+def build_daily_index(data_dir=None, store_dir=None, force=False, workers=1):
+    """바뀐 월의 일별 건수를 다시 만들고 전체 인덱스를 저장 - 새로 만든 (연도, 월) 목록 반환
+
+    외국인 일별 건수는 저장된 큐브(python -m ddareungi.cube)가 있으면 그것을, 없으면 원본 파일을 집계해 쓴다.
+    """
+    store_dir = store_dir or config.STORE_DIR
+    built = build_daily_counts(store_dir, force=force, workers=workers)
+    foreign_cube, _ = load_cube(store_dir)
+    if foreign_cube is None:
+        from ddareungi.loaders import load_foreign_cube
+        foreign_cube = load_foreign_cube(data_dir)
+
+    index = assemble_daily_index(store_dir, foreign_cube)
+    if index is None:
+        print('⏭️ 일별 인덱스를 만들 데이터가 없음')
+        return built
+    index.save(daily_index_path(store_dir))
+    print(f'✅ 일별 인덱스: 대여소 {len(index.keys):,}개 × {index.n_days:,}일 '
+          f'({index.start.astype(object)} ~ {index.end})')
+    return built
+
+
+def load_daily_index(store_dir=None):
+    """저장된 일별 인덱스 (없으면 None)"""
+    path = daily_index_path(store_dir)
+    if not os.path.exists(path):
+        return None
+    return DailyIndex.load(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대여소별 일별 누적 건수 인덱스 생성')
+    parser.add_argument('--data-dir', default=None, help='원본 CSV 폴더 (저장된 외국인 큐브가 없을 때 사용)')
+    parser.add_argument('--store-dir', default=None, help='변환된 데이터셋 폴더')
+    parser.add_argument('--force', action='store_true', help='모든 월의 일별 건수를 다시 생성')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 프로세스 수 (0이면 CPU 코어 수)')
+    args = parser.parse_args()
+    build_daily_index(args.data_dir, args.store_dir, force=args.force, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
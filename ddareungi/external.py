@@ -0,0 +1,388 @@
+"""메모리 한도를 넘는 집계/정렬을 디스크로 나눠 처리 (out-of-core)
+
+12개월 대여이력 전체의 대여소 × 대여소 건수, 자전거별 이동 순서처럼 중간 결과가 메모리에 다 올라가지 않는 계산용.
+memory_budget_mb 를 주지 않으면 config.MEMORY_BUDGET_MB(DDAREUNGI_MEMORY_BUDGET_MB, 기본 0 = 메모리 안에서만)를 쓴다.
+한도는 보관 중인 중간 결과 기준의 대략적인 상한이다.
+
+- SpillingCounter: int64 키별 건수 합계. 한도를 넘으면 키 해시로 나눈 파티션 파일로 내려쓰고,
+  마지막에 파티션마다 따로 합친다 (파티션 하나만 메모리에 올라옴).
+- external_sort: DataFrame 배치를 한도 크기의 정렬된 run 파일로 쓰고 배치 단위로 병합한다.
+  같은 키는 입력 순서를 유지하므로 전체를 한 번에 sort_values(kind='stable') 한 결과와 같다.
+  병합 때도 run 마다 한도 / run 수 만큼만 읽고, run 이 너무 많으면 여러 번에 나눠 병합한다.
+
+    python -m ddareungi.external --rows 4000000 --memory-budget-mb 8
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ddareungi import config
+from ddareungi.utils import sum_by_key
+
+DEFAULT_PARTITIONS = 16
+MERGE_BATCH_ROWS = 200_000
+# 병합 때 run 하나가 읽는 최소 행 수 - 한도 / run 수가 이보다 작으면 여러 번에 나눠 병합
+MIN_MERGE_ROWS = 4_096
+
+# 한도가 없을 때 보류 중인 조각을 합치는 기준 (od.CONSOLIDATE_ROWS 와 같은 역할)
+CONSOLIDATE_BYTES = 64 * 1024 ** 2
+
+# 해시 파티션용 곱셈 상수 (Fibonacci hashing)
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def budget_bytes(memory_budget_mb=None):
+    """메모리 한도 (바이트, 0이면 제한 없음)"""
+    if memory_budget_mb is None:
+        memory_budget_mb = config.MEMORY_BUDGET_MB
+    return int(memory_budget_mb * 1024 ** 2)
+
+
+def _make_spill_dir(spill_dir=None):
+    spill_dir = spill_dir or config.SPILL_DIR
+    os.makedirs(spill_dir, exist_ok=True)
+    return tempfile.mkdtemp(prefix='spill_', dir=spill_dir)
+
+
+class SpillingCounter:
+    """int64 키별 건수 합계 - 메모리 한도를 넘으면 해시 파티션별로 디스크에 내려씀
+
+    result()는 키 오름차순 (키, 건수)로 메모리 안에서 센 결과와 같다.
+    """
+
+    def __init__(self, memory_budget_mb=None, spill_dir=None, partitions=DEFAULT_PARTITIONS):
+        self.budget_bytes = budget_bytes(memory_budget_mb)
+        self.spill_dir = spill_dir
+        self.partitions = partitions
+        self._partition_bits = max(int(np.ceil(np.log2(partitions))), 1)
+        self._keys = np.empty(0, dtype=np.int64)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._pending = []
+        self._pending_bytes = 0
+        self._root = None
+        self.spills = 0
+        self.spilled_bytes = 0
+
+    @property
+    def spilled(self):
+        return self.spills > 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, keys, counts=None):
+        """키 배열(또는 키별 건수) 누적"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(keys) == 0:
+            return
+        if counts is None:
+            keys, counts = np.unique(keys, return_counts=True)
+        counts = np.asarray(counts, dtype=np.int64)
+        self._pending.append((keys, counts))
+        self._pending_bytes += keys.nbytes + counts.nbytes
+
+        held = self._pending_bytes + self._keys.nbytes + self._counts.nbytes
+        if self.budget_bytes and held > self.budget_bytes:
+            self._consolidate()
+            # 합친 뒤에도 한도의 절반을 넘으면 디스크로 (다음 조각이 들어올 자리 확보)
+            if self._keys.nbytes + self._counts.nbytes > self.budget_bytes // 2:
+                self._spill()
+        elif not self.budget_bytes and self._pending_bytes > CONSOLIDATE_BYTES:
+            self._consolidate()
+
+    def _consolidate(self):
+        if not self._pending:
+            return
+        keys = np.concatenate([self._keys] + [keys for keys, _ in self._pending])
+        counts = np.concatenate([self._counts] + [counts for _, counts in self._pending])
+        self._pending = []
+        self._pending_bytes = 0
+        self._keys, self._counts = sum_by_key(keys, counts)
+
+    def _partition_of(self, keys):
+        hashed = keys.astype(np.uint64) * _HASH_MULTIPLIER
+        return (hashed >> np.uint64(64 - self._partition_bits)).astype(np.int64) % self.partitions
+
+    def _partition_files(self, partition):
+        prefix = f'p{partition:04d}_'
+        return sorted(os.path.join(self._root, name) for name in os.listdir(self._root) if name.startswith(prefix))
+
+    def _spill(self):
+        if self._root is None:
+            self._root = _make_spill_dir(self.spill_dir)
+        partition_ids = self._partition_of(self._keys)
+        for partition in range(self.partitions):
+            mask = partition_ids == partition
+            if not mask.any():
+                continue
+            path = os.path.join(self._root, f'p{partition:04d}_{self.spills:06d}.npy')
+            np.save(path, np.stack([self._keys[mask], self._counts[mask]]))
+            self.spilled_bytes += os.path.getsize(path)
+        self.spills += 1
+        self._keys = np.empty(0, dtype=np.int64)
+        self._counts = np.empty(0, dtype=np.int64)
+
+    def iter_partitions(self):
+        """파티션별 (키, 건수) - 파티션 안에서만 키 오름차순, 한 번에 파티션 하나만 메모리에 올림"""
+        self._consolidate()
+        if not self.spilled:
+            yield self._keys, self._counts
+            return
+        if len(self._keys):
+            self._spill()
+        for partition in range(self.partitions):
+            parts = [np.load(path) for path in self._partition_files(partition)]
+            if parts:
+                stacked = np.concatenate(parts, axis=1)
+                yield sum_by_key(stacked[0], stacked[1])
+
+    def result(self):
+        """전체 (키, 건수) 키 오름차순"""
+        parts = list(self.iter_partitions())
+        keys = np.concatenate([keys for keys, _ in parts]) if parts else np.empty(0, dtype=np.int64)
+        counts = np.concatenate([counts for _, counts in parts]) if parts else np.empty(0, dtype=np.int64)
+        order = np.argsort(keys, kind='stable')
+        return keys[order], counts[order]
+
+    def close(self):
+        """내려쓴 파일 삭제"""
+        if self._root is not None:
+            shutil.rmtree(self._root, ignore_errors=True)
+            self._root = None
+
+
+def _frame_bytes(frame):
+    return int(frame.memory_usage(deep=True, index=False).sum())
+
+
+def _less_than(frame, by, bound, or_equal=False):
+    """frame 의 by 컬럼 값이 bound(값 튜플)보다 사전순으로 작은 (or_equal 이면 작거나 같은) 행"""
+    less = np.zeros(len(frame), dtype=bool)
+    equal = np.ones(len(frame), dtype=bool)
+    for col, value in zip(by, bound):
+        values = frame[col]
+        less |= equal & (values < value).to_numpy()
+        equal &= (values == value).to_numpy()
+    return less | equal if or_equal else less
+
+
+class _Run:
+    """정렬된 run 파일을 배치 단위로 읽는 버퍼 - 버퍼가 비었을 때만 다음 배치를 읽으므로 배치 하나를 넘지 않음"""
+
+    def __init__(self, path, batch_rows, schema):
+        self._batches = pq.ParquetFile(path).iter_batches(batch_size=batch_rows)
+        self._schema = schema
+        self.buffer = None
+        self.exhausted = False
+
+    def refill(self):
+        """버퍼가 비었으면 다음 배치로 채움 (더 없으면 exhausted)"""
+        while not self.exhausted and (self.buffer is None or self.buffer.empty):
+            try:
+                batch = next(self._batches)
+            except StopIteration:
+                self.exhausted = True
+                return
+            # Parquet 은 초 단위 일시를 ms 로 저장하므로 입력 스키마로 되돌림 (메모리 안 정렬 결과와 같은 형)
+            self.buffer = pa.Table.from_batches([batch]).cast(self._schema).to_pandas()
+
+
+def _write_run(frame, by, root, index):
+    frame = frame.sort_values(by, kind='stable', ignore_index=True)
+    path = os.path.join(root, f'run_{index:06d}.parquet')
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), path)
+    return path
+
+
+def _merge_runs(runs, by, batch_rows, schema):
+    """정렬된 run 파일들을 병합해 배치 단위로 반환 (같은 키는 run 순서 = 입력 순서 유지)
+
+    열린 run 마다 버퍼 마지막 키의 최솟값(bound)보다 작은 키는 모든 run 의 버퍼에 이미 다 있으므로 내보낸다.
+    bound 와 같은 키는 버퍼가 bound 에서 끝나는 첫 run 까지만 내보내고, 뒤 run 의 같은 키는 보류한다.
+    그 run 은 버퍼가 비어 다음 배치를 읽으므로 매 단계 진행하고, 버퍼는 run 마다 batch_rows 행을 넘지 않는다.
+    """
+    readers = [_Run(path, batch_rows, schema) for path in runs]
+    while True:
+        for reader in readers:
+            reader.refill()
+        lasts = [None if reader.exhausted else tuple(reader.buffer.iloc[-1][by]) for reader in readers]
+        if all(last is None for last in lasts):
+            rest = [reader.buffer for reader in readers if reader.buffer is not None and len(reader.buffer)]
+            if rest:
+                yield pd.concat(rest, ignore_index=True).sort_values(by, kind='stable', ignore_index=True)
+            return
+
+        bound = min(last for last in lasts if last is not None)
+        blocking = lasts.index(bound)
+        ready = []
+        for i, reader in enumerate(readers):
+            if reader.buffer is None or reader.buffer.empty:
+                continue
+            mask = _less_than(reader.buffer, by, bound, or_equal=i <= blocking)
+            if mask.any():
+                ready.append(reader.buffer[mask])
+                reader.buffer = reader.buffer[~mask].reset_index(drop=True)
+        yield pd.concat(ready, ignore_index=True).sort_values(by, kind='stable', ignore_index=True)
+
+
+def _merge_passes(runs, by, limit, row_bytes, schema, root):
+    """run 수가 많아 run 마다 MIN_MERGE_ROWS 행도 읽을 수 없으면 앞에서부터 묶어 병합한 run 으로 바꿈"""
+    fan_in = max(limit // (4 * row_bytes * MIN_MERGE_ROWS), 2)
+    merge_pass = 0
+    while len(runs) > fan_in:
+        read_rows = _merge_read_rows(limit, fan_in, row_bytes)
+        merged = []
+        for start in range(0, len(runs), fan_in):
+            group = runs[start:start + fan_in]
+            if len(group) == 1:
+                merged.extend(group)
+                continue
+            path = os.path.join(root, f'merge_{merge_pass:03d}_{len(merged):06d}.parquet')
+            with pq.ParquetWriter(path, schema) as writer:
+                for batch in _merge_runs(group, by, read_rows, schema):
+                    writer.write_table(pa.Table.from_pandas(batch, schema=schema, preserve_index=False))
+            for old in group:
+                os.remove(old)
+            merged.append(path)
+        runs = merged
+        merge_pass += 1
+    return runs
+
+
+def _merge_read_rows(limit, n_runs, row_bytes, batch_rows=MERGE_BATCH_ROWS):
+    """병합 때 run 하나가 한 번에 읽는 행 수
+
+    한도의 1/4 을 run 버퍼가 쓰고, 나머지는 내보낼 배치(버퍼 합계 이하)를 합친 표와 정렬한 표가 쓴다.
+    """
+    return int(min(max(limit // (4 * n_runs * row_bytes), 1), batch_rows))
+
+
+def external_sort(batches, by, memory_budget_mb=None, spill_dir=None, batch_rows=MERGE_BATCH_ROWS):
+    """DataFrame 배치 이터레이터를 by 컬럼 순으로 정렬해 배치 단위로 반환 (안정 정렬)
+
+    입력이 한도 안이면 메모리에서 한 번에 정렬한다. 정렬 컬럼은 < 비교가 되는 형(숫자, 일시, 문자열)이고
+    결측값이 없어야 한다 (결측 행은 호출하는 쪽에서 미리 제외).
+    한도를 넘어 run 파일로 나눈 경우에도 컬럼 형과 값은 메모리 안에서 정렬한 결과와 같다 (배치 경계만 다름).
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    limit = budget_bytes(memory_budget_mb)
+    root = None
+    runs = []
+    schema = None
+    row_bytes = 1
+    pending, pending_bytes, pending_rows = [], 0, 0
+    try:
+        for batch in batches:
+            if len(batch) == 0:
+                continue
+            if batch[by].isna().to_numpy().any():
+                raise ValueError(f'정렬 컬럼에 결측값이 있음: {by}')
+            pending.append(batch)
+            pending_bytes += _frame_bytes(batch)
+            pending_rows += len(batch)
+            # run 을 쓸 때 보류 배치 + 합친 표 + 정렬한 표가 같이 있으므로 한도의 1/3 에서 내려씀
+            if limit and pending_bytes > limit // 3:
+                root = root or _make_spill_dir(spill_dir)
+                frame = pd.concat(pending, ignore_index=True)
+                if schema is None:
+                    schema = pa.Schema.from_pandas(frame, preserve_index=False)
+                row_bytes = max(row_bytes, -(-pending_bytes // pending_rows))
+                runs.append(_write_run(frame, by, root, len(runs)))
+                pending, pending_bytes, pending_rows = [], 0, 0
+
+        if not runs:
+            if pending:
+                frame = pd.concat(pending, ignore_index=True).sort_values(by, kind='stable', ignore_index=True)
+                for start in range(0, len(frame), batch_rows):
+                    yield frame.iloc[start:start + batch_rows].reset_index(drop=True)
+            return
+        if pending:
+            row_bytes = max(row_bytes, -(-pending_bytes // pending_rows))
+            runs.append(_write_run(pd.concat(pending, ignore_index=True), by, root, len(runs)))
+            pending = []
+
+        runs = _merge_passes(runs, by, limit, row_bytes, schema, root)
+        yield from _merge_runs(runs, by, _merge_read_rows(limit, len(runs), row_bytes, batch_rows), schema)
+    finally:
+        if root is not None:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+# ---- 검증: 메모리 안 정렬과 디스크 정렬 결과 비교 ----
+
+def sample_trip_batches(rows, seed=0, batch_rows=100_000):
+    """재배치 정렬과 같은 모양의 합성 이용 배치 (자전거번호 문자열, 분 단위 대여일시라 같은 키가 많음)"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2024-01-01T00:00:00', 's')
+    for offset in range(0, rows, batch_rows):
+        n = min(batch_rows, rows - offset)
+        bikes = np.char.add('SPB-', np.char.zfill(rng.integers(0, 40_000, n).astype(str), 5))
+        yield pd.DataFrame({
+            '자전거번호': pd.Series(bikes, dtype=str),
+            '대여일시': start + rng.integers(0, 30 * 24 * 60, n) * np.timedelta64(60, 's'),
+            '대여소코드': rng.integers(0, 3_000, n).astype(np.int32),
+            '반납소코드': rng.integers(0, 3_000, n).astype(np.int32),
+        })
+
+
+def sorted_digest(batches, by, memory_budget_mb=None, spill_dir=None):
+    """external_sort 결과의 (행 수, 컬럼 형, 내용 해시, 최대 메모리 바이트) - 결과를 쌓아 두지 않고 배치마다 해시"""
+    digest = hashlib.blake2b(digest_size=16)
+    rows, dtypes = 0, None
+    tracemalloc.start()
+    try:
+        for batch in external_sort(batches, by, memory_budget_mb, spill_dir):
+            dtypes = dtypes or {col: str(dtype) for col, dtype in batch.dtypes.items()}
+            # 해시 중간 배열이 최대 메모리를 키우지 않도록 잘라서 해시
+            for start in range(0, len(batch), 10_000):
+                digest.update(pd.util.hash_pandas_object(batch.iloc[start:start + 10_000], index=False)
+                              .to_numpy().tobytes())
+            rows += len(batch)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return rows, dtypes, digest.hexdigest(), peak
+
+
+def check_external_sort(rows, memory_budget_mb, seed=0, spill_dir=None, by=('자전거번호', '대여일시')):
+    """같은 합성 입력을 메모리 안(한도 0)과 한도 memory_budget_mb 로 정렬해 비교 - (같은지, 메모리 안, 한도)"""
+    by = list(by)
+    in_memory = sorted_digest(sample_trip_batches(rows, seed), by, 0, spill_dir)
+    spilled = sorted_digest(sample_trip_batches(rows, seed), by, memory_budget_mb, spill_dir)
+    return in_memory[:3] == spilled[:3], in_memory, spilled
+
+
+def main():
+    parser = argparse.ArgumentParser(description='external_sort 디스크 정렬이 메모리 안 정렬과 같은 결과인지 확인')
+    parser.add_argument('--rows', type=int, default=4_000_000, help='합성 이용 행 수')
+    parser.add_argument('--memory-budget-mb', type=float, default=8, help='디스크 정렬 메모리 한도')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spill-dir', default=None, help='run 파일 폴더 (기본: DDAREUNGI_SPILL_DIR)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    same, in_memory, spilled = check_external_sort(args.rows, args.memory_budget_mb, args.seed, args.spill_dir)
+    mark = '✅' if same else '❌'
+    print(f'{mark} {args.rows:,}행 정렬 - 메모리 안 / 한도 {args.memory_budget_mb:g}MB 결과 '
+          f'{"같음" if same else "다름"} ({time.perf_counter() - start:.1f}초)')
+    print(f'   최대 메모리(tracemalloc): 메모리 안 {in_memory[3] / 1024 ** 2:.1f}MB, '
+          f'한도 {args.memory_budget_mb:g}MB {spilled[3] / 1024 ** 2:.1f}MB')
+    if not same:
+        print(f'   메모리 안: {in_memory[:3]}\n   한도: {spilled[:3]}')
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
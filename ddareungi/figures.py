@@ -0,0 +1,101 @@
+"""matplotlib 차트 렌더링 결과 캐시
+
+Streamlit은 위젯을 건드릴 때마다 페이지 전체를 다시 실행하므로, 같은 차트를 매번 새로 그리지 않도록
+(차트 이름, 데이터 해시) → PNG/SVG 바이트를 크기 제한 LRU로 보관한다.
+그린 figure는 이미지로 저장한 즉시 닫아 pyplot 전역 목록에 쌓이지 않게 한다.
+"""
+import hashlib
+import io
+import pickle
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# st.pyplot 기본 저장 옵션과 같게 맞춰 화면 모양이 바뀌지 않도록 함
+SAVEFIG_OPTIONS = {'bbox_inches': 'tight', 'dpi': 200}
+
+# pyplot 전역 상태(현재 figure, rcParams)는 스레드 안전하지 않으므로 그리기/저장은 한 번에 하나씩
+PYPLOT_LOCK = threading.Lock()
+
+
+def data_key(data):
+    """차트 입력 데이터 해시 (dict/list/tuple/숫자/문자열/pandas 객체)"""
+    return hashlib.blake2b(pickle.dumps(data, protocol=4), digest_size=16).hexdigest()
+
+
+def render_figure(fig, image_format='png'):
+    """figure → 이미지 바이트 (저장 후 figure는 닫힘)"""
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format=image_format, **SAVEFIG_OPTIONS)
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+class FigureCache:
+    """크기 제한 LRU 차트 이미지 캐시 (여러 세션이 공유하므로 잠금 사용)"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # 렌더링 중인 키 → 끝나면 set 되는 Event (같은 차트를 여러 세션이 동시에 그리지 않도록)
+        self._rendering = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._images)
+
+    @property
+    def total_bytes(self):
+        return self._bytes
+
+    def get_or_render(self, chart_id, data, draw, image_format='png'):
+        """캐시에 있으면 저장된 이미지, 없으면 draw()로 figure를 만들어 렌더링 후 저장
+
+        같은 키를 다른 스레드가 그리는 중이면 끝날 때까지 기다렸다가 그 결과를 쓴다.
+        """
+        key = (chart_id, image_format, data_key(data))
+        while True:
+            with self._lock:
+                image = self._images.get(key)
+                if image is not None:
+                    self._images.move_to_end(key)
+                    self.hits += 1
+                    return image
+                rendering = self._rendering.get(key)
+                if rendering is None:
+                    self._rendering[key] = threading.Event()
+                    break
+            # 먼저 그리던 스레드가 실패하면 다시 돌아와 직접 그림
+            rendering.wait()
+
+        try:
+            with PYPLOT_LOCK:
+                image = render_figure(draw(), image_format)
+            with self._lock:
+                self.misses += 1
+                self._images[key] = image
+                self._bytes += len(image)
+                self._evict()
+        finally:
+            with self._lock:
+                self._rendering.pop(key).set()
+        return image
+
+    def _evict(self):
+        # 가장 오래 안 쓴 이미지부터 제거 (방금 넣은 하나는 크기와 관계없이 유지)
+        while self._bytes > self.max_bytes and len(self._images) > 1:
+            _, image = self._images.popitem(last=False)
+            self._bytes -= len(image)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._bytes = 0
@@ -0,0 +1,130 @@
+"""대여소 × 기간 이용량 배열과 기간 간 증감 계산
+
+03 노트북 급성장 분석은 두 해의 대여소별 합계를 대여소 이름 문자열로 outer merge 했기 때문에
+이름이 바뀐 대여소(예: '502. 뚝섬유원지역 …' → '502. 자양(뚝섬한강공원)역 …')가 '신규 등장'으로 잡혔다.
+여기서는 라벨 앞의 대여소번호를 공용 대여소 사전(StationDictionary) 코드로 묶어 (대여소 × 기간) 배열 하나를 만들고,
+어떤 두 기간(연도/분기/월)이든 배열 열 두 개의 차이로 증가량/증가율/신규·소멸을 한 번에 계산한다.
+"""
+import numpy as np
+import pandas as pd
+
+from ddareungi.stations import canonical_station_key, load_station_dictionary
+
+GRANULARITIES = ('연도', '분기', '월')
+
+# '207. 여의나루역 1번출구 앞', '3010.홍대입구역 3번출구' → 앞의 번호
+STATION_NUMBER_PATTERN = r'^\s*(\d+)\s*\.'
+
+STATUS_NEW = '신규'
+STATUS_GONE = '소멸'
+
+
+def station_numbers(labels):
+    """대여소 라벨 → 정규 대여소번호 문자열 (번호가 없는 라벨은 라벨 그대로)"""
+    labels = pd.Series(labels, dtype=object).astype(str).str.strip()
+    numbers = labels.str.extract(STATION_NUMBER_PATTERN, expand=False)
+    return numbers.map(canonical_station_key, na_action='ignore').fillna(labels)
+
+
+def period_labels(cube, granularity='연도'):
+    """큐브 행 → 기간 라벨 정수 (연도 2024, 분기 20242, 월 202405)"""
+    years = cube['연도'].to_numpy(dtype=np.int64)
+    if granularity == '연도':
+        return years
+    months = cube['월'].to_numpy(dtype=np.int64)
+    if granularity == '분기':
+        return years * 10 + (months - 1) // 3 + 1
+    if granularity == '월':
+        return years * 100 + months
+    raise ValueError(f'알 수 없는 기간 단위: {granularity}')
+
+
+def format_period(label, granularity='연도'):
+    label = int(label)
+    if granularity == '분기':
+        return f'{label // 10}년 {label % 10}분기'
+    if granularity == '월':
+        return f'{label // 100}년 {label % 100}월'
+    return f'{label}년'
+
+
+class StationPeriodMatrix:
+    """(대여소 코드 × 기간) 이용량 배열
+
+    행 번호 i는 대여소 사전 코드 - keys[i]: 정규 대여소번호, names[i]: 가장 최근 기간의 라벨,
+    periods[j]: 기간 라벨(오름차순)
+    """
+
+    def __init__(self, keys, names, periods, values, granularity='연도'):
+        self.keys = np.asarray(keys, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+        self.periods = np.asarray(periods, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.int64)
+        self.granularity = granularity
+
+    @classmethod
+    def from_cube(cls, cube, granularity='연도', measure='대여건수', stations=None):
+        """외국인 이용 큐브 → 배열 (라벨 → 번호 변환은 대여소 종류 수만큼만 수행)
+
+        stations 를 주지 않으면 저장된 대여소 사전을 쓴다. 사전에 없는 번호는 이 사전 객체에만 추가된다.
+        """
+        if stations is None:
+            stations = load_station_dictionary()
+        cube = cube[cube['대여소'].notna()]
+        labels = cube['대여소'].astype('category')
+        label_codes = stations.encode(station_numbers(labels.cat.categories).to_numpy(dtype=object))
+        codes = label_codes[labels.cat.codes.to_numpy()]
+        if (codes < 0).any():
+            # 번호도 이름도 비어 있는 라벨은 묶을 대여소가 없으므로 제외
+            cube, labels, codes = cube[codes >= 0], labels[codes >= 0], codes[codes >= 0]
+        row_periods = period_labels(cube, granularity)
+        periods, period_idx = np.unique(row_periods, return_inverse=True)
+
+        keys = list(stations.keys)
+        n_stations, n_periods = len(keys), len(periods)
+        flat = codes.astype(np.int64) * n_periods + period_idx
+        values = np.bincount(flat, weights=cube[measure].to_numpy(dtype=np.float64),
+                             minlength=n_stations * n_periods).astype(np.int64).reshape(n_stations, n_periods)
+
+        # 대여소명은 가장 최근 기간(같은 기간이면 나중 행)의 라벨
+        latest = pd.DataFrame({'code': codes, 'period': row_periods, 'label': labels.astype(str).to_numpy()})
+        latest = latest.sort_values('period', kind='stable').drop_duplicates('code', keep='last')
+        names = np.empty(n_stations, dtype=object)
+        names[latest['code'].to_numpy()] = latest['label'].to_numpy()
+        return cls(keys, names, periods, values, granularity)
+
+    def column(self, period):
+        idx = np.searchsorted(self.periods, int(period))
+        if idx >= len(self.periods) or self.periods[idx] != int(period):
+            raise KeyError(f'기간 없음: {period}')
+        return idx
+
+    def change(self, before, after):
+        """두 기간 사이 전체 대여소 증감 - (이전, 이후, 증가량, 증가율(%), 상태) 배열"""
+        previous = self.values[:, self.column(before)]
+        current = self.values[:, self.column(after)]
+        diff = current - previous
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(previous > 0, diff / previous * 100, np.nan)
+        status = np.select([(previous == 0) & (current > 0), (previous > 0) & (current == 0),
+                            diff > 0, diff < 0], [STATUS_NEW, STATUS_GONE, '증가', '감소'], '유지')
+        return previous, current, diff, rate, status
+
+    def growth_table(self, before, after):
+        """두 기간 비교표 (증가량 내림차순, 두 기간 모두 0인 대여소 제외)"""
+        previous, current, diff, rate, status = self.change(before, after)
+        table = pd.DataFrame({
+            '대여소번호': self.keys, '대여소명': self.names,
+            '이전': previous, '이후': current, '증가량': diff, '증가율(%)': rate, '상태': status
+        })
+        table = table[(previous > 0) | (current > 0)]
+        return table.sort_values(['증가량', '대여소명'], ascending=[False, True], kind='stable', ignore_index=True)
+
+    def growth_top(self, before, after, top_n=10, min_count=10):
+        """급성장 상위 [(대여소명, 이전, 이후, 증가율 문자열)] - 03 페이지 growth_data 형태"""
+        table = self.growth_table(before, after)
+        table = table[(table['이후'] >= min_count) & (table['증가량'] > 0)].head(top_n)
+        return [(name, int(previous), int(current),
+                 '신규 등장' if status == STATUS_NEW else f'+{rate:.1f}%')
+                for name, previous, current, rate, status
+                in table[['대여소명', '이전', '이후', '증가율(%)', '상태']].itertuples(index=False)]
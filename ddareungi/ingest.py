@@ -0,0 +1,396 @@
+"""월별 대여이력 CSV → 연/월 파티션 Parquet 변환
+
+cp949 원본을 매번 다시 디코딩하지 않도록 파일별로 한 번만 변환해 두고,
+분석 코드는 read_rentals()로 필요한 컬럼만 읽는다 (compact=True 이면 축약 스키마).
+
+    python -m ddareungi.ingest --data-dir .. --store-dir data_store
+"""
+import argparse
+import glob
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from ddareungi import config
+from ddareungi.stations import load_station_dictionary, save_station_dictionary
+from ddareungi.utils import file_fingerprint
+
+RENTALS_DIR_NAME = 'rentals'
+MANIFEST_NAME = '_manifest.json'
+DEFAULT_CHUNKSIZE = 500_000
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 스키마가 바뀌면 올려서 기존 변환 결과를 다시 만들게 한다
+SCHEMA_VERSION = 2
+
+# 원본 컬럼명(공백 제거 기준) → 표준 컬럼명
+# 연도별로 '대여 대여소번호' / '대여소번호' 처럼 표기가 조금씩 다르다
+COLUMN_MAP = {
+    '자전거번호': '자전거번호',
+    '대여일시': '대여일시',
+    '대여대여소번호': '대여소번호',
+    '대여소번호': '대여소번호',
+    '대여대여소명': '대여소명',
+    '대여소명': '대여소명',
+    '대여거치대': '대여거치대',
+    '반납일시': '반납일시',
+    '반납대여소번호': '반납소번호',
+    '반납소번호': '반납소번호',
+    '반납대여소명': '반납소명',
+    '반납소명': '반납소명',
+    '반납거치대': '반납거치대',
+    '이용시간(분)': '이용시간(분)',
+    '이용시간': '이용시간(분)',
+    '이용거리(M)': '이용거리(M)',
+    '이용거리': '이용거리(M)',
+    '생년': '생년',
+    '성별': '성별',
+    '이용자종류': '이용자종류',
+    '대여대여소ID': '대여소ID',
+    '반납대여소ID': '반납소ID',
+    '자전거구분': '자전거구분',
+}
+
+# 고정 스키마 - 대여소번호는 원본 문자열 그대로, 대여소코드는 공용 대여소 사전의 정수 코드
+RENTAL_SCHEMA = pa.schema([
+    ('자전거번호', pa.string()),
+    ('대여일시', pa.timestamp('s')),
+    ('대여소번호', pa.string()),
+    ('대여소명', pa.string()),
+    ('대여거치대', pa.string()),
+    ('반납일시', pa.timestamp('s')),
+    ('반납소번호', pa.string()),
+    ('반납소명', pa.string()),
+    ('반납거치대', pa.string()),
+    ('이용시간(분)', pa.float64()),
+    ('이용거리(M)', pa.float64()),
+    ('생년', pa.string()),
+    ('성별', pa.string()),
+    ('이용자종류', pa.string()),
+    ('대여소ID', pa.string()),
+    ('반납소ID', pa.string()),
+    ('자전거구분', pa.string()),
+    ('대여소코드', pa.int32()),
+    ('반납소코드', pa.int32()),
+])
+
+# 분석용 축약 스키마 (read_rentals(compact=True))
+# 대여소번호/대여소명/대여소ID 문자열은 대여소코드(사전으로 되돌릴 수 있음)로 대신하고 거치대 번호는 뺀다.
+# 대여소코드는 대여소가 32,767개 미만이면 int16, 반복되는 문자열은 category.
+COMPACT_DTYPES = {
+    '자전거번호': 'category',
+    '대여일시': 'datetime64[s]',
+    '반납일시': 'datetime64[s]',
+    '대여소코드': 'station_code',
+    '반납소코드': 'station_code',
+    '이용시간(분)': 'float32',
+    '이용거리(M)': 'float32',
+    '생년': 'Int16',
+    '성별': 'category',
+    '이용자종류': 'category',
+    '자전거구분': 'category',
+}
+
+DATETIME_COLUMNS = {'대여일시', '반납일시'}
+FLOAT_COLUMNS = {'이용시간(분)', '이용거리(M)'}
+CODE_COLUMNS = {'대여소코드': ('대여소번호', '대여소명'), '반납소코드': ('반납소번호', '반납소명')}
+
+
+def get_year_month_from_filename(filename):
+    """파일명 끝의 _YYMM.csv 에서 (연도, 월) 추출, 형식이 다르면 None"""
+    match = re.search(r'_(\d{2})(\d{2})\.csv$', os.path.basename(filename))
+    if not match:
+        return None
+    year, month = 2000 + int(match.group(1)), int(match.group(2))
+    if not 1 <= month <= 12:
+        return None
+    return year, month
+
+
+def rentals_dir(store_dir=None):
+    return os.path.join(store_dir or config.STORE_DIR, RENTALS_DIR_NAME)
+
+
+def partition_path(year, month, store_dir=None):
+    return os.path.join(rentals_dir(store_dir), f'year={year}', f'month={month}', 'part-0.parquet')
+
+
+def manifest_path(store_dir=None):
+    return os.path.join(store_dir or config.STORE_DIR, MANIFEST_NAME)
+
+
+def load_manifest(store_dir=None):
+    path = manifest_path(store_dir)
+    if not os.path.exists(path):
+        return {'rentals': {}}
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest.setdefault('rentals', {})
+    return manifest
+
+
+def save_manifest(manifest, store_dir=None):
+    store_dir = store_dir or config.STORE_DIR
+    os.makedirs(store_dir, exist_ok=True)
+    path = manifest_path(store_dir)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _parse_datetime(values):
+    parsed = pd.to_datetime(values, format=DATETIME_FORMAT, errors='coerce')
+    # 형식이 다른 연도 파일 대비 - 전부 실패하면 자동 추론으로 재시도
+    if parsed.isna().all() and values.notna().any():
+        parsed = pd.to_datetime(values, errors='coerce')
+    return parsed
+
+
+def standardize_chunk(chunk, stations):
+    """원본 CSV 청크를 RENTAL_SCHEMA 형태의 Arrow 테이블로 변환"""
+    chunk = chunk.rename(columns=lambda col: COLUMN_MAP.get(str(col).replace(' ', ''), col))
+    columns = {}
+    for field in RENTAL_SCHEMA:
+        name = field.name
+        if name in CODE_COLUMNS:
+            id_col, name_col = CODE_COLUMNS[name]
+            columns[name] = stations.encode(columns[id_col], names=columns[name_col])
+            continue
+        if name in chunk.columns:
+            values = chunk[name]
+        else:
+            values = pd.Series(None, index=chunk.index, dtype=object)
+
+        if name in DATETIME_COLUMNS:
+            columns[name] = _parse_datetime(values)
+        elif name in FLOAT_COLUMNS:
+            columns[name] = pd.to_numeric(values, errors='coerce').astype('float64')
+        else:
+            columns[name] = values.astype(object).str.strip()
+    return pa.Table.from_pandas(pd.DataFrame(columns), schema=RENTAL_SCHEMA, preserve_index=False)
+
+
+def convert_rental_file(file_path, year, month, stations, store_dir=None, chunksize=DEFAULT_CHUNKSIZE):
+    """CSV 한 개를 파티션 Parquet로 변환하고 행 수를 반환
+
+    새로 등장한 대여소는 stations 사전에 추가된다.
+    """
+    out_path = partition_path(year, month, store_dir)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + '.tmp'
+
+    rows = 0
+    writer = pq.ParquetWriter(tmp_path, RENTAL_SCHEMA, compression='zstd')
+    try:
+        reader = pd.read_csv(file_path, encoding=config.RENTAL_HISTORY_ENCODING,
+                             dtype=str, chunksize=chunksize)
+        for chunk in reader:
+            table = standardize_chunk(chunk, stations)
+            writer.write_table(table)
+            rows += table.num_rows
+    except Exception:
+        writer.close()
+        os.remove(tmp_path)
+        raise
+    writer.close()
+    os.replace(tmp_path, out_path)
+    return rows
+
+
+def find_rental_files(data_dir=None):
+    return sorted(glob.glob(os.path.join(data_dir or config.DATA_DIR, config.RENTAL_HISTORY_GLOB)))
+
+
+def pending_rental_files(manifest, data_dir=None, store_dir=None, force=False):
+    """변환이 필요한 (파일경로, 연도, 월, os.stat 결과) 목록 - 파일명 순
+
+    크기/수정시각이 그대로면 바로 건너뛰고, 수정시각만 바뀐 파일(복사/touch 등)은
+    내용 해시를 비교해 같으면 manifest의 수정시각만 고친다.
+    """
+    pending = []
+    for file_path in find_rental_files(data_dir):
+        name = os.path.basename(file_path)
+        year_month = get_year_month_from_filename(name)
+        if year_month is None:
+            print(f'⚠️ {name} - 파일명에서 연월을 찾을 수 없음')
+            continue
+        year, month = year_month
+
+        stat = os.stat(file_path)
+        entry = manifest['rentals'].get(name)
+        if (not force and entry
+                and entry.get('schema') == SCHEMA_VERSION
+                and entry['size'] == stat.st_size
+                and os.path.exists(partition_path(year, month, store_dir))):
+            if entry['mtime'] == stat.st_mtime:
+                print(f'⏭️ {name} - 변경 없음')
+                continue
+            if entry.get('checksum') == file_fingerprint(file_path):
+                entry['mtime'] = stat.st_mtime
+                print(f'⏭️ {name} - 내용 변경 없음 (수정시각만 바뀜)')
+                continue
+        pending.append((file_path, year, month, stat))
+    return pending
+
+
+def record_converted(manifest, file_path, year, month, stat, rows):
+    manifest['rentals'][os.path.basename(file_path)] = {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'year': year,
+        'month': month,
+        'rows': rows,
+        'checksum': file_fingerprint(file_path),
+        'schema': SCHEMA_VERSION,
+    }
+
+
+def ingest_rental_history(data_dir=None, store_dir=None, force=False, chunksize=DEFAULT_CHUNKSIZE,
+                          workers=1):
+    """대여이력 CSV 중 새 파일/내용이 바뀐 파일만 변환
+
+    workers 가 1보다 크면 파일 단위로 프로세스 풀에서 변환한다 (결과는 순차 실행과 동일).
+    변환한 파일 경로 목록을 반환한다.
+    """
+    store_dir = store_dir or config.STORE_DIR
+    manifest = load_manifest(store_dir)
+    stations = load_station_dictionary(store_dir)
+    pending = pending_rental_files(manifest, data_dir, store_dir, force)
+
+    if workers != 1 and len(pending) > 1:
+        from ddareungi.parallel import convert_rental_files_parallel
+        outcomes = convert_rental_files_parallel(pending, stations, store_dir, chunksize, workers)
+    else:
+        outcomes = _convert_sequential(pending, stations, store_dir, chunksize)
+
+    converted = []
+    for (file_path, year, month, stat), rows, error in outcomes:
+        name = os.path.basename(file_path)
+        if error is not None:
+            print(f'❌ {name} - 변환 실패: {error}')
+            continue
+        record_converted(manifest, file_path, year, month, stat, rows)
+        save_station_dictionary(stations, store_dir)
+        save_manifest(manifest, store_dir)
+        converted.append(file_path)
+        print(f'✅ {name} → {year}년 {month}월 {rows:,}건')
+
+    if not converted and manifest['rentals']:
+        # 수정시각만 갱신된 항목 저장
+        save_manifest(manifest, store_dir)
+    return converted
+
+
+def _convert_sequential(pending, stations, store_dir, chunksize):
+    for task in pending:
+        file_path, year, month, _ = task
+        try:
+            rows = convert_rental_file(file_path, year, month, stations, store_dir, chunksize)
+        except Exception as e:
+            yield task, None, e
+            continue
+        yield task, rows, None
+
+
+def store_available(store_dir=None):
+    """변환된 대여이력 데이터셋이 있는지 확인"""
+    return bool(load_manifest(store_dir)['rentals']) and os.path.isdir(rentals_dir(store_dir))
+
+
+def available_months(store_dir=None):
+    """변환된 (연도, 월) 목록"""
+    entries = load_manifest(store_dir)['rentals'].values()
+    return sorted({(entry['year'], entry['month']) for entry in entries})
+
+
+def rental_dataset(store_dir=None):
+    return ds.dataset(rentals_dir(store_dir), format='parquet', partitioning='hive')
+
+
+def build_filter(year=None, months=None, user_types=None):
+    """연도/월(파티션)과 이용자종류(예: ('외국인',)) 조건 - 모두 None 이면 None"""
+    expr = None
+    if year is not None:
+        expr = ds.field('year') == year
+    if months is not None:
+        month_expr = ds.field('month').isin(list(months))
+        expr = month_expr if expr is None else expr & month_expr
+    if user_types is not None:
+        user_expr = ds.field('이용자종류').isin(list(user_types))
+        expr = user_expr if expr is None else expr & user_expr
+    return expr
+
+
+def station_code_dtype(n_stations):
+    return np.int16 if n_stations < np.iinfo(np.int16).max else np.int32
+
+
+def to_compact_frame(table, n_stations):
+    """Arrow 테이블 → COMPACT_DTYPES 적용 DataFrame
+
+    변환은 Arrow에서 먼저 해서(사전 인코딩, 형 변환) 문자열 object 배열이나 넓은 임시 배열을 만들지 않는다.
+    """
+    columns = {}
+    for name in table.column_names:
+        column = table.column(name)
+        dtype = COMPACT_DTYPES.get(name)
+        if dtype == 'category':
+            if not pa.types.is_dictionary(column.type):
+                column = column.dictionary_encode()
+            columns[name] = column.unify_dictionaries().to_pandas()
+        elif dtype == 'station_code':
+            columns[name] = column.to_numpy().astype(station_code_dtype(n_stations))
+        elif dtype == 'Int16':
+            # 숫자가 아닌 값(빈 값, '\N' 등)은 결측
+            digits = pc.if_else(pc.utf8_is_digit(column), column, None)
+            columns[name] = digits.cast(pa.int16()).to_pandas(types_mapper={pa.int16(): pd.Int16Dtype()}.get)
+        elif dtype == 'datetime64[s]':
+            columns[name] = pc.cast(column, pa.timestamp('s'), safe=False).to_pandas()
+        elif dtype == 'float32':
+            columns[name] = column.cast(pa.float32()).to_pandas()
+        else:
+            columns[name] = column.to_pandas()
+    return pd.DataFrame(columns)
+
+
+def read_rentals(columns=None, year=None, months=None, store_dir=None, compact=False):
+    """변환된 대여이력에서 필요한 컬럼/기간만 읽어 DataFrame으로 반환
+
+    compact=True 이면 COMPACT_DTYPES 로 줄여서 읽는다 (columns 기본값도 그 컬럼 목록).
+    이때는 컬럼을 하나씩 읽어 바로 변환하므로 최대 메모리가 Arrow 테이블 전체 + 결과가 아니라
+    컬럼 하나 + 결과 수준이다.
+    """
+    dataset = rental_dataset(store_dir)
+    expr = build_filter(year, months)
+    if not compact:
+        return dataset.to_table(columns=columns, filter=expr).to_pandas()
+
+    n_stations = len(load_station_dictionary(store_dir))
+    frames = [to_compact_frame(dataset.to_table(columns=[name], filter=expr), n_stations)
+              for name in (columns or list(COMPACT_DTYPES))]
+    return pd.concat(frames, axis=1, copy=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대여이력 CSV를 Parquet 데이터셋으로 변환')
+    parser.add_argument('--data-dir', default=None, help='원본 CSV 폴더 (기본: 저장소 상위 폴더)')
+    parser.add_argument('--store-dir', default=None, help='변환 결과 저장 폴더')
+    parser.add_argument('--force', action='store_true', help='변경 여부와 상관없이 모두 다시 변환')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 프로세스 수 (0이면 CPU 코어 수)')
+    args = parser.parse_args()
+
+    converted = ingest_rental_history(args.data_dir, args.store_dir, force=args.force,
+                                      workers=args.workers)
+    print(f'\n변환 완료: {len(converted)}개 파일')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""원본 통계 CSV → 대시보드 집계 (01~03, 05 노트북 로직)
+
+파일 하나마다 부분 집계(summarize_file)를 만들고, 페이지에 필요한 구조(load_*)는
+부분 집계를 합쳐서 만든다. 외국인 Monthly/Daily 파일은 이용 큐브(cube 모듈) 조각이 부분 집계다.
+streamlit_app.py는 부분 집계를 파일 내용 해시로 캐시하므로
+새 연도 파일이 추가되거나 한 파일이 바뀌면 그 파일만 다시 계산된다.
+load_* 결과는 snapshot 모듈의 같은 이름 딕셔너리와 형태가 같고, 원본 파일이 없는 항목은 빠진다.
+"""
+import glob
+import os
+import re
+
+import pandas as pd
+
+from ddareungi import config
+from ddareungi.cube import combine_cube, cube_from_daily, cube_from_monthly, rollup, weekday_years
+from ddareungi.growth import StationPeriodMatrix
+from ddareungi.utils import file_fingerprint
+
+WEEKDAY_NAMES = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일']
+
+# 월별/요일별 그래프에 표시할 최근 연도 수 (01 노트북은 2022~2024)
+RECENT_YEARS = 3
+
+# 장기 추세에서 따로 그리는 국가 (05 노트북)
+TREND_COUNTRIES = ['일본', '중국', '미국']
+
+# 대륙별 분석에서 제외하는 행
+CONTINENT_EXCLUDE = ('소계', '기타')
+
+# KOSIS 표의 연도 전체 열 이름 (파일마다 '계' 또는 '소계')
+KOSIS_TOTAL_LABELS = ('계', '소계')
+
+
+def get_year_from_filename(file_path):
+    """파일명의 'YY년' → 4자리 연도 (없으면 None)"""
+    match = re.search(r'(\d{2})년', os.path.basename(file_path))
+    return 2000 + int(match.group(1)) if match else None
+
+
+def find_data_files(pattern, data_dir=None):
+    """패턴에 맞는 원본 파일의 (연도, 경로) 목록 (경로 순)"""
+    paths = sorted(glob.glob(os.path.join(data_dir or config.DATA_DIR, pattern)))
+    return [(get_year_from_filename(path), path) for path in paths]
+
+
+def find_data_file(pattern, data_dir=None):
+    """패턴에 맞는 파일이 여러 개면 이름순 마지막 파일 (없으면 None)"""
+    paths = sorted(glob.glob(os.path.join(data_dir or config.DATA_DIR, pattern)))
+    return paths[-1] if paths else None
+
+
+# ---- 파일 단위 부분 집계 ----
+
+def summarize_general(file_path):
+    """General_YY년상/하반기_이용정보_월별 → 이용건수 합계"""
+    df = pd.read_csv(file_path, encoding='utf-8-sig')
+    return int(df['이용건수'].sum())
+
+
+def read_kosis_table(file_path):
+    """KOSIS 내려받기 CSV의 합계 행 → 숫자 표 (행: 대륙별(2), 열: (연도, 항목))
+
+    첫 데이터 행들이 열 설명(계/남자/여자, 연령대 등)이라 마지막 설명 행을 항목명으로 쓴다.
+    """
+    raw = pd.read_csv(file_path, encoding='utf-8-sig', dtype=str)
+    raw.columns = [str(col).replace('\ufeff', '') for col in raw.columns]
+    first_col = raw.iloc[:, 0].str.strip()
+
+    header_rows = raw[first_col == raw.columns[0]]
+    labels = (header_rows.iloc[-1, 2:].str.strip().tolist() if len(header_rows)
+              else [KOSIS_TOTAL_LABELS[0]] * (raw.shape[1] - 2))
+    years = [col.split('.')[0] for col in raw.columns[2:]]
+
+    body = raw[first_col == '합계']
+    values = body.iloc[:, 2:].apply(
+        lambda col: pd.to_numeric(col.str.replace(',', '').str.strip(), errors='coerce'))
+    values = values.fillna(0).astype('int64')
+    values.index = body.iloc[:, 1].str.strip().tolist()
+    values.columns = pd.MultiIndex.from_arrays([years, labels], names=['연도', '항목'])
+    return values
+
+
+SUMMARIZERS = {
+    'foreign_monthly': cube_from_monthly,
+    'foreign_daily': cube_from_daily,
+    'general': summarize_general,
+    'kosis': read_kosis_table,
+}
+
+
+def summarize_file(kind, file_path):
+    """파일 종류별 부분 집계 (streamlit_app 에서는 캐시된 버전으로 바꿔 넘긴다)"""
+    return SUMMARIZERS[kind](file_path)
+
+
+def _yearly_summaries(kind, pattern, data_dir, summarize, years=None):
+    summaries = {}
+    for year, path in find_data_files(pattern, data_dir):
+        if year is not None and (years is None or year in years):
+            summaries[year] = summarize(kind, path)
+    return dict(sorted(summaries.items()))
+
+
+# ---- 페이지 단위 구조 ----
+
+def load_foreign_cube(data_dir=None, summarize=summarize_file, years=None):
+    """외국인 이용 큐브 (일별 파일이 있는 연도는 일 단위, 없으면 월 단위)
+
+    years 를 주면 그 연도 파일만 집계한다 (증분 갱신용).
+    """
+    monthly = _yearly_summaries('foreign_monthly', config.FOREIGN_MONTHLY_GLOB, data_dir, summarize, years)
+    daily = _yearly_summaries('foreign_daily', config.FOREIGN_DAILY_GLOB, data_dir, summarize, years)
+    return combine_cube(monthly, daily)
+
+
+def foreign_cube_inputs(data_dir=None):
+    """큐브 입력 파일 {파일명: 내용 해시}"""
+    paths = [path for pattern in (config.FOREIGN_MONTHLY_GLOB, config.FOREIGN_DAILY_GLOB)
+             for _, path in find_data_files(pattern, data_dir)]
+    return {os.path.basename(path): file_fingerprint(path) for path in paths}
+
+
+def load_foreign_usage(data_dir=None, summarize=summarize_file, cube=None):
+    """01 페이지: annual_data / monthly_data / weekday_years / weekday_data"""
+    if cube is None:
+        cube = load_foreign_cube(data_dir, summarize)
+    if cube.empty:
+        return {}
+
+    annual = rollup(cube, ['연도'])
+    years = annual.index.tolist()
+    monthly = rollup(cube, ['연도', '월'], years=years[-RECENT_YEARS:])
+    result = {
+        'annual_data': {year: int(count) for year, count in annual.items()},
+        'monthly_data': {year: [int(monthly.get((year, month), 0)) for month in range(1, 13)]
+                         for year in years[-RECENT_YEARS:]}
+    }
+
+    recent_weekday_years = weekday_years(cube)[-RECENT_YEARS:]
+    if recent_weekday_years:
+        weekday = rollup(cube, ['요일', '연도'], years=recent_weekday_years, weekdays=range(7))
+        result['weekday_years'] = recent_weekday_years
+        result['weekday_data'] = {name: [int(weekday.get((day, year), 0)) for year in recent_weekday_years]
+                                  for day, name in enumerate(WEEKDAY_NAMES)}
+    return result
+
+
+def load_foreign_ratio(data_dir=None, summarize=summarize_file, cube=None):
+    """02 페이지: 외국인/일반 이용건수가 모두 있는 연도의 비중"""
+    if cube is None:
+        cube = load_foreign_cube(data_dir, summarize)
+    foreign = rollup(cube, ['연도']).to_dict() if not cube.empty else {}
+    general = {}
+    for year, path in find_data_files(config.GENERAL_MONTHLY_GLOB, data_dir):
+        if year is not None:
+            general[year] = general.get(year, 0) + summarize('general', path)
+
+    years = sorted(set(foreign) & set(general))
+    if not years:
+        return {}
+    foreign_counts = [int(foreign[year]) for year in years]
+    general_counts = [general[year] for year in years]
+    total_counts = [f + g for f, g in zip(foreign_counts, general_counts)]
+    return {
+        'years': years,
+        'foreign_counts': foreign_counts,
+        'general_counts': general_counts,
+        'total_counts': total_counts,
+        'foreign_ratios': [round(f / t * 100, 3) for f, t in zip(foreign_counts, total_counts)]
+    }
+
+
+def _top_stations(counts, top_n):
+    return counts.sort_values(ascending=False, kind='stable').head(top_n)
+
+
+def load_station_pattern(data_dir=None, summarize=summarize_file, cube=None, top_n=5):
+    """03 페이지: 연도별 TOP5, 최근 두 해 급성장 TOP10, 최근 연도 대여/반납 TOP5"""
+    if cube is None:
+        cube = load_foreign_cube(data_dir, summarize)
+    if cube.empty:
+        return {}
+
+    rental = rollup(cube, ['연도', '대여소'])
+    years = rental.index.get_level_values(0).unique().tolist()
+
+    def station_counts(year, counts=rental):
+        return counts.xs(year, level='연도')
+
+    latest_year = years[-1]
+    latest_returns = rollup(cube, ['대여소'], '반납건수', years=[latest_year])
+    result = {
+        'yearly_rental_top5': {
+            year: [(station, int(count))
+                   for station, count in _top_stations(station_counts(year), top_n).items()]
+            for year in years
+        },
+        'latest_year': latest_year,
+        'rental_top5_latest': _top_stations(station_counts(latest_year), top_n).index.tolist(),
+        'return_top5_latest': _top_stations(latest_returns, top_n).index.tolist()
+    }
+    if len(years) >= 2:
+        # 급성장은 대여소번호 기준 (이름만 바뀐 대여소가 신규로 잡히지 않도록)
+        result['growth_years'] = (years[-2], latest_year)
+        result['growth_data'] = StationPeriodMatrix.from_cube(cube, '연도').growth_top(years[-2], latest_year)
+    return result
+
+
+def _age_group(label):
+    """연령대 열 이름 → 05 노트북 연령대 (0-20세 ... 61세 이상), 연령대가 아니면 None
+
+    2023년은 '21~30세', 2024년은 '20~29세' 처럼 구간이 달라 시작 나이의 십의 자리로 묶는다.
+    """
+    match = re.match(r'(\d+)', label)
+    if not match:
+        return None
+    decade = int(match.group(1)) // 10
+    if decade <= 1:
+        return '0-20세'
+    if decade >= 6:
+        return '61세 이상'
+    return f'{decade * 10 + 1}-{decade * 10 + 10}세'
+
+
+def _year_total(table, row, year):
+    """연도 전체 열(계/소계) 값"""
+    for label in KOSIS_TOTAL_LABELS:
+        if (year, label) in table.columns:
+            return int(table.loc[row, (year, label)])
+    return int(table.loc[row, year].iloc[0])
+
+
+def load_tourist(data_dir=None, summarize=summarize_file):
+    """05 페이지: 연령대/대륙별/성별/장기 추세"""
+    result = {}
+
+    age_path = find_data_file(config.TOURIST_AGE_GLOB, data_dir)
+    if age_path:
+        table = summarize('kosis', age_path)
+        years = list(dict.fromkeys(table.columns.get_level_values(0)))
+        age_data = {}
+        for year in years:
+            groups = {}
+            for label, count in table.loc['소계', year].items():
+                group = _age_group(label)
+                if group:
+                    groups[group] = groups.get(group, 0) + int(count)
+            age_data[year] = groups
+        result['age_data'] = age_data
+        result['continent_data'] = {
+            continent: {year: _year_total(table, continent, year) for year in years}
+            for continent in table.index if continent not in CONTINENT_EXCLUDE
+        }
+
+    gender_path = find_data_file(config.TOURIST_GENDER_GLOB, data_dir)
+    if gender_path:
+        table = summarize('kosis', gender_path)
+        gender_data = {}
+        for year in dict.fromkeys(table.columns.get_level_values(0)):
+            total = _year_total(table, '소계', year)
+            male = int(table.loc['소계', (year, '남자')])
+            female = int(table.loc['소계', (year, '여자')])
+            gender_data[year] = {'전체': total, '남자': male, '여자': female,
+                                 '여성비율': round(female / total * 100, 1) if total else 0.0}
+        result['gender_data'] = gender_data
+
+    continent_path = find_data_file(config.TOURIST_CONTINENT_GLOB, data_dir)
+    if continent_path:
+        table = summarize('kosis', continent_path)
+        years = list(dict.fromkeys(table.columns.get_level_values(0)))
+        result['years_long'] = years
+        result['total_visitors_long'] = [_year_total(table, '소계', year) for year in years]
+        result['countries_data'] = {
+            country: [_year_total(table, country, year) for year in years]
+            for country in TREND_COUNTRIES if country in table.index
+        }
+    return result
@@ -0,0 +1,184 @@
+"""대여소 → 대여소 이동 확률(마르코프 전이) 모델과 관광 코스 조회
+
+OD 행렬의 각 행을 그 대여소 대여건수로 나누면 P[i, j] = i에서 빌린 자전거가 j에 반납될 확률인
+희소 전이 행렬이 된다. 반납한 곳에서 다시 빌려 이어 탄다고 보면
+- 다음 대여소 k개: 행 하나의 확률 상위 k
+- n단계 코스: 전이 확률 곱이 가장 큰 n단계 경로 (빔 탐색)
+이고, 필요한 행만 보므로 대여소 수천 개에서도 다음 대여소는 1ms, 코스는 수 ms 안에 계산된다.
+
+코스는 이동 경로를 보는 것이라 같은 대여소 반납(순환 이용)과 이미 지난 대여소는 빼고 고른다.
+반납소 결측 열은 전이에서 빼되 확률의 분모(대여건수)에는 남긴다.
+
+    python -m ddareungi.markov --store-dir data_store --year 2024 --station 207 --steps 3
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from ddareungi import config
+from ddareungi.ingest import build_filter, rental_dataset
+from ddareungi.od import DEFAULT_BATCH_SIZE, OD_COLUMNS, aggregate_od
+from ddareungi.od_matrix import load_od_matrix, od_counts_to_matrix
+from ddareungi.stations import MISSING_CODE, load_station_dictionary
+
+DEFAULT_NEXT_K = 5
+DEFAULT_STEPS = 3
+DEFAULT_BEAM_WIDTH = 20
+
+
+def user_od_matrix(year=None, months=None, user_types=None, store_dir=None):
+    """이용자종류를 골라 변환된 대여이력에서 바로 만든 OD 행렬 (user_types 가 None 이면 저장된 월별 행렬 합계)"""
+    if user_types is None:
+        return load_od_matrix(year, months, store_dir)
+    n_stations = len(load_station_dictionary(store_dir))
+    scanner = rental_dataset(store_dir).scanner(columns=OD_COLUMNS, filter=build_filter(year, months, user_types),
+                                                batch_size=DEFAULT_BATCH_SIZE)
+    batches = (batch.to_pandas() for batch in scanner.to_batches() if batch.num_rows)
+    return od_counts_to_matrix(aggregate_od(batches), n_stations)
+
+
+class TransitionModel:
+    """행 정규화한 대여소 × 대여소 희소 전이 행렬
+
+    probabilities: 같은 대여소 반납 포함 P[i, j], moving: 같은 대여소 반납을 뺀 뒤 다시 정규화한 이동 확률
+    """
+
+    def __init__(self, matrix, stations):
+        self.stations = stations
+        matrix = sparse.csr_matrix(matrix)
+        # 분모는 반납소 결측을 포함한 대여건수
+        self.rentals = np.asarray(matrix.sum(axis=1)).ravel()
+        self.counts = matrix[:, :matrix.shape[0]].astype(np.int64)
+        self.counts.sort_indices()
+        counts = self.counts.astype(np.float64)
+        self.probabilities = self._normalize(counts, self.rentals)
+
+        moving = counts.tolil()
+        moving.setdiag(0)
+        moving = moving.tocsr()
+        moving.eliminate_zeros()
+        self.moving = self._normalize(moving, np.asarray(moving.sum(axis=1)).ravel())
+
+    @staticmethod
+    def _normalize(counts, totals):
+        with np.errstate(divide='ignore'):
+            scale = np.where(totals > 0, 1.0 / totals, 0.0)
+        normalized = sparse.diags(scale) @ counts
+        normalized = sparse.csr_matrix(normalized)
+        normalized.sort_indices()
+        return normalized
+
+    @classmethod
+    def from_store(cls, year=None, months=None, user_types=None, store_dir=None):
+        return cls(user_od_matrix(year, months, user_types, store_dir), load_station_dictionary(store_dir))
+
+    @property
+    def n_stations(self):
+        return self.probabilities.shape[0]
+
+    def _row(self, matrix, code):
+        start, end = matrix.indptr[code], matrix.indptr[code + 1]
+        return matrix.indices[start:end], matrix.data[start:end]
+
+    def _label(self, code):
+        return self.stations.name_of(code) or ''
+
+    def next_stations(self, code, k=DEFAULT_NEXT_K, include_same=True):
+        """code 에서 빌렸을 때 반납 확률 상위 k개 대여소 (대여소번호, 대여소명, 확률(%), 건수)"""
+        if code == MISSING_CODE or code >= self.n_stations:
+            return pd.DataFrame(columns=['대여소번호', '대여소명', '확률(%)', '건수'])
+        matrix = self.probabilities if include_same else self.moving
+        codes, probabilities = self._row(matrix, code)
+        order = np.lexsort((codes, -probabilities))[:k]
+        codes = codes[order]
+        count_codes, count_values = self._row(self.counts, code)
+        counts = count_values[np.searchsorted(count_codes, codes)]
+        return pd.DataFrame({
+            '대여소번호': self.stations.keys_for(codes),
+            '대여소명': [self._label(c) for c in codes],
+            '확률(%)': (probabilities[order] * 100).round(2),
+            '건수': counts.astype(np.int64),
+        })
+
+    def course(self, code, steps=DEFAULT_STEPS, beam_width=DEFAULT_BEAM_WIDTH):
+        """code 에서 출발해 이동 확률 곱이 가장 큰 steps 단계 코스 (지난 대여소 재방문 없음)
+
+        단계마다 경로 beam_width 개만 남기는 빔 탐색이라 정확한 최적 경로가 아닐 수 있다.
+        반환: 단계(0 = 출발), 대여소번호, 대여소명, 전이확률(%), 누적확률(%) - 더 갈 곳이 없으면 그 단계에서 끝난다.
+        """
+        if code == MISSING_CODE or code >= self.n_stations:
+            return pd.DataFrame(columns=['단계', '대여소번호', '대여소명', '전이확률(%)', '누적확률(%)'])
+        # 경로 beam 개를 배열로: paths (경로 수, 단계 + 1), log_p (경로 수,), step_probabilities (경로 수, 단계)
+        paths = np.array([[code]], dtype=np.int64)
+        log_p = np.zeros(1)
+        step_probabilities = np.ones((1, 0))
+        indptr, indices, data = self.moving.indptr, self.moving.indices, self.moving.data
+        for _ in range(steps):
+            # 모든 경로의 마지막 대여소 행을 한 번에 펼침
+            starts, ends = indptr[paths[:, -1]], indptr[paths[:, -1] + 1]
+            lengths = ends - starts
+            beam_ids = np.repeat(np.arange(len(paths)), lengths)
+            positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            codes, probabilities = indices[positions].astype(np.int64), data[positions]
+            scores = log_p[beam_ids] + np.log(probabilities)
+            # 재방문으로 빠질 수 있는 후보는 경로 길이 합만큼이므로, 그만큼 더 남긴 상위 점수 후보만 검사
+            n_keep = beam_width + paths.size
+            if len(scores) > n_keep:
+                cutoff = np.partition(scores, len(scores) - n_keep)[len(scores) - n_keep]
+                keep = np.flatnonzero(scores >= cutoff)
+            else:
+                keep = np.arange(len(scores))
+            keep = keep[~(paths[beam_ids[keep]] == codes[keep, None]).any(axis=1)]
+            if not len(keep):
+                break
+            # 점수 순 (같은 점수는 앞 경로, 작은 코드 순)
+            chosen = keep[np.lexsort((codes[keep], beam_ids[keep], -scores[keep]))][:beam_width]
+            beam_ids, codes = beam_ids[chosen], codes[chosen]
+            paths = np.column_stack([paths[beam_ids], codes])
+            log_p = scores[chosen]
+            step_probabilities = np.column_stack([step_probabilities[beam_ids], probabilities[chosen]])
+
+        path = paths[0]
+        step_probabilities = np.concatenate([[1.0], step_probabilities[0]])
+        return pd.DataFrame({
+            '단계': np.arange(len(path)),
+            '대여소번호': self.stations.keys_for(path),
+            '대여소명': [self._label(c) for c in path],
+            '전이확률(%)': (step_probabilities * 100).round(2),
+            '누적확률(%)': np.cumprod(step_probabilities) * 100,
+        })
+
+    def same_station_ratio(self, code):
+        """code 에서 빌린 자전거가 같은 대여소로 돌아올 확률 (%)"""
+        if code == MISSING_CODE or code >= self.n_stations:
+            return 0.0
+        return float(self.probabilities[code, code]) * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대여소 이동 확률 모델로 다음 대여소/코스 조회')
+    parser.add_argument('--store-dir', default=None, help='변환된 데이터셋 폴더')
+    parser.add_argument('--year', type=int, default=None, help='연도 (기본: 전체)')
+    parser.add_argument('--months', type=int, nargs='*', default=None, help='월 (기본: 전체)')
+    parser.add_argument('--user-types', nargs='*', default=None, help="이용자종류 (예: 외국인, 기본: 전체)")
+    parser.add_argument('--station', required=True, help='출발 대여소번호')
+    parser.add_argument('-k', type=int, default=DEFAULT_NEXT_K, help='다음 대여소 수')
+    parser.add_argument('--steps', type=int, default=DEFAULT_STEPS, help='코스 단계 수')
+    args = parser.parse_args()
+
+    model = TransitionModel.from_store(args.year, args.months, args.user_types, args.store_dir)
+    code = model.stations.code_of(args.station)
+    if code == MISSING_CODE:
+        print(f'⏭️ {args.station}번 대여소가 대여소 사전에 없음 ({args.store_dir or config.STORE_DIR})')
+        return
+    print(f'✅ 전이 행렬: 대여소 {model.n_stations:,}개, 0이 아닌 전이 {model.probabilities.nnz:,}개')
+    print(f'\n{args.station}번 대여 후 반납 상위 {args.k}개 (같은 대여소 반납 {model.same_station_ratio(code):.1f}%)')
+    print(model.next_stations(code, args.k).to_string(index=False))
+    print(f'\n{args.station}번 출발 {args.steps}단계 예상 코스')
+    print(model.course(code, args.steps).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""대여이력 적재 단계별 메모리 사용량 보고서
+
+같은 표본 행을 단계별로 읽어 행당 바이트를 재고, manifest 행 수로 한 달/1년 분량을 추정한다.
+
+- CSV (object 문자열): 노트북처럼 원본 CSV 전 컬럼을 문자열 object로 읽은 경우
+- Arrow 테이블: 변환된 Parquet을 읽은 직후
+- Parquet 전체 스키마: table.to_pandas() (RENTAL_SCHEMA 전 컬럼)
+- 축약 스키마: read_rentals(compact=True) (ingest.COMPACT_DTYPES)
+
+    python -m ddareungi.memory --year 2024 --month 1 --data-dir .. --store-dir data_store
+"""
+import argparse
+
+import pandas as pd
+
+from ddareungi import config
+from ddareungi.ingest import (COMPACT_DTYPES, build_filter, find_rental_files, get_year_month_from_filename,
+                              load_manifest, rental_dataset, to_compact_frame)
+from ddareungi.stations import load_station_dictionary
+
+SAMPLE_ROWS = 200_000
+DEFAULT_BUDGET_GB = 16
+
+
+def frame_bytes(df):
+    """DataFrame 실제 메모리 (문자열 내용 포함)"""
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def column_bytes_per_row(df):
+    return (df.memory_usage(deep=True, index=False) / max(len(df), 1)).round(1)
+
+
+def rows_per_period(year, store_dir=None):
+    """manifest 기준 (선택 연도 월평균 행 수, 1년 추정 행 수)"""
+    entries = [entry for entry in load_manifest(store_dir)['rentals'].values() if entry['year'] == year]
+    if not entries:
+        return 0, 0
+    monthly = sum(entry['rows'] for entry in entries) / len(entries)
+    return int(monthly), int(monthly * 12)
+
+
+def _csv_sample(year, month, data_dir, rows):
+    for path in find_rental_files(data_dir):
+        if get_year_month_from_filename(path) == (year, month):
+            return pd.read_csv(path, encoding=config.RENTAL_HISTORY_ENCODING, dtype=object, nrows=rows)
+    return None
+
+
+def sample_stages(year, month, data_dir=None, store_dir=None, rows=SAMPLE_ROWS):
+    """단계 이름 → (표본 DataFrame 또는 None, 표본 바이트, 표본 행 수)"""
+    stages = {}
+    csv_sample = _csv_sample(year, month, data_dir, rows)
+    if csv_sample is not None:
+        stages['CSV (object 문자열)'] = (csv_sample, frame_bytes(csv_sample), len(csv_sample))
+
+    dataset = rental_dataset(store_dir)
+    table = dataset.head(rows, filter=build_filter(year, [month]))
+    if table.num_rows:
+        stages['Arrow 테이블'] = (None, table.nbytes, table.num_rows)
+        full = table.to_pandas()
+        stages['Parquet 전체 스키마'] = (full, frame_bytes(full), len(full))
+        compact = to_compact_frame(table.select(list(COMPACT_DTYPES)), len(load_station_dictionary(store_dir)))
+        stages['축약 스키마'] = (compact, frame_bytes(compact), len(compact))
+    return stages
+
+
+def memory_report(year, month, data_dir=None, store_dir=None, rows=SAMPLE_ROWS, budget_gb=DEFAULT_BUDGET_GB):
+    """단계별 행당 바이트와 월/연 메모리 추정 DataFrame"""
+    stages = sample_stages(year, month, data_dir, store_dir, rows)
+    month_rows, year_rows = rows_per_period(year, store_dir)
+    report = []
+    for stage, (_, sample_bytes, sample_rows) in stages.items():
+        per_row = sample_bytes / max(sample_rows, 1)
+        report.append({
+            '단계': stage,
+            '행당 바이트': round(per_row, 1),
+            '월 추정(MB)': round(per_row * month_rows / 1024 ** 2, 1),
+            '연 추정(GB)': round(per_row * year_rows / 1024 ** 3, 2),
+            f'{budget_gb}GB 이내': per_row * year_rows / 1024 ** 3 <= budget_gb,
+        })
+    return pd.DataFrame(report), stages, (month_rows, year_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대여이력 적재 단계별 메모리 사용량 보고서')
+    parser.add_argument('--year', type=int, required=True, help='표본 연도')
+    parser.add_argument('--month', type=int, required=True, help='표본 월')
+    parser.add_argument('--data-dir', default=None, help='원본 CSV 폴더 (CSV 단계 측정용)')
+    parser.add_argument('--store-dir', default=None, help='변환된 데이터셋 폴더')
+    parser.add_argument('--rows', type=int, default=SAMPLE_ROWS, help='표본 행 수')
+    parser.add_argument('--budget-gb', type=float, default=DEFAULT_BUDGET_GB, help='1년 분량 메모리 목표 (GB)')
+    parser.add_argument('--columns', action='store_true', help='컬럼별 행당 바이트도 출력')
+    args = parser.parse_args()
+
+    report, stages, (month_rows, year_rows) = memory_report(args.year, args.month, args.data_dir, args.store_dir,
+                                                            args.rows, args.budget_gb)
+    if report.empty:
+        print(f'⏭️ {args.year}년 {args.month}월 대여이력이 없음')
+        return
+    print(f'{args.year}년 월평균 {month_rows:,}행, 1년 추정 {year_rows:,}행\n')
+    print(report.to_string(index=False))
+    if args.columns:
+        for stage, (frame, _, _) in stages.items():
+            if frame is not None:
+                print(f'\n[{stage}] 컬럼별 행당 바이트')
+                print(column_bytes_per_row(frame).to_string())
+
+    compact_gb = report.loc[report['단계'] == '축약 스키마', '연 추정(GB)']
+    if len(compact_gb):
+        status = '✅' if compact_gb.iloc[0] <= args.budget_gb else '⚠️'
+        print(f'\n{status} 축약 스키마 1년 분량 {compact_gb.iloc[0]:.2f}GB (목표 {args.budget_gb:g}GB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""대여소 × 시간대 순유입 (반납 - 대여)
+
+대여이력 월마다 대여소 × (평일/주말) × 시각(0~23시) 대여/반납 건수를 bincount 한 번으로 세어 저장한다.
+여러 달을 합친 뒤 요일 유형별 일수로 나누면 하루 평균 시간대별 순유입이 되고,
+0시부터 누적하면 하루 동안 대여소 자전거 수가 얼마나 늘고 주는지(누적 재고 변화)가 된다.
+
+- 순유입 > 0: 반납이 많아 자전거가 쌓이는 시간대, < 0: 대여가 많아 비는 시간대
+- 반납은 반납일시 기준 시각/요일로 센다 (자정을 넘긴 반납은 다음 날 시각).
+- 공휴일은 따로 구분하지 않는다 (토/일만 주말).
+
+    python -m ddareungi.netflow --store-dir data_store --year 2024
+"""
+import argparse
+import calendar
+import os
+
+import numpy as np
+import pandas as pd
+
+from ddareungi import config
+from ddareungi.ingest import available_months, build_filter, partition_path, rental_dataset
+from ddareungi.stations import load_station_dictionary
+
+NETFLOW_DIR_NAME = 'netflow'
+DEFAULT_BATCH_SIZE = 1_000_000
+HOURS = 24
+DAY_TYPES = ('평일', '주말')
+
+# 측정 → (시각 컬럼, 대여소코드 컬럼)
+FLOW_MEASURES = {
+    'rentals': ('대여일시', '대여소코드'),
+    'returns': ('반납일시', '반납소코드'),
+}
+
+
+def netflow_path(year, month, store_dir=None):
+    return os.path.join(store_dir or config.STORE_DIR, NETFLOW_DIR_NAME, f'netflow_{year}_{month:02d}.npz')
+
+
+def month_day_counts(year, month):
+    """그 달의 (평일 수, 주말 수)"""
+    n_days = calendar.monthrange(year, month)[1]
+    weekdays = int(np.busday_count(f'{year}-{month:02d}-01', np.datetime64(f'{year}-{month:02d}-01') + n_days))
+    return np.array([weekdays, n_days - weekdays], dtype=np.int64)
+
+
+def hourly_counts(times, codes, n_stations):
+    """시각(datetime64 Series)/대여소코드 → (대여소 수, 요일 유형, 시각) 건수 배열 (결측 제외)"""
+    valid = times.notna().to_numpy() & (codes >= 0)
+    times = times[valid]
+    day_types = (times.dt.dayofweek.to_numpy() >= 5).astype(np.int64)
+    slots = day_types * HOURS + times.dt.hour.to_numpy(dtype=np.int64)
+    keys = codes[valid].astype(np.int64) * (len(DAY_TYPES) * HOURS) + slots
+    counts = np.bincount(keys, minlength=n_stations * len(DAY_TYPES) * HOURS)
+    return counts.reshape(n_stations, len(DAY_TYPES), HOURS)
+
+
+def _build_month_flow(task):
+    year, month, store_dir, n_stations = task
+    columns = sorted({col for pair in FLOW_MEASURES.values() for col in pair})
+    scanner = rental_dataset(store_dir).scanner(columns=columns, filter=build_filter(year, [month]),
+                                                batch_size=DEFAULT_BATCH_SIZE)
+    arrays = {measure: np.zeros((n_stations, len(DAY_TYPES), HOURS), dtype=np.int64) for measure in FLOW_MEASURES}
+    for batch in scanner.to_batches():
+        if not batch.num_rows:
+            continue
+        frame = batch.to_pandas()
+        for measure, (time_col, code_col) in FLOW_MEASURES.items():
+            arrays[measure] += hourly_counts(frame[time_col], frame[code_col].to_numpy(), n_stations)
+
+    out_path = netflow_path(year, month, store_dir)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + '.tmp.npz'
+    np.savez(tmp_path, days=month_day_counts(year, month),
+             **{measure: counts.astype(np.int32) for measure, counts in arrays.items()})
+    os.replace(tmp_path, out_path)
+    return int(arrays['rentals'].sum())
+
+
+def build_netflow(store_dir=None, force=False, workers=1):
+    """변환된 월별 대여이력마다 대여소 × 시간대 건수를 만들어 저장 - 새로 만든 (연도, 월) 목록 반환"""
+    store_dir = store_dir or config.STORE_DIR
+    n_stations = len(load_station_dictionary(store_dir))
+    tasks = []
+    for year, month in available_months(store_dir):
+        out_path = netflow_path(year, month, store_dir)
+        source_path = partition_path(year, month, store_dir)
+        if (not force and os.path.exists(out_path)
+                and os.path.getmtime(out_path) >= os.path.getmtime(source_path)):
+            continue
+        tasks.append((year, month, store_dir, n_stations))
+
+    if workers != 1 and len(tasks) > 1:
+        from ddareungi.parallel import run_per_item
+        outcomes = run_per_item(_build_month_flow, tasks, workers)
+    else:
+        outcomes = []
+        for task in tasks:
+            try:
+                outcomes.append((task, _build_month_flow(task), None))
+            except Exception as e:
+                outcomes.append((task, None, e))
+
+    built = []
+    for (year, month, _, _), rows, error in outcomes:
+        if error is not None:
+            print(f'❌ {year}년 {month}월 시간대별 순유입 생성 실패: {error}')
+            continue
+        built.append((year, month))
+        print(f'✅ {year}년 {month}월 시간대별 순유입: {rows:,}건')
+    return built
+
+
+class HourlyFlow:
+    """대여소 × 요일 유형 × 시각 대여/반납 건수와 요일 유형별 일수
+
+    day_type 이 None 이면 평일+주말 전체, '평일'/'주말'이면 해당 유형만 하루 평균으로 나눈다.
+    """
+
+    def __init__(self, rentals, returns, days):
+        self.rentals = np.asarray(rentals, dtype=np.int64)
+        self.returns = np.asarray(returns, dtype=np.int64)
+        self.days = np.asarray(days, dtype=np.int64)
+
+    @property
+    def n_stations(self):
+        return self.rentals.shape[0]
+
+    def _select(self, counts, day_type):
+        if day_type is None:
+            return counts.sum(axis=1), int(self.days.sum())
+        index = DAY_TYPES.index(day_type)
+        return counts[:, index, :], int(self.days[index])
+
+    def daily_average(self, measure, day_type=None):
+        """(대여소 수, 24) 하루 평균 건수 - measure: 'rentals' / 'returns'"""
+        counts, days = self._select(getattr(self, measure), day_type)
+        return counts / max(days, 1)
+
+    def net_inflow(self, day_type=None):
+        """(대여소 수, 24) 하루 평균 시간대별 순유입 (반납 - 대여)"""
+        return self.daily_average('returns', day_type) - self.daily_average('rentals', day_type)
+
+    def occupancy_change(self, day_type=None):
+        """(대여소 수, 24) 0시부터 각 시각이 끝날 때까지 누적 순유입 (하루 평균 재고 변화)"""
+        return np.cumsum(self.net_inflow(day_type), axis=1)
+
+    def station_profile(self, code, day_type=None):
+        """대여소 하나의 시간대별 평균 대여/반납/순유입/누적 변화 DataFrame"""
+        return pd.DataFrame({
+            '시각': np.arange(HOURS),
+            '평균대여': self.daily_average('rentals', day_type)[code].round(2),
+            '평균반납': self.daily_average('returns', day_type)[code].round(2),
+            '순유입': self.net_inflow(day_type)[code].round(2),
+            '누적변화': self.occupancy_change(day_type)[code].round(2),
+        })
+
+    def imbalance_table(self, stations, day_type=None, min_daily=0):
+        """대여소별 하루 누적 변화의 최대 부족/최대 적체와 그 시각(그 시각이 끝날 때) - 변화 폭 큰 순
+
+        변화 폭 = 최고 누적 - 최저 누적(0시 시작값 0 포함): 하루 안에 채우거나 비워야 하는 자전거 수에 가깝다.
+        """
+        change = self.occupancy_change(day_type)
+        with_start = np.concatenate([np.zeros((self.n_stations, 1)), change], axis=1)
+        daily_rentals = self.daily_average('rentals', day_type).sum(axis=1)
+        daily_returns = self.daily_average('returns', day_type).sum(axis=1)
+        codes = np.flatnonzero((daily_rentals + daily_returns > 0) & (daily_rentals >= min_daily))
+        low, high = change[codes].min(axis=1), change[codes].max(axis=1)
+        # 하루 내내 부족(적체)이 없으면 시각은 비워 둠
+        low_hour = pd.Series(change[codes].argmin(axis=1)).where(low < 0).astype('Int64')
+        high_hour = pd.Series(change[codes].argmax(axis=1)).where(high > 0).astype('Int64')
+        swing = with_start[codes].max(axis=1) - with_start[codes].min(axis=1)
+        table = pd.DataFrame({
+            '대여소코드': codes,
+            '대여소번호': stations.keys_for(codes),
+            '대여소명': [stations.name_of(code) or '' for code in codes],
+            '일평균대여': daily_rentals[codes].round(1),
+            '일평균반납': daily_returns[codes].round(1),
+            '하루순유입': (daily_returns - daily_rentals)[codes].round(1),
+            '최대부족': np.minimum(low, 0).round(1),
+            '최대부족시각': low_hour,
+            '최대적체': np.maximum(high, 0).round(1),
+            '최대적체시각': high_hour,
+            '변화폭': swing.round(1),
+        })
+        order = np.lexsort((codes, -swing))
+        return table.iloc[order].reset_index(drop=True)
+
+
+def load_netflow(year=None, months=None, store_dir=None):
+    """선택한 기간의 월별 건수 합계 HourlyFlow (저장된 월이 없으면 None)"""
+    store_dir = store_dir or config.STORE_DIR
+    n_stations = len(load_station_dictionary(store_dir))
+    shape = (n_stations, len(DAY_TYPES), HOURS)
+    totals = {measure: np.zeros(shape, dtype=np.int64) for measure in FLOW_MEASURES}
+    days = np.zeros(len(DAY_TYPES), dtype=np.int64)
+    found = False
+    for y, m in available_months(store_dir):
+        if year is not None and y != year:
+            continue
+        if months is not None and m not in months:
+            continue
+        path = netflow_path(y, m, store_dir)
+        if not os.path.exists(path):
+            continue
+        with np.load(path) as data:
+            for measure in FLOW_MEASURES:
+                # 대여소가 늘어난 뒤에도 예전 월은 앞쪽 코드만 채우면 됨
+                counts = data[measure]
+                totals[measure][:counts.shape[0]] += counts
+            days += data['days']
+        found = True
+    if not found:
+        return None
+    return HourlyFlow(totals['rentals'], totals['returns'], days)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대여소 × 시간대 순유입(반납 - 대여) 배열 생성')
+    parser.add_argument('--store-dir', default=None, help='변환된 데이터셋 폴더')
+    parser.add_argument('--year', type=int, default=None, help='요약할 연도 (기본: 전체)')
+    parser.add_argument('--day-type', choices=DAY_TYPES, default=None, help='평일/주말만 요약 (기본: 전체)')
+    parser.add_argument('--top', type=int, default=10, help='출력할 대여소 수')
+    parser.add_argument('--force', action='store_true', help='모든 월을 다시 생성')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 프로세스 수 (0이면 CPU 코어 수)')
+    args = parser.parse_args()
+
+    built = build_netflow(args.store_dir, force=args.force, workers=args.workers)
+    print(f'\n시간대별 순유입 생성 완료: {len(built)}개월')
+
+    flow = load_netflow(args.year, store_dir=args.store_dir)
+    if flow is None:
+        print('⏭️ 저장된 시간대별 순유입이 없음')
+        return
+    table = flow.imbalance_table(load_station_dictionary(args.store_dir), args.day_type)
+    print(table.drop(columns='대여소코드').head(args.top).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""청크 단위 출발지→도착지(OD) 집계
+
+월 파일을 모두 합친 combined_df 없이 청크마다 (대여소코드, 반납소코드) 건수를 누적하므로
+메모리 사용량이 분석 개월 수와 무관하다.
+"""
+import numpy as np
+import pandas as pd
+
+from ddareungi import config
+from ddareungi.external import SpillingCounter, budget_bytes
+from ddareungi.ingest import COLUMN_MAP, build_filter, rental_dataset
+from ddareungi.patterns import classify_pattern
+from ddareungi.stations import MISSING_CODE
+from ddareungi.utils import sum_by_key
+
+OD_COLUMNS = ['대여소코드', '반납소코드']
+RAW_OD_COLUMNS = ['대여소번호', '반납소번호']
+DEFAULT_BATCH_SIZE = 1_000_000
+
+# 누적 대기 중인 부분 집계가 이 개수를 넘으면 한 번에 합친다
+CONSOLIDATE_ROWS = 2_000_000
+
+# (대여소코드, 반납소코드) 쌍을 int64 하나로 묶을 때 사용 (-1 결측 코드는 +1 해서 0으로)
+PAIR_SHIFT = 32
+PAIR_MASK = (1 << PAIR_SHIFT) - 1
+
+
+def pair_keys(rental_codes, return_codes):
+    rental_codes = np.asarray(rental_codes, dtype=np.int64) + 1
+    return_codes = np.asarray(return_codes, dtype=np.int64) + 1
+    return (rental_codes << PAIR_SHIFT) | return_codes
+
+
+def split_pair_keys(keys):
+    keys = np.asarray(keys, dtype=np.int64)
+    return ((keys >> PAIR_SHIFT) - 1).astype(np.int32), ((keys & PAIR_MASK) - 1).astype(np.int32)
+
+
+class ODAccumulator:
+    """(대여소코드, 반납소코드) 건수를 청크 단위로 누적
+
+    배치에 코드 컬럼이 없으면 stations 사전으로 원본 대여소번호를 코드로 바꾼다.
+    memory_budget_mb 를 주면 중간 결과를 external.SpillingCounter 로 누적해 한도를 넘는 부분은 디스크에 내려쓴다.
+    """
+
+    def __init__(self, stations=None, memory_budget_mb=None, spill_dir=None):
+        self.stations = stations
+        self._keys = np.empty(0, dtype=np.int64)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._pending = []
+        self._pending_rows = 0
+        self.rows = 0
+        self._spill = None
+        if budget_bytes(memory_budget_mb):
+            self._spill = SpillingCounter(memory_budget_mb, spill_dir)
+
+    def _codes(self, frame):
+        if OD_COLUMNS[0] in frame.columns:
+            return frame[OD_COLUMNS[0]].to_numpy(), frame[OD_COLUMNS[1]].to_numpy()
+        if self.stations is None:
+            raise ValueError('원본 대여소번호를 집계하려면 대여소 사전(stations)이 필요함')
+        return (self.stations.encode(frame[RAW_OD_COLUMNS[0]]),
+                self.stations.encode(frame[RAW_OD_COLUMNS[1]]))
+
+    def add(self, frame):
+        if len(frame) == 0:
+            return
+        self.add_codes(*self._codes(frame))
+
+    def add_codes(self, rental_codes, return_codes):
+        keys, counts = np.unique(pair_keys(rental_codes, return_codes), return_counts=True)
+        if self._spill is not None:
+            self._spill.add(keys, counts)
+            self.rows += len(rental_codes)
+            return
+        self._pending.append((keys, counts.astype(np.int64)))
+        self._pending_rows += len(keys)
+        self.rows += len(rental_codes)
+        if self._pending_rows >= CONSOLIDATE_ROWS:
+            self._consolidate()
+
+    def merge(self, other):
+        """다른 누적기의 결과를 합침"""
+        for keys, counts in other._partial_counts():
+            if self._spill is not None:
+                self._spill.add(keys, counts)
+            else:
+                self._pending.append((keys, counts))
+        other.close()
+        self.rows += other.rows
+        self._consolidate()
+
+    def _partial_counts(self):
+        self._consolidate()
+        if self._spill is not None:
+            yield from self._spill.iter_partitions()
+        else:
+            yield self._keys, self._counts
+
+    def _consolidate(self):
+        if not self._pending:
+            return
+        keys = np.concatenate([self._keys] + [keys for keys, _ in self._pending])
+        counts = np.concatenate([self._counts] + [counts for _, counts in self._pending])
+        self._pending = []
+        self._pending_rows = 0
+        self._keys, self._counts = sum_by_key(keys, counts)
+
+    def result(self):
+        """누적된 OD 건수 (대여소코드/반납소코드 MultiIndex Series, 건수 내림차순)"""
+        self._consolidate()
+        keys, counts = self._keys, self._counts
+        if self._spill is not None:
+            keys, counts = self._spill.result()
+        rental_codes, return_codes = split_pair_keys(keys)
+        index = pd.MultiIndex.from_arrays([rental_codes, return_codes], names=OD_COLUMNS)
+        counts = pd.Series(counts, index=index, name='count')
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def close(self):
+        """디스크에 내려쓴 중간 결과 삭제"""
+        if self._spill is not None:
+            self._spill.close()
+
+
+def iter_store_batches(year=None, months=None, store_dir=None, batch_size=DEFAULT_BATCH_SIZE):
+    """변환된 Parquet에서 대여소코드/반납소코드만 배치 단위로 읽기"""
+    dataset = rental_dataset(store_dir)
+    scanner = dataset.scanner(columns=OD_COLUMNS, filter=build_filter(year, months),
+                              batch_size=batch_size)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def iter_csv_batches(file_paths, chunksize=DEFAULT_BATCH_SIZE):
+    """원본 CSV에서 대여소번호/반납소번호만 청크 단위로 읽기 (변환 전 데이터용)"""
+    def wanted(col):
+        return COLUMN_MAP.get(str(col).replace(' ', '')) in RAW_OD_COLUMNS
+
+    for file_path in file_paths:
+        reader = pd.read_csv(file_path, encoding=config.RENTAL_HISTORY_ENCODING, dtype=str,
+                             usecols=wanted, chunksize=chunksize)
+        for chunk in reader:
+            yield chunk.rename(columns=lambda col: COLUMN_MAP[str(col).replace(' ', '')])
+
+
+def aggregate_od(batches, stations=None, memory_budget_mb=None, spill_dir=None):
+    """배치 이터레이터를 끝까지 돌며 OD 건수 누적 (memory_budget_mb: external 모듈 참고)"""
+    accumulator = ODAccumulator(stations, memory_budget_mb, spill_dir)
+    try:
+        for batch in batches:
+            accumulator.add(batch)
+        return accumulator.result()
+    finally:
+        accumulator.close()
+
+
+def return_pattern_from_od(od_counts, station_ids, stations, top_n=5):
+    """OD 건수로 대여소별 반납 패턴 계산
+
+    결과 형태는 04 노트북의 results 딕셔너리와 같고, top_returns 인덱스는 정규 대여소번호다.
+    """
+    results = {}
+    rental_level = od_counts.index.get_level_values(0)
+    for station_id in station_ids:
+        code = stations.code_of(station_id)
+        station_counts = od_counts[rental_level == code] if code != MISSING_CODE else od_counts.iloc[:0]
+        total = int(station_counts.sum())
+        if total == 0:
+            results[station_id] = None
+            continue
+
+        return_counts = station_counts.droplevel(0)
+        same_count = int(return_counts.get(code, 0))
+        return_counts = return_counts[return_counts.index != MISSING_CODE].head(top_n)
+        top_returns = pd.Series(return_counts.to_numpy(), name='count',
+                                index=pd.Index(stations.keys_for(return_counts.index), name='반납소번호'))
+        same_ratio = same_count / total * 100
+        results[station_id] = {
+            'total': total,
+            'same_ratio': same_ratio,
+            'pattern': classify_pattern(same_ratio),
+            'top_returns': top_returns,
+            'same_count': same_count
+        }
+    return results
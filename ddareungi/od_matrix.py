@@ -0,0 +1,166 @@
+"""전체 대여소 × 대여소 월별 희소 OD 행렬
+
+월마다 (대여소코드 × 반납소코드) CSR 행렬을 npz로 저장해 두면,
+TOP5 뿐 아니라 어떤 대여소든 동일지점 반납 비율/주요 반납지/패턴을 바로 계산할 수 있다.
+마지막 열(인덱스 = 대여소 수)은 반납소 결측 건수다.
+
+    python -m ddareungi.od_matrix --store-dir data_store
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from ddareungi import config
+from ddareungi.ingest import available_months, partition_path
+from ddareungi.od import aggregate_od, iter_store_batches
+from ddareungi.patterns import classify_pattern
+from ddareungi.stations import MISSING_CODE, load_station_dictionary
+
+OD_DIR_NAME = 'od'
+
+
+def od_matrix_path(year, month, store_dir=None):
+    return os.path.join(store_dir or config.STORE_DIR, OD_DIR_NAME, f'od_{year}_{month:02d}.npz')
+
+
+def od_counts_to_matrix(od_counts, n_stations):
+    """OD 건수 Series → (대여소 수) × (대여소 수 + 1) CSR 행렬"""
+    rental_codes = od_counts.index.get_level_values(0).to_numpy()
+    return_codes = od_counts.index.get_level_values(1).to_numpy()
+    valid = rental_codes != MISSING_CODE
+    rental_codes = rental_codes[valid]
+    return_codes = np.where(return_codes[valid] == MISSING_CODE, n_stations, return_codes[valid])
+    matrix = sparse.coo_matrix((od_counts.to_numpy()[valid], (rental_codes, return_codes)),
+                               shape=(n_stations, n_stations + 1), dtype=np.int64)
+    return matrix.tocsr()
+
+
+def resize_matrix(matrix, n_stations):
+    """대여소가 늘어난 뒤 예전 월 행렬을 현재 크기로 맞춤 (결측 열은 마지막으로 이동)"""
+    old_n = matrix.shape[0]
+    if old_n == n_stations:
+        return matrix
+    coo = matrix.tocoo()
+    cols = np.where(coo.col == old_n, n_stations, coo.col)
+    return sparse.csr_matrix((coo.data, (coo.row, cols)), shape=(n_stations, n_stations + 1))
+
+
+def _build_month_matrix(task):
+    year, month, store_dir, n_stations, memory_budget_mb = task
+    od_counts = aggregate_od(iter_store_batches(year=year, months=[month], store_dir=store_dir),
+                             memory_budget_mb=memory_budget_mb)
+    matrix = od_counts_to_matrix(od_counts, n_stations)
+    out_path = od_matrix_path(year, month, store_dir)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + '.tmp.npz'
+    sparse.save_npz(tmp_path, matrix)
+    os.replace(tmp_path, out_path)
+    return matrix.nnz
+
+
+def build_od_matrices(store_dir=None, force=False, workers=1, memory_budget_mb=None):
+    """변환된 월별 대여이력마다 OD 행렬을 만들어 저장 - 새로 만든 (연도, 월) 목록 반환
+
+    workers 가 1보다 크면 월 단위로 프로세스 풀에서 만든다.
+    memory_budget_mb 는 작업자마다의 중간 집계 한도 (넘으면 디스크로, external 모듈 참고).
+    """
+    store_dir = store_dir or config.STORE_DIR
+    n_stations = len(load_station_dictionary(store_dir))
+    tasks = []
+    for year, month in available_months(store_dir):
+        out_path = od_matrix_path(year, month, store_dir)
+        source_path = partition_path(year, month, store_dir)
+        if (not force and os.path.exists(out_path)
+                and os.path.getmtime(out_path) >= os.path.getmtime(source_path)):
+            continue
+        tasks.append((year, month, store_dir, n_stations, memory_budget_mb))
+
+    if workers != 1 and len(tasks) > 1:
+        from ddareungi.parallel import run_per_item
+        outcomes = run_per_item(_build_month_matrix, tasks, workers)
+    else:
+        outcomes = []
+        for task in tasks:
+            try:
+                outcomes.append((task, _build_month_matrix(task), None))
+            except Exception as e:
+                outcomes.append((task, None, e))
+
+    built = []
+    for (year, month, _, _, _), nnz, error in outcomes:
+        if error is not None:
+            print(f'❌ {year}년 {month}월 OD 행렬 생성 실패: {error}')
+            continue
+        built.append((year, month))
+        print(f'✅ {year}년 {month}월 OD 행렬: {nnz:,}개 쌍')
+    return built
+
+
+def load_od_matrix(year=None, months=None, store_dir=None):
+    """선택한 기간의 월별 OD 행렬 합계 (없는 월은 건너뜀)"""
+    store_dir = store_dir or config.STORE_DIR
+    n_stations = len(load_station_dictionary(store_dir))
+    total = sparse.csr_matrix((n_stations, n_stations + 1), dtype=np.int64)
+    for y, m in available_months(store_dir):
+        if year is not None and y != year:
+            continue
+        if months is not None and m not in months:
+            continue
+        path = od_matrix_path(y, m, store_dir)
+        if os.path.exists(path):
+            total = total + resize_matrix(sparse.load_npz(path), n_stations)
+    return total
+
+
+def station_return_pattern(matrix, code, stations, top_n=5):
+    """OD 행렬 한 행으로 대여소 반납 패턴 계산 (return_pattern_from_od 결과 한 개와 같은 형태)"""
+    if code == MISSING_CODE or code >= matrix.shape[0]:
+        return None
+    row = matrix.getrow(code)
+    total = int(row.sum())
+    if total == 0:
+        return None
+
+    n_stations = matrix.shape[0]
+    return_codes, counts = row.indices, row.data
+    station_mask = return_codes < n_stations
+    return_codes, counts = return_codes[station_mask], counts[station_mask]
+    order = np.lexsort((return_codes, -counts))[:top_n]
+
+    same_count = int(counts[return_codes == code].sum())
+    same_ratio = same_count / total * 100
+    top_returns = pd.Series(counts[order].astype(np.int64), name='count',
+                            index=pd.Index(stations.keys_for(return_codes[order]), name='반납소번호'))
+    return {
+        'total': total,
+        'same_ratio': same_ratio,
+        'pattern': classify_pattern(same_ratio),
+        'top_returns': top_returns,
+        'same_count': same_count
+    }
+
+
+def station_totals(matrix):
+    """대여소코드별 총 대여건수"""
+    return np.asarray(matrix.sum(axis=1)).ravel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='월별 OD 희소 행렬 생성')
+    parser.add_argument('--store-dir', default=None, help='변환된 데이터셋 폴더')
+    parser.add_argument('--force', action='store_true', help='모든 월을 다시 생성')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 프로세스 수 (0이면 CPU 코어 수)')
+    parser.add_argument('--memory-budget-mb', type=float, default=None,
+                        help='중간 집계 메모리 한도 (넘으면 디스크 사용, 기본: DDAREUNGI_MEMORY_BUDGET_MB)')
+    args = parser.parse_args()
+
+    built = build_od_matrices(args.store_dir, force=args.force, workers=args.workers,
+                              memory_budget_mb=args.memory_budget_mb)
+    print(f'\nOD 행렬 생성 완료: {len(built)}개월')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""월별 파일 단위 병렬 처리 (프로세스 풀)
+
+파일마다 독립적으로 변환/집계한 뒤 부분 결과를 파일명 순서대로 합치므로,
+작업자 수나 완료 순서와 관계없이 순차 실행과 같은 결과가 나온다.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ddareungi.ingest import RENTAL_SCHEMA, convert_rental_file, partition_path
+from ddareungi.stations import StationDictionary
+
+CODE_COLUMNS = ('대여소코드', '반납소코드')
+
+# 작업자 프로세스마다 한 번만 받아 두는 대여소 사전 스냅샷
+_station_snapshot = None
+
+
+def resolve_workers(workers):
+    """0 또는 None 이면 CPU 코어 수"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def run_per_item(func, items, workers=None, initializer=None, initargs=()):
+    """items 각각에 func를 프로세스 풀로 실행
+
+    입력 순서대로 (item, 결과, 예외) 목록을 반환한다. 한 파일이 실패해도 나머지는 계속 진행.
+    """
+    items = list(items)
+    workers = min(resolve_workers(workers), max(1, len(items)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        futures = [pool.submit(func, item) for item in items]
+        outcomes = []
+        for item, future in zip(items, futures):
+            try:
+                outcomes.append((item, future.result(), None))
+            except Exception as e:
+                outcomes.append((item, None, e))
+    return outcomes
+
+
+def _init_station_snapshot(snapshot_frame):
+    global _station_snapshot
+    _station_snapshot = snapshot_frame
+
+
+def _convert_with_snapshot(task):
+    """작업자: 스냅샷 사전 사본으로 파일 하나를 변환
+
+    스냅샷 이후 새로 등장한 대여소는 임시 코드(스냅샷 크기부터)로 기록되고,
+    메인 프로세스가 합칠 때 전역 코드로 바꾼다.
+    """
+    file_path, year, month, store_dir, chunksize = task
+    stations = StationDictionary.from_frame(_station_snapshot)
+    base = len(stations)
+    known_names = set(stations.names)
+    rows = convert_rental_file(file_path, year, month, stations, store_dir, chunksize)
+    new_names = {code: name for code, name in stations.names.items() if code not in known_names}
+    return rows, stations.keys[base:], new_names
+
+
+def remap_partition_codes(path, mapping):
+    """파티션 파일의 대여소코드/반납소코드를 mapping[옛 코드] 로 교체 (행 그룹 단위)
+
+    변환 때와 같은 스키마/압축으로 행 그룹을 하나씩 다시 쓰므로 순차 실행으로 만든 파일과 바이트까지 같다.
+    """
+    source = pq.ParquetFile(path)
+    tmp_path = path + '.remap'
+    writer = pq.ParquetWriter(tmp_path, RENTAL_SCHEMA, compression='zstd')
+    try:
+        for index in range(source.num_row_groups):
+            table = source.read_row_group(index)
+            for name in CODE_COLUMNS:
+                codes = table[name].to_numpy()
+                remapped = np.where(codes >= 0, mapping[np.maximum(codes, 0)], codes).astype(np.int32)
+                table = table.set_column(table.schema.get_field_index(name), name, pa.array(remapped))
+            # Parquet에서 밀리초로 읽힌 시각 컬럼도 변환 때 스키마로 되돌림
+            writer.write_table(table.cast(RENTAL_SCHEMA))
+    except Exception:
+        writer.close()
+        os.remove(tmp_path)
+        raise
+    writer.close()
+    os.replace(tmp_path, path)
+
+
+def convert_rental_files_parallel(pending, stations, store_dir, chunksize, workers=None):
+    """pending 파일들을 병렬 변환하고 대여소 사전을 파일명 순서대로 합침
+
+    ingest._convert_sequential 과 같은 (task, 행 수, 예외) 형태를 반환한다.
+    """
+    base = len(stations)
+    tasks = [(file_path, year, month, store_dir, chunksize) for file_path, year, month, _ in pending]
+    outcomes = run_per_item(_convert_with_snapshot, tasks, workers,
+                            initializer=_init_station_snapshot, initargs=(stations.to_frame(),))
+
+    merged = []
+    for task, (_, result, error) in zip(pending, outcomes):
+        if error is not None:
+            merged.append((task, None, error))
+            continue
+
+        rows, new_keys, new_names = result
+        mapping = np.arange(base + len(new_keys), dtype=np.int32)
+        for offset, key in enumerate(new_keys):
+            mapping[base + offset] = stations.add_key(key)
+        for code, name in new_names.items():
+            stations.names.setdefault(int(mapping[code]), name)
+
+        _, year, month, _ = task
+        if not np.array_equal(mapping, np.arange(len(mapping))):
+            try:
+                remap_partition_codes(partition_path(year, month, store_dir), mapping)
+            except Exception as e:
+                merged.append((task, None, e))
+                continue
+        merged.append((task, rows, None))
+    return merged
+
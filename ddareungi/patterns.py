@@ -0,0 +1,19 @@
+"""대여소별 반납 패턴 분석 (04 노트북 로직)"""
+
+# 04 노트북 분석 대상 TOP5 대여소
+TOP5_STATIONS = {
+    '207': '여의나루역 1번출구 앞',
+    '4217': '한강공원 망원나들목',
+    '3515': '서울숲 관리사무소',
+    '502': '자양(뚝섬한강공원)역 1번출구 앞',
+    '474': '동대문역사문화공원역 1번출구 뒤편'
+}
+
+
+def classify_pattern(same_ratio):
+    """동일지점 반납 비율(%)로 순환형/혼합형/이동형 분류"""
+    if same_ratio > 70:
+        return '순환형'
+    elif same_ratio > 40:
+        return '혼합형'
+    return '이동형'
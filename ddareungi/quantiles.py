@@ -0,0 +1,271 @@
+"""대여소별 이용시간/이용거리 분위수 스케치
+
+한 해 전체 이용의 대여소별 정확한 백분위는 원본을 다시 정렬해야 하므로,
+월마다 대여소 × 로그 구간 건수(상대 오차가 정해진 히스토그램, DDSketch 방식)를 저장해 둔다.
+
+- 값 x 는 구간 k = ceil(log(x / 최솟값) / log(γ)) 에 들어가고 γ = (1 + α) / (1 - α) 이다.
+  구간 대표값을 쓰면 어떤 분위수든 상대 오차가 α(기본 1%) 이내다.
+- 구간 경계가 고정이라 월/대여소 스케치는 건수를 더하기만 하면 합쳐진다 (순서 무관, 정확히 같은 결과).
+- 최솟값보다 작은 값(0분, 0m 등)은 0 구간에 모아 0으로 본다.
+- 대여소는 대여소코드(출발 대여소) 기준이다.
+
+    python -m ddareungi.quantiles --store-dir data_store --year 2024
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from ddareungi import config
+from ddareungi.ingest import available_months, build_filter, partition_path, rental_dataset
+from ddareungi.stations import load_station_dictionary
+
+QUANTILES_DIR_NAME = 'quantiles'
+DEFAULT_BATCH_SIZE = 1_000_000
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+# 상대 오차와 구간 수 (최솟값의 10^7배까지, 넘는 값은 마지막 구간)
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+N_BUCKETS = int(np.ceil(np.log(1e7) / np.log(GAMMA))) + 2
+
+# 측정 → (컬럼, 단위, 최솟값)
+QUANTILE_MEASURES = {
+    'duration': ('이용시간(분)', '분', 1.0),
+    'distance': ('이용거리(M)', 'm', 1.0),
+}
+
+
+def quantiles_path(year, month, store_dir=None):
+    return os.path.join(store_dir or config.STORE_DIR, QUANTILES_DIR_NAME, f'quantiles_{year}_{month:02d}.npz')
+
+
+def bucket_index(values, min_value):
+    """값 배열 → 구간 번호 (0 = 최솟값 미만, 1부터 로그 구간)"""
+    values = np.asarray(values, dtype=np.float64)
+    buckets = np.zeros(len(values), dtype=np.int64)
+    positive = values >= min_value
+    scaled = np.log(values[positive] / min_value) / np.log(GAMMA)
+    buckets[positive] = np.minimum(np.ceil(scaled).astype(np.int64) + 1, N_BUCKETS - 1)
+    return buckets
+
+
+def bucket_values(min_value):
+    """구간 번호 → 대표값 (구간 [γ^(k-1), γ^k] 의 상대 오차가 가장 작은 값)"""
+    k = np.arange(N_BUCKETS, dtype=np.float64) - 1
+    values = min_value * 2 * GAMMA ** k / (GAMMA + 1)
+    values[0] = 0.0
+    # 첫 로그 구간(k = 0)은 정확히 최솟값
+    values[1] = min_value
+    return values
+
+
+class QuantileSketch:
+    """대여소 × 구간 건수 CSR 행렬 하나 (측정 하나)
+
+    code 가 None 이면 전체 대여소를 합친 분포를 쓴다.
+    """
+
+    def __init__(self, counts, min_value):
+        self.counts = sparse.csr_matrix(counts, dtype=np.int64)
+        self.min_value = min_value
+        self._values = bucket_values(min_value)
+
+    def __add__(self, other):
+        return QuantileSketch(self.counts + other.counts, self.min_value)
+
+    @property
+    def n_stations(self):
+        return self.counts.shape[0]
+
+    def _histogram(self, code=None):
+        if code is None:
+            return np.asarray(self.counts.sum(axis=0)).ravel()
+        return self.counts.getrow(code).toarray().ravel()
+
+    def count(self, code=None):
+        return int(self._histogram(code).sum())
+
+    def quantiles(self, code=None, qs=DEFAULT_QUANTILES):
+        """분위수 배열 (건수가 없으면 NaN) - 순위 q × (n - 1) 이 들어가는 구간의 대표값"""
+        return self._quantiles_from(self._histogram(code), qs)
+
+    def _quantiles_from(self, histogram, qs):
+        total = histogram.sum()
+        if total == 0:
+            return np.full(len(qs), np.nan)
+        cumulative = np.cumsum(histogram)
+        ranks = np.floor(np.asarray(qs, dtype=np.float64) * (total - 1))
+        return self._values[np.searchsorted(cumulative, ranks, side='right')]
+
+    def station_quantiles(self, qs=DEFAULT_QUANTILES, min_count=1):
+        """(대여소코드 배열, 건수 배열, (대여소 수 × 분위수 수) 배열) - 건수가 min_count 이상인 대여소만
+
+        대여소마다 반복하지 않고 행별 누적합과 순위 비교로 한 번에 계산한다.
+        """
+        counts = self.counts
+        totals = np.asarray(counts.sum(axis=1)).ravel()
+        codes = np.flatnonzero(totals >= max(min_count, 1))
+        if len(codes) == 0:
+            return codes, totals[codes], np.empty((0, len(qs)))
+        sub = counts[codes].tocsr()
+        sub.sort_indices()
+        # 행마다 (0이 아닌) 구간 누적 건수
+        cumulative = np.cumsum(sub.data)
+        row_start = np.repeat(cumulative[sub.indptr[:-1] - 1] * (sub.indptr[:-1] > 0), np.diff(sub.indptr))
+        row_cumulative = cumulative - row_start
+        row_ids = np.repeat(np.arange(len(codes)), np.diff(sub.indptr))
+
+        results = np.empty((len(codes), len(qs)))
+        for j, q in enumerate(qs):
+            ranks = np.floor(q * (totals[codes] - 1))
+            # 누적 건수가 순위를 처음 넘는 위치 = 행 안에서 (누적 <= 순위)인 원소 수
+            passed = np.bincount(row_ids, weights=row_cumulative <= ranks[row_ids], minlength=len(codes))
+            positions = sub.indptr[:-1] + passed.astype(np.int64)
+            results[:, j] = self._values[sub.indices[positions]]
+        return codes, totals[codes], results
+
+
+def _build_month_sketch(task):
+    year, month, store_dir, n_stations = task
+    columns = ['대여소코드'] + [column for column, _, _ in QUANTILE_MEASURES.values()]
+    scanner = rental_dataset(store_dir).scanner(columns=columns, filter=build_filter(year, [month]),
+                                                batch_size=DEFAULT_BATCH_SIZE)
+    dense = {measure: np.zeros(n_stations * N_BUCKETS, dtype=np.int64) for measure in QUANTILE_MEASURES}
+    for batch in scanner.to_batches():
+        if not batch.num_rows:
+            continue
+        frame = batch.to_pandas()
+        codes = frame['대여소코드'].to_numpy()
+        for measure, (column, _, min_value) in QUANTILE_MEASURES.items():
+            values = frame[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = (codes >= 0) & ~np.isnan(values)
+            keys = codes[valid].astype(np.int64) * N_BUCKETS + bucket_index(values[valid], min_value)
+            dense[measure] += np.bincount(keys, minlength=n_stations * N_BUCKETS)
+
+    arrays = {}
+    for measure, counts in dense.items():
+        matrix = sparse.coo_matrix(counts.reshape(n_stations, N_BUCKETS))
+        arrays[f'{measure}_rows'] = matrix.row.astype(np.int32)
+        arrays[f'{measure}_cols'] = matrix.col.astype(np.int16)
+        arrays[f'{measure}_counts'] = matrix.data.astype(np.int32)
+    out_path = quantiles_path(year, month, store_dir)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + '.tmp.npz'
+    # 대여소 × 구간 조합이 많아 압축해서 저장 (행 번호가 정렬돼 있어 잘 줄어듦)
+    np.savez_compressed(tmp_path, n_stations=np.array(n_stations), n_buckets=np.array(N_BUCKETS), **arrays)
+    os.replace(tmp_path, out_path)
+    return int(dense['duration'].sum())
+
+
+def build_quantile_sketches(store_dir=None, force=False, workers=1):
+    """변환된 월별 대여이력마다 대여소별 분위수 스케치를 만들어 저장 - 새로 만든 (연도, 월) 목록 반환"""
+    store_dir = store_dir or config.STORE_DIR
+    n_stations = len(load_station_dictionary(store_dir))
+    tasks = []
+    for year, month in available_months(store_dir):
+        out_path = quantiles_path(year, month, store_dir)
+        source_path = partition_path(year, month, store_dir)
+        if (not force and os.path.exists(out_path)
+                and os.path.getmtime(out_path) >= os.path.getmtime(source_path)):
+            continue
+        tasks.append((year, month, store_dir, n_stations))
+
+    if workers != 1 and len(tasks) > 1:
+        from ddareungi.parallel import run_per_item
+        outcomes = run_per_item(_build_month_sketch, tasks, workers)
+    else:
+        outcomes = []
+        for task in tasks:
+            try:
+                outcomes.append((task, _build_month_sketch(task), None))
+            except Exception as e:
+                outcomes.append((task, None, e))
+
+    built = []
+    for (year, month, _, _), rows, error in outcomes:
+        if error is not None:
+            print(f'❌ {year}년 {month}월 분위수 스케치 생성 실패: {error}')
+            continue
+        built.append((year, month))
+        print(f'✅ {year}년 {month}월 분위수 스케치: {rows:,}건')
+    return built
+
+
+def load_quantile_sketches(year=None, months=None, store_dir=None):
+    """선택한 기간의 측정별 QuantileSketch 합계 {'duration': ..., 'distance': ...} (저장된 월이 없으면 None)"""
+    store_dir = store_dir or config.STORE_DIR
+    n_stations = len(load_station_dictionary(store_dir))
+    totals = {measure: sparse.csr_matrix((n_stations, N_BUCKETS), dtype=np.int64) for measure in QUANTILE_MEASURES}
+    found = False
+    for y, m in available_months(store_dir):
+        if year is not None and y != year:
+            continue
+        if months is not None and m not in months:
+            continue
+        path = quantiles_path(y, m, store_dir)
+        if not os.path.exists(path):
+            continue
+        with np.load(path) as data:
+            for measure in QUANTILE_MEASURES:
+                # 대여소가 늘어난 뒤에도 예전 월의 코드는 그대로
+                totals[measure] = totals[measure] + sparse.csr_matrix(
+                    (data[f'{measure}_counts'].astype(np.int64), (data[f'{measure}_rows'], data[f'{measure}_cols'])),
+                    shape=(n_stations, N_BUCKETS))
+        found = True
+    if not found:
+        return None
+    return {measure: QuantileSketch(totals[measure], min_value)
+            for measure, (_, _, min_value) in QUANTILE_MEASURES.items()}
+
+
+def quantile_table(sketches, stations, qs=DEFAULT_QUANTILES, min_count=1):
+    """대여소별 건수와 이용시간/이용거리 분위수 DataFrame (건수 많은 순)"""
+    frames = []
+    for measure, sketch in sketches.items():
+        column, unit, _ = QUANTILE_MEASURES[measure]
+        codes, counts, values = sketch.station_quantiles(qs, min_count)
+        frame = pd.DataFrame({'대여소코드': codes, '건수': counts})
+        label = column.split('(')[0]
+        for j, q in enumerate(qs):
+            frame[f'{label} p{round(q * 100):g}({unit})'] = values[:, j].round(1)
+        frames.append(frame.set_index('대여소코드'))
+    table = frames[0]
+    for frame in frames[1:]:
+        table = table.join(frame.drop(columns='건수'), how='outer')
+    table = table.reset_index()
+    table.insert(1, '대여소번호', stations.keys_for(table['대여소코드'].to_numpy()))
+    table.insert(2, '대여소명', [stations.name_of(code) or '' for code in table['대여소코드']])
+    return table.sort_values(['건수', '대여소코드'], ascending=[False, True], kind='stable', ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대여소별 이용시간/이용거리 분위수 스케치 생성')
+    parser.add_argument('--store-dir', default=None, help='변환된 데이터셋 폴더')
+    parser.add_argument('--year', type=int, default=None, help='요약할 연도 (기본: 전체)')
+    parser.add_argument('--top', type=int, default=10, help='출력할 대여소 수 (건수 순)')
+    parser.add_argument('--force', action='store_true', help='모든 월을 다시 생성')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 프로세스 수 (0이면 CPU 코어 수)')
+    args = parser.parse_args()
+
+    built = build_quantile_sketches(args.store_dir, force=args.force, workers=args.workers)
+    print(f'\n분위수 스케치 생성 완료: {len(built)}개월')
+
+    sketches = load_quantile_sketches(args.year, store_dir=args.store_dir)
+    if sketches is None:
+        print('⏭️ 저장된 분위수 스케치가 없음')
+        return
+    for measure, sketch in sketches.items():
+        column, unit, _ = QUANTILE_MEASURES[measure]
+        values = ', '.join(f'p{round(q * 100):g} {value:,.1f}{unit}'
+                           for q, value in zip(DEFAULT_QUANTILES, sketch.quantiles()))
+        print(f'전체 {column}: {values}')
+    table = quantile_table(sketches, load_station_dictionary(args.store_dir))
+    print()
+    print(table.drop(columns='대여소코드').head(args.top).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
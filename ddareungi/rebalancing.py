@@ -0,0 +1,295 @@
+"""자전거별 이용 연결과 재배치 추정
+
+대여이력을 자전거번호·대여일시 순으로 정렬해 같은 자전거의 연속된 두 이용을 잇는다.
+앞 이용의 반납소와 다음 이용의 대여소가 같으면 그 자리에서 다시 빌린 것이고,
+다르면 그 사이에 자전거가 옮겨진 것(재배치 - 운영 차량 이동, 기록 누락 포함)으로 본다.
+
+- 연결 행렬: (반납소코드 × 다음 대여소코드) 건수. 대각선은 제자리, 나머지가 재배치.
+- 월별로 (그 달 안의 연결 행렬, 자전거마다 그 달 첫 대여/마지막 반납 구간)을 저장하고,
+  여러 달을 볼 때는 구간끼리 같은 방식으로 이어 달 경계를 넘는 연결을 더한다.
+- 정렬은 external_sort 를 쓰므로 memory_budget_mb 를 주면 한 달이 메모리를 넘어도 된다.
+  연결은 정렬된 배치마다 한 번에 비교하고 자전거별 반복문은 없다.
+
+    python -m ddareungi.rebalancing --store-dir data_store --year 2024
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from scipy import sparse
+
+from ddareungi import config
+from ddareungi.external import external_sort
+from ddareungi.ingest import available_months, build_filter, partition_path, rental_dataset
+from ddareungi.stations import load_station_dictionary
+
+REBALANCING_DIR_NAME = 'rebalancing'
+TRIP_COLUMNS = ['자전거번호', '대여일시', '대여소코드', '반납일시', '반납소코드']
+SORT_COLUMNS = ['자전거번호', '대여일시']
+DEFAULT_BATCH_SIZE = 1_000_000
+
+
+def rebalancing_path(year, month, store_dir=None):
+    return os.path.join(store_dir or config.STORE_DIR, REBALANCING_DIR_NAME,
+                        f'rebalancing_{year}_{month:02d}.npz')
+
+
+def iter_trip_batches(year=None, months=None, store_dir=None, batch_size=DEFAULT_BATCH_SIZE):
+    """자전거번호/대여일시가 있는 이용만 TRIP_COLUMNS 배치로 읽기"""
+    expr = ds.field('자전거번호').is_valid() & ds.field('대여일시').is_valid()
+    period = build_filter(year, months)
+    if period is not None:
+        expr = period & expr
+    scanner = rental_dataset(store_dir).scanner(columns=TRIP_COLUMNS, filter=expr, batch_size=batch_size)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def link_matrix(return_codes, rental_codes, n_stations):
+    """(앞 이용 반납소코드, 다음 이용 대여소코드) 쌍 → 건수 CSR 행렬 (결측 코드 제외)"""
+    return_codes = np.asarray(return_codes, dtype=np.int64)
+    rental_codes = np.asarray(rental_codes, dtype=np.int64)
+    valid = (return_codes >= 0) & (rental_codes >= 0)
+    return sparse.coo_matrix((np.ones(int(valid.sum()), dtype=np.int64),
+                              (return_codes[valid], rental_codes[valid])),
+                             shape=(n_stations, n_stations)).tocsr()
+
+
+def bike_segments(trips):
+    """정렬된 이용 → 자전거마다 (첫 대여일시/대여소코드, 마지막 반납일시/반납소코드) 한 행
+
+    결과도 TRIP_COLUMNS 형태라 구간끼리 다시 이을 수 있다.
+    """
+    if len(trips) == 0:
+        return trips[TRIP_COLUMNS].reset_index(drop=True)
+    bikes = trips['자전거번호'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, bikes[1:] != bikes[:-1]])
+    ends = np.r_[starts[1:] - 1, len(bikes) - 1]
+    return pd.DataFrame({
+        '자전거번호': bikes[starts],
+        '대여일시': trips['대여일시'].to_numpy()[starts],
+        '대여소코드': trips['대여소코드'].to_numpy()[starts],
+        '반납일시': trips['반납일시'].to_numpy()[ends],
+        '반납소코드': trips['반납소코드'].to_numpy()[ends],
+    })
+
+
+def chain_sorted_trips(batches, n_stations):
+    """자전거번호·대여일시 순 배치 → (연결 행렬, 자전거별 구간 DataFrame)
+
+    배치 경계를 넘는 연결은 앞 배치의 마지막 이용을 다음 배치 앞에 붙여서 잇는다.
+    """
+    links = sparse.csr_matrix((n_stations, n_stations), dtype=np.int64)
+    segments = []
+    carry = None
+    for batch in batches:
+        if len(batch) == 0:
+            continue
+        segments.append(bike_segments(batch))
+        trips = batch if carry is None else pd.concat([carry, batch], ignore_index=True)
+        bikes = trips['자전거번호'].to_numpy()
+        same_bike = bikes[1:] == bikes[:-1]
+        links = links + link_matrix(trips['반납소코드'].to_numpy()[:-1][same_bike],
+                                    trips['대여소코드'].to_numpy()[1:][same_bike], n_stations)
+        carry = batch.iloc[[-1]]
+
+    if not segments:
+        return links, pd.DataFrame({col: [] for col in TRIP_COLUMNS})
+    # 배치마다 나눠 만든 구간을 자전거별로 다시 합침 (이미 정렬된 순서)
+    return links, bike_segments(pd.concat(segments, ignore_index=True))
+
+
+def chain_trips(batches, n_stations, memory_budget_mb=None, spill_dir=None):
+    """정렬되지 않은 이용 배치 → (연결 행렬, 자전거별 구간) - 정렬은 external_sort"""
+    return chain_sorted_trips(external_sort(batches, SORT_COLUMNS, memory_budget_mb, spill_dir), n_stations)
+
+
+def resize_links(matrix, n_stations):
+    """대여소가 늘어난 뒤 예전 월 연결 행렬을 현재 크기로 맞춤"""
+    if matrix.shape[0] == n_stations:
+        return matrix
+    coo = matrix.tocoo()
+    return sparse.csr_matrix((coo.data, (coo.row, coo.col)), shape=(n_stations, n_stations))
+
+
+class RebalancingFlows:
+    """반납소 → 다음 대여소 연결 행렬 (대각선 = 제자리 재대여, 나머지 = 재배치)
+
+    행 합은 그 대여소에 반납된 뒤 다음 이용이 확인된 건수(연결반납), 열 합은 앞 이용이 확인된 대여 건수(연결대여).
+    """
+
+    def __init__(self, links):
+        self.links = sparse.csr_matrix(links, dtype=np.int64)
+        self.same = self.links.diagonal().astype(np.int64)
+        self.returns = np.asarray(self.links.sum(axis=1)).ravel().astype(np.int64)
+        self.rentals = np.asarray(self.links.sum(axis=0)).ravel().astype(np.int64)
+        self.moved_out = self.returns - self.same
+        self.moved_in = self.rentals - self.same
+
+    @property
+    def total_links(self):
+        return int(self.returns.sum())
+
+    @property
+    def total_moves(self):
+        return int(self.moved_out.sum())
+
+    def move_ratio(self):
+        return self.total_moves / self.total_links * 100 if self.total_links else 0.0
+
+    def station_table(self, stations, min_links=0):
+        """대여소별 재배치 반출/반입 DataFrame (순유입 절댓값 큰 순)"""
+        codes = np.flatnonzero((self.returns + self.rentals > 0)
+                               & (np.maximum(self.returns, self.rentals) >= min_links))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out_ratio = np.where(self.returns[codes] > 0, self.moved_out[codes] / self.returns[codes] * 100, 0.0)
+            in_ratio = np.where(self.rentals[codes] > 0, self.moved_in[codes] / self.rentals[codes] * 100, 0.0)
+        table = pd.DataFrame({
+            '대여소코드': codes,
+            '대여소번호': stations.keys_for(codes),
+            '대여소명': [stations.name_of(code) or '' for code in codes],
+            '연결반납': self.returns[codes],
+            '재배치반출': self.moved_out[codes],
+            '반출비율(%)': out_ratio.round(1),
+            '연결대여': self.rentals[codes],
+            '재배치반입': self.moved_in[codes],
+            '반입비율(%)': in_ratio.round(1),
+            '순유입': self.moved_in[codes] - self.moved_out[codes],
+        })
+        order = np.lexsort((table['대여소코드'].to_numpy(), -np.abs(table['순유입'].to_numpy())))
+        return table.iloc[order].reset_index(drop=True)
+
+    def station_moves(self, code, top_n=5):
+        """대여소 하나의 재배치 요약 - 반출 건수/비율, 반입 건수/비율, 주요 반출 도착지 [(코드, 건수)]"""
+        if code < 0 or code >= self.links.shape[0] or self.returns[code] + self.rentals[code] == 0:
+            return None
+        row = self.links.getrow(code)
+        moved = row.indices != code
+        dest_codes, dest_counts = row.indices[moved], row.data[moved]
+        order = np.lexsort((dest_codes, -dest_counts))[:top_n]
+        return {
+            'moved_out': int(self.moved_out[code]),
+            'out_ratio': self.moved_out[code] / self.returns[code] * 100 if self.returns[code] else 0.0,
+            'moved_in': int(self.moved_in[code]),
+            'in_ratio': self.moved_in[code] / self.rentals[code] * 100 if self.rentals[code] else 0.0,
+            'destinations': [(int(dest_codes[i]), int(dest_counts[i])) for i in order],
+        }
+
+
+def _build_month_links(task):
+    year, month, store_dir, n_stations, memory_budget_mb = task
+    links, segments = chain_trips(iter_trip_batches(year, [month], store_dir), n_stations, memory_budget_mb)
+    coo = links.tocoo()
+    out_path = rebalancing_path(year, month, store_dir)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + '.tmp.npz'
+    np.savez(tmp_path, shape=np.array(links.shape), rows=coo.row, cols=coo.col, counts=coo.data,
+             bikes=segments['자전거번호'].to_numpy(dtype=str),
+             **{col: segments[col].to_numpy() for col in TRIP_COLUMNS[1:]})
+    os.replace(tmp_path, out_path)
+    return int(coo.data.sum())
+
+
+def _load_month(path, n_stations):
+    with np.load(path) as data:
+        links = sparse.csr_matrix((data['counts'], (data['rows'], data['cols'])), shape=tuple(data['shape']))
+        segments = pd.DataFrame({'자전거번호': data['bikes'].astype(object),
+                                 **{col: data[col] for col in TRIP_COLUMNS[1:]}})
+    return resize_links(links, n_stations), segments
+
+
+def build_rebalancing(store_dir=None, force=False, workers=1, memory_budget_mb=None):
+    """변환된 월별 대여이력마다 연결 행렬/자전거별 구간을 만들어 저장 - 새로 만든 (연도, 월) 목록 반환"""
+    store_dir = store_dir or config.STORE_DIR
+    n_stations = len(load_station_dictionary(store_dir))
+    tasks = []
+    for year, month in available_months(store_dir):
+        out_path = rebalancing_path(year, month, store_dir)
+        source_path = partition_path(year, month, store_dir)
+        if (not force and os.path.exists(out_path)
+                and os.path.getmtime(out_path) >= os.path.getmtime(source_path)):
+            continue
+        tasks.append((year, month, store_dir, n_stations, memory_budget_mb))
+
+    if workers != 1 and len(tasks) > 1:
+        from ddareungi.parallel import run_per_item
+        outcomes = run_per_item(_build_month_links, tasks, workers)
+    else:
+        outcomes = []
+        for task in tasks:
+            try:
+                outcomes.append((task, _build_month_links(task), None))
+            except Exception as e:
+                outcomes.append((task, None, e))
+
+    built = []
+    for (year, month, _, _, _), n_links, error in outcomes:
+        if error is not None:
+            print(f'❌ {year}년 {month}월 재배치 연결 생성 실패: {error}')
+            continue
+        built.append((year, month))
+        print(f'✅ {year}년 {month}월 재배치 연결: {n_links:,}건')
+    return built
+
+
+def load_rebalancing(year=None, months=None, store_dir=None):
+    """선택한 기간의 RebalancingFlows - 월별 연결 합계 + 달 경계 연결 (저장된 월이 없으면 None)"""
+    store_dir = store_dir or config.STORE_DIR
+    n_stations = len(load_station_dictionary(store_dir))
+    links = sparse.csr_matrix((n_stations, n_stations), dtype=np.int64)
+    segments = []
+    for y, m in available_months(store_dir):
+        if year is not None and y != year:
+            continue
+        if months is not None and m not in months:
+            continue
+        path = rebalancing_path(y, m, store_dir)
+        if os.path.exists(path):
+            month_links, month_segments = _load_month(path, n_stations)
+            links = links + month_links
+            segments.append(month_segments)
+    if not segments:
+        return None
+
+    # 월별 구간(자전거마다 한 행)을 이어 붙이면 앞 달 마지막 반납 → 다음 달 첫 대여 연결이 나온다
+    boundary = pd.concat(segments, ignore_index=True).sort_values(SORT_COLUMNS, kind='stable', ignore_index=True)
+    boundary_links, _ = chain_sorted_trips([boundary], n_stations)
+    return RebalancingFlows(links + boundary_links)
+
+
+def rebalancing_flows(year=None, months=None, store_dir=None, memory_budget_mb=None):
+    """저장된 월별 결과 없이 선택한 기간 전체를 한 번에 정렬해 RebalancingFlows 계산"""
+    n_stations = len(load_station_dictionary(store_dir))
+    links, _ = chain_trips(iter_trip_batches(year, months, store_dir), n_stations, memory_budget_mb)
+    return RebalancingFlows(links)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='자전거별 이용 연결과 대여소별 재배치 추정')
+    parser.add_argument('--store-dir', default=None, help='변환된 데이터셋 폴더')
+    parser.add_argument('--year', type=int, default=None, help='요약할 연도 (기본: 전체)')
+    parser.add_argument('--top', type=int, default=10, help='출력할 대여소 수')
+    parser.add_argument('--force', action='store_true', help='모든 월을 다시 생성')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 프로세스 수 (0이면 CPU 코어 수)')
+    parser.add_argument('--memory-budget-mb', type=float, default=None,
+                        help='월별 정렬 메모리 한도 (넘으면 디스크 사용, 기본: DDAREUNGI_MEMORY_BUDGET_MB)')
+    args = parser.parse_args()
+
+    built = build_rebalancing(args.store_dir, force=args.force, workers=args.workers,
+                              memory_budget_mb=args.memory_budget_mb)
+    print(f'\n재배치 연결 생성 완료: {len(built)}개월')
+
+    flows = load_rebalancing(args.year, store_dir=args.store_dir)
+    if flows is None:
+        print('⏭️ 저장된 재배치 연결이 없음')
+        return
+    print(f'연결된 이용 {flows.total_links:,}건 중 재배치 {flows.total_moves:,}건 ({flows.move_ratio():.1f}%)\n')
+    table = flows.station_table(load_station_dictionary(args.store_dir))
+    print(table.drop(columns='대여소코드').head(args.top).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
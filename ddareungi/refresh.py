@@ -0,0 +1,70 @@
+"""월간 증분 갱신 - 새로 공개된 파일만 처리
+
+1. 대여이력: manifest(파일별 크기/수정시각/내용 해시)에 없는 파일이나 내용이 바뀐 파일만 변환
+2. 분위수 스케치: 변환 직후 다시 변환된 월의 대여소별 이용시간/이용거리 스케치만 새로 만듦
+3. OD 행렬: 다시 변환된 월만 새로 만듦 (나머지 월 행렬은 그대로 두고 조회 시 합산)
+4. 외국인 이용 큐브: 입력 파일이 바뀐 연도만 다시 집계해 기존 큐브에 합침
+5. 일별 누적 인덱스: 다시 변환된 월의 일별 건수만 새로 만들고 전체 인덱스를 다시 조립
+6. 재배치 연결: 다시 변환된 월만 자전거별로 정렬해 새로 만듦 (달 경계 연결은 조회 시 계산)
+7. 시간대별 순유입: 다시 변환된 월의 대여소 × 시간대 건수만 새로 만듦
+
+새 달 파일 하나가 추가되면 그 한 달 분량만 처리하므로 갱신 시간이 전체 기간과 무관하다.
+
+    python -m ddareungi.refresh --data-dir .. --store-dir data_store
+"""
+import argparse
+import time
+
+from ddareungi import config
+from ddareungi.cube import build_cube
+from ddareungi.daily_index import build_daily_index
+from ddareungi.ingest import get_year_month_from_filename, ingest_rental_history
+from ddareungi.netflow import build_netflow
+from ddareungi.od_matrix import build_od_matrices
+from ddareungi.quantiles import build_quantile_sketches
+from ddareungi.rebalancing import build_rebalancing
+
+
+def refresh(data_dir=None, store_dir=None, workers=1):
+    """증분 갱신 실행 - 단계별로 새로 처리한 항목
+
+    {'rentals': 변환한 (연도, 월), 'cube': 갱신한 연도,
+     'quantiles'/'od'/'daily'/'rebalancing'/'netflow': 새로 만든 (연도, 월)}
+    """
+    store_dir = store_dir or config.STORE_DIR
+    start = time.perf_counter()
+
+    converted = ingest_rental_history(data_dir, store_dir, workers=workers)
+    quantiles = build_quantile_sketches(store_dir, workers=workers)
+    built = build_od_matrices(store_dir, workers=workers)
+    cube_years = build_cube(data_dir, store_dir)
+    daily = build_daily_index(data_dir, store_dir, workers=workers)
+    rebalancing = build_rebalancing(store_dir, workers=workers)
+    netflow = build_netflow(store_dir, workers=workers)
+
+    summary = {
+        'rentals': [get_year_month_from_filename(path) for path in converted],
+        'quantiles': quantiles,
+        'od': built,
+        'cube': cube_years,
+        'daily': daily,
+        'rebalancing': rebalancing,
+        'netflow': netflow,
+    }
+    print(f'\n갱신 완료 ({time.perf_counter() - start:.1f}초): 대여이력 {len(converted)}개월, '
+          f'분위수 스케치 {len(quantiles)}개월, OD 행렬 {len(built)}개월, 외국인 큐브 {len(cube_years)}개 연도, '
+          f'일별 건수 {len(daily)}개월, 재배치 연결 {len(rebalancing)}개월, 시간대별 순유입 {len(netflow)}개월')
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='새로 추가/변경된 원본 파일만 반영하는 증분 갱신')
+    parser.add_argument('--data-dir', default=None, help='원본 CSV 폴더 (기본: 저장소 상위 폴더)')
+    parser.add_argument('--store-dir', default=None, help='변환 결과 저장 폴더')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 프로세스 수 (0이면 CPU 코어 수)')
+    args = parser.parse_args()
+    refresh(args.data_dir, args.store_dir, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""원본 대여이력 CSV 표본으로 빠른 근사 집계 (미리보기)
+
+변환 전 원본 여러 달을 처음 볼 때, 전체를 다 읽기 전에 몇 초 안에 대여소별 건수/동일지점 반납 비율/순위를
+신뢰구간과 함께 보여 주기 위한 모듈. 정확한 값은 전체 집계(od.aggregate_od)가 끝나면 바꿔 보여 준다.
+
+- 층: 월(파일). 파일의 데이터 부분을 같은 바이트 간격의 구간으로 나누고 구간마다 임의 위치에서
+  연속된 block_rows 줄(블록)을 읽는다. 원본은 대여일시 순이라 구간이 한 달의 시간대를 고르게 덮는다.
+- 대여소: 층 안의 추정 영역. 블록마다 대여소별 건수를 세고 '바이트당 건수' 비율로 파일 전체 건수를 추정한다
+  (파일 행 수를 몰라도 됨).
+- 분산: 블록을 집락으로 본 비율 추정량 분산을 월별로 더한다. 동일지점 반납 비율은
+  (동일지점 - r × 대여) 잔차로 선형화한다. 신뢰구간은 정규 근사 (기본 95%).
+- 파일이 작아 표본이 파일의 절반을 넘으면 그 파일은 전부 읽는다 (분산 0).
+
+    python -m ddareungi.sampling --data-dir .. --year 2024 --months 1 2 3
+"""
+import argparse
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from ddareungi import config
+from ddareungi.ingest import COLUMN_MAP, find_rental_files, get_year_month_from_filename
+from ddareungi.od import (RAW_OD_COLUMNS, aggregate_od, iter_csv_batches, pair_keys, return_pattern_from_od,
+                         split_pair_keys)
+from ddareungi.patterns import classify_pattern
+from ddareungi.stations import MISSING_CODE, StationDictionary
+from ddareungi.utils import sum_by_key
+
+DEFAULT_BLOCKS = 200
+DEFAULT_BLOCK_ROWS = 100
+Z_95 = 1.96
+
+# 첫 줄들로 한 줄 평균 길이를 잴 때 읽는 줄 수
+PROBE_ROWS = 200
+
+
+def period_files(year=None, months=None, data_dir=None):
+    """선택한 기간의 원본 대여이력 파일 (연월 순)"""
+    files = []
+    for path in find_rental_files(data_dir):
+        year_month = get_year_month_from_filename(path)
+        if year_month is None:
+            continue
+        if year is not None and year_month[0] != year:
+            continue
+        if months is not None and year_month[1] not in months:
+            continue
+        files.append(path)
+    return sorted(files, key=get_year_month_from_filename)
+
+
+def _read_od_rows(header, lines):
+    def wanted(col):
+        return COLUMN_MAP.get(str(col).replace(' ', '')) in RAW_OD_COLUMNS
+
+    frame = pd.read_csv(io.BytesIO(header + b''.join(lines)), encoding=config.RENTAL_HISTORY_ENCODING,
+                        dtype=str, usecols=wanted)
+    return frame.rename(columns=lambda col: COLUMN_MAP[str(col).replace(' ', '')])
+
+
+def sample_file_blocks(path, n_blocks=DEFAULT_BLOCKS, block_rows=DEFAULT_BLOCK_ROWS, rng=None):
+    """파일 하나에서 블록 표본 읽기 → (대여소번호/반납소번호 DataFrame, 행별 블록 번호, 블록별 바이트, 데이터 전체 바이트, 전부 읽었는지)
+
+    구간 시작 위치가 줄 중간이면 그 줄은 버리고 다음 줄부터 읽는다 (cp949에서 줄바꿈 바이트는 다른 글자 안에 나오지 않음).
+    """
+    rng = rng or np.random.default_rng()
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        data_bytes = size - data_start
+        probe = [line for line in (f.readline() for _ in range(PROBE_ROWS)) if line]
+        line_bytes = sum(len(line) for line in probe) / max(len(probe), 1)
+
+        if not probe or n_blocks * block_rows * line_bytes * 2 >= data_bytes:
+            f.seek(data_start)
+            lines = f.read().splitlines(keepends=True)
+            frame = _read_od_rows(header, lines)
+            return frame, np.zeros(len(frame), dtype=np.int64), np.array([data_bytes], dtype=np.float64), data_bytes, True
+
+        segment = data_bytes / n_blocks
+        lines, block_ids, block_bytes = [], [], np.zeros(n_blocks, dtype=np.float64)
+        for block in range(n_blocks):
+            f.seek(data_start + int((block + rng.random()) * segment))
+            f.readline()
+            for _ in range(block_rows):
+                line = f.readline()
+                if not line:
+                    break
+                lines.append(line)
+                block_ids.append(block)
+                block_bytes[block] += len(line)
+    frame = _read_od_rows(header, lines)
+    return frame, np.asarray(block_ids, dtype=np.int64), block_bytes, data_bytes, False
+
+
+class SampleEstimates:
+    """월(층)별 블록 표본에서 추정한 대여소별 대여 건수/동일지점 반납 건수와 분산 성분
+
+    월을 더할 때는 추정값과 분산 성분(Σd_y², Σd_z², Σd_y·d_z × 상수)을 더하기만 하면 된다.
+    od_pairs 는 (대여소코드, 반납소코드) 쌍 키별 추정 건수 (주요 반납지용).
+    """
+
+    def __init__(self, stations=None):
+        self.stations = stations or StationDictionary()
+        self.rentals = np.zeros(0)
+        self.same = np.zeros(0)
+        self.var_yy = np.zeros(0)
+        self.var_zz = np.zeros(0)
+        self.var_yz = np.zeros(0)
+        self.pair_keys = np.empty(0, dtype=np.int64)
+        self.pair_counts = np.zeros(0)
+        self.sampled_rows = 0
+        self.files = []
+
+    def _grow(self):
+        n = len(self.stations)
+        for name in ('rentals', 'same', 'var_yy', 'var_zz', 'var_yz'):
+            values = getattr(self, name)
+            if len(values) < n:
+                setattr(self, name, np.concatenate([values, np.zeros(n - len(values))]))
+
+    def add_file(self, path, n_blocks=DEFAULT_BLOCKS, block_rows=DEFAULT_BLOCK_ROWS, rng=None):
+        frame, block_ids, block_bytes, data_bytes, complete = sample_file_blocks(path, n_blocks, block_rows, rng)
+        rental_codes = self.stations.encode(frame['대여소번호'])
+        return_codes = self.stations.encode(frame['반납소번호'])
+        self._grow()
+        n_stations, n_blocks = len(self.stations), len(block_bytes)
+        self.sampled_rows += len(frame)
+        self.files.append((path, len(frame), complete))
+
+        valid = rental_codes != MISSING_CODE
+        cells = block_ids[valid] * n_stations + rental_codes[valid]
+        y = np.bincount(cells, minlength=n_blocks * n_stations).reshape(n_blocks, n_stations).astype(np.float64)
+        same_cells = cells[rental_codes[valid] == return_codes[valid]]
+        z = np.bincount(same_cells, minlength=n_blocks * n_stations).reshape(n_blocks, n_stations).astype(np.float64)
+
+        # 비율 추정: 파일 전체 = 데이터 바이트 × (표본 건수 / 표본 바이트)
+        scale = data_bytes / block_bytes.sum()
+        self.rentals += y.sum(axis=0) * scale
+        self.same += z.sum(axis=0) * scale
+
+        if not complete and n_blocks > 1:
+            # 블록 잔차 d_b = y_b - R x_b, V = X² (1 - f) / (B x̄²) × Σd² / (B - 1)
+            fraction = min(block_bytes.sum() / data_bytes, 1.0)
+            mean_bytes = block_bytes.mean()
+            factor = data_bytes ** 2 * (1 - fraction) / (n_blocks * mean_bytes ** 2) / (n_blocks - 1)
+            d_y = y - np.outer(block_bytes, y.sum(axis=0) / block_bytes.sum())
+            d_z = z - np.outer(block_bytes, z.sum(axis=0) / block_bytes.sum())
+            self.var_yy += factor * (d_y ** 2).sum(axis=0)
+            self.var_zz += factor * (d_z ** 2).sum(axis=0)
+            self.var_yz += factor * (d_y * d_z).sum(axis=0)
+
+        keys, counts = np.unique(pair_keys(rental_codes[valid], return_codes[valid]), return_counts=True)
+        self.pair_keys, self.pair_counts = sum_by_key(np.concatenate([self.pair_keys, keys]),
+                                                      np.concatenate([self.pair_counts, counts * scale]), dtype=None)
+        return self
+
+    @property
+    def estimated_rows(self):
+        return float(self.rentals.sum())
+
+    def total_interval(self, code, z=Z_95):
+        """대여소 추정 대여 건수와 (하한, 상한)"""
+        total = self.rentals[code]
+        margin = z * np.sqrt(self.var_yy[code])
+        return total, (max(total - margin, 0.0), total + margin)
+
+    def same_ratio_interval(self, code, z=Z_95):
+        """동일지점 반납 비율(%)과 (하한, 상한) - 선형화 분산 V(Ẑ - rŶ) / Ŷ²"""
+        total = self.rentals[code]
+        if total <= 0:
+            return 0.0, (0.0, 0.0)
+        ratio = self.same[code] / total
+        variance = self.var_zz[code] - 2 * ratio * self.var_yz[code] + ratio ** 2 * self.var_yy[code]
+        margin = z * np.sqrt(max(variance, 0.0)) / total
+        return ratio * 100, (max(ratio - margin, 0.0) * 100, min(ratio + margin, 1.0) * 100)
+
+    def ranking(self, k=10, z=Z_95):
+        """추정 대여 건수 상위 k 대여소 DataFrame - 신뢰구간이 다음 순위와 겹치지 않으면 순위확정"""
+        codes = np.flatnonzero(self.rentals > 0)
+        codes = codes[np.lexsort((codes, -self.rentals[codes]))]
+        totals = self.rentals[codes]
+        margins = z * np.sqrt(self.var_yy[codes])
+        top = min(k, len(codes))
+        # i위의 하한이 i+1위 이하 모든 대여소의 상한보다 크면 그 위치는 확정
+        upper_after = np.maximum.accumulate((totals + margins)[::-1])[::-1]
+        separated = np.r_[(totals - margins)[:-1] > upper_after[1:], True] if len(codes) else np.zeros(0, bool)
+        return pd.DataFrame({
+            '순위': np.arange(1, top + 1),
+            '대여소번호': self.stations.keys_for(codes[:top]),
+            '대여소명': [self.stations.name_of(code) or '' for code in codes[:top]],
+            '추정대여건수': totals[:top].round(),
+            '하한': np.maximum(totals[:top] - margins[:top], 0).round(),
+            '상한': (totals[:top] + margins[:top]).round(),
+            '순위확정': separated[:top],
+        })
+
+    def return_patterns(self, station_ids, top_n=5, z=Z_95):
+        """od.return_pattern_from_od 와 같은 형태 + 'total_ci', 'same_ratio_ci', 'approximate'"""
+        rental_codes, return_codes = split_pair_keys(self.pair_keys)
+        results = {}
+        for station_id in station_ids:
+            code = self.stations.code_of(station_id)
+            if code == MISSING_CODE or code >= len(self.rentals) or self.rentals[code] <= 0:
+                results[station_id] = None
+                continue
+            total, total_ci = self.total_interval(code, z)
+            same_ratio, same_ratio_ci = self.same_ratio_interval(code, z)
+            mask = (rental_codes == code) & (return_codes != MISSING_CODE)
+            dest_codes, dest_counts = return_codes[mask], self.pair_counts[mask]
+            order = np.lexsort((dest_codes, -dest_counts))[:top_n]
+            top_returns = pd.Series(dest_counts[order].round().astype(np.int64), name='count',
+                                    index=pd.Index(self.stations.keys_for(dest_codes[order]), name='반납소번호'))
+            results[station_id] = {
+                'total': int(round(total)),
+                'same_ratio': same_ratio,
+                'pattern': classify_pattern(same_ratio),
+                'top_returns': top_returns,
+                'same_count': int(round(self.same[code])),
+                'total_ci': total_ci,
+                'same_ratio_ci': same_ratio_ci,
+                'approximate': True,
+            }
+        return results
+
+
+def sample_estimates(file_paths, n_blocks=DEFAULT_BLOCKS, block_rows=DEFAULT_BLOCK_ROWS, seed=0):
+    """원본 파일 목록 → SampleEstimates (seed 가 같으면 같은 표본)"""
+    rng = np.random.default_rng(seed)
+    estimates = SampleEstimates()
+    for path in file_paths:
+        estimates.add_file(path, n_blocks, block_rows, rng)
+    return estimates
+
+
+def exact_return_patterns(file_paths, station_ids, top_n=5, report=None):
+    """표본 대신 원본 전체를 읽은 정확한 반납 패턴 (return_pattern_from_od 결과)
+
+    report 를 주면 파일 하나를 다 읽을 때마다 진행률(0~1)을 알린다 (background.BackgroundJob 용).
+    """
+    stations = StationDictionary()
+
+    def batches():
+        for i, path in enumerate(file_paths):
+            yield from iter_csv_batches([path])
+            if report is not None:
+                report((i + 1) / len(file_paths))
+
+    od_counts = aggregate_od(batches(), stations)
+    return return_pattern_from_od(od_counts, station_ids, stations, top_n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='원본 대여이력 표본 근사 집계 (대여소 순위/동일지점 반납 비율)')
+    parser.add_argument('--data-dir', default=None, help='원본 CSV 폴더')
+    parser.add_argument('--year', type=int, default=None, help='연도 (기본: 전체)')
+    parser.add_argument('--months', type=int, nargs='*', default=None, help='월 목록 (기본: 전체)')
+    parser.add_argument('--blocks', type=int, default=DEFAULT_BLOCKS, help='파일당 블록 수')
+    parser.add_argument('--block-rows', type=int, default=DEFAULT_BLOCK_ROWS, help='블록당 줄 수')
+    parser.add_argument('-k', type=int, default=10, help='순위 개수')
+    parser.add_argument('--seed', type=int, default=0, help='표본 난수 시드')
+    args = parser.parse_args()
+
+    files = period_files(args.year, args.months, args.data_dir)
+    if not files:
+        print('⏭️ 해당 기간 원본 대여이력이 없음')
+        return
+    estimates = sample_estimates(files, args.blocks, args.block_rows, args.seed)
+    rate = estimates.sampled_rows / max(estimates.estimated_rows, 1) * 100
+    print(f'표본 {estimates.sampled_rows:,}건 / 추정 전체 {estimates.estimated_rows:,.0f}건 ({rate:.1f}%), {len(files)}개 파일\n')
+    print(estimates.ranking(args.k).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""대시보드 집계를 메모리 맵 파일로 발행해 프로세스/세션 간 공유
+
+Streamlit 서버 프로세스를 여러 개 띄우면 st.cache_data 결과(pandas 객체)는 세션마다 복사되고,
+st.cache_resource 도 프로세스마다 따로 메모리에 올라간다. 집계(외국인 이용 큐브, OD 행렬,
+일별 누적 인덱스)를 한 번 비압축 파일로 써 두고 모든 프로세스가 메모리 맵으로 열면
+같은 서버에서는 운영체제 페이지 캐시의 한 복사본을 읽기 전용으로 나눠 쓴다.
+
+- 표(큐브): Arrow IPC 파일 → 숫자 컬럼은 복사 없는 읽기 전용 배열, 대여소(범주)는 코드만 복사
+- 배열(OD 행렬, 누적 인덱스): 배열마다 .npy 파일 → np.load(mmap_mode='r')
+- 파일명은 (이름, 세대, 키 해시) - 세대(입력 파일/변환 목록 해시)가 바뀌면 이전 세대 파일은 지운다.
+
+처음 발행하는 프로세스만 build() 를 실행하고, 동시에 발행하면 먼저 끝난 쪽 파일을 쓴다.
+파일을 쓸 수 없는 환경(읽기 전용 디스크 등)에서는 build() 결과를 그대로 돌려준다.
+
+    python -m ddareungi.shared --shared-dir data_store/_shared
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+from scipy import sparse
+
+from ddareungi import config
+
+META_FILE_NAME = 'meta.json'
+
+
+def _digest(value):
+    text = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def shared_path(name, generation, key, suffix='', shared_dir=None):
+    """발행 파일(또는 폴더) 경로 - name-세대해시-키해시"""
+    return os.path.join(shared_dir or config.SHARED_DIR, f'{name}-{_digest(generation)}-{_digest(key)}{suffix}')
+
+
+def prune_shared(name, generation, shared_dir=None):
+    """name 의 다른 세대 파일 삭제 - 다른 프로세스가 열고 있어 지울 수 없는 파일은 남겨 둠"""
+    shared_dir = shared_dir or config.SHARED_DIR
+    current = f'{name}-{_digest(generation)}-'
+    removed = 0
+    for path in glob.glob(os.path.join(shared_dir, f'{name}-*')):
+        base = os.path.basename(path)
+        if base.startswith(current) or '.tmp' in base:
+            continue
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def _tmp_path(path):
+    return f'{path}.tmp{os.getpid()}'
+
+
+# ---- 표 (Arrow IPC) ----
+
+def publish_frame(frame, path):
+    """DataFrame → 비압축 Arrow IPC 파일 (이미 있으면 그대로)"""
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    tmp_path = _tmp_path(path)
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def open_frame(path):
+    """Arrow IPC 파일을 메모리 맵으로 열어 DataFrame - 숫자 컬럼은 파일을 그대로 가리키는 읽기 전용 배열"""
+    table = ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return table.to_pandas(split_blocks=True, self_destruct=False)
+
+
+# ---- 배열 (.npy) ----
+
+def publish_arrays(arrays, path, meta=None):
+    """{이름: 배열} → 폴더 안 .npy 파일들과 meta.json (이미 있으면 그대로)"""
+    if os.path.exists(path):
+        return path
+    tmp_path = _tmp_path(path)
+    os.makedirs(tmp_path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, f'{name}.npy'), np.ascontiguousarray(array))
+    with open(os.path.join(tmp_path, META_FILE_NAME), 'w', encoding='utf-8') as f:
+        json.dump(meta or {}, f, ensure_ascii=False)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # 다른 프로세스가 먼저 발행함
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return path
+
+
+def open_arrays(path):
+    """발행된 폴더 → ({이름: 읽기 전용 메모리 맵 배열}, meta)"""
+    arrays = {}
+    for file_path in sorted(glob.glob(os.path.join(path, '*.npy'))):
+        arrays[os.path.basename(file_path)[:-len('.npy')]] = np.load(file_path, mmap_mode='r')
+    with open(os.path.join(path, META_FILE_NAME), encoding='utf-8') as f:
+        return arrays, json.load(f)
+
+
+def _shared(name, generation, key, build, publish, open_path, suffix, shared_dir):
+    path = shared_path(name, generation, key, suffix, shared_dir)
+    if not os.path.exists(path):
+        value = build()
+        if value is None:
+            return None
+        try:
+            publish(value, path)
+            prune_shared(name, generation, shared_dir)
+        except OSError:
+            return value
+    return open_path(path)
+
+
+def shared_frame(name, generation, key, build, shared_dir=None):
+    """발행된 표가 있으면 메모리 맵으로 열고, 없으면 build() 결과(DataFrame)를 발행한 뒤 연다"""
+    return _shared(name, generation, key, build, publish_frame, open_frame, '.arrow', shared_dir)
+
+
+# ---- 집계별 변환 ----
+
+def csr_arrays(matrix):
+    """CSR 행렬 → 발행용 배열 (정렬된 인덱스로 맞춰 읽기 전용에서도 다시 정렬하지 않게)"""
+    matrix = sparse.csr_matrix(matrix)
+    matrix.sum_duplicates()
+    matrix.sort_indices()
+    return {'data': matrix.data, 'indices': matrix.indices, 'indptr': matrix.indptr,
+            'shape': np.array(matrix.shape, dtype=np.int64)}
+
+
+def csr_from_arrays(arrays):
+    matrix = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                               shape=tuple(int(n) for n in arrays['shape']), copy=False)
+    matrix.has_sorted_indices = True
+    return matrix
+
+
+def shared_csr(name, generation, key, build, shared_dir=None):
+    """build() 가 만든 CSR 행렬을 발행하고 메모리 맵 배열로 다시 만든 행렬 (배열 복사 없음)"""
+    def publish(matrix, path):
+        publish_arrays(csr_arrays(matrix), path)
+
+    def open_path(path):
+        return csr_from_arrays(open_arrays(path)[0])
+
+    return _shared(name, generation, key, build, publish, open_path, '', shared_dir)
+
+
+def shared_daily_index(generation, build, shared_dir=None):
+    """일별 인덱스 누적 배열을 발행하고 메모리 맵 배열로 만든 DailyIndex"""
+    from ddareungi.daily_index import DailyIndex
+
+    def publish(index, path):
+        arrays = {f'cumulative_{measure}': values for measure, values in index.cumulative.items()}
+        arrays['keys'] = index.keys.astype(str)
+        arrays['names'] = np.array(['' if name is None else str(name) for name in index.names])
+        publish_arrays(arrays, path, {'start': str(index.start)})
+
+    def open_path(path):
+        arrays, meta = open_arrays(path)
+        cumulative = {name[len('cumulative_'):]: values for name, values in arrays.items()
+                      if name.startswith('cumulative_')}
+        names = [name or None for name in arrays['names'].tolist()]
+        return DailyIndex.from_cumulative(meta['start'], arrays['keys'].tolist(), names, cumulative)
+
+    return _shared('daily_index', generation, None, build, publish, open_path, '', shared_dir)
+
+
+def shared_files(shared_dir=None):
+    """발행된 파일/폴더와 크기(MB) 목록"""
+    shared_dir = shared_dir or config.SHARED_DIR
+    rows = []
+    for path in sorted(glob.glob(os.path.join(shared_dir, '*'))):
+        if os.path.isdir(path):
+            size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        else:
+            size = os.path.getsize(path)
+        rows.append((os.path.basename(path), size / (1024 * 1024)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대시보드 공유 집계(메모리 맵 파일) 목록/정리')
+    parser.add_argument('--shared-dir', default=None, help='공유 파일 폴더 (기본: DDAREUNGI_SHARED_DIR)')
+    parser.add_argument('--clear', action='store_true', help='발행된 파일을 모두 지움 (대시보드를 끈 뒤 실행)')
+    args = parser.parse_args()
+
+    shared_dir = args.shared_dir or config.SHARED_DIR
+    if args.clear:
+        shutil.rmtree(shared_dir, ignore_errors=True)
+        print(f'✅ {shared_dir} 삭제')
+        return
+    files = shared_files(shared_dir)
+    if not files:
+        print(f'⏭️ 발행된 공유 집계가 없음 ({shared_dir})')
+    for name, size in files:
+        print(f'✅ {name}: {size:,.1f}MB')
+
+
+if __name__ == '__main__':
+    main()
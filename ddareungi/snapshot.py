@@ -0,0 +1,157 @@
+"""노트북(01~05) 실행 결과 스냅샷
+
+원본 CSV가 없는 환경(배포된 대시보드 등)에서는 이 값으로 화면을 그린다.
+원본이 있으면 loaders 모듈이 같은 형태의 값을 직접 계산한다.
+"""
+
+# 01. 외국인 따릉이 이용패턴
+FOREIGN_USAGE = {
+    # 연도별 이용량
+    'annual_data': {2021: 19049, 2022: 50761, 2023: 64342, 2024: 71077},
+    # 월별 이용량
+    'monthly_data': {
+        2022: [518, 566, 1570, 4838, 6350, 5735, 5640, 4198, 7278, 7154, 5981, 933],
+        2023: [502, 783, 2473, 3775, 5325, 9562, 6392, 6560, 9621, 11592, 5689, 2068],
+        2024: [1403, 2043, 5959, 10403, 9390, 10103, 6602, 5091, 7271, 7108, 4296, 1408]
+    },
+    # 요일별 이용량 (weekday_years 순서)
+    'weekday_years': [2022, 2023, 2024],
+    'weekday_data': {
+        '월요일': [6156, 9297, 9654],
+        '화요일': [6343, 8039, 8637],
+        '수요일': [6207, 7600, 8930],
+        '목요일': [5973, 7621, 9208],
+        '금요일': [7252, 9208, 9995],
+        '토요일': [9502, 10686, 11758],
+        '일요일': [9328, 11891, 12895]
+    }
+}
+
+# 02. 전체 따릉이 중 외국인 비중
+FOREIGN_RATIO = {
+    'years': [2022, 2023, 2024],
+    'foreign_counts': [50761, 64342, 71077],
+    'general_counts': [40950756, 44904665, 43849559],
+    'total_counts': [41001517, 44969007, 43920636],
+    'foreign_ratios': [0.124, 0.143, 0.162]
+}
+
+# 03. 외국인 대여반납 장소패턴
+STATION_PATTERN = {
+    # 연도별 TOP 5 대여 장소
+    'yearly_rental_top5': {
+        2021: [
+            ("207. 여의나루역 1번출구 앞", 587),
+            ("502. 뚝섬유원지역 1번출구 앞", 290),
+            ("2262. 한신16차아파트 119동 앞", 215),
+            ("3010.홍대입구역 3번출구", 183),
+            ("272. 당산육갑문", 179)
+        ],
+        2022: [
+            ("207. 여의나루역 1번출구 앞", 1823),
+            ("502. 뚝섬유원지역 1번출구 앞", 666),
+            ("4217. 한강공원 망원나들목", 661),
+            ("3515. 서울숲 관리사무소", 562),
+            ("2262. 한신16차아파트 119동 앞", 559)
+        ],
+        2023: [
+            ("207. 여의나루역 1번출구 앞", 2236),
+            ("3515. 서울숲 관리사무소", 922),
+            ("2262. 한신16차아파트 119동 앞", 850),
+            ("249. 여의도중학교 옆", 724),
+            ("502. 뚝섬유원지역 1번출구 앞", 724)
+        ],
+        2024: [
+            ("207. 여의나루역 1번출구 앞", 1990),
+            ("4217. 한강공원 망원나들목", 1114),
+            ("3515. 서울숲 관리사무소", 1109),
+            ("502. 자양(뚝섬한강공원)역 1번출구 앞", 857),
+            ("474.동대문역사문화공원역 1번출구 뒤편", 651)
+        ]
+    },
+    # 급성장 TOP 10 (대여소, 이전 연도, 최근 연도, 증가율)
+    'growth_years': (2023, 2024),
+    'growth_data': [
+        ("502. 자양(뚝섬한강공원)역 1번출구 앞", 0, 857, "신규 등장"),
+        ("4217. 한강공원 망원나들목", 724, 1114, "+53.9%"),
+        ("5870. LG트윈타워 앞", 265, 499, "+88.3%"),
+        ("2217.아크로리버뷰 부지 앞", 134, 365, "+172.4%"),
+        ("3552.서울숲 공영주차장앞", 373, 582, "+56.0%"),
+        ("302. 경복궁역 6번출구 뒤", 0, 190, "신규 등장"),
+        ("3515. 서울숲 관리사무소", 922, 1109, "+20.3%"),
+        ("4244. 당인리발전소 공원 앞", 160, 313, "+95.6%"),
+        ("2525.반포쇼핑타운 2동 앞", 448, 596, "+33.0%"),
+        ("3559.성동구민종합체육센터 앞", 216, 356, "+64.8%")
+    ],
+    # 최근 연도 대여/반납 TOP 5
+    'latest_year': 2024,
+    'rental_top5_latest': [
+        "207. 여의나루역 1번출구 앞",
+        "4217. 한강공원 망원나들목",
+        "3515. 서울숲 관리사무소",
+        "502. 자양(뚝섬한강공원)역 1번출구 앞",
+        "474.동대문역사문화공원역 1번출구 뒤편"
+    ],
+    'return_top5_latest': [
+        "207. 여의나루역 1번출구 앞",
+        "4217. 한강공원 망원나들목",
+        "502. 자양(뚝섬한강공원)역 1번출구 앞",
+        "2525.반포쇼핑타운 2동 앞",
+        "3515. 서울숲 관리사무소"
+    ]
+}
+
+# 04. 전체 따릉이 이용객 반납장소 (2024년 1~6월)
+RETURN_PATTERN_RESULTS = {
+    '207': {'total': 50175, 'same_ratio': 21.4, 'pattern': '이동형'},
+    '4217': {'total': 73751, 'same_ratio': 25.4, 'pattern': '이동형'},
+    '3515': {'total': 15745, 'same_ratio': 35.1, 'pattern': '이동형'},
+    '502': {'total': 73157, 'same_ratio': 22.7, 'pattern': '이동형'},
+    '474': {'total': 13947, 'same_ratio': 7.9, 'pattern': '이동형'}
+}
+
+# 05. 해외관광객 추이
+TOURIST = {
+    # 연령대별
+    'age_data': {
+        '2023': {'0-20세': 1141274, '21-30세': 2789771, '31-40세': 2267755,
+                 '41-50세': 1617046, '51-60세': 1349707, '61세 이상': 1110580},
+        '2024': {'0-20세': 1467487, '21-30세': 3966890, '31-40세': 3446258,
+                 '41-50세': 2365782, '51-60세': 1957080, '61세 이상': 2024923}
+    },
+    # 대륙별
+    'continent_data': {
+        '아시아주': {'2023': 8401391, '2024': 13113511},
+        '미주': {'2023': 1373227, '2024': 1719511},
+        '구주': {'2023': 918059, '2024': 1140953},
+        '대양주': {'2023': 240864, '2024': 289685},
+        '아프리카': {'2023': 57253, '2024': 70758},
+        '교포': {'2023': 40663, '2024': 34989}
+    },
+    # 성별
+    'gender_data': {
+        '2017': {'전체': 13335758, '남자': 5533199, '여자': 6806301, '여성비율': 51.0},
+        '2018': {'전체': 15346879, '남자': 6229185, '여자': 8195792, '여성비율': 53.4},
+        '2019': {'전체': 17502756, '남자': 6768303, '여자': 9695380, '여성비율': 55.4},
+        '2020': {'전체': 2519118, '남자': 978594, '여자': 1156517, '여성비율': 45.9},
+        '2021': {'전체': 967003, '남자': 335894, '여자': 196694, '여성비율': 20.3},
+        '2022': {'전체': 3198017, '남자': 1403186, '여자': 1290033, '여성비율': 40.3},
+        '2023': {'전체': 11031665, '남자': 4233401, '여자': 6042732, '여성비율': 54.8},
+        '2024': {'전체': 16369629, '남자': 5979930, '여자': 9248490, '여성비율': 56.5}
+    },
+    # 장기 추세
+    'years_long': ['2010', '2011', '2012', '2013', '2014', '2015', '2016',
+                   '2017', '2018', '2019', '2020', '2021', '2022', '2023', '2024'],
+    'total_visitors_long': [8797658, 9794796, 11140028, 12175550, 14201516, 13231651,
+                            17241823, 13335758, 15346879, 17502756, 2519118, 967003,
+                            3198017, 11031665, 16369629],
+    # 국가별
+    'countries_data': {
+        '일본': [3023009, 3289051, 3518792, 2747750, 2280434, 1837782, 2297893,
+                 2311447, 2948527, 3271706, 430742, 15265, 296867, 2316429, 3224079],
+        '중국': [1875157, 2220196, 2836892, 4326869, 6126865, 5984170, 8067722,
+                 4169353, 4789512, 6023021, 686430, 170215, 227358, 2019424, 4603273],
+        '미국': [652889, 661503, 697866, 722315, 770305, 767613, 866186,
+                 868881, 967992, 1044038, 220417, 204025, 543648, 1086415, 1320108]
+    }
+}
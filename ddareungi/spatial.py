@@ -0,0 +1,288 @@
+"""대여소 위치 공간 인덱스 - 반경 검색과 권역(인접 대여소 묶음) 합계
+
+TOP5 목록은 대여소를 하나씩 따로 보지만 502/3515(서울숲·뚝섬), 207/249(여의도)처럼
+걸어서 몇 분 거리의 대여소는 사실상 한 권역이다. 대여소 정보 파일의 위경도를
+평균 위도 기준 평면 좌표(m)로 바꿔 KD-tree 를 만들어 두고,
+- 반경 검색: 한 대여소(또는 지점)에서 R m 안의 대여소
+- 권역: 서로 R m 안에 있는 대여소를 이어 붙인 연결 요소 (single linkage)
+- 권역/반경 합계: 대여소번호 컬럼이 있는 집계표(일별 인덱스 기간 합계 등)를 권역별로 합산
+을 수천 개 대여소 전체에 대해 수 ms 안에 계산한다.
+
+권역은 이어 붙이는 방식이라 대여소가 촘촘한 지역에서 R 을 크게 잡으면 권역이 길게 이어진다 (기본 150m).
+
+    python -m ddareungi.spatial --data-dir .. --station 207 --radius 500
+"""
+import argparse
+import csv
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from ddareungi import config
+from ddareungi.loaders import find_data_file
+from ddareungi.stations import canonical_station_key
+
+EARTH_RADIUS_M = 6_371_000
+DEFAULT_RADIUS_M = 500
+DEFAULT_CLUSTER_RADIUS_M = 150
+
+# 서울 범위를 벗어난 좌표(0, 결측 대체값 등)는 버림
+LAT_RANGE = (33.0, 39.0)
+LON_RANGE = (124.0, 132.0)
+
+
+def _header_label(value):
+    """'대여소\\n번호' 같은 머리글 → 공백/줄바꿈 없는 문자열"""
+    return '' if pd.isna(value) else re.sub(r'\s+', '', str(value))
+
+
+def _find_column(labels, keyword, exclude=()):
+    for i, label in enumerate(labels):
+        if keyword in label and i not in exclude:
+            return i
+    return None
+
+
+def read_station_info(path):
+    """대여소 정보 CSV → 대여소번호(정규)/대여소명/자치구/위도/경도 DataFrame
+
+    원본은 설명 줄 뒤에 '위도'가 있는 머리글 줄이 오고, '소재지(위치)' 아래에 자치구/상세주소가
+    한 줄 더 붙은 두 줄 머리글이다. 아래 줄에 이름이 있는 칸은 그 이름을 쓴다.
+    """
+    rows = None
+    for encoding in config.STATION_INFO_ENCODINGS:
+        try:
+            # 설명 줄과 본문의 칸 수가 달라 read_csv 대신 줄 단위로 읽음 (수천 줄)
+            with open(path, encoding=encoding, newline='') as f:
+                rows = list(csv.reader(f))
+            break
+        except UnicodeDecodeError:
+            continue
+    if rows is None:
+        raise ValueError(f'대여소 정보 파일 인코딩을 알 수 없음: {path}')
+    width = max((len(row) for row in rows), default=0)
+    raw = pd.DataFrame([row + [''] * (width - len(row)) for row in rows])
+
+    header_rows = [i for i in range(min(len(raw), 20))
+                   if any(_header_label(value) == '위도' for value in raw.iloc[i])]
+    if not header_rows:
+        raise KeyError(f'위도 컬럼을 찾을 수 없음: {path}')
+    header_row = header_rows[0]
+    labels = [_header_label(value) for value in raw.iloc[header_row]]
+    lat_col = labels.index('위도')
+    body_start = header_row + 1
+    if body_start < len(raw) and pd.isna(pd.to_numeric(raw.iat[body_start, lat_col], errors='coerce')):
+        sub_labels = [_header_label(value) for value in raw.iloc[body_start]]
+        labels = [sub or label for label, sub in zip(labels, sub_labels)]
+        body_start += 1
+    body = raw.iloc[body_start:]
+
+    key_col = _find_column(labels, '번호')
+    name_col = _find_column(labels, '명', exclude=(key_col,))
+    district_col = _find_column(labels, '자치구')
+    if key_col is None:
+        raise KeyError(f'대여소번호 컬럼을 찾을 수 없음: {path}')
+
+    info = pd.DataFrame({
+        '대여소번호': body.iloc[:, key_col].map(canonical_station_key).to_numpy(),
+        '대여소명': body.iloc[:, name_col].str.strip().to_numpy() if name_col is not None else None,
+        '자치구': body.iloc[:, district_col].str.strip().to_numpy() if district_col is not None else None,
+        '위도': pd.to_numeric(body.iloc[:, lat_col], errors='coerce').to_numpy(),
+        '경도': pd.to_numeric(body.iloc[:, labels.index('경도')], errors='coerce').to_numpy(),
+    })
+    valid = (info['대여소번호'].notna() & info['위도'].between(*LAT_RANGE) & info['경도'].between(*LON_RANGE))
+    return info[valid].drop_duplicates('대여소번호', keep='last').reset_index(drop=True)
+
+
+def load_station_info(data_dir=None):
+    """DATA_DIR 의 대여소 정보 파일 (없으면 None)"""
+    path = find_data_file(config.STATION_INFO_GLOB, data_dir)
+    return read_station_info(path) if path else None
+
+
+class StationIndex:
+    """대여소 좌표 KD-tree
+
+    위경도는 평균 위도에서의 등거리 근사(서울 크기에서 오차 0.1% 미만)로 평면 m 좌표로 바꾼다.
+    """
+
+    def __init__(self, keys, names, lat, lon, districts=None):
+        self.keys = np.asarray(keys, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+        self.districts = np.asarray(districts if districts is not None else [None] * len(self.keys), dtype=object)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.origin = (float(self.lat.mean()), float(self.lon.mean())) if len(self.lat) else (0.0, 0.0)
+        self.xy = self.project(self.lat, self.lon)
+        self.tree = cKDTree(self.xy)
+        self._position = {key: i for i, key in enumerate(self.keys)}
+        self._clusters = {}
+
+    @classmethod
+    def from_frame(cls, info):
+        return cls(info['대여소번호'], info['대여소명'], info['위도'], info['경도'], info['자치구'])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return canonical_station_key(key) in self._position
+
+    def project(self, lat, lon):
+        """위경도 → 평균 위도 기준 평면 (x, y) m"""
+        lat0, lon0 = np.radians(self.origin)
+        x = (np.radians(lon) - lon0) * np.cos(lat0) * EARTH_RADIUS_M
+        y = (np.radians(lat) - lat0) * EARTH_RADIUS_M
+        return np.column_stack([x, y])
+
+    def position_of(self, key):
+        """대여소번호 → 인덱스 위치 (좌표가 없으면 None)"""
+        return self._position.get(canonical_station_key(key))
+
+    def positions_for(self, keys):
+        """대여소번호 배열 → 인덱스 위치 배열 (좌표가 없으면 -1)"""
+        return np.array([self._position.get(canonical_station_key(key), -1) for key in keys], dtype=np.int64)
+
+    def nearby(self, key=None, radius_m=DEFAULT_RADIUS_M, lat=None, lon=None):
+        """대여소(또는 위경도 지점)에서 radius_m 안의 대여소 - 가까운 순 (대여소번호, 대여소명, 자치구, 거리(m))"""
+        if key is not None:
+            position = self.position_of(key)
+            if position is None:
+                raise KeyError(f'좌표가 없는 대여소: {key}')
+            point = self.xy[position]
+        else:
+            point = self.project(np.array([lat]), np.array([lon]))[0]
+        positions = np.asarray(self.tree.query_ball_point(point, radius_m), dtype=np.int64)
+        distances = np.hypot(*(self.xy[positions] - point).T) if len(positions) else np.zeros(0)
+        order = np.lexsort((positions, distances))
+        positions = positions[order]
+        return pd.DataFrame({
+            '대여소번호': self.keys[positions],
+            '대여소명': self.names[positions],
+            '자치구': self.districts[positions],
+            '거리(m)': distances[order].round(0),
+        })
+
+    def adjacency(self, radius_m):
+        """radius_m 안의 대여소 쌍 희소 행렬 (자기 자신 포함, 대칭)"""
+        n = len(self)
+        pairs = self.tree.query_pairs(radius_m, output_type='ndarray')
+        rows = np.concatenate([pairs[:, 0], pairs[:, 1], np.arange(n)])
+        cols = np.concatenate([pairs[:, 1], pairs[:, 0], np.arange(n)])
+        return sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=(n, n))
+
+    def clusters(self, radius_m=DEFAULT_CLUSTER_RADIUS_M):
+        """대여소별 권역 번호 - radius_m 안의 대여소끼리 이어 붙인 연결 요소 (반경별로 캐시)"""
+        if radius_m not in self._clusters:
+            _, labels = connected_components(self.adjacency(radius_m), directed=False)
+            self._clusters[radius_m] = labels
+        return self._clusters[radius_m]
+
+    def _aligned_values(self, table, measures):
+        """대여소번호 컬럼이 있는 집계표 → (인덱스 대여소 수, 측정값 수) 배열, 좌표 없는 대여소의 건수"""
+        positions = self.positions_for(table['대여소번호'])
+        counts = table[measures].fillna(0).to_numpy(dtype=np.float64)
+        found = positions >= 0
+        values = np.zeros((len(self), len(measures)))
+        np.add.at(values, positions[found], counts[found])
+        return values, dict(zip(measures, counts[~found].sum(axis=0).round().astype(np.int64).tolist()))
+
+    def neighborhood_totals(self, table, measures, radius_m=DEFAULT_RADIUS_M):
+        """대여소마다 자신 포함 radius_m 안의 대여소 합계 - 집계표에 '반경 합계' 컬럼을 붙여 반환"""
+        values, _ = self._aligned_values(table, measures)
+        totals = self.adjacency(radius_m) @ values
+        positions = self.positions_for(table['대여소번호'])
+        result = table.copy()
+        for i, measure in enumerate(measures):
+            column = np.where(positions >= 0, totals[np.maximum(positions, 0), i], np.nan)
+            result[f'반경{radius_m}m {measure}'] = column
+        return result
+
+    def cluster_table(self, table, measures, radius_m=DEFAULT_CLUSTER_RADIUS_M, min_stations=1):
+        """권역별 합계 - 첫 측정값 큰 순
+
+        권역 이름은 첫 측정값이 가장 큰 대여소 이름(외 n곳), 위경도는 대여소 좌표 평균이다.
+        좌표가 없는 대여소의 건수는 attrs['좌표없음'] 에 따로 남긴다.
+        """
+        labels = self.clusters(radius_m)
+        values, missing = self._aligned_values(table, measures)
+        n_clusters = labels.max() + 1 if len(labels) else 0
+        sums = np.zeros((n_clusters, len(measures)))
+        np.add.at(sums, labels, values)
+        sizes = np.bincount(labels, minlength=n_clusters)
+
+        # 권역 대표 대여소: 첫 측정값 최대 (같으면 앞 위치)
+        order = np.lexsort((np.arange(len(labels)), -values[:, 0], labels))
+        leaders = order[np.r_[True, labels[order][1:] != labels[order][:-1]]] if len(order) else order
+        by_cluster = np.argsort(labels, kind='stable')
+        members = [', '.join(keys) for keys in np.split(self.keys[by_cluster], np.cumsum(sizes)[:-1])]
+
+        result = pd.DataFrame({
+            '권역': np.arange(n_clusters),
+            '대표대여소': [f'{self.keys[i]}. {self.names[i] or ""}'.strip() for i in leaders],
+            '대여소수': sizes,
+            '대여소번호': members,
+            '위도': np.bincount(labels, self.lat, n_clusters) / np.maximum(sizes, 1),
+            '경도': np.bincount(labels, self.lon, n_clusters) / np.maximum(sizes, 1),
+        })
+        for i, measure in enumerate(measures):
+            result[measure] = sums[:, i].round().astype(np.int64)
+        result = result[result['대여소수'] >= min_stations]
+        result = result.sort_values([measures[0], '권역'], ascending=[False, True], kind='stable')
+        result = result.reset_index(drop=True)
+        result.attrs['좌표없음'] = missing
+        return result
+
+    def cluster_of(self, key, radius_m=DEFAULT_CLUSTER_RADIUS_M):
+        """대여소가 속한 권역의 대여소번호 목록"""
+        position = self.position_of(key)
+        if position is None:
+            return []
+        labels = self.clusters(radius_m)
+        return self.keys[labels == labels[position]].tolist()
+
+
+def load_station_index(data_dir=None):
+    """대여소 정보 파일로 만든 StationIndex (파일이 없으면 None)"""
+    info = load_station_info(data_dir)
+    return StationIndex.from_frame(info) if info is not None and len(info) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대여소 반경 검색과 권역 요약')
+    parser.add_argument('--data-dir', default=None, help='대여소 정보 CSV 폴더')
+    parser.add_argument('--store-dir', default=None, help='일별 인덱스가 있는 데이터셋 폴더 (권역 합계용)')
+    parser.add_argument('--station', default=None, help='반경 검색 기준 대여소번호')
+    parser.add_argument('--radius', type=float, default=DEFAULT_RADIUS_M, help='반경 검색 거리 (m)')
+    parser.add_argument('--cluster-radius', type=float, default=DEFAULT_CLUSTER_RADIUS_M, help='권역으로 잇는 거리 (m)')
+    parser.add_argument('--top', type=int, default=10, help='출력할 권역 수')
+    args = parser.parse_args()
+
+    index = load_station_index(args.data_dir)
+    if index is None:
+        print(f'⏭️ 대여소 정보 파일이 없음 ({config.STATION_INFO_GLOB})')
+        return
+    labels = index.clusters(args.cluster_radius)
+    print(f'✅ 대여소 {len(index):,}개, 권역 {labels.max() + 1:,}개 (반경 {args.cluster_radius:g}m)')
+
+    if args.station:
+        print(f'\n{args.station}번 대여소 반경 {args.radius:g}m')
+        print(index.nearby(args.station, args.radius).to_string(index=False))
+
+    from ddareungi.daily_index import daily_index_path, load_daily_index
+    if not os.path.exists(daily_index_path(args.store_dir)):
+        return
+    summary = load_daily_index(args.store_dir).range_summary()
+    measures = [measure for measure in ('대여건수', '반납건수', '외국인대여건수') if measure in summary]
+    table = index.cluster_table(summary, measures, args.cluster_radius, min_stations=2)
+    print(f'\n여러 대여소가 묶인 권역 상위 {args.top}개')
+    print(table.drop(columns=['권역', '대여소번호', '위도', '경도']).head(args.top).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""변환된 대여이력/외국인 이용 큐브에 대한 DuckDB SQL 조회
+
+Parquet 파일을 그대로 뷰로 연결하므로 데이터를 메모리에 올리지 않고,
+필요한 컬럼만 읽고(projection pushdown) year/month 파티션과 row group 통계로 파일을 건너뛴다
+(predicate pushdown). 노트북에서는 query()로 자유롭게 SQL을 쓰고,
+대시보드 필터는 rental_summary()가 값 바인딩(?) 쿼리로 바꾼다.
+
+뷰:
+- rentals: 대여이력 (RENTAL_SCHEMA 컬럼 + year, month 파티션)
+- stations: 대여소 사전 (code, key, name)
+- foreign_usage: 외국인 이용 큐브 (연도, 월, 일, 요일, 대여소, 대여건수, 반납건수)
+
+duckdb 패키지가 필요하다 (pip install duckdb).
+"""
+import os
+import threading
+
+from ddareungi import config
+from ddareungi.cube import cube_path
+from ddareungi.ingest import rentals_dir
+from ddareungi.stations import canonical_station_key, stations_path
+
+# 대여/반납 기준별 (시각 컬럼, 대여소코드 컬럼)
+BASIS_COLUMNS = {
+    '대여': ('대여일시', '대여소코드'),
+    '반납': ('반납일시', '반납소코드'),
+}
+
+# 묶음 기준 → SQL 식 ({time}: 기준 시각 컬럼, {station}: 기준 대여소코드 컬럼)
+GROUP_EXPRESSIONS = {
+    '대여소': '{station}',
+    '시간대': 'hour({time})',
+    '요일': 'isodow({time}) - 1',
+    '일자': 'CAST({time} AS DATE)',
+    '월': 'month({time})',
+}
+
+DEFAULT_LIMIT = 20
+
+
+def _quote_path(path):
+    return "'" + path.replace('\\', '/').replace("'", "''") + "'"
+
+
+def _quote_name(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SQLEngine:
+    """store_dir 의 Parquet 데이터셋을 뷰로 연결한 in-process DuckDB
+
+    연결 하나를 여러 세션이 공유하고, 쿼리마다 cursor()로 따로 실행한다.
+    """
+
+    def __init__(self, store_dir=None, threads=None):
+        import duckdb
+
+        self.store_dir = store_dir or config.STORE_DIR
+        self._connection = duckdb.connect(':memory:')
+        if threads:
+            self._connection.execute(f'SET threads = {int(threads)}')
+        self._lock = threading.Lock()
+        self.views = self._create_views()
+
+    def _create_views(self):
+        views = []
+        rental_files = os.path.join(rentals_dir(self.store_dir), '*', '*', '*.parquet')
+        if os.path.isdir(rentals_dir(self.store_dir)):
+            self._connection.execute(
+                f'CREATE VIEW rentals AS SELECT * FROM read_parquet({_quote_path(rental_files)}, hive_partitioning = true)')
+            views.append('rentals')
+        if os.path.exists(stations_path(self.store_dir)):
+            self._connection.execute(
+                f'CREATE VIEW stations AS SELECT * FROM read_parquet({_quote_path(stations_path(self.store_dir))})')
+            views.append('stations')
+        if os.path.exists(cube_path(self.store_dir)):
+            self._connection.execute(
+                f'CREATE VIEW foreign_usage AS SELECT * FROM read_parquet({_quote_path(cube_path(self.store_dir))})')
+            views.append('foreign_usage')
+        return views
+
+    def query(self, sql, params=None):
+        """SQL 실행 결과 DataFrame (params 는 ? 자리에 바인딩)"""
+        with self._lock:
+            cursor = self._connection.cursor()
+        try:
+            return cursor.execute(sql, params or []).df()
+        finally:
+            cursor.close()
+
+    def rental_summary(self, basis='대여', group_by='대여소', year=None, months=None, weekdays=None,
+                       hours=None, station_codes=None, station_keyword=None, user_types=None,
+                       limit=DEFAULT_LIMIT):
+        """대시보드 필터 → 대여이력 집계 (구분, 건수, 평균이용시간(분), 평균이용거리(M))
+
+        basis: '대여'/'반납' - 시간/요일/대여소 조건과 묶음에 쓰는 기준
+        year/months: 파티션(대여 월) 조건, weekdays: 0=월요일, hours: (시작, 끝) 포함 범위
+        station_keyword: 숫자면 대여소번호('00207'도 207), 아니면 대여소명 일부
+        group_by 가 '대여소'면 건수 내림차순 limit 개, 그 외에는 구분 순서대로 전체.
+        """
+        if basis not in BASIS_COLUMNS:
+            raise ValueError(f'알 수 없는 기준: {basis}')
+        if group_by not in GROUP_EXPRESSIONS:
+            raise ValueError(f'알 수 없는 묶음 기준: {group_by}')
+        time_col, station_col = (_quote_name(col) for col in BASIS_COLUMNS[basis])
+        group_expr = GROUP_EXPRESSIONS[group_by].format(time=time_col, station=station_col)
+
+        conditions, params = [], []
+        if year is not None:
+            conditions.append('year = ?')
+            params.append(int(year))
+        if months:
+            conditions.append(f'month IN ({", ".join("?" * len(months))})')
+            params.extend(int(month) for month in months)
+        if weekdays:
+            conditions.append(f'isodow({time_col}) - 1 IN ({", ".join("?" * len(weekdays))})')
+            params.extend(int(day) for day in weekdays)
+        if hours is not None:
+            conditions.append(f'hour({time_col}) BETWEEN ? AND ?')
+            params.extend(int(hour) for hour in hours)
+        if station_codes:
+            conditions.append(f'{station_col} IN ({", ".join("?" * len(station_codes))})')
+            params.extend(int(code) for code in station_codes)
+        if station_keyword and station_keyword.strip():
+            keyword = station_keyword.strip()
+            if keyword.isdigit():
+                conditions.append(f'{station_col} IN (SELECT code FROM stations WHERE key = ?)')
+                params.append(canonical_station_key(keyword))
+            else:
+                conditions.append(f'{station_col} IN (SELECT code FROM stations WHERE name ILIKE ?)')
+                params.append(f'%{keyword}%')
+        if user_types:
+            conditions.append(f'"이용자종류" IN ({", ".join("?" * len(user_types))})')
+            params.extend(user_types)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+
+        sql = f'''
+            SELECT {group_expr} AS 구분, COUNT(*) AS 건수,
+                   AVG("이용시간(분)") AS "평균이용시간(분)", AVG("이용거리(M)") AS "평균이용거리(M)"
+            FROM rentals {where}
+            GROUP BY 1
+        '''
+        if group_by == '대여소':
+            sql = f'''
+                SELECT s.key AS 대여소번호, s.name AS 대여소명, r.*
+                FROM ({sql} ORDER BY 건수 DESC, 구분 LIMIT ?) r
+                LEFT JOIN stations s ON s.code = r.구분
+                ORDER BY r.건수 DESC, r.구분
+            '''
+            params.append(int(limit))
+        else:
+            sql += ' ORDER BY 1'
+        return self.query(sql, params)
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,151 @@
+"""대여소번호 정규화와 공용 대여소 사전
+
+원본 대여소번호는 월마다 207 / '207' / '00207' / 207.0 처럼 형태가 다르다.
+값 종류(수천 개)만 정규화한 뒤 pd.factorize 결과에 매핑하므로 행 단위 .apply 없이
+전체 컬럼을 한 번에 정수 코드(int32)로 바꾼다.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from ddareungi import config
+
+MISSING_CODE = -1
+STATIONS_FILE_NAME = 'stations.parquet'
+
+
+def canonical_station_key(value):
+    """대여소번호 한 개를 정규 문자열로 (0패딩/소수점 제거, 결측은 None)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return None
+        return str(int(value)) if float(value).is_integer() else str(value)
+
+    key = str(value).strip()
+    if key.endswith('.0') and key[:-2].isdigit():
+        key = key[:-2]
+    if key.isdigit():
+        return str(int(key))
+    return key or None
+
+
+class StationDictionary:
+    """정규 대여소번호 ↔ 정수 코드 ↔ 대여소명 사전
+
+    코드는 처음 등장한 순서대로 0부터 부여되며 한 번 부여된 코드는 바뀌지 않는다.
+    """
+
+    def __init__(self):
+        self._code_of = {}
+        self.keys = []
+        self.names = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return canonical_station_key(key) in self._code_of
+
+    def add_key(self, key):
+        """정규 대여소번호를 사전에 추가하고 코드를 반환"""
+        code = self._code_of.get(key)
+        if code is None:
+            code = len(self.keys)
+            self._code_of[key] = code
+            self.keys.append(key)
+        return code
+
+    def encode(self, ids, names=None, add=True):
+        """대여소번호 컬럼 → int32 코드 배열
+
+        add=False 이면 사전에 없는 번호는 MISSING_CODE(-1)가 된다.
+        names 를 주면 코드별로 처음 본 대여소명을 기록한다.
+        """
+        raw_codes, uniques = pd.factorize(pd.Series(ids), use_na_sentinel=True)
+        lookup = np.empty(len(uniques) + 1, dtype=np.int32)
+        for i, value in enumerate(uniques):
+            key = canonical_station_key(value)
+            if key is None:
+                lookup[i] = MISSING_CODE
+            elif add:
+                lookup[i] = self.add_key(key)
+            else:
+                lookup[i] = self._code_of.get(key, MISSING_CODE)
+        lookup[-1] = MISSING_CODE
+        codes = lookup[raw_codes]
+
+        if names is not None:
+            self._record_names(codes, names)
+        return codes
+
+    def _record_names(self, codes, names):
+        named = pd.DataFrame({'code': codes, 'name': pd.Series(names).to_numpy()})
+        named = named[(named['code'] >= 0) & named['name'].notna()]
+        named = named.drop_duplicates('code')
+        for code, name in zip(named['code'], named['name']):
+            self.names.setdefault(int(code), str(name).strip())
+
+    def code_of(self, key):
+        """정규 대여소번호(또는 패딩된 번호) → 코드, 없으면 MISSING_CODE"""
+        return self._code_of.get(canonical_station_key(key), MISSING_CODE)
+
+    def key_of(self, code):
+        return self.keys[code] if 0 <= code < len(self.keys) else None
+
+    def name_of(self, code):
+        return self.names.get(int(code))
+
+    def keys_for(self, codes):
+        """코드 배열 → 정규 대여소번호 배열 (-1은 None)"""
+        table = np.array(self.keys + [None], dtype=object)
+        codes = np.asarray(codes)
+        return table[np.where(codes >= 0, codes, len(self.keys))]
+
+    def to_frame(self):
+        codes = np.arange(len(self.keys), dtype=np.int32)
+        return pd.DataFrame({
+            'code': codes,
+            'key': self.keys,
+            'name': [self.names.get(int(code)) for code in codes],
+        })
+
+    @classmethod
+    def from_frame(cls, frame):
+        stations = cls()
+        for code, key, name in frame.sort_values('code')[['code', 'key', 'name']].itertuples(index=False):
+            if stations.add_key(key) != code:
+                raise ValueError(f'대여소 사전 코드가 연속적이지 않음: {key} ({code})')
+            if isinstance(name, str):
+                stations.names[int(code)] = name
+        return stations
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        self.to_frame().to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        return cls.from_frame(pd.read_parquet(path))
+
+
+def stations_path(store_dir=None):
+    return os.path.join(store_dir or config.STORE_DIR, STATIONS_FILE_NAME)
+
+
+def load_station_dictionary(store_dir=None):
+    """저장된 대여소 사전을 읽고, 없으면 빈 사전을 반환"""
+    path = stations_path(store_dir)
+    if os.path.exists(path):
+        return StationDictionary.load(path)
+    return StationDictionary()
+
+
+def save_station_dictionary(stations, store_dir=None):
+    stations.save(stations_path(store_dir))
@@ -0,0 +1,322 @@
+"""벤치마크용 합성 따릉이 데이터 생성
+
+실제 원본과 같은 파일명/컬럼명/인코딩으로 만든다.
+- 대여이력: cp949, '대여 대여소번호'는 207 처럼 그대로, '반납대여소번호'는 '05860' 처럼 0패딩
+  (일부 대여소번호는 207.0 형태, 일부 반납소는 결측)
+- Monthly/Daily 외국인, General 상/하반기, KOSIS 방문객 통계: utf-8-sig
+  (2024년 파일만 '년월' / '대여소명' 컬럼명)
+- 대여소 정보: cp949, 설명 줄 + 두 줄 머리글, 대여소는 동네(중심점) 주변에 모여 있음
+
+scale 1 은 대여이력 월 5만 건 (50배 ≈ 2024년 상반기 실제 규모인 월 250만 건).
+같은 scale/seed 면 항상 같은 파일이 만들어진다.
+
+    python -m ddareungi.synthetic --out-dir bench_data/scale_1 --scale 1
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from ddareungi import config
+from ddareungi.ingest import DATETIME_FORMAT
+from ddareungi.patterns import TOP5_STATIONS
+
+GENERATOR_VERSION = 2
+MARKER_NAME = '_synthetic.json'
+
+STATION_COUNT = 2700
+BASE_RENTALS_PER_MONTH = 50_000
+BASE_FOREIGN_PER_YEAR = 20_000
+BASE_GENERAL_ROWS_PER_HALF = 20_000
+WRITE_CHUNK_ROWS = 500_000
+
+RENTAL_YEAR = 2024
+RENTAL_MONTHS = range(1, 7)
+STAT_YEARS = [2021, 2022, 2023, 2024]
+DAILY_YEARS = [2022, 2023, 2024]
+
+# 연도별 외국인 이용량 비율 (최근 연도 = 1)
+FOREIGN_GROWTH = {2021: 0.27, 2022: 0.71, 2023: 0.91, 2024: 1.0}
+# 월별 이용량 가중치 (봄/가을이 많음)
+MONTH_WEIGHTS = np.array([0.3, 0.4, 0.8, 1.2, 1.3, 1.3, 1.0, 0.9, 1.2, 1.3, 0.8, 0.3])
+# 외국인 대비 일반 이용건수 배율 (실제 비중 약 0.15%)
+GENERAL_PER_FOREIGN = 650
+SAME_STATION_RETURN_RATIO = 0.22
+MISSING_RETURN_RATIO = 0.005
+FLOAT_ID_RATIO = 0.01
+
+RENTAL_COLUMNS = ['자전거번호', '대여일시', '대여 대여소번호', '대여 대여소명', '대여거치대',
+                  '반납일시', '반납대여소번호', '반납대여소명', '반납거치대', '이용시간(분)',
+                  '이용거리(M)', '생년', '성별', '이용자종류', '대여대여소ID', '반납대여소ID', '자전거구분']
+GENERAL_COLUMNS = ['대여일자', '대여소번호', '대여소명', '대여구분코드', '성별', '연령대코드',
+                   '이용건수', '운동량', '탄소량', '이동거리(M)', '이용시간(분)']
+TICKET_TYPES = ['정기권', '일일권', '일일권(비회원)', '단체권']
+AGE_CODES = ['~10대', '20대', '30대', '40대', '50대', '60대', '70대이상', '기타']
+
+# 대여소 정보 파일 - TOP5 대여소는 실제 좌표/자치구, 나머지는 서울 범위의 동네 중심점 주변에 배치
+TOP5_COORDINATES = {
+    '207': ((37.5271, 126.9326), '영등포구'),
+    '4217': ((37.5556, 126.8957), '마포구'),
+    '3515': ((37.5441, 127.0379), '성동구'),
+    '502': ((37.5313, 127.0668), '광진구'),
+    '474': ((37.5656, 127.0090), '중구'),
+}
+SEOUL_BOUNDS = ((37.46, 37.68), (126.82, 127.16))
+NEIGHBORHOOD_COUNT = 400
+NEIGHBORHOOD_SPREAD_M = 250
+DISTRICTS = ['강남구', '강동구', '강북구', '강서구', '관악구', '광진구', '구로구', '금천구', '노원구', '도봉구',
+             '동대문구', '동작구', '마포구', '서대문구', '서초구', '성동구', '성북구', '송파구', '양천구',
+             '영등포구', '용산구', '은평구', '종로구', '중구', '중랑구']
+
+KOSIS_CONTINENTS = ['소계', '아시아주', '미주', '구주', '대양주', '아프리카', '교포', '기타']
+KOSIS_COUNTRIES = ['소계', '일본', '중국', '미국', '대만', '해외동포', '기타']
+KOSIS_AGE_LABELS = {
+    2023: ['소계', '0~20세', '21~30세', '31~40세', '41~50세', '51~60세', '61세 이상', '승무원'],
+    2024: ['소계', '0~9세', '10~19세', '20~29세', '30~39세', '40~49세', '50~59세',
+           '60~69세', '70~79세', '80세 이상', '승무원'],
+}
+
+
+def make_stations(rng, count=STATION_COUNT):
+    """대여소 번호/이름/인기도 - TOP5 대여소가 가장 인기 있게 배치"""
+    top_ids = [int(station_id) for station_id in TOP5_STATIONS]
+    others = np.setdiff1d(np.arange(101, 6001), top_ids)
+    ids = np.concatenate([top_ids, rng.choice(others, count - len(top_ids), replace=False)])
+    names = [TOP5_STATIONS.get(str(station_id), f'대여소 {station_id}') for station_id in ids]
+    # Zipf 형태 인기도
+    weights = 1.0 / np.arange(1, count + 1) ** 0.9
+    return pd.DataFrame({
+        '번호': ids,
+        '이름': names,
+        '표시명': [f'{station_id}. {name}' for station_id, name in zip(ids, names)],
+        'ID': [f'ST-{100 + i}' for i in range(count)],
+        '가중치': weights / weights.sum(),
+    })
+
+
+def _rental_chunk(rng, stations, year, month, n):
+    count = len(stations)
+    weights = stations['가중치'].to_numpy()
+    rental_idx = rng.choice(count, n, p=weights)
+    return_idx = np.where(rng.random(n) < SAME_STATION_RETURN_RATIO, rental_idx, rng.choice(count, n, p=weights))
+
+    start = pd.Timestamp(year=year, month=month, day=1)
+    seconds = int((start + pd.offsets.MonthBegin(1) - start).total_seconds())
+    rented = start + pd.to_timedelta(rng.integers(0, seconds, n), unit='s')
+    minutes = np.maximum(1, rng.exponential(20, n).astype(int))
+    returned = rented + pd.to_timedelta(minutes, unit='m')
+
+    ids = stations['번호'].to_numpy()
+    rental_ids = ids[rental_idx].astype(str).astype(object)
+    float_ids = rng.random(n) < FLOAT_ID_RATIO
+    rental_ids[float_ids] = [f'{value}.0' for value in rental_ids[float_ids]]
+    return_ids = pd.Series(ids[return_idx]).map('{:05d}'.format).to_numpy(dtype=object)
+    missing = rng.random(n) < MISSING_RETURN_RATIO
+    return_ids[missing] = None
+
+    names = stations['이름'].to_numpy()
+    station_keys = stations['ID'].to_numpy()
+    birth_years = rng.integers(1950, 2009, n).astype(str).astype(object)
+    birth_years[rng.random(n) < 0.03] = '\\N'
+    return pd.DataFrame({
+        '자전거번호': pd.Series(rng.integers(1, 45000, n)).map('SPB-{:05d}'.format),
+        '대여일시': rented.strftime(DATETIME_FORMAT),
+        '대여 대여소번호': rental_ids,
+        '대여 대여소명': names[rental_idx],
+        '대여거치대': rng.integers(0, 21, n),
+        '반납일시': returned.strftime(DATETIME_FORMAT),
+        '반납대여소번호': return_ids,
+        '반납대여소명': np.where(missing, None, names[return_idx]),
+        '반납거치대': rng.integers(0, 21, n),
+        '이용시간(분)': minutes,
+        '이용거리(M)': np.round(minutes * rng.uniform(80, 250, n), 2),
+        '생년': birth_years,
+        '성별': rng.choice(['M', 'F', ''], n, p=[0.55, 0.4, 0.05]),
+        '이용자종류': rng.choice(['내국인', '외국인', '비회원'], n, p=[0.95, 0.01, 0.04]),
+        '대여대여소ID': station_keys[rental_idx],
+        '반납대여소ID': np.where(missing, None, station_keys[return_idx]),
+        '자전거구분': rng.choice(['일반', '새싹'], n, p=[0.9, 0.1]),
+    }, columns=RENTAL_COLUMNS)
+
+
+def write_rental_history(out_dir, stations, rng, scale=1, year=RENTAL_YEAR, months=RENTAL_MONTHS):
+    """월별 대여이력 CSV (cp949) - 파일 경로 목록 반환"""
+    paths = []
+    for month in months:
+        path = os.path.join(out_dir, f'서울특별시 공공자전거 대여이력 정보_{year % 100:02d}{month:02d}.csv')
+        remaining = int(BASE_RENTALS_PER_MONTH * scale)
+        header = True
+        with open(path, 'w', encoding=config.RENTAL_HISTORY_ENCODING, newline='') as f:
+            while remaining > 0:
+                n = min(remaining, WRITE_CHUNK_ROWS)
+                _rental_chunk(rng, stations, year, month, n).to_csv(f, index=False, header=header)
+                header = False
+                remaining -= n
+        paths.append(path)
+    return paths
+
+
+def _foreign_daily(rng, stations, year, total):
+    """외국인 대여/반납 (날짜, 대여소) 건수"""
+    days = pd.date_range(f'{year}-01-01', f'{year}-12-31')
+    day_weights = MONTH_WEIGHTS[days.month - 1] * np.where(days.dayofweek >= 5, 1.3, 1.0)
+    day_weights = day_weights / day_weights.sum()
+    weights = stations['가중치'].to_numpy()
+    day_idx = rng.choice(len(days), total, p=day_weights)
+    rental_idx = rng.choice(len(stations), total, p=weights)
+    return_idx = np.where(rng.random(total) < SAME_STATION_RETURN_RATIO, rental_idx,
+                          rng.choice(len(stations), total, p=weights))
+
+    labels = stations['표시명'].to_numpy()
+    rentals = pd.DataFrame({'일시': days[day_idx], '대여소': labels[rental_idx], '대여건수': 1, '반납건수': 0})
+    returns = pd.DataFrame({'일시': days[day_idx], '대여소': labels[return_idx], '대여건수': 0, '반납건수': 1})
+    daily = pd.concat([rentals, returns]).groupby(['일시', '대여소'], as_index=False)[['대여건수', '반납건수']].sum()
+    return daily
+
+
+def write_foreign_stats(out_dir, stations, rng, scale=1, years=STAT_YEARS, daily_years=DAILY_YEARS):
+    """Monthly/Daily 외국인 이용 통계 (utf-8-sig) - 연도별 대여건수 합계 반환"""
+    totals = {}
+    for year in years:
+        yy = year % 100
+        daily = _foreign_daily(rng, stations, year, int(BASE_FOREIGN_PER_YEAR * scale * FOREIGN_GROWTH.get(year, 1.0)))
+        totals[year] = int(daily['대여건수'].sum())
+        station_col = '대여소명' if year >= 2024 else '대여소'
+
+        monthly = (daily.assign(년월=daily['일시'].dt.strftime('%Y%m'))
+                   .groupby(['년월', '대여소'], as_index=False)[['대여건수', '반납건수']].sum())
+        monthly.columns = ['년월' if year >= 2024 else '일시', station_col, '대여건수', '반납건수']
+        monthly.to_csv(os.path.join(out_dir, f'Monthly_{yy}년_외국인대여정보.csv'), index=False, encoding='utf-8-sig')
+
+        if year in daily_years:
+            daily = daily.assign(일시=daily['일시'].dt.strftime('%Y-%m-%d')).rename(columns={'대여소': station_col})
+            daily.to_csv(os.path.join(out_dir, f'Daily_{yy}년_외국인이용정보.csv'), index=False, encoding='utf-8-sig')
+    return totals
+
+
+def write_general_stats(out_dir, stations, rng, foreign_totals, scale=1):
+    """General_YY년상/하반기_이용정보_월별 (utf-8-sig) - 외국인 합계의 GENERAL_PER_FOREIGN 배"""
+    rows = int(BASE_GENERAL_ROWS_PER_HALF * scale)
+    weights = stations['가중치'].to_numpy()
+    for year, foreign_total in foreign_totals.items():
+        if year not in DAILY_YEARS:
+            continue
+        for half, months in (('상반기', np.arange(1, 7)), ('하반기', np.arange(7, 13))):
+            station_idx = rng.choice(len(stations), rows, p=weights)
+            mean_count = foreign_total * GENERAL_PER_FOREIGN / 2 / rows
+            counts = rng.poisson(mean_count, rows) + 1
+            frame = pd.DataFrame({
+                '대여일자': [f'{year}{month:02d}' for month in rng.choice(months, rows)],
+                '대여소번호': stations['번호'].to_numpy()[station_idx],
+                '대여소명': stations['이름'].to_numpy()[station_idx],
+                '대여구분코드': rng.choice(TICKET_TYPES, rows),
+                '성별': rng.choice(['M', 'F', '\\N'], rows, p=[0.55, 0.4, 0.05]),
+                '연령대코드': rng.choice(AGE_CODES, rows),
+                '이용건수': counts,
+                '운동량': np.round(counts * rng.uniform(20, 60, rows), 2),
+                '탄소량': np.round(counts * rng.uniform(0.1, 0.5, rows), 2),
+                '이동거리(M)': np.round(counts * rng.uniform(1000, 4000, rows), 2),
+                '이용시간(분)': counts * rng.integers(10, 40, rows),
+            }, columns=GENERAL_COLUMNS)
+            frame.to_csv(os.path.join(out_dir, f'General_{year % 100:02d}년{half}_이용정보_월별.csv'),
+                         index=False, encoding='utf-8-sig')
+
+
+def _write_kosis(path, labels_by_year, header_rows, row_names, rng):
+    """KOSIS 내려받기 형식 - 설명 행(대륙별(1)) 다음에 합계 행"""
+    columns = ['대륙별(1)', '대륙별(2)']
+    for year, labels in labels_by_year.items():
+        columns += [str(year) if i == 0 else f'{year}.{i}' for i in range(len(labels))]
+    rows = []
+    for header in header_rows:
+        row = ['대륙별(1)', '대륙별(2)']
+        for labels in labels_by_year.values():
+            row += labels if header is None else [header] * len(labels)
+        rows.append(row)
+    for name in row_names:
+        row = ['합계', name]
+        for labels in labels_by_year.values():
+            row += [f'{value:,}' for value in rng.integers(1_000, 3_000_000, len(labels))]
+        rows.append(row)
+    pd.DataFrame(rows, columns=columns).to_csv(path, index=False, encoding='utf-8-sig')
+
+
+def write_tourist_stats(out_dir, rng):
+    """KOSIS 방문객 통계 3종 (scale과 무관하게 크기 고정)"""
+    _write_kosis(os.path.join(out_dir, '방문객_연령별_대륙별_전국외국인_2023년~2024년.csv'),
+                 KOSIS_AGE_LABELS, ['합계', None], KOSIS_CONTINENTS, rng)
+    _write_kosis(os.path.join(out_dir, '방문객_성별_전국외국인_2017년~2024년.csv'),
+                 {year: ['계', '남자', '여자'] for year in range(2017, 2025)}, [None], KOSIS_COUNTRIES, rng)
+    _write_kosis(os.path.join(out_dir, '방문객_대륙별_전국외국인_2010년~2024년.csv'),
+                 {year: ['계'] for year in range(2010, 2025)}, [None], KOSIS_COUNTRIES, rng)
+
+
+def write_station_info(out_dir, stations, rng):
+    """공공자전거 대여소 정보 CSV (cp949) - scale과 무관하게 크기 고정"""
+    (lat_min, lat_max), (lon_min, lon_max) = SEOUL_BOUNDS
+    centers = np.column_stack([rng.uniform(lat_min, lat_max, NEIGHBORHOOD_COUNT),
+                               rng.uniform(lon_min, lon_max, NEIGHBORHOOD_COUNT)])
+    centers[:len(TOP5_COORDINATES)] = [coordinates for coordinates, _ in TOP5_COORDINATES.values()]
+    districts = rng.choice(DISTRICTS, NEIGHBORHOOD_COUNT)
+    districts[:len(TOP5_COORDINATES)] = [district for _, district in TOP5_COORDINATES.values()]
+    home = rng.integers(0, NEIGHBORHOOD_COUNT, len(stations))
+    home[:len(TOP5_COORDINATES)] = np.arange(len(TOP5_COORDINATES))
+    offsets = rng.normal(0, NEIGHBORHOOD_SPREAD_M, (len(stations), 2))
+    offsets[:len(TOP5_COORDINATES)] = 0
+    lat = centers[home, 0] + offsets[:, 0] / 111_000
+    lon = centers[home, 1] + offsets[:, 1] / (111_000 * np.cos(np.radians(centers[home, 0])))
+
+    header = [['대여소\n번호', '보관소(대여소)명', '소재지(위치)', '', '위도', '경도', '설치\n시기'],
+              ['', '', '자치구', '상세주소', '', '', '']]
+    rows = [[f'{station_id:05d}', name, district, f'{district} 대여소 {station_id}', f'{y:.6f}', f'{x:.6f}', '2015-10-07']
+            for station_id, name, district, y, x
+            in zip(stations['번호'], stations['이름'], districts[home], lat, lon)]
+    path = os.path.join(out_dir, '공공자전거 대여소 정보(24.06월 기준).csv')
+    with open(path, 'w', encoding=config.STATION_INFO_ENCODINGS[0], newline='') as f:
+        f.write('공공자전거 대여소 정보\n')
+        pd.DataFrame(header + rows).to_csv(f, index=False, header=False)
+    return path
+
+
+def generate(out_dir, scale=1, seed=0, force=False):
+    """합성 데이터 전체 생성 - 같은 설정으로 이미 만들어져 있으면 건너뜀
+
+    생성 설정 딕셔너리(마커 파일 내용)를 반환한다.
+    """
+    settings = {'version': GENERATOR_VERSION, 'scale': scale, 'seed': seed}
+    marker_path = os.path.join(out_dir, MARKER_NAME)
+    if not force and os.path.exists(marker_path):
+        with open(marker_path, encoding='utf-8') as f:
+            if json.load(f) == settings:
+                print(f'⏭️ {out_dir} - 같은 설정의 합성 데이터가 있음')
+                return settings
+
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    stations = make_stations(rng)
+    write_rental_history(out_dir, stations, rng, scale)
+    foreign_totals = write_foreign_stats(out_dir, stations, rng, scale)
+    write_general_stats(out_dir, stations, rng, foreign_totals, scale)
+    write_tourist_stats(out_dir, rng)
+    write_station_info(out_dir, stations, rng)
+
+    with open(marker_path, 'w', encoding='utf-8') as f:
+        json.dump(settings, f)
+    print(f'✅ {out_dir} - scale {scale} 합성 데이터 생성')
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='벤치마크용 합성 따릉이 데이터 생성')
+    parser.add_argument('--out-dir', required=True, help='생성 폴더')
+    parser.add_argument('--scale', type=float, default=1, help='데이터 배율 (1 = 대여이력 월 5만 건)')
+    parser.add_argument('--seed', type=int, default=0, help='난수 시드')
+    parser.add_argument('--force', action='store_true', help='이미 있어도 다시 생성')
+    args = parser.parse_args()
+    generate(args.out_dir, args.scale, args.seed, force=args.force)
+
+
+if __name__ == '__main__':
+    main()
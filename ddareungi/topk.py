@@ -0,0 +1,357 @@
+"""대여소 순위 스트리밍 집계 (Space-Saving 계열 top-K 스케치)
+
+03 노트북의 연도별/월별/요일별 대여·반납 순위를 구간마다 groupby().sum().sort_values() 하지 않고,
+대여이력을 배치 단위로 한 번 읽으면서 (측정, 차원, 구간)마다 크기가 capacity 로 고정된 스케치에 누적한다.
+
+- 스케치는 추적 중인 대여소의 추정 건수/오차와 floor(추적하지 않는 대여소의 건수 상한)를 가진다.
+  추정 건수 - 오차 ≤ 실제 건수 ≤ 추정 건수 이므로 두 스케치를 그대로 합칠 수 있다 (월별 작업자 결과 병합).
+- 두 번째 패스에서 후보 대여소만 정확히 다시 세어 최종 순위를 확정한다.
+  k번째 정확한 건수가 floor 보다 크면 빠진 대여소가 없다는 것이 보장된다 (guaranteed).
+  (floor 와 같으면 추적하지 않은 대여소가 같은 건수로 코드 순 동점 처리에서 앞설 수 있다.)
+- user_types 로 이용자종류를 고르면 (예: 03 노트북처럼 외국인만) 그 행만 읽는다.
+- exact_station_rankings 는 스케치 없이 모든 (구간, 대여소) 건수를 한 번에 세는 경로로,
+  메모리 한도를 넘는 중간 결과는 디스크로 내려쓴다 (external.SpillingCounter). 결과 형태는 같다.
+
+    python -m ddareungi.topk --store-dir data_store --year 2024 -k 5 --user-types 외국인
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from ddareungi.external import SpillingCounter
+from ddareungi.ingest import available_months, build_filter, rental_dataset
+from ddareungi.stations import load_station_dictionary
+
+DEFAULT_CAPACITY = 200
+DEFAULT_BATCH_SIZE = 1_000_000
+
+# 측정 → (시각 컬럼, 대여소코드 컬럼)
+MEASURES = {
+    '대여': ('대여일시', '대여소코드'),
+    '반납': ('반납일시', '반납소코드'),
+}
+RANKING_COLUMNS = ['대여일시', '대여소코드', '반납일시', '반납소코드']
+
+# 구간 라벨: 연도 → 2024, 월 → 202405, 요일 → 20245 (연도*10 + 요일, 0=월요일)
+SLICE_DIMENSIONS = ('연도', '월', '요일')
+WEEKDAY_NAMES = ('월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일')
+CODE_BITS = 32
+
+# exact_station_rankings 키: (측정×차원 번호 << 56) | (구간 라벨 << 32) | 대여소코드
+SLICE_BITS = 56
+
+
+def slice_labels(times, dimension):
+    """시각(datetime64 Series) → 구간 라벨 정수 배열"""
+    years = times.dt.year.to_numpy(dtype=np.int64)
+    if dimension == '연도':
+        return years
+    if dimension == '월':
+        return years * 100 + times.dt.month.to_numpy(dtype=np.int64)
+    if dimension == '요일':
+        return years * 10 + times.dt.dayofweek.to_numpy(dtype=np.int64)
+    raise ValueError(f'알 수 없는 구간 차원: {dimension}')
+
+
+def format_slice(label, dimension):
+    """구간 라벨 → 표시 이름 (2024년, 2024년 5월, 2024년 토요일)"""
+    if dimension == '연도':
+        return f'{label}년'
+    if dimension == '월':
+        return f'{label // 100}년 {label % 100}월'
+    return f'{label // 10}년 {WEEKDAY_NAMES[label % 10]}'
+
+
+def _combined_keys(labels, codes):
+    return (np.asarray(labels, dtype=np.int64) << CODE_BITS) | np.asarray(codes, dtype=np.int64)
+
+
+def _split_keys(keys):
+    keys = np.asarray(keys, dtype=np.int64)
+    return keys >> CODE_BITS, keys & ((1 << CODE_BITS) - 1)
+
+
+class SpaceSaving:
+    """크기 제한 top-K 스케치 (keys 정렬 상태로 유지)
+
+    counts: 추정 건수(상한), errors: 추정 오차, floor: 추적하지 않는 키의 건수 상한
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.errors = np.empty(0, dtype=np.int64)
+        self.floor = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_counts(cls, keys, counts, capacity=DEFAULT_CAPACITY):
+        """정확한 (키, 건수) → 스케치 (capacity 를 넘으면 상위만 남기고 floor 설정)"""
+        sketch = cls(capacity)
+        keys = np.asarray(keys, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        sketch._set(keys, counts, np.zeros(len(keys), dtype=np.int64), 0)
+        return sketch
+
+    def update(self, keys, weights=None):
+        """키 배열(가중치)을 누적 - 배치를 정확히 센 뒤 스케치끼리 병합"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(keys) == 0:
+            return
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, weights=weights, minlength=len(unique_keys)).astype(np.int64)
+        # 배치는 자르지 않고 정확한 건수 그대로 합친 뒤 한 번만 capacity 로 줄임
+        self.merge(SpaceSaving.from_counts(unique_keys, counts, len(unique_keys)))
+
+    def _lookup(self, keys):
+        # 추적 중이 아닌 키는 (floor, floor)
+        idx = np.searchsorted(self.keys, keys)
+        idx = np.minimum(idx, max(len(self.keys) - 1, 0))
+        found = (self.keys[idx] == keys) if len(self.keys) else np.zeros(len(keys), dtype=bool)
+        counts = np.where(found, self.counts[idx] if len(self.keys) else 0, self.floor)
+        errors = np.where(found, self.errors[idx] if len(self.keys) else 0, self.floor)
+        return counts, errors
+
+    def merge(self, other):
+        """다른 스케치를 합침 (건수 상한/오차가 그대로 더해짐)"""
+        keys = np.union1d(self.keys, other.keys)
+        counts1, errors1 = self._lookup(keys)
+        counts2, errors2 = other._lookup(keys)
+        self._set(keys, counts1 + counts2, errors1 + errors2, self.floor + other.floor)
+
+    def _set(self, keys, counts, errors, floor):
+        if len(keys) > self.capacity:
+            order = np.argsort(-counts, kind='stable')
+            floor = max(floor, int(counts[order[self.capacity]]))
+            keep = np.sort(order[:self.capacity])
+            keys, counts, errors = keys[keep], counts[keep], errors[keep]
+        self.keys, self.counts, self.errors, self.floor = keys, counts, errors, floor
+
+    def top(self, k):
+        """추정 건수 상위 k개 [(키, 추정 건수, 오차)]"""
+        order = np.lexsort((self.keys, -self.counts))[:k]
+        return [(int(self.keys[i]), int(self.counts[i]), int(self.errors[i])) for i in order]
+
+
+class StationRankings:
+    """(측정, 차원, 구간 라벨) 마다 스케치 하나씩 - 구간마다 capacity 개 대여소만 유지
+
+    스케치 키는 (구간 라벨 << 32 | 대여소코드)라서 두 번째 패스에서 차원별 후보를 한 배열로 찾는다.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, dimensions=SLICE_DIMENSIONS):
+        self.capacity = capacity
+        self.dimensions = dimensions
+        self.sketches = {}
+        self.rows = 0
+
+    def add(self, batch):
+        """대여이력 배치 (RANKING_COLUMNS) 누적 - 결측 대여소/시각은 제외"""
+        self.rows += len(batch)
+        for measure, (time_col, code_col) in MEASURES.items():
+            valid = batch[time_col].notna().to_numpy() & (batch[code_col].to_numpy() >= 0)
+            times, codes = batch[time_col][valid], batch[code_col].to_numpy()[valid]
+            for dimension in self.dimensions:
+                self.add_keys(measure, dimension, slice_labels(times, dimension), codes)
+
+    def add_keys(self, measure, dimension, labels, codes, weights=None):
+        """(구간 라벨, 대여소코드[, 가중치]) 배열을 구간별 스케치에 누적"""
+        keys = _combined_keys(labels, codes)
+        unique_labels = np.unique(np.asarray(labels, dtype=np.int64))
+        for label in unique_labels:
+            mask = np.asarray(labels) == label
+            sketch = self.sketches.setdefault((measure, dimension, int(label)), SpaceSaving(self.capacity))
+            sketch.update(keys[mask], None if weights is None else np.asarray(weights)[mask])
+
+    def merge(self, other):
+        for slice_key, sketch in other.sketches.items():
+            if slice_key in self.sketches:
+                self.sketches[slice_key].merge(sketch)
+            else:
+                self.sketches[slice_key] = sketch
+        self.rows += other.rows
+
+    def candidate_keys(self):
+        """(측정, 차원) → 후보 키 배열 (정확히 다시 셀 대상)"""
+        candidates = {}
+        for (measure, dimension, _), sketch in self.sketches.items():
+            candidates.setdefault((measure, dimension), []).append(sketch.keys)
+        return {key: np.unique(np.concatenate(parts)) for key, parts in candidates.items()}
+
+
+class ExactCounter:
+    """후보 키만 정확히 세는 두 번째 패스 누적기 (월별 결과를 더해서 합칠 수 있음)"""
+
+    def __init__(self, candidates):
+        self.candidates = candidates
+        self.counts = {key: np.zeros(len(keys), dtype=np.int64) for key, keys in candidates.items()}
+
+    def add(self, batch):
+        for measure, (time_col, code_col) in MEASURES.items():
+            valid = batch[time_col].notna().to_numpy() & (batch[code_col].to_numpy() >= 0)
+            times, codes = batch[time_col][valid], batch[code_col].to_numpy()[valid]
+            for dimension in {dimension for m, dimension in self.candidates if m == measure}:
+                self.add_keys(measure, dimension, slice_labels(times, dimension), codes)
+
+    def add_keys(self, measure, dimension, labels, codes, weights=None):
+        candidate_keys = self.candidates[(measure, dimension)]
+        if len(candidate_keys) == 0:
+            return
+        keys = _combined_keys(labels, codes)
+        idx = np.searchsorted(candidate_keys, keys)
+        idx = np.minimum(idx, len(candidate_keys) - 1)
+        hit = candidate_keys[idx] == keys
+        self.counts[(measure, dimension)] += np.bincount(
+            idx[hit], weights=None if weights is None else np.asarray(weights)[hit],
+            minlength=len(candidate_keys)).astype(np.int64)
+
+    def merge(self, other):
+        for key, counts in other.counts.items():
+            self.counts[key] += counts
+
+
+def verified_rankings(rankings, exact, k=5):
+    """(측정, 차원, 구간 라벨) → {'top': [(대여소코드, 건수)], 'guaranteed': bool}"""
+    results = {}
+    for (measure, dimension, label), sketch in rankings.sketches.items():
+        candidate_keys = exact.candidates[(measure, dimension)]
+        counts = exact.counts[(measure, dimension)]
+        labels, codes = _split_keys(candidate_keys)
+        mask = labels == label
+        slice_codes, slice_counts = codes[mask], counts[mask]
+        order = np.lexsort((slice_codes, -slice_counts))[:k]
+        top = [(int(slice_codes[i]), int(slice_counts[i])) for i in order if slice_counts[i] > 0]
+        # 추적하지 않은 대여소는 floor 이하이므로 k번째 건수가 floor 보다 커야 순위 확정 (같으면 동점 대여소가 앞설 수 있음)
+        guaranteed = sketch.floor == 0 or (len(top) == k and top[-1][1] > sketch.floor)
+        results[(measure, dimension, label)] = {'top': top, 'guaranteed': guaranteed}
+    return results
+
+
+def rankings_frame(results):
+    """station_rankings 결과 → (측정, 차원, 구간, 순위, 대여소코드, 건수, 확정) 표 - 공유 파일로 발행하는 형태"""
+    rows = [(measure, dimension, label, rank, code, count, result['guaranteed'])
+            for (measure, dimension, label), result in sorted(results.items())
+            for rank, (code, count) in enumerate(result['top'], start=1)]
+    frame = pd.DataFrame(rows, columns=['측정', '차원', '구간', '순위', '대여소코드', '건수', '확정'])
+    return frame.astype({'측정': pd.CategoricalDtype(list(MEASURES)), '차원': pd.CategoricalDtype(SLICE_DIMENSIONS),
+                         '구간': np.int64, '순위': np.int8, '대여소코드': np.int32, '건수': np.int64, '확정': bool})
+
+
+def iter_ranking_batches(year=None, months=None, store_dir=None, batch_size=DEFAULT_BATCH_SIZE, user_types=None):
+    scanner = rental_dataset(store_dir).scanner(columns=RANKING_COLUMNS, filter=build_filter(year, months, user_types),
+                                                batch_size=batch_size)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def _sketch_month(task):
+    year, month, store_dir, user_types, capacity = task
+    rankings = StationRankings(capacity)
+    for batch in iter_ranking_batches(year, [month], store_dir, user_types=user_types):
+        rankings.add(batch)
+    return rankings
+
+
+def _count_month(task):
+    year, month, store_dir, user_types, candidates = task
+    exact = ExactCounter(candidates)
+    for batch in iter_ranking_batches(year, [month], store_dir, user_types=user_types):
+        exact.add(batch)
+    return exact
+
+
+def station_rankings(year=None, months=None, store_dir=None, k=5, capacity=DEFAULT_CAPACITY, workers=1,
+                     user_types=None):
+    """변환된 대여이력의 연도/월/요일별 대여·반납 TOP k (두 번 스트리밍, 메모리는 스케치 크기만큼)
+
+    user_types 를 주면 그 이용자종류만 센다. workers 가 1보다 크면 월 단위로 스케치/정확 집계를 나눠 만든 뒤 합친다.
+    """
+    periods = [(y, m) for y, m in available_months(store_dir)
+               if (year is None or y == year) and (months is None or m in months)]
+
+    def run(func, make_task):
+        tasks = [make_task(y, m) for y, m in periods]
+        if workers != 1 and len(tasks) > 1:
+            from ddareungi.parallel import run_per_item
+            outcomes = run_per_item(func, tasks, workers)
+            for _, _, error in outcomes:
+                if error is not None:
+                    raise error
+            return [result for _, result, _ in outcomes]
+        return [func(task) for task in tasks]
+
+    rankings = StationRankings(capacity)
+    for partial in run(_sketch_month, lambda y, m: (y, m, store_dir, user_types, capacity)):
+        rankings.merge(partial)
+
+    candidates = rankings.candidate_keys()
+    exact = ExactCounter(candidates)
+    for partial in run(_count_month, lambda y, m: (y, m, store_dir, user_types, candidates)):
+        exact.merge(partial)
+    return verified_rankings(rankings, exact, k)
+
+
+def exact_station_rankings(year=None, months=None, store_dir=None, k=5, dimensions=SLICE_DIMENSIONS,
+                           memory_budget_mb=None, spill_dir=None, user_types=None):
+    """모든 (측정, 차원, 구간, 대여소) 건수를 정확히 세어 TOP k - station_rankings 와 같은 형태 (항상 guaranteed)
+
+    한 번만 읽지만 중간 결과가 (구간 수 × 대여소 수)만큼 커지므로 memory_budget_mb 를 넘으면 디스크를 쓴다.
+    """
+    slices = [(measure, dimension) for measure in MEASURES for dimension in dimensions]
+    with SpillingCounter(memory_budget_mb, spill_dir) as counter:
+        for batch in iter_ranking_batches(year, months, store_dir, user_types=user_types):
+            for slice_id, (measure, dimension) in enumerate(slices):
+                time_col, code_col = MEASURES[measure]
+                valid = batch[time_col].notna().to_numpy() & (batch[code_col].to_numpy() >= 0)
+                labels = slice_labels(batch[time_col][valid], dimension)
+                keys = _combined_keys(labels, batch[code_col].to_numpy()[valid]) | (slice_id << SLICE_BITS)
+                counter.add(keys)
+        keys, counts = counter.result()
+
+    slice_ids = keys >> SLICE_BITS
+    labels, codes = _split_keys(keys & ((1 << SLICE_BITS) - 1))
+    results = {}
+    for slice_id, (measure, dimension) in enumerate(slices):
+        in_slice = slice_ids == slice_id
+        for label in np.unique(labels[in_slice]):
+            mask = in_slice & (labels == label)
+            slice_codes, slice_counts = codes[mask], counts[mask]
+            order = np.lexsort((slice_codes, -slice_counts))[:k]
+            top = [(int(slice_codes[i]), int(slice_counts[i])) for i in order]
+            results[(measure, dimension, int(label))] = {'top': top, 'guaranteed': True}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='연도/월/요일별 대여소 대여·반납 순위 (스트리밍 top-K)')
+    parser.add_argument('--store-dir', default=None, help='변환된 데이터셋 폴더')
+    parser.add_argument('--year', type=int, default=None, help='대상 연도 (기본: 전체)')
+    parser.add_argument('-k', type=int, default=5, help='순위 개수')
+    parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY, help='구간별 스케치 크기')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 프로세스 수 (0이면 CPU 코어 수)')
+    parser.add_argument('--user-types', nargs='*', default=None, help='이용자종류 (예: 외국인, 기본: 전체)')
+    parser.add_argument('--exact', action='store_true', help='스케치 없이 전체를 정확히 집계')
+    parser.add_argument('--memory-budget-mb', type=float, default=None,
+                        help='--exact 중간 집계 메모리 한도 (넘으면 디스크 사용, 기본: DDAREUNGI_MEMORY_BUDGET_MB)')
+    args = parser.parse_args()
+
+    stations = load_station_dictionary(args.store_dir)
+    if args.exact:
+        results = exact_station_rankings(args.year, store_dir=args.store_dir, k=args.k,
+                                         memory_budget_mb=args.memory_budget_mb, user_types=args.user_types)
+    else:
+        results = station_rankings(args.year, store_dir=args.store_dir, k=args.k, capacity=args.capacity,
+                                   workers=args.workers, user_types=args.user_types)
+    for (measure, dimension, label), result in sorted(results.items()):
+        mark = '✅' if result['guaranteed'] else '⚠️'
+        ranking = ', '.join(f'{stations.key_of(code)}({count:,})' for code, count in result['top'])
+        print(f'{mark} {measure} {format_slice(label, dimension)}: {ranking}')
+
+
+if __name__ == '__main__':
+    main()
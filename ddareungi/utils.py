@@ -0,0 +1,39 @@
+"""여러 단계가 같이 쓰는 작은 도구 (파일 내용 해시, 키별 합계, 컬럼 이름 찾기)
+
+적재(ingest)와 집계, 대시보드가 모두 쓰므로 다른 ddareungi 모듈을 가져오지 않는다.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+# (경로, 크기, 수정시각) → 내용 해시
+_fingerprints = {}
+
+
+def file_fingerprint(path):
+    """파일 내용 해시 - 크기/수정시각이 그대로면 이전에 계산한 값을 재사용"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _fingerprints:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _fingerprints[key] = digest.hexdigest()
+    return _fingerprints[key]
+
+
+def first_column(df, candidates):
+    """후보 컬럼 이름 중 df 에 있는 첫 번째 (파일마다 헤더명이 다른 원본용)"""
+    for col in candidates:
+        if col in df.columns:
+            return col
+    raise KeyError(f'컬럼을 찾을 수 없음: {candidates}')
+
+
+def sum_by_key(keys, counts, dtype=np.int64):
+    """키별 건수 합계 → (정렬된 고유 키, 합계) - dtype=None 이면 가중치 합(float) 그대로"""
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    totals = np.bincount(inverse, weights=counts, minlength=len(unique_keys))
+    return unique_keys, totals if dtype is None else totals.astype(dtype)
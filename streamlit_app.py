@@ -7,7 +7,26 @@ import matplotlib.font_manager as fm
 from matplotlib import rcParams
 import warnings
 import os
-from datetime import datetime
+import time
+
+from ddareungi import config, cube, loaders, snapshot
+from ddareungi.background import BackgroundJob
+from ddareungi.daily_index import MEASURES, daily_index_path, load_daily_index
+from ddareungi.figures import FigureCache
+from ddareungi.growth import GRANULARITIES, StationPeriodMatrix, format_period, station_numbers
+from ddareungi.ingest import available_months, manifest_path, store_available
+from ddareungi.od import aggregate_od, iter_store_batches
+from ddareungi.od_matrix import load_od_matrix, od_counts_to_matrix, station_return_pattern, station_totals
+from ddareungi.markov import TransitionModel
+from ddareungi.netflow import DAY_TYPES, load_netflow
+from ddareungi.patterns import TOP5_STATIONS, classify_pattern
+from ddareungi.quantiles import DEFAULT_QUANTILES, QUANTILE_MEASURES, load_quantile_sketches, quantile_table
+from ddareungi.rebalancing import load_rebalancing, rebalancing_flows
+from ddareungi.sampling import exact_return_patterns, period_files, sample_estimates
+from ddareungi.shared import shared_csr, shared_daily_index, shared_frame
+from ddareungi.spatial import DEFAULT_CLUSTER_RADIUS_M, DEFAULT_RADIUS_M, load_station_index
+from ddareungi.stations import load_station_dictionary
+from ddareungi.topk import MEASURES as RANKING_MEASURES, SLICE_DIMENSIONS, format_slice, rankings_frame, station_rankings
 
 warnings.filterwarnings('ignore')
 
@@ -50,6 +69,345 @@ def setup_korean_font():
 korean_font_prop = setup_korean_font()
 sns.set_style("whitegrid")
 
+# 차트 이미지 캐시 크기 (MB) - 모든 세션이 공유
+FIGURE_CACHE_MB = int(os.environ.get('DDAREUNGI_FIGURE_CACHE_MB', '64'))
+
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache(FIGURE_CACHE_MB * 1024 * 1024)
+
+# 앱 시작 시 개요 ~ 05 페이지가 쓰는 데이터 캐시와 기본 선택 차트 이미지를 백그라운드 스레드에서 미리 채움 (0이면 끔)
+WARMUP_ENABLED = os.environ.get('DDAREUNGI_WARMUP', '1') != '0'
+
+def show_lazy_tabs(key, sections):
+    # sections: (탭 이름, 탭 내용 함수) 목록 - 선택된 탭의 함수만 실행
+    labels = [label for label, _ in sections]
+    try:
+        tabs = st.tabs(labels, key=key, on_change="rerun")
+    except TypeError:
+        # 지연 실행을 지원하지 않는 Streamlit 버전은 기존처럼 모든 탭을 그림
+        tabs = st.tabs(labels)
+    for tab, (_, render) in zip(tabs, sections):
+        with tab:
+            if getattr(tab, 'open', None) is not False:
+                render()
+
+# 차트 id → 그리기 함수 (차트 데이터 하나만 받아 figure 반환) - 페이지와 미리 준비 스레드가 같은 함수로 그림
+CHARTS = {}
+
+def chart(chart_id):
+    def register(draw):
+        CHARTS[chart_id] = draw
+        return draw
+    return register
+
+def render_chart(chart_id, data):
+    # 같은 차트 + 같은 데이터면 이전에 렌더링한 이미지를 재사용, 없을 때만 그림 (PYPLOT_LOCK 안에서)
+    return get_figure_cache().get_or_render(chart_id, data, lambda: CHARTS[chart_id](data))
+
+def show_figure(chart_id, data):
+    st.image(render_chart(chart_id, data), width="stretch")
+
+# 04 분석 기간 (2024년 상반기 6개월)
+RETURN_PATTERN_YEAR = 2024
+RETURN_PATTERN_MONTHS = range(1, 7)
+
+@st.cache_data(show_spinner=False)
+def summarize_cached(kind, path, fingerprint):
+    # fingerprint(파일 내용 해시)가 캐시 키 - 내용이 바뀐 파일만 다시 집계
+    return loaders.summarize_file(kind, path)
+
+def summarize_file(kind, path):
+    return summarize_cached(kind, path, loaders.file_fingerprint(path))
+
+def foreign_cube_key():
+    # (파일명, 내용 해시) 목록 - 원본 파일이 없으면 빈 튜플
+    return tuple(sorted(loaders.foreign_cube_inputs().items()))
+
+def load_foreign_cube():
+    return load_foreign_cube_cached(foreign_cube_key())
+
+@st.cache_resource(show_spinner=False)
+def load_foreign_cube_cached(inputs):
+    # inputs: (파일명, 내용 해시) - 미리 만들어 둔 큐브가 같은 입력이면 그대로 사용
+    # 메모리 맵 파일로 발행해 같은 서버의 모든 프로세스/세션이 읽기 전용 한 복사본을 공유
+    def build():
+        saved_cube, saved_inputs = cube.load_cube()
+        if saved_cube is not None and tuple(sorted(saved_inputs.items())) == inputs:
+            return saved_cube
+        return loaders.load_foreign_cube(summarize=summarize_file)
+    return shared_frame('foreign_cube', inputs, None, build)
+
+@st.cache_data(show_spinner=False)
+def load_growth_matrix_cached(inputs, granularity):
+    # 단위별 (대여소 × 기간) 배열은 한 번만 만들고, 기간 선택은 배열 열 비교로 바로 계산
+    return StationPeriodMatrix.from_cube(load_foreign_cube_cached(inputs), granularity)
+
+def page_data(load, snapshot_data, with_cube=False):
+    # 원본 파일에서 집계한 항목이 우선, 원본이 없는 항목은 노트북 스냅샷 사용
+    options = {'cube': load_foreign_cube()} if with_cube else {}
+    return {**snapshot_data, **load(summarize=summarize_file, **options)}
+
+def load_page_data(load, snapshot_data, with_cube=False):
+    try:
+        return page_data(load, snapshot_data, with_cube)
+    except Exception as e:
+        st.warning(f"원본 데이터 집계 실패 - 저장된 노트북 결과를 표시합니다 ({e})")
+        return snapshot_data
+
+def store_fingerprint():
+    # 변환 목록(manifest)이 바뀌면 OD 캐시도 새로 계산
+    path = manifest_path()
+    return loaders.file_fingerprint(path) if os.path.exists(path) else None
+
+def load_od_data(year, months):
+    return load_od_data_cached(year, months, store_fingerprint())
+
+@st.cache_resource(show_spinner=False)
+def load_od_data_cached(year, months, fingerprint):
+    # 저장된 월별 OD 행렬을 합산, 아직 없으면 대여이력을 배치 단위로 읽어 바로 만듦
+    # 합산 결과는 메모리 맵 파일로 발행해 프로세스/세션 간 공유 (읽기 전용)
+    if fingerprint is None or not store_available():
+        return None, None
+    stations = load_station_dictionary()
+
+    def build():
+        od_matrix = load_od_matrix(year=year, months=months)
+        if od_matrix.nnz == 0:
+            od_counts = aggregate_od(iter_store_batches(year=year, months=months))
+            od_matrix = od_counts_to_matrix(od_counts, len(stations))
+        return od_matrix
+
+    try:
+        od_matrix = shared_csr('od_matrix', fingerprint, (year, months), build)
+    except Exception:
+        return None, None
+    return od_matrix, stations
+
+def load_rebalancing_data(year, months):
+    return load_rebalancing_cached(year, months, store_fingerprint())
+
+@st.cache_data(show_spinner=False)
+def load_rebalancing_cached(year, months, fingerprint):
+    # 저장된 월별 재배치 연결을 합산, 아직 없으면 대여이력을 자전거별로 정렬해 바로 계산
+    if fingerprint is None or not store_available():
+        return None
+    try:
+        flows = load_rebalancing(year=year, months=months)
+        if flows is None:
+            flows = rebalancing_flows(year=year, months=months)
+    except Exception:
+        return None
+    return flows if flows.total_links > 0 else None
+
+@st.cache_data(show_spinner=False)
+def load_netflow_cached(year, fingerprint):
+    # 대여소 × 요일 유형 × 시각 배열이라 작아서 세션마다 복사해도 됨
+    if fingerprint is None or not store_available():
+        return None, None
+    flow = load_netflow(year=year)
+    return flow, load_station_dictionary()
+
+def load_transition_model(year, user_types):
+    fingerprint = store_fingerprint()
+    if fingerprint is None or not store_available():
+        return None
+    return get_transition_model(year, user_types, fingerprint)
+
+@st.cache_resource(show_spinner=False)
+def get_transition_model(year, user_types, fingerprint):
+    # 희소 전이 행렬은 읽기 전용이라 모든 세션이 공유 - 변환 목록이 바뀌면 다시 만듦
+    return TransitionModel.from_store(year, user_types=user_types)
+
+@st.cache_resource(show_spinner=False)
+def load_station_rankings_cached(user_types, fingerprint):
+    # 대여이력을 두 번 스트리밍해 (대여/반납 × 연도/월/요일) 구간별 TOP 5를 한 번에 - 메모리는 스케치 크기만큼
+    # 결과 표는 메모리 맵 파일로 발행해 프로세스/세션 간 공유 (읽기 전용)
+    if fingerprint is None or not store_available():
+        return None, None
+    try:
+        rankings = shared_frame('station_rankings', fingerprint, user_types,
+                                lambda: rankings_frame(station_rankings(user_types=user_types)))
+    except Exception:
+        return None, None
+    return (rankings if len(rankings) else None), load_station_dictionary()
+
+@st.cache_data(show_spinner=False)
+def load_quantile_sketches_cached(year, months, fingerprint):
+    # 저장된 월별 스케치를 더하기만 하므로 기간을 바꿔도 원본을 다시 읽지 않음
+    if fingerprint is None or not store_available():
+        return None, None
+    return load_quantile_sketches(year=year, months=months), load_station_dictionary()
+
+@st.cache_resource(show_spinner=False)
+def get_sql_engine(fingerprint):
+    # fingerprint(변환 목록 해시)가 바뀌면 새 데이터셋으로 뷰를 다시 만듦
+    from ddareungi.sql import SQLEngine
+    return SQLEngine()
+
+@st.cache_data(show_spinner=False)
+def rental_user_types(fingerprint):
+    return get_sql_engine(fingerprint).query('SELECT DISTINCT "이용자종류" FROM rentals WHERE "이용자종류" IS NOT NULL ORDER BY 1')['이용자종류'].tolist()
+
+def load_daily_index_data():
+    path = daily_index_path()
+    if not os.path.exists(path):
+        return None
+    return get_daily_index(loaders.file_fingerprint(path))
+
+@st.cache_resource(show_spinner=False)
+def get_daily_index(fingerprint):
+    # 누적 배열은 읽기 전용이라 메모리 맵 파일로 발행해 모든 프로세스/세션이 한 복사본을 공유
+    return shared_daily_index(fingerprint, load_daily_index)
+
+def load_station_index_data():
+    path = loaders.find_data_file(config.STATION_INFO_GLOB)
+    if path is None:
+        return None
+    return get_station_index(loaders.file_fingerprint(path))
+
+@st.cache_resource(show_spinner=False)
+def get_station_index(fingerprint):
+    # 대여소 좌표 KD-tree와 반경별 권역은 모든 세션이 한 객체를 공유
+    return load_station_index()
+
+def load_return_pattern_results():
+    od_matrix, stations = load_od_data(RETURN_PATTERN_YEAR, tuple(RETURN_PATTERN_MONTHS))
+    if od_matrix is None:
+        return None
+    results = {station_id: station_return_pattern(od_matrix, stations.code_of(station_id), stations)
+               for station_id in TOP5_STATIONS.keys()}
+    if not all(results.values()):
+        return None
+    return results
+
+def raw_rental_key(year, months):
+    # 원본 파일은 (경로, 크기, 수정시각)으로 구분 - 내용 해시는 파일 전체를 읽어야 해서 미리보기에 맞지 않음
+    return tuple((path, os.path.getsize(path), os.stat(path).st_mtime_ns) for path in period_files(year, months))
+
+@st.cache_data(show_spinner=False)
+def sample_return_patterns_cached(files_key):
+    estimates = sample_estimates([path for path, _, _ in files_key])
+    return estimates.return_patterns(TOP5_STATIONS.keys()), estimates.sampled_rows, estimates.estimated_rows
+
+@st.cache_resource(show_spinner=False)
+def get_return_pattern_job(files_key):
+    # 세션/새로고침과 무관하게 같은 파일 목록이면 정확한 전체 집계는 한 번만 돌림
+    return BackgroundJob(exact_return_patterns, [path for path, _, _ in files_key], list(TOP5_STATIONS.keys()))
+
+def load_return_pattern_preview():
+    # 변환된 데이터 없이 원본 대여이력만 있으면 표본 근사치를 먼저 보여 주고, 전체 집계가 끝나면 그 결과로 교체
+    files_key = raw_rental_key(RETURN_PATTERN_YEAR, tuple(RETURN_PATTERN_MONTHS))
+    if not files_key:
+        return None, None
+    job = get_return_pattern_job(files_key)
+    if job.done and job.error is None and all(job.result.values()):
+        return job.result, {'approximate': False}
+    results, sampled_rows, estimated_rows = sample_return_patterns_cached(files_key)
+    if not all(results.values()):
+        return None, None
+    return results, {'approximate': True, 'sampled_rows': sampled_rows, 'estimated_rows': estimated_rows,
+                     'progress': job.progress, 'error': job.error}
+
+def show_preview_status(status):
+    if not status['approximate']:
+        st.success("✅ 원본 대여이력 전체 집계 결과입니다.")
+        return
+    rate = status['sampled_rows'] / max(status['estimated_rows'], 1) * 100
+    st.warning(f"⚡ 근사치 미리보기 - 원본 표본 {status['sampled_rows']:,}건 (추정 전체 {status['estimated_rows']:,.0f}건의 {rate:.1f}%) 기준이며, "
+               "표의 구간은 95% 신뢰구간입니다.")
+    if status['error'] is not None:
+        st.error(f"전체 집계 실패 - 근사치만 표시합니다 ({status['error']})")
+        return
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.progress(status['progress'], text=f"전체 집계 진행 중 ({status['progress'] * 100:.0f}%)")
+    with col2:
+        st.button("🔄 정확한 값 확인", key="return_pattern_refresh")
+
+def latest_store_year():
+    years = [year for year, _ in available_months()] if store_available() else []
+    return max(years, default=None)
+
+def warm_up_page_data():
+    # 01 ~ 03, 05 페이지 집계 - 원본 파일별 요약(summarize_cached)과 외국인 이용 큐브가 캐시에 남음
+    foreign_cube = load_foreign_cube()
+    for load in [loaders.load_foreign_usage, loaders.load_foreign_ratio, loaders.load_station_pattern]:
+        load(summarize=summarize_file, cube=foreign_cube)
+    loaders.load_tourist(summarize=summarize_file)
+    load_growth_matrix_cached(foreign_cube_key(), GRANULARITIES[0])
+
+def warm_up_store_models():
+    # 03 페이지 구간별 순위와 코스 모델 (최근 연도, 외국인)
+    year = latest_store_year()
+    if year is not None:
+        load_station_rankings_cached(('외국인',), store_fingerprint())
+        load_transition_model(year, ('외국인',))
+
+def warm_up_return_patterns():
+    # 04 페이지 OD 합산과 재배치 연결 (변환된 데이터가 없으면 원본 표본 근사치)
+    if load_return_pattern_results() is None:
+        load_return_pattern_preview()
+    load_rebalancing_data(RETURN_PATTERN_YEAR, tuple(RETURN_PATTERN_MONTHS))
+
+def warm_up_store_arrays():
+    # 04-1 / 04-2 페이지 기본 선택값 (최근 연도 전체 월)
+    year = latest_store_year()
+    if year is not None:
+        load_netflow_cached(year, store_fingerprint())
+        months = tuple(month for y, month in available_months() if y == year)
+        load_quantile_sketches_cached(year, months, store_fingerprint())
+
+def warm_up_figures():
+    # 개요 ~ 05 페이지를 기본 선택값으로 처음 열 때 그리는 차트 - 앞 단계의 데이터 캐시로 차트 데이터를 만들고
+    # FigureCache 에 렌더링 (PYPLOT_LOCK 안에서 하나씩, 세션이 같은 차트를 그리는 중이면 그 결과를 기다림)
+    charts = {}
+    charts.update(foreign_usage_charts(page_data(loaders.load_foreign_usage, snapshot.FOREIGN_USAGE, with_cube=True)))
+    charts.update(foreign_ratio_charts(page_data(loaders.load_foreign_ratio, snapshot.FOREIGN_RATIO, with_cube=True)))
+    charts.update(station_pattern_charts(page_data(loaders.load_station_pattern, snapshot.STATION_PATTERN, with_cube=True)))
+    charts['04.patterns'] = return_pattern_chart(current_return_patterns()[0])
+    charts.update(default_netflow_charts())
+    charts.update(default_quantile_charts())
+    charts.update(tourist_charts(page_data(loaders.load_tourist, snapshot.TOURIST)))
+    for chart_id, data in charts.items():
+        render_chart(chart_id, data)
+
+# (표시 이름, 함수) - 세션 없이 캐시된 집계 함수와 FigureCache 만 부르고 st 화면 요소는 부르지 않음
+WARMUP_STEPS = [
+    ("원본 요약 · 외국인 이용 큐브", warm_up_page_data),
+    ("대여소 순위 · 코스 모델", warm_up_store_models),
+    ("OD 행렬 · 재배치 연결", warm_up_return_patterns),
+    ("순유입 · 분위수 스케치", warm_up_store_arrays),
+    ("기본 선택 차트 이미지", warm_up_figures),
+]
+
+def warm_up_caches(steps, report):
+    errors = {}
+    for i, (label, warm_up) in enumerate(steps):
+        try:
+            warm_up()
+        except Exception as e:
+            errors[label] = e
+        report((i + 1) / len(steps))
+    return errors
+
+@st.cache_resource(show_spinner=False)
+def get_warmup_job(fingerprint):
+    # 서버 프로세스마다 한 번 (변환 목록이 바뀌면 다시) - 모든 세션이 같은 작업을 봄
+    return BackgroundJob(warm_up_caches, WARMUP_STEPS)
+
+def show_warmup_status(job, labels):
+    if job.done:
+        if job.error is not None or job.result:
+            failed = [] if job.error is not None else list(job.result)
+            st.sidebar.caption(f"⚠️ 일부 캐시 준비 실패 {', '.join(failed) or job.error} - 페이지를 열 때 다시 계산합니다.")
+        else:
+            st.sidebar.caption("✅ 모든 데이터 · 차트 캐시 준비 완료")
+        return
+    ready = int(job.progress * len(labels) + 1e-9)
+    st.sidebar.progress(job.progress, text=f"⏳ 데이터 미리 준비 중 ({ready}/{len(labels)}) - {labels[min(ready, len(labels) - 1)]}")
+    st.sidebar.button("🔄 진행 상황 새로고침", key="warmup_refresh")
+
 # 메인 함수
 def main():
     st.title("🚴‍♂️ 따릉이 & 외국인 관광객 데이터 분석 대시보드")
@@ -57,36 +415,92 @@ def main():
 
     # 사이드바
     st.sidebar.title("📋 분석 메뉴")
-    page = st.sidebar.selectbox("분석 페이지 선택", [
-        "📊 개요",
-        "🚴‍♂️ 01. 외국인 따릉이 이용패턴",
-        "📈 02. 전체 따릉이 중 외국인 비중",
-        "🗺️ 03. 외국인 대여반납 장소패턴",
-        "🏆 04. 전체 따릉이 이용객 반납장소",
-        "🌏 05. 해외관광객 추이분석"
-    ])
+    pages = {
+        "📊 개요": show_overview,
+        "🚴‍♂️ 01. 외국인 따릉이 이용패턴": show_foreign_usage_pattern,
+        "📈 02. 전체 따릉이 중 외국인 비중": show_foreign_ratio,
+        "🗺️ 03. 외국인 대여반납 장소패턴": show_foreign_station_pattern,
+        "🏆 04. 전체 따릉이 이용객 반납장소": show_all_users_pattern,
+        "⚖️ 04-1. 대여소 시간대별 순유입": show_station_netflow,
+        "⏱️ 04-2. 대여소별 이용시간·거리 분포": show_trip_quantiles,
+        "🌏 05. 해외관광객 추이분석": show_tourist_trend,
+        "🔎 06. 대여이력 조회": show_rental_query,
+        "📅 07. 기간별 대여소 집계": show_period_summary,
+    }
+    page = st.sidebar.selectbox("분석 페이지 선택", list(pages))
+
+    # 개요는 바로 보여 주고, 개요 ~ 05 페이지 데이터와 기본 차트는 뒤에서 미리 준비 (06/07은 사용자 입력에 따라 달라 제외)
+    if WARMUP_ENABLED:
+        show_warmup_status(get_warmup_job(store_fingerprint()), [label for label, _ in WARMUP_STEPS])
 
     # 페이지별 라우팅
-    if page == "📊 개요":
-        show_overview()
-    elif page == "🚴‍♂️ 01. 외국인 따릉이 이용패턴":
-        show_foreign_usage_pattern()
-    elif page == "📈 02. 전체 따릉이 중 외국인 비중":
-        show_foreign_ratio()
-    elif page == "🗺️ 03. 외국인 대여반납 장소패턴":
-        show_foreign_station_pattern()
-    elif page == "🏆 04. 전체 따릉이 이용객 반납장소":
-        show_all_users_pattern()
-    elif page == "🌏 05. 해외관광객 추이분석":
-        show_tourist_trend()
+    pages[page]()
+
+def top_station_streak(yearly_rental_top5):
+    # 최근 연도 1위 대여소와 몇 년 연속 1위인지 (대여소번호 기준 - 이름이 바뀐 해도 같은 대여소)
+    years = sorted(yearly_rental_top5)
+    firsts = [yearly_rental_top5[year][0][0] if yearly_rental_top5[year] else None for year in years]
+    if not firsts or firsts[-1] is None:
+        return None, 0
+    numbers = station_numbers([first or '' for first in firsts]).tolist()
+    streak = 1
+    while streak < len(numbers) and firsts[-streak - 1] is not None and numbers[-streak - 1] == numbers[-1]:
+        streak += 1
+    return firsts[-1], streak
+
+def weekend_weekday_ratio(weekday_data, index=-1):
+    # 주말 하루 평균 / 평일 하루 평균 (weekday_years 의 index 번째 연도)
+    weekend = [weekday_data[day][index] for day in ('토요일', '일요일')]
+    weekdays = [counts[index] for day, counts in weekday_data.items() if day not in ('토요일', '일요일')]
+    return (sum(weekend) / len(weekend)) / (sum(weekdays) / len(weekdays))
+
+def tourist_summary(tourist):
+    # 05 페이지 주요 지표 - 개요와 05 페이지가 같은 값을 씀
+    years_long, totals = tourist['years_long'], tourist['total_visitors_long']
+    gender_data, continent_data = tourist['gender_data'], tourist['continent_data']
+    last_total = totals[-1]
+    # 코로나19 이전(2019년까지) 최고 연도 대비 회복 수준
+    pre_covid = [(total, year) for year, total in zip(years_long, totals) if int(year) < 2020]
+    pre_total, pre_year = max(pre_covid) if pre_covid else (None, None)
+    last_gender_year = list(gender_data.keys())[-1]
+    continent_year = list(next(iter(continent_data.values())).keys())[-1]
+    continent_total = sum(data[continent_year] for data in continent_data.values())
+    top_continent = max(continent_data, key=lambda cont: continent_data[cont][continent_year])
+    return {
+        'last_year': years_long[-1],
+        'last_total': last_total,
+        'total_rank': sorted(totals, reverse=True).index(last_total) + 1,
+        'pre_covid_year': pre_year,
+        'recovery': last_total / pre_total * 100 if pre_total else None,
+        'last_gender_year': last_gender_year,
+        'female_ratio': gender_data[last_gender_year]['여성비율'],
+        'continent_year': continent_year,
+        'top_continent': top_continent,
+        'top_share': continent_data[top_continent][continent_year] / continent_total * 100,
+    }
+
+def recovery_text(summary):
+    if summary['recovery'] is None:
+        return None
+    if summary['recovery'] >= 100:
+        return f"코로나19 이전 최고({summary['pre_covid_year']}년) 수준 넘어섬 ({summary['recovery']:.0f}%)"
+    return f"코로나19 이전 최고({summary['pre_covid_year']}년)의 {summary['recovery']:.0f}% 회복"
 
 def show_overview():
     st.header("📊 분석 개요")
 
+    usage = load_page_data(loaders.load_foreign_usage, snapshot.FOREIGN_USAGE, with_cube=True)
+    annual_data = usage['annual_data']
+    first_year, last_year = min(annual_data), max(annual_data)
+    top_station, streak = top_station_streak(
+        load_page_data(loaders.load_station_pattern, snapshot.STATION_PATTERN, with_cube=True)['yearly_rental_top5'])
+    weekend_ratio = weekend_weekday_ratio(usage['weekday_data'])
+    tourist = tourist_summary(load_page_data(loaders.load_tourist, snapshot.TOURIST))
+
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        st.metric("분석 기간", "2021년 ~ 2024년", "4년간")
+        st.metric("분석 기간", f"{first_year}년 ~ {last_year}년", f"{last_year - first_year + 1}년간")
 
     with col2:
         st.metric("분석 대상", "따릉이 + 관광객", "통합 분석")
@@ -113,136 +527,218 @@ def show_overview():
     col1, col2 = st.columns(2)
 
     with col1:
-        st.success("""
-        **🚴‍♂️ 따릉이 이용 급증**
-        - 2021년 19,049건 → 2024년 71,077건
-        - 여의나루역이 4년 연속 1위
-        - 주말 이용량이 평일의 1.3배
+        streak_text = ""
+        if top_station is not None:
+            streak_text = (f"- {short_station_name(top_station)}: {streak}년 연속 1위" if streak > 1
+                           else f"- {last_year}년 1위 {short_station_name(top_station)}")
+        st.success(f"""
+        **🚴‍♂️ 따릉이 이용 {'증가' if annual_data[last_year] >= annual_data[first_year] else '감소'}**
+        - {first_year}년 {annual_data[first_year]:,}건 → {last_year}년 {annual_data[last_year]:,}건
+        {streak_text}
+        - 주말 하루 이용량이 평일의 {weekend_ratio:.1f}배 ({usage['weekday_years'][-1]}년)
         """)
 
     with col2:
-        st.info("""
-        **🌏 관광객 완전 회복**
-        - 2024년 1,637만명 (역대 2위)
-        - 아시아주 80.1% 압도적 비중
-        - 여성 관광객 지속적 우세 (56.5%)
+        recovery = recovery_text(tourist)
+        st.info(f"""
+        **🌏 관광객 추이**
+        - {tourist['last_year']}년 {tourist['last_total'] / 10000:,.0f}만명 (역대 {tourist['total_rank']}위)
+        {f"- {recovery}" if recovery else ""}
+        - {tourist['top_continent']} {tourist['top_share']:.1f}% 비중 ({tourist['continent_year']}년)
+        - 여성 관광객 비율 {tourist['female_ratio']:.1f}% ({tourist['last_gender_year']}년)
         """)
 
-def show_foreign_usage_pattern():
-    st.header("🚴‍♂️ 외국인 따릉이 이용패턴 분석")
+def weekday_weekend_averages(weekday_years, weekday_data):
+    # 연도별 평일(월~금) / 주말(토, 일) 요일 평균을 다시 연도 평균
+    weekdays = list(weekday_data.keys())
+    weekday_avg = np.mean([np.mean([weekday_data[day][i] for day in weekdays[:5]]) for i in range(len(weekday_years))])
+    weekend_avg = np.mean([np.mean([weekday_data[day][i] for day in weekdays[5:]]) for i in range(len(weekday_years))])
+    return weekday_avg, weekend_avg
+
+@chart('01.annual')
+def draw_annual_usage(annual_data):
+    years = list(annual_data.keys())
+    counts = list(annual_data.values())
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    bars = ax.bar(years, counts, color=['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A'])
+    ax.set_title('연도별 외국인 관광객 따릉이 대여건수',
+                fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    ax.set_xlabel('연도', fontproperties=korean_font_prop)
+    ax.set_ylabel('총 대여건수', fontproperties=korean_font_prop)
+
+    for bar, count in zip(bars, counts):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(counts)*0.01,
+               f'{count:,}', ha='center', va='bottom', fontweight='bold')
+    return fig
+
+@chart('01.growth')
+def draw_annual_growth(annual_data):
+    years = list(annual_data.keys())
+    counts = list(annual_data.values())
+    growth_rates = []
+    growth_years = []
+    for i in range(1, len(years)):
+        growth_rate = ((counts[i] - counts[i-1]) / counts[i-1]) * 100
+        growth_rates.append(growth_rate)
+        growth_years.append(f"{years[i-1]}-{years[i]}")
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    colors = ['green' if rate >= 0 else 'red' for rate in growth_rates]
+    bars = ax.bar(growth_years, growth_rates, color=colors, alpha=0.7)
+    ax.set_title('연도별 증가율 (%)', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    ax.set_xlabel('연도', fontproperties=korean_font_prop)
+    ax.set_ylabel('증가율 (%)', fontproperties=korean_font_prop)
+    ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
+
+    for bar, rate in zip(bars, growth_rates):
+        ax.text(bar.get_x() + bar.get_width()/2,
+               bar.get_height() + (5 if rate >= 0 else -10),
+               f'{rate:.1f}%', ha='center', va='bottom' if rate >= 0 else 'top',
+               fontweight='bold')
+    return fig
+
+@chart('01.monthly')
+def draw_monthly_usage(monthly_data):
+    monthly_years = list(monthly_data.keys())
+    period = f"{monthly_years[0]}-{monthly_years[-1]}"
+    months = range(1, 13)
+    colors = ['#FF6B6B', '#4ECDC4', '#9B59B6']
+    markers = ['o', 's', '^']
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+
+    for i, year in enumerate(monthly_years):
+        values = monthly_data[year]
+        ax.plot(months, values, marker=markers[i], linewidth=2.5,
+               markersize=8, color=colors[i], label=f'{year}년')
+
+    ax.set_title(f'월별 외국인 관광객 따릉이 이용량 추이 ({period})',
+                fontproperties=korean_font_prop, fontsize=16, fontweight='bold')
+    ax.set_xlabel('월', fontproperties=korean_font_prop, fontsize=12)
+    ax.set_ylabel('총 대여건수', fontproperties=korean_font_prop, fontsize=12)
+    ax.set_xticks(months)
+    legend = ax.legend(fontsize=12)
+    if korean_font_prop:
+        for text in legend.get_texts():
+            text.set_fontproperties(korean_font_prop)
+    ax.grid(True, alpha=0.3)
+    return fig
 
-    # 연도별 이용량 데이터
-    annual_data = {2021: 19049, 2022: 50761, 2023: 64342, 2024: 71077}
+@chart('01.weekday')
+def draw_weekday_usage(data):
+    years, weekday_data = data
+    weekdays = list(weekday_data.keys())
+    colors = ['#FF6B6B', '#4ECDC4', '#9B59B6']
+    fig, ax = plt.subplots(figsize=(12, 8))
 
-    # 월별 이용량 데이터
-    monthly_data = {
-        2022: [518, 566, 1570, 4838, 6350, 5735, 5640, 4198, 7278, 7154, 5981, 933],
-        2023: [502, 783, 2473, 3775, 5325, 9562, 6392, 6560, 9621, 11592, 5689, 2068],
-        2024: [1403, 2043, 5959, 10403, 9390, 10103, 6602, 5091, 7271, 7108, 4296, 1408]
-    }
+    for i, year in enumerate(years):
+        values = [weekday_data[day][i] for day in weekdays]
+        ax.plot(weekdays, values, marker='o', linewidth=2.5,
+               markersize=6, color=colors[i], label=f'{year}년')
+
+    ax.set_title('요일별 이용량 추이', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    ax.set_xlabel('요일', fontproperties=korean_font_prop)
+    ax.set_ylabel('총 대여건수', fontproperties=korean_font_prop)
 
-    # 요일별 이용량 데이터
-    weekday_data = {
-        '월요일': [6156, 9297, 9654],
-        '화요일': [6343, 8039, 8637],
-        '수요일': [6207, 7600, 8930],
-        '목요일': [5973, 7621, 9208],
-        '금요일': [7252, 9208, 9995],
-        '토요일': [9502, 10686, 11758],
-        '일요일': [9328, 11891, 12895]
+    if korean_font_prop:
+        ax.set_xticklabels(weekdays, fontproperties=korean_font_prop)
+
+    plt.xticks(rotation=45)
+    legend = ax.legend()
+    if korean_font_prop:
+        for text in legend.get_texts():
+            text.set_fontproperties(korean_font_prop)
+    ax.grid(True, alpha=0.3)
+    return fig
+
+@chart('01.weekend')
+def draw_weekend_usage(data):
+    fig, ax = plt.subplots(figsize=(8, 6))
+    categories = ['평일', '주말']
+    values = list(weekday_weekend_averages(*data))
+
+    bars = ax.bar(categories, values, color=['#4ECDC4', '#FF6B6B'], alpha=0.8)
+    ax.set_title('평일 vs 주말 평균 이용량', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    ax.set_ylabel('평균 대여건수', fontproperties=korean_font_prop)
+
+    if korean_font_prop:
+        ax.set_xticklabels(categories, fontproperties=korean_font_prop)
+
+    for bar, value in zip(bars, values):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(values)*0.02,
+               f'{value:,.0f}', ha='center', va='bottom', fontweight='bold')
+    return fig
+
+def foreign_usage_charts(usage):
+    # 01 페이지 차트 id → 차트 데이터 (선택 위젯이 없어 미리 준비한 이미지와 같은 키)
+    weekday = (usage['weekday_years'], usage['weekday_data'])
+    return {
+        '01.annual': usage['annual_data'],
+        '01.growth': usage['annual_data'],
+        '01.monthly': usage['monthly_data'],
+        '01.weekday': weekday,
+        '01.weekend': weekday,
     }
 
+def show_foreign_usage_pattern():
+    st.header("🚴‍♂️ 외국인 따릉이 이용패턴 분석")
+
+    # 연도별/월별/요일별 이용량 데이터
+    usage = load_page_data(loaders.load_foreign_usage, snapshot.FOREIGN_USAGE, with_cube=True)
+    annual_data = usage['annual_data']
+    monthly_data = usage['monthly_data']
+    weekday_data = usage['weekday_data']
+    weekday_years = usage['weekday_years']
+    charts = foreign_usage_charts(usage)
+
+    annual_years = list(annual_data.keys())
+    first_year, last_year = annual_years[0], annual_years[-1]
+    last_monthly = monthly_data[max(monthly_data)]
+    peak_month = int(np.argmax(last_monthly)) + 1
+    last_weekday = {day: values[-1] for day, values in weekday_data.items()}
+    peak_weekday = max(last_weekday, key=last_weekday.get)
+
     # 주요 지표
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("2024년 총 이용", "71,077건", "+10.5%")
+        if len(annual_years) > 1:
+            last_growth = (annual_data[last_year] / annual_data[annual_years[-2]] - 1) * 100
+            st.metric(f"{last_year}년 총 이용", f"{annual_data[last_year]:,}건", f"{last_growth:+.1f}%")
+        else:
+            st.metric(f"{last_year}년 총 이용", f"{annual_data[last_year]:,}건")
 
     with col2:
-        st.metric("4년간 증가율", "+273%", "2021년 대비")
+        total_growth = (annual_data[last_year] / annual_data[first_year] - 1) * 100
+        st.metric(f"{len(annual_years)}년간 증가율", f"{total_growth:+.0f}%", f"{first_year}년 대비")
 
     with col3:
-        st.metric("최고 이용 요일", "일요일", "12,895건")
+        st.metric("최고 이용 요일", peak_weekday, f"{last_weekday[peak_weekday]:,}건")
 
     with col4:
-        st.metric("최고 이용 월", "4월", "10,403건")
+        st.metric("최고 이용 월", f"{peak_month}월", f"{last_monthly[peak_month - 1]:,}건")
 
-    # 탭 구성
-    tab1, tab2, tab3 = st.tabs(["📈 연도별 추이", "🗓️ 월별 패턴", "📅 요일별 패턴"])
-
-    with tab1:
+    # 탭 구성 (선택된 탭만 그림)
+    def annual_tab():
         st.subheader("연도별 외국인 따릉이 이용량 증가 추이")
 
         col1, col2 = st.columns(2)
 
         with col1:
             # 연도별 이용량
-            fig, ax = plt.subplots(figsize=(10, 6))
-            years = list(annual_data.keys())
-            counts = list(annual_data.values())
-
-            bars = ax.bar(years, counts, color=['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A'])
-            ax.set_title('연도별 외국인 관광객 따릉이 대여건수',
-                        fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
-            ax.set_xlabel('연도', fontproperties=korean_font_prop)
-            ax.set_ylabel('총 대여건수', fontproperties=korean_font_prop)
-
-            for bar, count in zip(bars, counts):
-                ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(counts)*0.01,
-                       f'{count:,}', ha='center', va='bottom', fontweight='bold')
-
-            st.pyplot(fig)
+            show_figure('01.annual', charts['01.annual'])
 
         with col2:
             # 증가율
-            growth_rates = []
-            growth_years = []
-            for i in range(1, len(years)):
-                growth_rate = ((counts[i] - counts[i-1]) / counts[i-1]) * 100
-                growth_rates.append(growth_rate)
-                growth_years.append(f"{years[i-1]}-{years[i]}")
-
-            fig, ax = plt.subplots(figsize=(10, 6))
-            colors = ['green' if rate >= 0 else 'red' for rate in growth_rates]
-            bars = ax.bar(growth_years, growth_rates, color=colors, alpha=0.7)
-            ax.set_title('연도별 증가율 (%)', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
-            ax.set_xlabel('연도', fontproperties=korean_font_prop)
-            ax.set_ylabel('증가율 (%)', fontproperties=korean_font_prop)
-            ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
-
-            for bar, rate in zip(bars, growth_rates):
-                ax.text(bar.get_x() + bar.get_width()/2,
-                       bar.get_height() + (5 if rate >= 0 else -10),
-                       f'{rate:.1f}%', ha='center', va='bottom' if rate >= 0 else 'top',
-                       fontweight='bold')
-
-            st.pyplot(fig)
-
-    with tab2:
-        st.subheader("월별 외국인 따릉이 이용량 패턴 (2022-2024)")
-
-        fig, ax = plt.subplots(figsize=(14, 8))
-        months = range(1, 13)
-        colors = ['#FF6B6B', '#4ECDC4', '#9B59B6']
-        markers = ['o', 's', '^']
-
-        for i, year in enumerate([2022, 2023, 2024]):
-            values = monthly_data[year]
-            ax.plot(months, values, marker=markers[i], linewidth=2.5,
-                   markersize=8, color=colors[i], label=f'{year}년')
-
-        ax.set_title('월별 외국인 관광객 따릉이 이용량 추이 (2022-2024)',
-                    fontproperties=korean_font_prop, fontsize=16, fontweight='bold')
-        ax.set_xlabel('월', fontproperties=korean_font_prop, fontsize=12)
-        ax.set_ylabel('총 대여건수', fontproperties=korean_font_prop, fontsize=12)
-        ax.set_xticks(months)
-        legend = ax.legend(fontsize=12)
-        if korean_font_prop:
-            for text in legend.get_texts():
-                text.set_fontproperties(korean_font_prop)
-        ax.grid(True, alpha=0.3)
+            show_figure('01.growth', charts['01.growth'])
 
-        st.pyplot(fig)
+    def monthly_tab():
+        monthly_years = list(monthly_data.keys())
+        period = f"{monthly_years[0]}-{monthly_years[-1]}"
+        st.subheader(f"월별 외국인 따릉이 이용량 패턴 ({period})")
+
+        show_figure('01.monthly', charts['01.monthly'])
 
         # 월별 패턴 인사이트
         st.markdown("### 📊 월별 패턴 분석")
@@ -257,168 +753,160 @@ def show_foreign_usage_pattern():
         with col3:
             st.success("**🍂 가을철 안정**  \n9-10월 꾸준한 이용  \n관광 최적기")
 
-    with tab3:
+    def weekday_tab():
         st.subheader("요일별 외국인 따릉이 이용량 패턴")
 
-        # 요일별 데이터 시각화
-        weekdays = list(weekday_data.keys())
-        years = [2022, 2023, 2024]
-
         col1, col2 = st.columns(2)
 
         with col1:
             # 요일별 라인 차트
-            fig, ax = plt.subplots(figsize=(12, 8))
+            show_figure('01.weekday', charts['01.weekday'])
 
-            for i, year in enumerate(years):
-                values = [weekday_data[day][i] for day in weekdays]
-                ax.plot(weekdays, values, marker='o', linewidth=2.5,
-                       markersize=6, color=colors[i], label=f'{year}년')
-
-            ax.set_title('요일별 이용량 추이', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
-            ax.set_xlabel('요일', fontproperties=korean_font_prop)
-            ax.set_ylabel('총 대여건수', fontproperties=korean_font_prop)
+        with col2:
+            # 평일 vs 주말 비교
+            show_figure('01.weekend', charts['01.weekend'])
 
-            if korean_font_prop:
-                ax.set_xticklabels(weekdays, fontproperties=korean_font_prop)
+        weekday_avg, weekend_avg = weekday_weekend_averages(weekday_years, weekday_data)
 
-            plt.xticks(rotation=45)
-            legend = ax.legend()
-            if korean_font_prop:
-                for text in legend.get_texts():
-                    text.set_fontproperties(korean_font_prop)
-            ax.grid(True, alpha=0.3)
+        # 요일별 인사이트
+        st.markdown("### 📊 요일별 패턴 분석")
+        col1, col2 = st.columns(2)
 
-            st.pyplot(fig)
+        with col1:
+            st.success(f"**🎯 최고 이용 요일: {peak_weekday}**  \n{weekday_years[-1]}년 {last_weekday[peak_weekday]:,}건  \n여가 목적 이용 집중")
 
         with col2:
-            # 평일 vs 주말 비교
-            weekday_avg = np.mean([np.mean([weekday_data[day][i] for day in weekdays[:5]]) for i in range(3)])
-            weekend_avg = np.mean([np.mean([weekday_data[day][i] for day in weekdays[5:]]) for i in range(3)])
+            st.info(f"**📈 주말 vs 평일 비율**  \n주말이 평일보다 {weekend_avg / weekday_avg:.1f}배 높음  \n관광 목적 이용 특성")
 
-            fig, ax = plt.subplots(figsize=(8, 6))
-            categories = ['평일', '주말']
-            values = [weekday_avg, weekend_avg]
+    show_lazy_tabs("foreign_usage_tabs", [
+        ("📈 연도별 추이", annual_tab),
+        ("🗓️ 월별 패턴", monthly_tab),
+        ("📅 요일별 패턴", weekday_tab)
+    ])
 
-            bars = ax.bar(categories, values, color=['#4ECDC4', '#FF6B6B'], alpha=0.8)
-            ax.set_title('평일 vs 주말 평균 이용량', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
-            ax.set_ylabel('평균 대여건수', fontproperties=korean_font_prop)
+@chart('02.composition')
+def draw_ratio_composition(ratio_data):
+    years = ratio_data['years']
+    foreign_counts = ratio_data['foreign_counts']
+    general_counts = ratio_data['general_counts']
+    fig, ax = plt.subplots(figsize=(10, 8))
+    width = 0.6
+
+    p1 = ax.bar(years, [count/1000000 for count in general_counts], width,
+               label='일반 이용자', color='#4ECDC4', alpha=0.8)
+    p2 = ax.bar(years, [count/1000000 for count in foreign_counts], width,
+               bottom=[count/1000000 for count in general_counts],
+               label='외국인 이용자', color='#FF6B6B', alpha=0.8)
+
+    ax.set_title('연도별 따릉이 이용자 구성', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    ax.set_xlabel('연도', fontproperties=korean_font_prop)
+    ax.set_ylabel('총 이용건수 (백만건)', fontproperties=korean_font_prop)
+    legend = ax.legend()
+    if korean_font_prop:
+        for text in legend.get_texts():
+            text.set_fontproperties(korean_font_prop)
 
-            if korean_font_prop:
-                ax.set_xticklabels(categories, fontproperties=korean_font_prop)
+    # 총 이용건수 텍스트 추가
+    for i, year in enumerate(years):
+        total = (general_counts[i] + foreign_counts[i]) / 1000000
+        ax.text(year, total + 2, f'{total:.1f}M', ha='center', va='bottom', fontweight='bold')
+    return fig
 
-            for bar, value in zip(bars, values):
-                ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(values)*0.02,
-                       f'{value:,.0f}', ha='center', va='bottom', fontweight='bold')
+@chart('02.ratio')
+def draw_ratio_trend(ratio_data):
+    years = ratio_data['years']
+    foreign_ratios = ratio_data['foreign_ratios']
+    fig, ax = plt.subplots(figsize=(10, 8))
+    ax.plot(years, foreign_ratios, marker='o', linewidth=3, markersize=8, color='#FF6B6B')
+    ax.set_title('연도별 외국인 이용자 비율 추이', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    ax.set_xlabel('연도', fontproperties=korean_font_prop)
+    ax.set_ylabel('외국인 비율 (%)', fontproperties=korean_font_prop)
+    ax.grid(True, alpha=0.3)
+
+    # 비율 수치 표시
+    for i, (year, ratio) in enumerate(zip(years, foreign_ratios)):
+        ax.text(year, ratio + max(foreign_ratios) * 0.05, f'{ratio:.3f}%',
+               ha='center', va='bottom', fontweight='bold')
+    return fig
+
+@chart('02.pie')
+def draw_ratio_pie(ratio_data):
+    years = ratio_data['years']
+    period = f"{years[0]}-{years[-1]}"
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sizes = [sum(ratio_data['general_counts']), sum(ratio_data['foreign_counts'])]
+    labels = ['일반 이용자', '외국인 이용자']
+    colors = ['#4ECDC4', '#FF6B6B']
+    explode = (0, 0.1)
 
-            st.pyplot(fig)
+    wedges, texts, autotexts = ax.pie(sizes, explode=explode, labels=labels, colors=colors,
+                                     autopct='%1.3f%%', shadow=True, startangle=90)
 
-        # 요일별 인사이트
-        st.markdown("### 📊 요일별 패턴 분석")
-        col1, col2 = st.columns(2)
+    if korean_font_prop:
+        for text in texts:
+            text.set_fontproperties(korean_font_prop)
+        for autotext in autotexts:
+            autotext.set_fontproperties(korean_font_prop)
 
-        with col1:
-            st.success(f"**🎯 최고 이용 요일: 일요일**  \n2024년 평균 12,895건  \n여가 목적 이용 집중")
+    ax.set_title(f'{len(years)}년간 전체 이용자 구성 ({period})',
+                fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    return fig
 
-        with col2:
-            st.info(f"**📈 주말 vs 평일 비율**  \n주말이 평일보다 1.3배 높음  \n관광 목적 이용 특성")
+def foreign_ratio_charts(ratio_data):
+    # 02 페이지 차트 id → 차트 데이터 (세 차트 모두 연도별 구성 전체를 씀)
+    return {chart_id: ratio_data for chart_id in ['02.composition', '02.ratio', '02.pie']}
 
 def show_foreign_ratio():
     st.header("📈 전체 따릉이 이용자 중 외국인 비중 분석")
 
     # 데이터
-    years = [2022, 2023, 2024]
-    foreign_counts = [50761, 64342, 71077]
-    general_counts = [40950756, 44904665, 43849559]
-    total_counts = [41001517, 44969007, 43920636]
-    foreign_ratios = [0.124, 0.143, 0.162]
+    ratio_data = load_page_data(loaders.load_foreign_ratio, snapshot.FOREIGN_RATIO, with_cube=True)
+    years = ratio_data['years']
+    foreign_counts = ratio_data['foreign_counts']
+    general_counts = ratio_data['general_counts']
+    total_counts = ratio_data['total_counts']
+    foreign_ratios = ratio_data['foreign_ratios']
+    period = f"{years[0]}-{years[-1]}"
+    n_years = len(years)
+    charts = foreign_ratio_charts(ratio_data)
 
     # 주요 지표
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("2024년 외국인 비율", "0.162%", "+0.038%p")
+        st.metric(f"{years[-1]}년 외국인 비율", f"{foreign_ratios[-1]:.3f}%",
+                  f"{foreign_ratios[-1] - foreign_ratios[0]:+.3f}%p")
 
     with col2:
-        st.metric("2024년 외국인 이용", "71,077건", "+40.0%")
+        st.metric(f"{years[-1]}년 외국인 이용", f"{foreign_counts[-1]:,}건",
+                  f"{(foreign_counts[-1] / foreign_counts[0] - 1) * 100:+.1f}%")
 
     with col3:
-        st.metric("연평균 증가율", "14.3%", "2022-2024")
+        annual_rate = ((foreign_ratios[-1] / foreign_ratios[0]) ** (1 / max(n_years - 1, 1)) - 1) * 100
+        st.metric("연평균 증가율", f"{annual_rate:.1f}%", period)
 
     with col4:
-        st.metric("3년간 평균 비율", "0.143%", "소수지만 성장")
+        st.metric(f"{n_years}년간 평균 비율", f"{np.mean(foreign_ratios):.3f}%", "소수지만 성장")
 
     # 시각화
     col1, col2 = st.columns(2)
 
     with col1:
         # 연도별 이용자 구성 (스택 바 차트)
-        fig, ax = plt.subplots(figsize=(10, 8))
-        width = 0.6
-
-        p1 = ax.bar(years, [count/1000000 for count in general_counts], width,
-                   label='일반 이용자', color='#4ECDC4', alpha=0.8)
-        p2 = ax.bar(years, [count/1000000 for count in foreign_counts], width,
-                   bottom=[count/1000000 for count in general_counts],
-                   label='외국인 이용자', color='#FF6B6B', alpha=0.8)
-
-        ax.set_title('연도별 따릉이 이용자 구성', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
-        ax.set_xlabel('연도', fontproperties=korean_font_prop)
-        ax.set_ylabel('총 이용건수 (백만건)', fontproperties=korean_font_prop)
-        legend = ax.legend()
-        if korean_font_prop:
-            for text in legend.get_texts():
-                text.set_fontproperties(korean_font_prop)
-
-        # 총 이용건수 텍스트 추가
-        for i, year in enumerate(years):
-            total = (general_counts[i] + foreign_counts[i]) / 1000000
-            ax.text(year, total + 2, f'{total:.1f}M', ha='center', va='bottom', fontweight='bold')
-
-        st.pyplot(fig)
+        show_figure('02.composition', charts['02.composition'])
 
     with col2:
         # 외국인 비율 추이
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.plot(years, foreign_ratios, marker='o', linewidth=3, markersize=8, color='#FF6B6B')
-        ax.set_title('연도별 외국인 이용자 비율 추이', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
-        ax.set_xlabel('연도', fontproperties=korean_font_prop)
-        ax.set_ylabel('외국인 비율 (%)', fontproperties=korean_font_prop)
-        ax.grid(True, alpha=0.3)
-
-        # 비율 수치 표시
-        for i, (year, ratio) in enumerate(zip(years, foreign_ratios)):
-            ax.text(year, ratio + max(foreign_ratios) * 0.05, f'{ratio:.3f}%',
-                   ha='center', va='bottom', fontweight='bold')
-
-        st.pyplot(fig)
+        show_figure('02.ratio', charts['02.ratio'])
 
     # 3년간 총합 파이 차트
-    st.subheader("3년간(2022-2024) 전체 이용자 구성")
+    st.subheader(f"{n_years}년간({period}) 전체 이용자 구성")
 
     total_foreign = sum(foreign_counts)
     total_general = sum(general_counts)
     total_all = total_foreign + total_general
 
-    fig, ax = plt.subplots(figsize=(10, 8))
-    sizes = [total_general, total_foreign]
-    labels = ['일반 이용자', '외국인 이용자']
-    colors = ['#4ECDC4', '#FF6B6B']
-    explode = (0, 0.1)
-
-    wedges, texts, autotexts = ax.pie(sizes, explode=explode, labels=labels, colors=colors,
-                                     autopct='%1.3f%%', shadow=True, startangle=90)
-
-    if korean_font_prop:
-        for text in texts:
-            text.set_fontproperties(korean_font_prop)
-        for autotext in autotexts:
-            autotext.set_fontproperties(korean_font_prop)
-
-    ax.set_title('3년간 전체 이용자 구성 (2022-2024)',
-                fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
-
-    st.pyplot(fig)
+    show_figure('02.pie', charts['02.pie'])
 
     # 통계 요약
     st.markdown("### 📊 주요 통계")
@@ -433,64 +921,148 @@ def show_foreign_ratio():
     with col3:
         st.warning(f"**외국인 이용자**  \n{total_foreign:,}건  \n({(total_foreign/total_all)*100:.3f}%)")
 
+def short_station_name(station):
+    # "207. 여의나루역 1번출구 앞" → "여의나루역"
+    return station.split('.', 1)[-1].strip().split(' ')[0]
+
+def period_growth(matrix, granularity, before, after):
+    # 03 급성장 차트 데이터 (이전 기간 이름, 비교 기간 이름, 급성장 상위 행)
+    return format_period(before, granularity), format_period(after, granularity), matrix.growth_top(before, after)
+
+@chart('03.growth')
+def draw_station_growth(data):
+    before_label, after_label, rows = data
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
+
+    # 증가량 TOP 5
+    top5_growth = rows[:5]
+    names = [item[0][:20] + "..." for item in top5_growth]
+    growth_amounts = [item[2] - item[1] for item in top5_growth]
+
+    bars1 = ax1.barh(range(len(names)), growth_amounts, color='#E74C3C', alpha=0.8)
+    ax1.set_yticks(range(len(names)))
+    if korean_font_prop:
+        ax1.set_yticklabels(names, fontproperties=korean_font_prop, fontsize=10)
+    ax1.set_xlabel('증가량 (건)', fontproperties=korean_font_prop)
+    ax1.set_title(f'{before_label}→{after_label} 급성장 대여소 TOP 5', fontproperties=korean_font_prop, fontsize=12, fontweight='bold')
+    ax1.invert_yaxis()
+
+    for i, (bar, value) in enumerate(zip(bars1, growth_amounts)):
+        ax1.text(bar.get_width() + max(growth_amounts) * 0.02,
+                bar.get_y() + bar.get_height()/2,
+                f'+{int(value)}', ha='left', va='center', fontweight='bold')
+
+    # 두 기간 비교
+    x = np.arange(len(top5_growth))
+    width = 0.35
+
+    values_previous = [item[1] for item in top5_growth]
+    values_latest = [item[2] for item in top5_growth]
+
+    bars2 = ax2.bar(x - width/2, values_previous, width, label=before_label, color='#3498DB', alpha=0.8)
+    bars3 = ax2.bar(x + width/2, values_latest, width, label=after_label, color='#E74C3C', alpha=0.8)
+
+    ax2.set_xlabel('대여소', fontproperties=korean_font_prop)
+    ax2.set_ylabel('대여건수', fontproperties=korean_font_prop)
+    ax2.set_title('급성장 상위 5개 대여소 비교', fontproperties=korean_font_prop, fontsize=12, fontweight='bold')
+    ax2.set_xticks(x)
+    if korean_font_prop:
+        ax2.set_xticklabels([name[:10] + "..." for name in names],
+                           rotation=45, ha='right', fontproperties=korean_font_prop, fontsize=8)
+    legend = ax2.legend()
+    if korean_font_prop:
+        for text in legend.get_texts():
+            text.set_fontproperties(korean_font_prop)
+    return fig
+
+@chart('03.heatmap')
+def draw_station_heatmap(data):
+    heatmap_year, measure, matrix = data
+    fig, ax = plt.subplots(figsize=(14, max(4, len(matrix) * 0.45)))
+    sns.heatmap(matrix, annot=True, fmt='d', cmap='YlOrRd', linewidths=0.5, ax=ax,
+                cbar_kws={'label': measure})
+    ax.set_xticklabels([f'{month}월' for month in matrix.columns], fontproperties=korean_font_prop)
+    ax.set_yticklabels([station[:25] for station in matrix.index], rotation=0,
+                       fontproperties=korean_font_prop, fontsize=9)
+    ax.set_xlabel('')
+    ax.set_ylabel('')
+    ax.set_title(f'{heatmap_year}년 월별 {measure} 상위 3개 대여소', fontproperties=korean_font_prop,
+                 fontsize=14, fontweight='bold')
+    return fig
+
+def station_pattern_charts(pattern_data):
+    # 03 페이지 탭을 기본 선택값(가장 짧은 기간 단위의 마지막 두 기간, 최근 연도 대여건수)으로 열 때의 차트 데이터
+    previous_year, latest_year = pattern_data['growth_years']
+    growth = (f"{previous_year}년", f"{latest_year}년", pattern_data['growth_data'])
+    inputs = foreign_cube_key()
+    if inputs:
+        matrix = load_growth_matrix_cached(inputs, GRANULARITIES[0])
+        periods = matrix.periods.tolist()
+        if len(periods) >= 2:
+            growth = period_growth(matrix, GRANULARITIES[0], periods[-2], periods[-1])
+    charts = {'03.growth': growth} if growth[2] else {}
+
+    foreign_cube = load_foreign_cube()
+    if not foreign_cube.empty:
+        heatmap_year = max(foreign_cube['연도'].unique().tolist())
+        matrix = cube.station_month_matrix(foreign_cube, heatmap_year, '대여건수')
+        if not matrix.empty:
+            charts['03.heatmap'] = (heatmap_year, '대여건수', matrix)
+    return charts
+
 def show_foreign_station_pattern():
     st.header("🗺️ 외국인 대여반납 장소패턴 분석")
 
-    # 연도별 TOP 5 대여 장소 데이터
-    yearly_rental_top5 = {
-        2021: [
-            ("207. 여의나루역 1번출구 앞", 587),
-            ("502. 뚝섬유원지역 1번출구 앞", 290),
-            ("2262. 한신16차아파트 119동 앞", 215),
-            ("3010.홍대입구역 3번출구", 183),
-            ("272. 당산육갑문", 179)
-        ],
-        2022: [
-            ("207. 여의나루역 1번출구 앞", 1823),
-            ("502. 뚝섬유원지역 1번출구 앞", 666),
-            ("4217. 한강공원 망원나들목", 661),
-            ("3515. 서울숲 관리사무소", 562),
-            ("2262. 한신16차아파트 119동 앞", 559)
-        ],
-        2023: [
-            ("207. 여의나루역 1번출구 앞", 2236),
-            ("3515. 서울숲 관리사무소", 922),
-            ("2262. 한신16차아파트 119동 앞", 850),
-            ("249. 여의도중학교 옆", 724),
-            ("502. 뚝섬유원지역 1번출구 앞", 724)
-        ],
-        2024: [
-            ("207. 여의나루역 1번출구 앞", 1990),
-            ("4217. 한강공원 망원나들목", 1114),
-            ("3515. 서울숲 관리사무소", 1109),
-            ("502. 자양(뚝섬한강공원)역 1번출구 앞", 857),
-            ("474.동대문역사문화공원역 1번출구 뒤편", 651)
-        ]
-    }
+    # 연도별 TOP 5 대여 장소 / 급성장 / 최근 연도 대여·반납 데이터
+    pattern_data = load_page_data(loaders.load_station_pattern, snapshot.STATION_PATTERN, with_cube=True)
+    yearly_rental_top5 = pattern_data['yearly_rental_top5']
+    previous_year, latest_year = pattern_data['growth_years']
+    growth_data = pattern_data['growth_data']
+    rental_top5_latest = pattern_data['rental_top5_latest']
+    return_top5_latest = pattern_data['return_top5_latest']
+
+    # 최근 연도 1위 대여소의 연속 1위 기간과 역대 순위
+    ranked_years = sorted(yearly_rental_top5)
+    top_station, top_count = yearly_rental_top5[ranked_years[-1]][0]
+    streak = 0
+    for year in reversed(ranked_years):
+        if yearly_rental_top5[year][0][0] != top_station:
+            break
+        streak += 1
+    top_counts = sorted((dict(yearly_rental_top5[year]).get(top_station, 0) for year in ranked_years),
+                        reverse=True)
+    top_rank = top_counts.index(top_count) + 1
+
+    # 급성장 1위, 최근 연도 TOP5 중 가장 여러 해 TOP5에 든 대여소
+    growth_station, growth_before, growth_after, growth_rate = growth_data[0]
+    growth_label = "신규" if growth_before == 0 else growth_rate
+    # (TOP5에 1위 대여소만 있으면 1위 대여소)
+    top5_years = {station: sum(station in dict(yearly_rental_top5[year]) for year in ranked_years)
+                  for station, _ in yearly_rental_top5[ranked_years[-1]][1:] or [(top_station, top_count)]}
+    steady_station = max(top5_years, key=top5_years.get)
 
     # 주요 지표
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("4년 연속 1위", "여의나루역", "한강공원 최고 인기")
+        st.metric(f"{streak}년 연속 1위", short_station_name(top_station), f"{ranked_years[-1]}년 대여 1위")
 
     with col2:
-        st.metric("2024년 1위 이용량", "1,990건", "역대 2위")
+        st.metric(f"{ranked_years[-1]}년 1위 이용량", f"{top_count:,}건", f"역대 {top_rank}위")
 
     with col3:
-        st.metric("신규 급성장", "자양역", "+857건 (신규)")
+        st.metric("신규 급성장", short_station_name(growth_station),
+                  f"+{growth_after - growth_before:,}건 ({growth_label})")
 
     with col4:
-        st.metric("지속 인기", "서울숲", "3년 TOP5")
+        st.metric("지속 인기", short_station_name(steady_station), f"{top5_years[steady_station]}년 TOP5")
 
-    # 탭 구성
-    tab1, tab2, tab3 = st.tabs(["📈 연도별 순위", "🚀 급성장 분석", "🎯 관광 코스 예측"])
-
-    with tab1:
+    # 탭 구성 (선택된 탭만 그림)
+    def ranking_tab():
         st.subheader("연도별 외국인 대여 TOP 5 장소")
 
         # 연도별 비교
-        for year in [2021, 2022, 2023, 2024]:
+        for year in ranked_years:
             st.markdown(f"**{year}년 TOP 5:**")
             data = yearly_rental_top5[year]
 
@@ -507,126 +1079,87 @@ def show_foreign_station_pattern():
 
             st.markdown("---")
 
-    with tab2:
-        st.subheader("2023→2024년 급성장 대여소 분석")
-
-        # 급성장 TOP 10 데이터
-        growth_data = [
-            ("502. 자양(뚝섬한강공원)역 1번출구 앞", 0, 857, "신규 등장"),
-            ("4217. 한강공원 망원나들목", 724, 1114, "+53.9%"),
-            ("5870. LG트윈타워 앞", 265, 499, "+88.3%"),
-            ("2217.아크로리버뷰 부지 앞", 134, 365, "+172.4%"),
-            ("3552.서울숲 공영주차장앞", 373, 582, "+56.0%"),
-            ("302. 경복궁역 6번출구 뒤", 0, 190, "신규 등장"),
-            ("3515. 서울숲 관리사무소", 922, 1109, "+20.3%"),
-            ("4244. 당인리발전소 공원 앞", 160, 313, "+95.6%"),
-            ("2525.반포쇼핑타운 2동 앞", 448, 596, "+33.0%"),
-            ("3559.성동구민종합체육센터 앞", 216, 356, "+64.8%")
-        ]
+        show_station_rankings()
+
+    def growth_tab():
+        # 원본 데이터가 있으면 임의의 두 기간(연도/분기/월)을 골라 대여소번호 기준으로 비교
+        rows, before_label, after_label = growth_data, f"{previous_year}년", f"{latest_year}년"
+        try:
+            matrix_inputs = foreign_cube_key()
+        except Exception as e:
+            st.warning(f"원본 데이터 집계 실패 ({e})")
+            matrix_inputs = ()
+        if matrix_inputs:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                granularity = st.radio("기간 단위", GRANULARITIES, horizontal=True, key="growth_granularity")
+            matrix = load_growth_matrix_cached(matrix_inputs, granularity)
+            periods = matrix.periods.tolist()
+            if len(periods) >= 2:
+                def period_name(period):
+                    return format_period(period, granularity)
+                with col2:
+                    before = st.selectbox("이전 기간", periods, index=len(periods) - 2,
+                                          format_func=period_name, key=f"growth_before_{granularity}")
+                with col3:
+                    after = st.selectbox("비교 기간", periods, index=len(periods) - 1,
+                                         format_func=period_name, key=f"growth_after_{granularity}")
+                before_label, after_label, rows = period_growth(matrix, granularity, before, after)
+
+        st.subheader(f"{before_label}→{after_label} 급성장 대여소 분석")
+        if not rows:
+            st.info("두 기간 사이 대여가 늘어난 대여소가 없습니다.")
+            return
 
         # 급성장 대여소 시각화
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
-
-        # 증가량 TOP 5
-        top5_growth = growth_data[:5]
-        names = [item[0][:20] + "..." for item in top5_growth]
-        growth_amounts = [item[2] - item[1] for item in top5_growth]
-
-        bars1 = ax1.barh(range(len(names)), growth_amounts, color='#E74C3C', alpha=0.8)
-        ax1.set_yticks(range(len(names)))
-        if korean_font_prop:
-            ax1.set_yticklabels(names, fontproperties=korean_font_prop, fontsize=10)
-        ax1.set_xlabel('증가량 (건)', fontproperties=korean_font_prop)
-        ax1.set_title('2023→2024 급성장 대여소 TOP 5', fontproperties=korean_font_prop, fontsize=12, fontweight='bold')
-        ax1.invert_yaxis()
-
-        for i, (bar, value) in enumerate(zip(bars1, growth_amounts)):
-            ax1.text(bar.get_width() + max(growth_amounts) * 0.02,
-                    bar.get_y() + bar.get_height()/2,
-                    f'+{int(value)}', ha='left', va='center', fontweight='bold')
-
-        # 2023 vs 2024 비교
-        x = np.arange(len(top5_growth))
-        width = 0.35
-
-        values_2023 = [item[1] for item in top5_growth]
-        values_2024 = [item[2] for item in top5_growth]
-
-        bars2 = ax2.bar(x - width/2, values_2023, width, label='2023년', color='#3498DB', alpha=0.8)
-        bars3 = ax2.bar(x + width/2, values_2024, width, label='2024년', color='#E74C3C', alpha=0.8)
-
-        ax2.set_xlabel('대여소', fontproperties=korean_font_prop)
-        ax2.set_ylabel('대여건수', fontproperties=korean_font_prop)
-        ax2.set_title('급성장 상위 5개 대여소 비교', fontproperties=korean_font_prop, fontsize=12, fontweight='bold')
-        ax2.set_xticks(x)
-        if korean_font_prop:
-            ax2.set_xticklabels([name[:10] + "..." for name in names],
-                               rotation=45, ha='right', fontproperties=korean_font_prop, fontsize=8)
-        legend = ax2.legend()
-        if korean_font_prop:
-            for text in legend.get_texts():
-                text.set_fontproperties(korean_font_prop)
-
-        st.pyplot(fig)
+        show_figure('03.growth', (before_label, after_label, rows))
 
-        # 급성장 특징 분석
+        # 급성장 특징 분석 (선택한 두 기간의 급성장 상위 대여소 기준)
         st.markdown("### 🚀 급성장 대여소 특징")
+        new_rows = [row for row in rows if row[1] == 0]
+        grown_rows = sorted((row for row in rows if row[1] > 0),
+                            key=lambda row: (row[2] - row[1]) / row[1], reverse=True)
+        total_increase = sum(after - before for _, before, after, _ in rows)
+        new_increase = sum(after for _, _, after, _ in new_rows)
         col1, col2 = st.columns(2)
 
         with col1:
-            st.success("""
-            **신규 등장 대여소**
-            - 자양(뚝섬한강공원)역: 857건
-            - 경복궁역 6번출구: 190건
-            - 한강공원/관광지 인근 집중
-            """)
+            st.success("\n".join(
+                [f"**신규 등장 대여소** ({before_label} 0건)"] +
+                [f"- {short_station_name(station)}: {after:,}건" for station, _, after, _ in new_rows[:2]] +
+                ([f"- 상위 {len(rows)}곳 증가량의 {new_increase / total_increase * 100:.0f}%"] if new_rows
+                 else [f"- 급성장 상위 {len(rows)}곳 중 신규 대여소 없음"])))
 
         with col2:
-            st.info("""
-            **기존 대여소 급성장**
-            - 아크로리버뷰: +172.4%
-            - 당인리발전소 공원: +95.6%
-            - 한강/공원 지역 성장세
-            """)
+            st.info("\n".join(
+                ["**기존 대여소 급성장** (증가율 순)"] +
+                [f"- {short_station_name(station)}: {label}" for station, _, _, label in grown_rows[:2]] +
+                ([f"- 기존 대여소 {len(grown_rows)}곳 합계 +{total_increase - new_increase:,}건"] if grown_rows
+                 else [f"- 급성장 상위 {len(rows)}곳이 모두 신규 대여소"])))
 
-    with tab3:
+    def course_tab():
         st.subheader("외국인 관광 코스 예측 분석")
 
-        # 2024년 대여/반납 TOP 5 비교
-        rental_top5_2024 = [
-            "207. 여의나루역 1번출구 앞",
-            "4217. 한강공원 망원나들목",
-            "3515. 서울숲 관리사무소",
-            "502. 자양(뚝섬한강공원)역 1번출구 앞",
-            "474.동대문역사문화공원역 1번출구 뒤편"
-        ]
-
-        return_top5_2024 = [
-            "207. 여의나루역 1번출구 앞",
-            "4217. 한강공원 망원나들목",
-            "502. 자양(뚝섬한강공원)역 1번출구 앞",
-            "2525.반포쇼핑타운 2동 앞",
-            "3515. 서울숲 관리사무소"
-        ]
+        # 최근 연도 대여/반납 TOP 5 비교
 
         col1, col2 = st.columns(2)
 
         with col1:
             st.markdown("**🚀 주요 대여 출발지 TOP 5**")
-            for i, station in enumerate(rental_top5_2024):
+            for i, station in enumerate(rental_top5_latest):
                 emoji = "🏆" if i == 0 else f"{i+1}️⃣"
                 short_name = station[:25] + "..." if len(station) > 25 else station
                 st.write(f"{emoji} {short_name}")
 
         with col2:
             st.markdown("**🏁 주요 반납 도착지 TOP 5**")
-            for i, station in enumerate(return_top5_2024):
+            for i, station in enumerate(return_top5_latest):
                 emoji = "🏆" if i == 0 else f"{i+1}️⃣"
                 short_name = station[:25] + "..." if len(station) > 25 else station
                 st.write(f"{emoji} {short_name}")
 
         # 공통 장소 분석
-        common_stations = set(rental_top5_2024) & set(return_top5_2024)
+        common_stations = set(rental_top5_latest) & set(return_top5_latest)
 
         st.markdown("### 🔄 대여/반납 공통 상위 장소")
         st.success(f"**{len(common_stations)}곳이 대여/반납 모두 TOP 5**")
@@ -635,8 +1168,10 @@ def show_foreign_station_pattern():
             short_name = station[:40] + "..." if len(station) > 40 else station
             st.write(f"• {short_name}")
 
-        # 관광 코스 예측
+        # 관광 코스 예측 (변환된 대여이력이 있으면 이동 확률 모델로, 없으면 노트북 결과)
         st.markdown("### 🎯 추정 관광 코스 패턴")
+        if show_course_model(rental_top5_latest):
+            return
 
         col1, col2 = st.columns(2)
 
@@ -656,51 +1191,149 @@ def show_foreign_station_pattern():
             - 지하철 연계 이용
             """)
 
-def show_all_users_pattern():
-    st.header("🏆 전체 따릉이 이용객 반납장소 패턴")
+    def heatmap_tab():
+        st.subheader("월별 인기 대여소 히트맵")
 
-    # TOP5 대여소 정보
-    top5_stations = {
-        '207': '여의나루역 1번출구 앞',
-        '4217': '한강공원 망원나들목',
-        '3515': '서울숲 관리사무소',
-        '502': '자양(뚝섬한강공원)역 1번출구 앞',
-        '474': '동대문역사문화공원역 1번출구 뒤편'
-    }
+        # 외국인 이용 큐브에서 연도/대여·반납을 골라 월별 상위 대여소만 표시
+        try:
+            foreign_cube = load_foreign_cube()
+        except Exception as e:
+            st.warning(f"원본 데이터 집계 실패 ({e})")
+            return
+        if foreign_cube.empty:
+            st.info("원본 Monthly/Daily 외국인 이용 파일이 있어야 히트맵을 그릴 수 있습니다.")
+            return
 
-    # 6개월 데이터 결과
-    results = {
-        '207': {'total': 50175, 'same_ratio': 21.4, 'pattern': '이동형'},
-        '4217': {'total': 73751, 'same_ratio': 25.4, 'pattern': '이동형'},
-        '3515': {'total': 15745, 'same_ratio': 35.1, 'pattern': '이동형'},
-        '502': {'total': 73157, 'same_ratio': 22.7, 'pattern': '이동형'},
-        '474': {'total': 13947, 'same_ratio': 7.9, 'pattern': '이동형'}
-    }
+        cube_years = sorted(foreign_cube['연도'].unique().tolist())
+        col1, col2 = st.columns(2)
+        with col1:
+            heatmap_year = st.selectbox("연도", cube_years, index=len(cube_years) - 1, key="heatmap_year")
+        with col2:
+            measure = st.radio("구분", ['대여건수', '반납건수'], horizontal=True, key="heatmap_measure")
 
-    # 주요 지표
-    col1, col2, col3, col4 = st.columns(4)
+        matrix = cube.station_month_matrix(foreign_cube, heatmap_year, measure)
+        if matrix.empty:
+            st.info(f"{heatmap_year}년 {measure} 데이터가 없습니다.")
+            return
 
-    with col1:
-        st.metric("분석 대상", "TOP 5 대여소", "6개월 데이터")
+        show_figure('03.heatmap', (heatmap_year, measure, matrix))
 
+    show_lazy_tabs("station_pattern_tabs", [
+        ("📈 연도별 순위", ranking_tab),
+        ("🚀 급성장 분석", growth_tab),
+        ("🎯 관광 코스 예측", course_tab),
+        ("🗓️ 월별 히트맵", heatmap_tab)
+    ])
+
+def show_station_rankings():
+    # 변환된 대여이력이 있으면 03 노트북 순위(연도/월/요일별 대여·반납)를 외국인 이용만으로 다시 계산
+    rankings, stations = load_station_rankings_cached(('외국인',), store_fingerprint())
+    if rankings is None:
+        return False
+
+    st.subheader("🔁 대여이력 기준 구간별 외국인 TOP 5")
+    col1, col2 = st.columns(2)
+    with col1:
+        measure = st.radio("측정", list(RANKING_MEASURES), horizontal=True, key="ranking_measure")
     with col2:
-        st.metric("총 분석 건수", "226,775건", "전체 이용 패턴")
+        dimension = st.radio("구간", SLICE_DIMENSIONS, horizontal=True, key="ranking_dimension")
+
+    rows, unverified = {}, 0
+    selected = rankings[(rankings['측정'] == measure) & (rankings['차원'] == dimension)]
+    for label, ranked in selected.groupby('구간', sort=True):
+        rows[format_slice(label, dimension)] = {
+            f"{rank}위": f"{stations.key_of(code)}. {stations.name_of(code) or ''} ({count:,}건)"
+            for rank, code, count in ranked[['순위', '대여소코드', '건수']].itertuples(index=False)
+        }
+        unverified += not ranked['확정'].iloc[0]
+    st.dataframe(pd.DataFrame.from_dict(rows, orient='index'), width="stretch")
+    st.caption("구간마다 크기가 고정된 top-K 스케치로 후보를 모은 뒤 후보만 정확히 다시 세어 확정한 순위입니다"
+               + (f" · ⚠️ 순위가 확정되지 않은 구간 {unverified}개" if unverified else " · 모든 구간 순위 확정"))
+    return True
+
+def show_course_model(start_labels):
+    # 대여소 → 반납 대여소 전이 확률로 출발 대여소별 다음 대여소와 n단계 코스 계산 (변환된 데이터가 없으면 False)
+    years = sorted({year for year, _ in available_months()}) if store_available() else []
+    if not years:
+        return False
 
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        year = st.selectbox("연도", years, index=len(years) - 1, key="course_year")
+    with col2:
+        users = st.radio("이용자", ['외국인', '전체'], horizontal=True, key="course_users")
     with col3:
-        st.metric("최고 이용", "한강공원 망원나들목", "73,751건")
-
-    with col4:
-        st.metric("패턴 결과", "모두 이동형", "교통수단 활용")
+        steps = st.slider("코스 단계 수", min_value=2, max_value=6, value=3, key="course_steps")
+
+    model = load_transition_model(year, ('외국인',) if users == '외국인' else None)
+    stations = model.stations
+    if model.rentals.sum() == 0:
+        st.info(f"{year}년 {users} 이용자 대여 기록이 없습니다.")
+        return True
+
+    # 출발 대여소: 최근 연도 대여 TOP5 → 전체 TOP5 → 나머지는 대여건수 순
+    preferred = list(station_numbers(start_labels)) + list(TOP5_STATIONS.keys())
+    codes = [stations.code_of(station_id) for station_id in dict.fromkeys(preferred) if station_id in stations]
+    codes = [code for code in codes if model.rentals[code] > 0]
+    ranked = np.lexsort((np.arange(model.n_stations), -model.rentals))
+    codes += [int(code) for code in ranked[model.rentals[ranked] > 0] if code not in set(codes)]
+
+    def station_label(code):
+        name = stations.name_of(code)
+        return f"{stations.key_of(code)}번 {name}" if name else f"{stations.key_of(code)}번"
+
+    code = st.selectbox("출발 대여소", codes, format_func=station_label, key="course_station")
+    query_start = time.perf_counter()
+    next_stations = model.next_stations(code, 5, include_same=False)
+    course = model.course(code, steps)
+    elapsed = time.perf_counter() - query_start
 
-    # 대여소별 분석 결과
-    st.subheader("TOP 5 대여소별 반납 패턴 분석")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("출발 대여소 대여", f"{int(model.rentals[code]):,}건", f"{year}년 {users}")
+    with col2:
+        same_ratio = model.same_station_ratio(code)
+        st.metric("같은 대여소 반납", f"{same_ratio:.1f}%", classify_pattern(same_ratio),
+                  delta_color="off")
+    with col3:
+        # 단계가 늘면 누적 확률이 급격히 작아지므로 단계당 평균(기하평균) 전이 확률로 표시
+        step_mean = (course['누적확률(%)'].iloc[-1] / 100) ** (1 / max(len(course) - 1, 1)) * 100
+        st.metric("단계당 평균 전이확률", f"{step_mean:.2f}%", f"{len(course) - 1}단계 코스", delta_color="off")
 
-    # 동일지점 반납 비율 시각화
+    st.success(" → ".join(f"{name or station_id}" for station_id, name in zip(course['대여소번호'], course['대여소명'])))
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**🚲 다음 반납 대여소 TOP 5** (같은 대여소 반납 제외)")
+        st.dataframe(next_stations, width="stretch", hide_index=True)
+    with col2:
+        st.markdown(f"**🗺️ 가장 가능성 높은 {steps}단계 코스**")
+        st.dataframe(course, width="stretch", hide_index=True,
+                     column_config={'누적확률(%)': st.column_config.NumberColumn(format="%.2e")})
+    st.caption(f"반납한 대여소에서 다시 빌려 이어 탄다고 보고, 전이 확률 곱이 가장 큰 경로를 빔 탐색으로 고릅니다 "
+               f"(같은 대여소 반납과 재방문 제외) · 전이 {model.probabilities.nnz:,}개 · {elapsed * 1000:,.1f}ms")
+    return True
+
+def current_return_patterns():
+    # 6개월 데이터 결과 (변환된 데이터가 없으면 원본 표본 근사치 → 전체 집계, 원본도 없으면 노트북 결과 사용)
+    results, preview = load_return_pattern_results(), None
+    if results is None:
+        results, preview = load_return_pattern_preview()
+    return results or snapshot.RETURN_PATTERN_RESULTS, preview
+
+def return_pattern_chart(results):
+    # 04 차트 데이터 (TOP5 대여소, 대여소별 (총 이용건수, 동일지점 반납 비율))
+    pattern_summary = {station_id: (results[station_id]['total'], results[station_id]['same_ratio'])
+                       for station_id in TOP5_STATIONS.keys()}
+    return TOP5_STATIONS, pattern_summary
+
+@chart('04.patterns')
+def draw_return_patterns(data):
+    top5_stations, pattern_summary = data
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
 
     # 동일지점 반납 비율
     stations = [f"{station_id}번\n{name[:10]}..." for station_id, name in top5_stations.items()]
-    ratios = [results[station_id]['same_ratio'] for station_id in top5_stations.keys()]
+    ratios = [pattern_summary[station_id][1] for station_id in top5_stations.keys()]
     colors = ['#FF6B6B' if ratio < 30 else '#FFA500' if ratio < 50 else '#4ECDC4' for ratio in ratios]
 
     bars1 = ax1.bar(range(len(stations)), ratios, color=colors, alpha=0.8)
@@ -724,7 +1357,7 @@ def show_all_users_pattern():
             text.set_fontproperties(korean_font_prop)
 
     # 총 이용건수 비교
-    totals = [results[station_id]['total'] for station_id in top5_stations.keys()]
+    totals = [pattern_summary[station_id][0] for station_id in top5_stations.keys()]
     bars2 = ax2.bar(range(len(stations)), [total/1000 for total in totals],
                     color='#45B7D1', alpha=0.8)
     ax2.set_title('대여소별 총 이용건수 (6개월)', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
@@ -736,8 +1369,53 @@ def show_all_users_pattern():
     for bar, total in zip(bars2, totals):
         ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 2,
                 f'{total:,.0f}', ha='center', va='bottom', fontweight='bold')
+    return fig
+
+def show_all_users_pattern():
+    st.header("🏆 전체 따릉이 이용객 반납장소 패턴")
+
+    # TOP5 대여소 정보
+    top5_stations = TOP5_STATIONS
+
+    # 6개월 데이터 결과
+    results, preview = current_return_patterns()
+    approximate = preview is not None and preview['approximate']
+    if preview is not None:
+        show_preview_status(preview)
+
+    # 주요 지표
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("분석 대상", "TOP 5 대여소", "6개월 데이터")
+
+    total_all = sum(results[station_id]['total'] for station_id in top5_stations.keys())
+    top_station = max(top5_stations.keys(), key=lambda station_id: results[station_id]['total'])
+
+    with col2:
+        st.metric("총 분석 건수", f"{'≈' if approximate else ''}{total_all:,}건", "표본 추정" if approximate else "전체 이용 패턴")
+
+    with col3:
+        st.metric("최고 이용", top5_stations[top_station], f"{results[top_station]['total']:,}건")
+
+    # 대여소 패턴 분포 (패턴 분류 기준 설명과 같은 용도 문구)
+    pattern_uses = {'이동형': '교통수단 활용', '혼합형': '이동 + 여가 혼합', '순환형': '여가/운동 목적'}
+    patterns = [results[station_id]['pattern'] for station_id in top5_stations.keys()]
+    main_pattern = max(pattern_uses, key=patterns.count)
 
-    st.pyplot(fig)
+    with col4:
+        if patterns.count(main_pattern) == len(patterns):
+            st.metric("패턴 결과", f"모두 {main_pattern}", pattern_uses[main_pattern])
+        else:
+            st.metric("패턴 결과", f"{main_pattern} {patterns.count(main_pattern)}곳",
+                      " · ".join(f"{pattern} {patterns.count(pattern)}곳" for pattern in pattern_uses
+                                 if pattern != main_pattern and pattern in patterns), delta_color="off")
+
+    # 대여소별 분석 결과
+    st.subheader("TOP 5 대여소별 반납 패턴 분석")
+
+    # 동일지점 반납 비율 시각화
+    show_figure('04.patterns', return_pattern_chart(results))
 
     # 분석 결과 요약 테이블
     st.subheader("📋 분석 결과 요약")
@@ -745,35 +1423,49 @@ def show_all_users_pattern():
     summary_data = []
     for station_id, station_name in top5_stations.items():
         data = results[station_id]
-        summary_data.append({
+        row = {
             '대여소': f'{station_id}번 {station_name}',
             '총대여': f"{data['total']:,}건",
             '동일지점반납': f"{data['same_ratio']:.1f}%",
             '패턴': data['pattern']
-        })
+        }
+        if data.get('approximate'):
+            row['총대여 95% 구간'] = f"{data['total_ci'][0]:,.0f} ~ {data['total_ci'][1]:,.0f}건"
+            row['동일지점반납 95% 구간'] = f"{data['same_ratio_ci'][0]:.1f} ~ {data['same_ratio_ci'][1]:.1f}%"
+        summary_data.append(row)
 
     summary_df = pd.DataFrame(summary_data)
-    st.dataframe(summary_df, use_container_width=True)
+    st.dataframe(summary_df, width="stretch")
+
+    # 전체 대여소 반납 패턴 조회 / 재배치 추정 (변환된 데이터가 있을 때만)
+    od_matrix, stations = load_od_data(RETURN_PATTERN_YEAR, tuple(RETURN_PATTERN_MONTHS))
+    flows = load_rebalancing_data(RETURN_PATTERN_YEAR, tuple(RETURN_PATTERN_MONTHS))
+    if od_matrix is not None and od_matrix.nnz > 0:
+        show_station_return_lookup(od_matrix, stations, flows)
+    if flows is not None:
+        show_rebalancing_summary(flows, stations or load_station_dictionary())
 
     # 주요 인사이트
     st.subheader("🎯 주요 인사이트")
 
     col1, col2 = st.columns(2)
 
+    ratios = {station_id: results[station_id]['same_ratio'] for station_id in top5_stations.keys()}
+    highest, lowest = max(ratios, key=ratios.get), min(ratios, key=ratios.get)
+
     with col1:
-        st.success("""
-        **🚴 이동형 패턴 우세**
-        - 모든 TOP5 대여소가 이동형
-        - 동일지점 반납 7.9~35.1%
-        - 따릉이 = 교통수단 활용
+        st.success(f"""
+        **🚴 {main_pattern} 패턴 우세**
+        - TOP5 대여소 중 {patterns.count(main_pattern)}곳이 {main_pattern}
+        - 동일지점 반납 {ratios[lowest]:.1f}~{ratios[highest]:.1f}%
+        - 따릉이 = {pattern_uses[main_pattern]}
         """)
 
     with col2:
-        st.info("""
-        **📍 지역별 차이**
-        - 서울숲: 35.1% (상대적 순환형)
-        - 동대문: 7.9% (강한 이동형)
-        - 관광지 특성에 따른 차이
+        st.info(f"""
+        **📍 대여소별 차이**
+        - {short_station_name(top5_stations[highest])}: {ratios[highest]:.1f}% (가장 높음, {results[highest]['pattern']})
+        - {short_station_name(top5_stations[lowest])}: {ratios[lowest]:.1f}% (가장 낮음, {results[lowest]['pattern']})
         """)
 
     # 패턴 분류 기준
@@ -805,177 +1497,565 @@ def show_all_users_pattern():
         - 출발지로 되돌아오는 이용
         """)
 
+def show_station_return_lookup(od_matrix, stations, flows=None):
+    st.subheader("🔎 대여소별 반납 패턴 조회")
+
+    totals = station_totals(od_matrix)
+    station_codes = [int(code) for code in np.argsort(-totals, kind='stable') if totals[code] > 0]
+
+    def station_label(code):
+        name = stations.name_of(code)
+        return f"{stations.key_of(code)}번 {name}" if name else f"{stations.key_of(code)}번"
+
+    code = st.selectbox("대여소 선택 (이용건수 순)", station_codes, format_func=station_label)
+    data = station_return_pattern(od_matrix, code, stations, top_n=10)
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric("총 대여", f"{data['total']:,}건")
+
+    with col2:
+        st.metric("동일지점 반납", f"{data['same_ratio']:.1f}%", f"{data['same_count']:,}건")
+
+    with col3:
+        st.metric("패턴", data['pattern'])
+
+    # 같은 자전거의 다음 이용이 다른 대여소에서 시작되면 그 사이 재배치로 추정
+    moves = flows.station_moves(code) if flows is not None else None
+    if moves:
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.metric("재배치 반출", f"{moves['moved_out']:,}대", f"반납 후 {moves['out_ratio']:.1f}%", delta_color="off")
+
+        with col2:
+            st.metric("재배치 반입", f"{moves['moved_in']:,}대", f"대여 전 {moves['in_ratio']:.1f}%", delta_color="off")
+
+        with col3:
+            net = moves['moved_in'] - moves['moved_out']
+            st.metric("순유입", f"{net:+,}대", "반입 - 반출", delta_color="off")
+
+    top_returns = data['top_returns']
+    top_df = pd.DataFrame({
+        '반납지': [f"{return_id}번 {stations.name_of(stations.code_of(return_id)) or ''}".strip()
+                 for return_id in top_returns.index],
+        '건수': [f"{count:,}건" for count in top_returns.values],
+        '비율': [f"{count / data['total'] * 100:.1f}%" for count in top_returns.values]
+    })
+    st.markdown("**주요 반납지 TOP 10**")
+    st.dataframe(top_df, width="stretch")
+
+    if moves and moves['destinations']:
+        dest_df = pd.DataFrame({
+            '다음 대여 대여소': [f"{stations.key_of(dest)}번 {stations.name_of(dest) or ''}".strip()
+                          for dest, _ in moves['destinations']],
+            '건수': [f"{count:,}대" for _, count in moves['destinations']]
+        })
+        st.markdown("**재배치 주요 도착지 (반납 후 다른 대여소에서 다시 대여)**")
+        st.dataframe(dest_df, width="stretch")
+
+def show_rebalancing_summary(flows, stations):
+    st.subheader("🚚 자전거 재배치 추정")
+    st.caption("자전거번호별로 이용을 시간순으로 이어, 반납한 대여소와 다음 대여 대여소가 다르면 재배치로 봅니다 (기록 누락 포함).")
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric("연결된 이용", f"{flows.total_links:,}건", "같은 자전거 연속 이용")
+
+    with col2:
+        st.metric("재배치 추정", f"{flows.total_moves:,}건", f"{flows.move_ratio():.1f}%", delta_color="off")
+
+    with col3:
+        st.metric("제자리 재대여", f"{flows.total_links - flows.total_moves:,}건")
+
+    table = flows.station_table(stations)
+    top5_codes = {stations.code_of(station_id) for station_id in TOP5_STATIONS.keys()}
+    top5_table = table[table['대여소코드'].isin(top5_codes)]
+    if len(top5_table):
+        st.markdown("**TOP 5 대여소 재배치 규모**")
+        st.dataframe(top5_table.drop(columns='대여소코드'), width="stretch", hide_index=True)
+
+    st.markdown("**순유입/순유출이 큰 대여소** (순유입 > 0: 운영으로 채워지는 곳, < 0: 비워지는 곳)")
+    st.dataframe(table.drop(columns='대여소코드').head(20), width="stretch", hide_index=True)
+
+def station_code_label(stations, code):
+    name = stations.name_of(code)
+    return f"{stations.key_of(code)}번 {name}" if name else f"{stations.key_of(code)}번"
+
+def station_code_choices(table, stations):
+    # 대여소 선택 목록 (TOP5 대여소가 있으면 먼저, 나머지는 표 순서) → (표에 있는 TOP5 코드, 전체 코드)
+    table_codes = table['대여소코드'].tolist()
+    top5_codes = [stations.code_of(station_id) for station_id in TOP5_STATIONS.keys()
+                  if station_id in stations and stations.code_of(station_id) in set(table_codes)]
+    return top5_codes, top5_codes + [code for code in table_codes if code not in set(top5_codes)]
+
+def netflow_charts(flow, stations, table, year, day_type, code):
+    # 04-1 차트 id → 차트 데이터 (선택한 대여소 시간대별 순유입, 변화 폭 상위 15곳 누적 변화)
+    top = table.head(15)
+    labels = [f"{key} {name[:12]}" for key, name in zip(top['대여소번호'], top['대여소명'])]
+    return {
+        '04-1.profile': (year, day_type, station_code_label(stations, code), flow.station_profile(code, day_type)),
+        '04-1.heatmap': (year, day_type, labels, flow.occupancy_change(day_type)[top['대여소코드'].to_numpy()]),
+    }
+
+@chart('04-1.profile')
+def draw_netflow_profile(data):
+    year, day_type, label, profile = data
+    fig, ax1 = plt.subplots(figsize=(14, 6))
+    net = profile['순유입'].to_numpy()
+    ax1.bar(profile['시각'], net, color=np.where(net >= 0, '#4ECDC4', '#FF6B6B'), alpha=0.8, label='시간대별 순유입')
+    ax1.axhline(0, color='gray', linewidth=0.8)
+    ax1.set_xlabel('시각', fontproperties=korean_font_prop)
+    ax1.set_ylabel('순유입 (대/일)', fontproperties=korean_font_prop)
+    ax1.set_xticks(range(24))
+
+    ax2 = ax1.twinx()
+    ax2.plot(profile['시각'], profile['누적변화'], color='#2C3E50', marker='o', linewidth=2, label='누적 재고 변화')
+    ax2.set_ylabel('누적 변화 (대)', fontproperties=korean_font_prop)
+
+    ax1.set_title(f'{label} 시간대별 순유입 ({year}년 {day_type or "전체"})',
+                  fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    handles = ax1.get_legend_handles_labels()[0] + ax2.get_legend_handles_labels()[0]
+    legend = ax1.legend(handles, ['시간대별 순유입', '누적 재고 변화'], loc='upper left')
+    if korean_font_prop:
+        for text in legend.get_texts():
+            text.set_fontproperties(korean_font_prop)
+    return fig
+
+@chart('04-1.heatmap')
+def draw_netflow_heatmap(data):
+    year, day_type, labels, change = data
+    fig, ax = plt.subplots(figsize=(14, 7))
+    limit = max(float(np.abs(change).max()), 1e-9)
+    sns.heatmap(change, cmap='RdBu', center=0, vmin=-limit, vmax=limit, ax=ax,
+                xticklabels=range(24), yticklabels=labels, cbar_kws={'label': '누적 변화 (대)'})
+    ax.set_yticklabels(labels, fontproperties=korean_font_prop, fontsize=9, rotation=0)
+    ax.set_xlabel('시각', fontproperties=korean_font_prop)
+    ax.set_title(f'{year}년 {day_type or "전체"} 누적 재고 변화 (빨강: 부족, 파랑: 적체)',
+                 fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    return fig
+
+def default_netflow_charts():
+    # 04-1 페이지 기본 선택값 (최근 연도, 전체 요일, 첫 번째 대여소)의 차트 데이터
+    year = latest_store_year()
+    if year is None:
+        return {}
+    flow, stations = load_netflow_cached(year, store_fingerprint())
+    if flow is None:
+        return {}
+    table = flow.imbalance_table(stations, None)
+    if table.empty:
+        return {}
+    _, codes = station_code_choices(table, stations)
+    return netflow_charts(flow, stations, table, year, None, codes[0])
+
+def show_station_netflow():
+    st.header("⚖️ 대여소 시간대별 순유입")
+    st.caption("순유입 = 반납 - 대여 (하루 평균). 0시부터 누적하면 하루 동안 대여소의 자전거가 얼마나 쌓이고 비는지 보입니다.")
+
+    years = sorted({year for year, _ in available_months()}) if store_available() else []
+    if not years:
+        st.info("변환된 대여이력이 없습니다. `python -m ddareungi.ingest`와 `python -m ddareungi.netflow`를 먼저 실행하세요.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        year = st.selectbox("연도", years, index=len(years) - 1, key="netflow_year")
+    with col2:
+        day_type = st.radio("요일 유형", ['전체'] + list(DAY_TYPES), horizontal=True, key="netflow_day_type")
+    day_type = None if day_type == '전체' else day_type
+
+    flow, stations = load_netflow_cached(year, store_fingerprint())
+    if flow is None:
+        st.info("시간대별 순유입 배열이 없습니다. `python -m ddareungi.netflow --store-dir data_store`로 먼저 만드세요.")
+        return
+
+    table = flow.imbalance_table(stations, day_type)
+    if table.empty:
+        st.info("선택한 조건에 해당하는 대여가 없습니다.")
+        return
+
+    # 대여소 선택 (TOP5 대여소가 있으면 먼저, 나머지는 변화 폭 순)
+    _, codes = station_code_choices(table, stations)
+    code = st.selectbox("대여소 선택", codes, format_func=lambda code: station_code_label(stations, code),
+                        key="netflow_station")
+    row = table[table['대여소코드'] == code].iloc[0]
+    charts = netflow_charts(flow, stations, table, year, day_type, code)
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("일평균 대여", f"{row['일평균대여']:,.1f}대")
+    with col2:
+        st.metric("일평균 반납", f"{row['일평균반납']:,.1f}대", f"순유입 {row['하루순유입']:+,.1f}", delta_color="off")
+    with col3:
+        low_hour = f"{row['최대부족시각']}시 말" if pd.notna(row['최대부족시각']) else "없음"
+        st.metric("최대 부족", f"{row['최대부족']:,.1f}대", low_hour, delta_color="off")
+    with col4:
+        high_hour = f"{row['최대적체시각']}시 말" if pd.notna(row['최대적체시각']) else "없음"
+        st.metric("최대 적체", f"{row['최대적체']:+,.1f}대", high_hour, delta_color="off")
+
+    show_figure('04-1.profile', charts['04-1.profile'])
+
+    # 변화 폭이 큰 대여소의 시간대별 누적 변화 히트맵
+    st.subheader("하루 재고 변화가 큰 대여소")
+    show_figure('04-1.heatmap', charts['04-1.heatmap'])
+    st.dataframe(table.drop(columns='대여소코드').head(30), width="stretch", hide_index=True)
+
+def quantile_period(year, first, last):
+    return f"{year}년 {first}~{last}월" if first != last else f"{year}년 {first}월"
+
+def quantile_compare_chart(table, stations, top5_codes, code, period):
+    # 04-2 차트 데이터 - 선택한 대여소와 TOP5 대여소의 이용시간 분위수
+    compare_codes = [code] + [c for c in top5_codes if c != code]
+    compare = table.set_index('대여소코드').loc[compare_codes]
+    duration_columns = [col for col in compare.columns if col.startswith('이용시간 p')]
+    labels = [station_code_label(stations, c)[:18] for c in compare_codes]
+    return period, labels, duration_columns, compare[duration_columns].to_numpy()
+
+@chart('04-2.compare')
+def draw_quantile_compare(data):
+    period, labels, duration_columns, values = data
+    fig, ax = plt.subplots(figsize=(14, 6))
+    width = 0.8 / len(duration_columns)
+    colors = ['#4ECDC4', '#FFA500', '#FF6B6B']
+    for j, column in enumerate(duration_columns):
+        ax.bar(np.arange(len(labels)) + (j - (len(duration_columns) - 1) / 2) * width, values[:, j],
+               width, label=column, color=colors[j % len(colors)], alpha=0.85)
+    ax.set_xticks(range(len(labels)))
+    ax.set_xticklabels(labels, fontproperties=korean_font_prop, rotation=20, ha='right')
+    ax.set_ylabel('이용시간 (분)', fontproperties=korean_font_prop)
+    ax.set_title(f'{period} 대여소별 이용시간 분위수', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3, axis='y')
+    legend = ax.legend()
+    if korean_font_prop:
+        for text in legend.get_texts():
+            text.set_fontproperties(korean_font_prop)
+    return fig
+
+def default_quantile_charts():
+    # 04-2 페이지 기본 선택값 (최근 연도 전체 월, 첫 번째 대여소)의 차트 데이터
+    year = latest_store_year()
+    if year is None:
+        return {}
+    months = tuple(month for y, month in available_months() if y == year)
+    sketches, stations = load_quantile_sketches_cached(year, months, store_fingerprint())
+    if sketches is None:
+        return {}
+    table = quantile_table(sketches, stations)
+    if table.empty:
+        return {}
+    top5_codes, codes = station_code_choices(table, stations)
+    period = quantile_period(year, months[0], months[-1])
+    return {'04-2.compare': quantile_compare_chart(table, stations, top5_codes, codes[0], period)}
+
+def show_trip_quantiles():
+    st.header("⏱️ 대여소별 이용시간·거리 분포")
+    st.caption("월별 대여소 분위수 스케치(상대 오차 1% 이내)를 합쳐 계산합니다. 대여소는 출발(대여) 대여소 기준입니다.")
+
+    months_available = available_months() if store_available() else []
+    if not months_available:
+        st.info("변환된 대여이력이 없습니다. `python -m ddareungi.ingest`와 `python -m ddareungi.quantiles`를 먼저 실행하세요.")
+        return
+
+    years = sorted({year for year, _ in months_available})
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        year = st.selectbox("연도", years, index=len(years) - 1, key="quantile_year")
+    year_months = [month for y, month in months_available if y == year]
+    with col2:
+        if len(year_months) > 1:
+            first, last = st.select_slider("월 범위", options=year_months, value=(year_months[0], year_months[-1]),
+                                           format_func=lambda month: f"{month}월", key=f"quantile_months_{year}")
+        else:
+            first = last = year_months[0]
+    months = tuple(month for month in year_months if first <= month <= last)
+
+    sketches, stations = load_quantile_sketches_cached(year, months, store_fingerprint())
+    if sketches is None:
+        st.info("분위수 스케치가 없습니다. `python -m ddareungi.quantiles --store-dir data_store`로 먼저 만드세요.")
+        return
+
+    table = quantile_table(sketches, stations)
+    if table.empty:
+        st.info("선택한 기간에 이용 기록이 없습니다.")
+        return
+
+    # 대여소 선택 (TOP5 대여소가 있으면 먼저, 나머지는 건수 순)
+    top5_codes, codes = station_code_choices(table, stations)
+    code = st.selectbox("대여소 선택", codes, format_func=lambda code: station_code_label(stations, code),
+                        key="quantile_station")
+    period = quantile_period(year, first, last)
+
+    for measure, sketch in sketches.items():
+        column, unit, _ = QUANTILE_MEASURES[measure]
+        station_values = sketch.quantiles(code)
+        overall_values = sketch.quantiles()
+        st.markdown(f"**{column.split('(')[0]}** ({period}, {sketch.count(code):,}건)")
+        cols = st.columns(len(DEFAULT_QUANTILES))
+        for col, q, value, overall in zip(cols, DEFAULT_QUANTILES, station_values, overall_values):
+            with col:
+                st.metric(f"p{round(q * 100):g}", f"{value:,.1f}{unit}", f"전체 {overall:,.1f}{unit}", delta_color="off")
+
+    # TOP5 대여소 이용시간 분위수 비교
+    show_figure('04-2.compare', quantile_compare_chart(table, stations, top5_codes, code, period))
+
+    min_count = st.number_input("최소 건수", min_value=1, value=100, step=50, key="quantile_min_count")
+    st.dataframe(table[table['건수'] >= min_count].drop(columns='대여소코드'), width="stretch", hide_index=True)
+
+@chart('05.age_prev')
+@chart('05.age_last')
+def draw_age_distribution(data):
+    year, ages = data
+    fig, ax = plt.subplots(figsize=(8, 8))
+    wedges, texts, autotexts = ax.pie(ages.values(), labels=ages.keys(),
+                                     autopct='%1.1f%%', startangle=90)
+    for text in texts + autotexts:
+        if korean_font_prop:
+            text.set_fontproperties(korean_font_prop)
+    ax.set_title(f'{year}년 외국인 방문객 연령대별 분포',
+                fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    return fig
+
+@chart('05.continent_prev')
+@chart('05.continent_last')
+def draw_continent_distribution(data):
+    year, continent_data = data
+    fig, ax = plt.subplots(figsize=(8, 8))
+    values = [continent_data[cont][year] for cont in continent_data.keys()]
+    wedges, texts, autotexts = ax.pie(values, labels=continent_data.keys(),
+                                     autopct='%1.1f%%', startangle=90)
+    for text in texts + autotexts:
+        if korean_font_prop:
+            text.set_fontproperties(korean_font_prop)
+    ax.set_title(f'{year}년 대륙별 외국인 방문객 분포',
+                fontproperties=korean_font_prop, fontsize=12, fontweight='bold')
+    return fig
+
+@chart('05.gender_total')
+def draw_gender_total(gender_data):
+    years = list(gender_data.keys())
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(years, [gender_data[year]['전체']/1000000 for year in years], marker='o', linewidth=2, markersize=8, color='blue')
+    ax.set_title(f'{years[0]}-{years[-1]}년 외국인 방문객 총 수 변화',
+                fontproperties=korean_font_prop, fontsize=12, fontweight='bold')
+    ax.set_ylabel('방문객 수 (백만명)', fontproperties=korean_font_prop)
+    ax.tick_params(axis='x', rotation=45)
+    ax.grid(True, alpha=0.3)
+    return fig
+
+@chart('05.gender_female')
+def draw_gender_female(gender_data):
+    years = list(gender_data.keys())
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(years, [gender_data[year]['여성비율'] for year in years], marker='s', linewidth=2, markersize=6, color='red')
+    ax.set_title(f'{years[0]}-{years[-1]}년 여성 방문객 비율 변화',
+                fontproperties=korean_font_prop, fontsize=12, fontweight='bold')
+    ax.set_ylabel('여성 비율 (%)', fontproperties=korean_font_prop)
+    ax.tick_params(axis='x', rotation=45)
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(0, 70)
+    return fig
+
+@chart('05.long')
+def draw_long_trend(data):
+    years_long, total_visitors_long = data
+    peak_index = int(np.argmax(total_visitors_long))
+    peak_year, peak_total = years_long[peak_index], total_visitors_long[peak_index]
+    fig, ax = plt.subplots(figsize=(14, 8))
+    ax.plot(years_long, [x/1000000 for x in total_visitors_long],
+           marker='o', linewidth=3, markersize=8, color='darkblue')
+    ax.set_title(f'{years_long[0]}-{years_long[-1]}년 외국인 방문객 총 수 변화',
+                fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    ax.set_ylabel('방문객 수 (백만명)', fontproperties=korean_font_prop)
+    ax.tick_params(axis='x', rotation=45)
+    ax.grid(True, alpha=0.3)
+
+    # 주요 시점 표시
+    ax.axvline(x=peak_year, color='green', linestyle='--', alpha=0.7)
+    ax.text(peak_year, peak_total / 1000000 + 0.5, '역대 최고', ha='center', fontproperties=korean_font_prop)
+    if '2020' in years_long:
+        ax.axvline(x='2020', color='red', linestyle='--', alpha=0.7)
+        ax.text('2020', peak_total / 1000000 * 0.85, 'COVID-19', ha='center', fontproperties=korean_font_prop)
+    return fig
+
+@chart('05.countries')
+def draw_country_trend(data):
+    years_long, countries_data = data
+    fig, ax = plt.subplots(figsize=(14, 8))
+    colors = ['red', 'orange', 'blue']
+    markers = ['o', 's', '^']
+
+    for i, (country, values) in enumerate(countries_data.items()):
+        ax.plot(years_long, [x/1000000 for x in values],
+               marker=markers[i], label=country, linewidth=2,
+               markersize=6, color=colors[i], alpha=0.8)
+
+    ax.set_title(f'{years_long[0]}-{years_long[-1]}년 주요 국가별 외국인 방문객 수 변화',
+                fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    ax.set_ylabel('방문객 수 (백만명)', fontproperties=korean_font_prop)
+    ax.tick_params(axis='x', rotation=45)
+    legend = ax.legend()
+    if korean_font_prop:
+        for text in legend.get_texts():
+            text.set_fontproperties(korean_font_prop)
+    ax.grid(True, alpha=0.3)
+    return fig
+
+def tourist_charts(tourist):
+    # 05 페이지 차트 id → 차트 데이터 (연령대/대륙은 최근 두 해)
+    age_data, continent_data = tourist['age_data'], tourist['continent_data']
+    age_prev_year, age_last_year = list(age_data.keys())[-2:]
+    continent_prev_year, continent_year = list(next(iter(continent_data.values())).keys())[-2:]
+    return {
+        '05.age_prev': (age_prev_year, age_data[age_prev_year]),
+        '05.age_last': (age_last_year, age_data[age_last_year]),
+        '05.continent_prev': (continent_prev_year, continent_data),
+        '05.continent_last': (continent_year, continent_data),
+        '05.gender_total': tourist['gender_data'],
+        '05.gender_female': tourist['gender_data'],
+        '05.long': (tourist['years_long'], tourist['total_visitors_long']),
+        '05.countries': (tourist['years_long'], tourist['countries_data']),
+    }
+
 def show_tourist_trend():
-    st.header("🌏 해외관광객 추이분석 (2010-2024)")
+    tourist = load_page_data(loaders.load_tourist, snapshot.TOURIST)
+    charts = tourist_charts(tourist)
+    age_data = tourist['age_data']
+    continent_data = tourist['continent_data']
+    gender_data = tourist['gender_data']
+    years_long = tourist['years_long']
+    total_visitors_long = tourist['total_visitors_long']
+    countries_data = tourist['countries_data']
+
+    first_year, last_year = years_long[0], years_long[-1]
+    last_total = total_visitors_long[-1]
+    peak_index = int(np.argmax(total_visitors_long))
+    peak_year, peak_total = years_long[peak_index], total_visitors_long[peak_index]
+    summary = tourist_summary(tourist)
+    total_rank, last_gender_year = summary['total_rank'], summary['last_gender_year']
+    continent_year, top_continent, top_share = summary['continent_year'], summary['top_continent'], summary['top_share']
+
+    st.header(f"🌏 해외관광객 추이분석 ({first_year}-{last_year})")
 
     # 주요 지표
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("2024년 총 방문객", "1,637만명", "역대 2위")
+        st.metric(f"{last_year}년 총 방문객", f"{last_total / 10000:,.0f}만명", f"역대 {total_rank}위")
 
     with col2:
-        st.metric("15년간 성장률", "+86.1%", "2010년 대비")
+        long_growth = (last_total / total_visitors_long[0] - 1) * 100
+        st.metric(f"{len(years_long)}년간 성장률", f"{long_growth:+.1f}%", f"{first_year}년 대비")
 
     with col3:
-        st.metric("여성 방문객 비율", "56.5%", "2024년 기준")
+        st.metric("여성 방문객 비율", f"{gender_data[last_gender_year]['여성비율']:.1f}%",
+                  f"{last_gender_year}년 기준")
 
     with col4:
-        st.metric("아시아주 비중", "80.1%", "압도적 1위")
-
-    # 탭 구성
-    tab1, tab2, tab3, tab4 = st.tabs(["📈 연령대 분석", "🌏 대륙별 분석", "👫 성별 분석", "📊 장기 추세"])
+        st.metric(f"{top_continent} 비중", f"{top_share:.1f}%", f"{continent_year}년 1위", delta_color="off")
 
-    with tab1:
-        st.subheader("2023-2024년 연령대별 분석")
+    # 탭 구성 (선택된 탭만 그림)
+    def age_tab():
+        # 연령대별 데이터 (최근 두 해)
+        age_prev_year, age_last_year = list(age_data.keys())[-2:]
+        age_prev, age_last = age_data[age_prev_year], age_data[age_last_year]
 
-        # 연령대별 데이터
-        age_2023 = {'0-20세': 1141274, '21-30세': 2789771, '31-40세': 2267755,
-                    '41-50세': 1617046, '51-60세': 1349707, '61세 이상': 1110580}
-        age_2024 = {'0-20세': 1467487, '21-30세': 3966890, '31-40세': 3446258,
-                    '41-50세': 2365782, '51-60세': 1957080, '61세 이상': 2024923}
+        st.subheader(f"{age_prev_year}-{age_last_year}년 연령대별 분석")
 
         col1, col2 = st.columns(2)
 
         with col1:
-            # 2023년 파이차트
-            fig, ax = plt.subplots(figsize=(8, 8))
-            wedges, texts, autotexts = ax.pie(age_2023.values(), labels=age_2023.keys(),
-                                             autopct='%1.1f%%', startangle=90)
-            for text in texts + autotexts:
-                if korean_font_prop:
-                    text.set_fontproperties(korean_font_prop)
-            ax.set_title('2023년 외국인 방문객 연령대별 분포',
-                        fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
-            st.pyplot(fig)
+            # 이전 연도 파이차트
+            show_figure('05.age_prev', charts['05.age_prev'])
 
         with col2:
-            # 2024년 파이차트
-            fig, ax = plt.subplots(figsize=(8, 8))
-            wedges, texts, autotexts = ax.pie(age_2024.values(), labels=age_2024.keys(),
-                                             autopct='%1.1f%%', startangle=90)
-            for text in texts + autotexts:
-                if korean_font_prop:
-                    text.set_fontproperties(korean_font_prop)
-            ax.set_title('2024년 외국인 방문객 연령대별 분포',
-                        fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
-            st.pyplot(fig)
+            # 최근 연도 파이차트
+            show_figure('05.age_last', charts['05.age_last'])
 
         # 변화 분석
         st.markdown("### 📊 연령대별 변화 분석")
 
         age_change = {}
-        for age_group in age_2023.keys():
-            change = age_2024[age_group] - age_2023[age_group]
-            change_rate = (change / age_2023[age_group]) * 100
+        for age_group in age_prev.keys():
+            change = age_last.get(age_group, 0) - age_prev[age_group]
+            change_rate = (change / age_prev[age_group]) * 100 if age_prev[age_group] else 0.0
             age_change[age_group] = {'변화량': change, '변화율(%)': change_rate}
 
-        change_df = pd.DataFrame(age_change).T
+        by_rate = sorted(age_change, key=lambda group: age_change[group]['변화율(%)'], reverse=True)
+        total_prev, total_last = sum(age_prev.values()), sum(age_last.get(group, 0) for group in age_prev)
+        total_rate = (total_last / total_prev - 1) * 100 if total_prev else 0.0
+        decreased = [group for group in by_rate if age_change[group]['변화량'] < 0]
 
         col1, col2 = st.columns(2)
 
         with col1:
-            st.success("""
-            **🎯 주요 증가 연령대**
-            - 21-30세: +42.2% 증가
-            - 31-40세: +52.0% 증가
-            - 젊은 층 중심 증가
+            first, second = by_rate[0], by_rate[1]
+            st.success(f"""
+            **🎯 증가율 상위 연령대**
+            - {first}: {age_change[first]['변화율(%)']:+.1f}% ({age_change[first]['변화량'] / 10000:+,.0f}만명)
+            - {second}: {age_change[second]['변화율(%)']:+.1f}% ({age_change[second]['변화량'] / 10000:+,.0f}만명)
             """)
 
         with col2:
-            st.info("""
-            **📈 전체 증가율**
-            - 전 연령대 증가
-            - 총 48.4% 증가
-            - 0-20세도 28.6% 증가
+            st.info(f"""
+            **📈 전체 변화율**
+            - {'전 연령대 증가' if not decreased else f"감소 연령대: {', '.join(decreased)}"}
+            - 총 {total_rate:+.1f}% ({age_prev_year}→{age_last_year}년)
+            - 최저 {by_rate[-1]}: {age_change[by_rate[-1]]['변화율(%)']:+.1f}%
             """)
 
-    with tab2:
-        st.subheader("2023-2024년 대륙별 분석")
-
-        # 대륙별 데이터
-        continent_data = {
-            '아시아주': {'2023': 8401391, '2024': 13113511},
-            '미주': {'2023': 1373227, '2024': 1719511},
-            '구주': {'2023': 918059, '2024': 1140953},
-            '대양주': {'2023': 240864, '2024': 289685},
-            '아프리카': {'2023': 57253, '2024': 70758},
-            '교포': {'2023': 40663, '2024': 34989}
-        }
+    def continent_tab():
+        continent_prev_year = list(next(iter(continent_data.values())).keys())[-2]
+        st.subheader(f"{continent_prev_year}-{continent_year}년 대륙별 분석")
 
         col1, col2 = st.columns(2)
 
         with col1:
-            # 2023년 분포
-            fig, ax = plt.subplots(figsize=(8, 8))
-            values_2023 = [continent_data[cont]['2023'] for cont in continent_data.keys()]
-            wedges, texts, autotexts = ax.pie(values_2023, labels=continent_data.keys(),
-                                             autopct='%1.1f%%', startangle=90)
-            for text in texts + autotexts:
-                if korean_font_prop:
-                    text.set_fontproperties(korean_font_prop)
-            ax.set_title('2023년 대륙별 외국인 방문객 분포',
-                        fontproperties=korean_font_prop, fontsize=12, fontweight='bold')
-            st.pyplot(fig)
+            # 이전 연도 분포
+            show_figure('05.continent_prev', charts['05.continent_prev'])
 
         with col2:
-            # 2024년 분포
-            fig, ax = plt.subplots(figsize=(8, 8))
-            values_2024 = [continent_data[cont]['2024'] for cont in continent_data.keys()]
-            wedges, texts, autotexts = ax.pie(values_2024, labels=continent_data.keys(),
-                                             autopct='%1.1f%%', startangle=90)
-            for text in texts + autotexts:
-                if korean_font_prop:
-                    text.set_fontproperties(korean_font_prop)
-            ax.set_title('2024년 대륙별 외국인 방문객 분포',
-                        fontproperties=korean_font_prop, fontsize=12, fontweight='bold')
-            st.pyplot(fig)
+            # 최근 연도 분포
+            show_figure('05.continent_last', charts['05.continent_last'])
 
         # 대륙별 변화 분석
         st.markdown("### 🌏 대륙별 변화 분석")
 
         col1, col2, col3 = st.columns(3)
 
+        continent_change = {cont: (data[continent_year] - data[continent_prev_year],
+                                   (data[continent_year] / data[continent_prev_year] - 1) * 100 if data[continent_prev_year] else 0.0)
+                            for cont, data in continent_data.items()}
+        others = sorted((cont for cont in continent_data if cont != top_continent),
+                        key=lambda cont: continent_data[cont][continent_year], reverse=True)
+        decreased = [cont for cont in others if continent_change[cont][0] < 0]
+
         with col1:
-            st.success("""
-            **🚀 아시아주 급증**
-            - 80.1% 압도적 비중
-            - 56.1% 증가 (~470만명)
-            - 중국 관광객 회복 주도
+            top_change, top_rate = continent_change[top_continent]
+            st.success(f"""
+            **{'🚀' if top_change >= 0 else '📉'} {top_continent} {'증가' if top_change >= 0 else '감소'}**
+            - {top_share:.1f}% 비중 (1위)
+            - {top_rate:+.1f}% ({top_change / 10000:+,.0f}만명)
             """)
 
         with col2:
-            st.info("""
-            **📈 서구권 회복**
-            - 구주(유럽): +24.3%
-            - 미주: +25.2%
-            - 대양주: +20.3%
-            """)
+            st.info("\n".join(["**📈 그 밖의 대륙**"] +
+                               [f"- {cont}: {continent_change[cont][1]:+.1f}%" for cont in others[:3]]))
 
         with col3:
-            st.warning("""
-            **📉 유일한 감소**
-            - 해외동포: -13.9%
-            - 코로나 영향 지속
-            - 방문 목적 변화
-            """)
-
-    with tab3:
-        st.subheader("2017-2024년 성별 분석")
-
-        # 성별 데이터
-        gender_data = {
-            '2017': {'전체': 13335758, '남자': 5533199, '여자': 6806301, '여성비율': 51.0},
-            '2018': {'전체': 15346879, '남자': 6229185, '여자': 8195792, '여성비율': 53.4},
-            '2019': {'전체': 17502756, '남자': 6768303, '여자': 9695380, '여성비율': 55.4},
-            '2020': {'전체': 2519118, '남자': 978594, '여자': 1156517, '여성비율': 45.9},
-            '2021': {'전체': 967003, '남자': 335894, '여자': 196694, '여성비율': 20.3},
-            '2022': {'전체': 3198017, '남자': 1403186, '여자': 1290033, '여성비율': 40.3},
-            '2023': {'전체': 11031665, '남자': 4233401, '여자': 6042732, '여성비율': 54.8},
-            '2024': {'전체': 16369629, '남자': 5979930, '여자': 9248490, '여성비율': 56.5}
-        }
+            if decreased:
+                st.warning("\n".join(["**📉 감소한 대륙**"] +
+                                      [f"- {cont}: {continent_change[cont][1]:+.1f}%" for cont in decreased]))
+            else:
+                st.success("**📈 모든 대륙 증가**")
 
+    def gender_tab():
         years = list(gender_data.keys())
+        gender_period = f"{years[0]}-{years[-1]}"
+        st.subheader(f"{gender_period}년 성별 분석")
+
         total_visitors = [gender_data[year]['전체'] for year in years]
         female_ratios = [gender_data[year]['여성비율'] for year in years]
 
@@ -983,159 +2063,371 @@ def show_tourist_trend():
 
         with col1:
             # 전체 방문객 수 변화
-            fig, ax = plt.subplots(figsize=(10, 6))
-            ax.plot(years, [x/1000000 for x in total_visitors], marker='o', linewidth=2, markersize=8, color='blue')
-            ax.set_title('2017-2024년 외국인 방문객 총 수 변화',
-                        fontproperties=korean_font_prop, fontsize=12, fontweight='bold')
-            ax.set_ylabel('방문객 수 (백만명)', fontproperties=korean_font_prop)
-            ax.tick_params(axis='x', rotation=45)
-            ax.grid(True, alpha=0.3)
-            st.pyplot(fig)
+            show_figure('05.gender_total', charts['05.gender_total'])
 
         with col2:
             # 여성 비율 변화
-            fig, ax = plt.subplots(figsize=(10, 6))
-            ax.plot(years, female_ratios, marker='s', linewidth=2, markersize=6, color='red')
-            ax.set_title('2017-2024년 여성 방문객 비율 변화',
-                        fontproperties=korean_font_prop, fontsize=12, fontweight='bold')
-            ax.set_ylabel('여성 비율 (%)', fontproperties=korean_font_prop)
-            ax.tick_params(axis='x', rotation=45)
-            ax.grid(True, alpha=0.3)
-            ax.set_ylim(0, 70)
-            st.pyplot(fig)
+            show_figure('05.gender_female', charts['05.gender_female'])
 
         # 성별 분석 인사이트
         st.markdown("### 👫 성별 분석 인사이트")
 
         col1, col2 = st.columns(2)
 
+        female_years = sum(ratio > 50 for ratio in female_ratios)
+        low_index = int(np.argmin(total_visitors))
+        pre_covid = [total for year, total in zip(years, total_visitors) if int(year) < 2020]
+
         with col1:
-            st.success("""
-            **👩 여성 방문객 우세**
-            - 8년 평균 57.5%
-            - 2024년 56.5% 안정적
-            - 지속적인 여성 우위
+            st.success(f"""
+            **👩 여성 방문객 비율**
+            - {len(years)}년 평균 {np.mean(female_ratios):.1f}%
+            - {years[-1]}년 {female_ratios[-1]:.1f}%
+            - 여성 우위 {female_years}/{len(years)}년
             """)
 
         with col2:
-            st.info("""
+            recovery = f"{total_visitors[-1] / max(pre_covid) * 100:.0f}%" if pre_covid else "-"
+            st.info(f"""
             **📊 코로나19 영향**
-            - 2020-2021년 급감
-            - 2022년부터 회복
-            - 2024년 완전 정상화
+            - 최저 {years[low_index]}년 {total_visitors[low_index] / 10000:,.0f}만명
+            - {years[-1]}년 {total_visitors[-1] / 10000:,.0f}만명
+            - 코로나19 이전 최고 대비 {recovery}
             """)
 
-    with tab4:
-        st.subheader("2010-2024년 장기 추세 분석")
-
-        # 장기 데이터
-        years_long = ['2010', '2011', '2012', '2013', '2014', '2015', '2016',
-                     '2017', '2018', '2019', '2020', '2021', '2022', '2023', '2024']
-        total_visitors_long = [8797658, 9794796, 11140028, 12175550, 14201516, 13231651,
-                              17241823, 13335758, 15346879, 17502756, 2519118, 967003,
-                              3198017, 11031665, 16369629]
-
-        # 국가별 데이터
-        countries_data = {
-            '일본': [3023009, 3289051, 3518792, 2747750, 2280434, 1837782, 2297893,
-                    2311447, 2948527, 3271706, 430742, 15265, 296867, 2316429, 3224079],
-            '중국': [1875157, 2220196, 2836892, 4326869, 6126865, 5984170, 8067722,
-                    4169353, 4789512, 6023021, 686430, 170215, 227358, 2019424, 4603273],
-            '미국': [652889, 661503, 697866, 722315, 770305, 767613, 866186,
-                    868881, 967992, 1044038, 220417, 204025, 543648, 1086415, 1320108]
-        }
+    def trend_tab():
+        st.subheader(f"{first_year}-{last_year}년 장기 추세 분석")
 
         # 전체 트렌드
-        fig, ax = plt.subplots(figsize=(14, 8))
-        ax.plot(years_long, [x/1000000 for x in total_visitors_long],
-               marker='o', linewidth=3, markersize=8, color='darkblue')
-        ax.set_title('2010-2024년 외국인 방문객 총 수 변화',
-                    fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
-        ax.set_ylabel('방문객 수 (백만명)', fontproperties=korean_font_prop)
-        ax.tick_params(axis='x', rotation=45)
-        ax.grid(True, alpha=0.3)
-
-        # 주요 시점 표시
-        ax.axvline(x='2019', color='green', linestyle='--', alpha=0.7)
-        ax.text('2019', 18, '역대 최고', ha='center', fontproperties=korean_font_prop)
-        ax.axvline(x='2020', color='red', linestyle='--', alpha=0.7)
-        ax.text('2020', 15, 'COVID-19', ha='center', fontproperties=korean_font_prop)
-
-        st.pyplot(fig)
+        show_figure('05.long', charts['05.long'])
 
         # 국가별 트렌드
         st.markdown("### 🌍 주요 국가별 변화")
+        show_figure('05.countries', charts['05.countries'])
 
-        fig, ax = plt.subplots(figsize=(14, 8))
-        colors = ['red', 'orange', 'blue']
-        markers = ['o', 's', '^']
-
-        for i, (country, data) in enumerate(countries_data.items()):
-            ax.plot(years_long, [x/1000000 for x in data],
-                   marker=markers[i], label=country, linewidth=2,
-                   markersize=6, color=colors[i], alpha=0.8)
-
-        ax.set_title('2010-2024년 주요 국가별 외국인 방문객 수 변화',
-                    fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
-        ax.set_ylabel('방문객 수 (백만명)', fontproperties=korean_font_prop)
-        ax.tick_params(axis='x', rotation=45)
-        legend = ax.legend()
-        if korean_font_prop:
-            for text in legend.get_texts():
-                text.set_fontproperties(korean_font_prop)
-        ax.grid(True, alpha=0.3)
-
-        st.pyplot(fig)
-
-        # 15년간 변화 통계
-        st.markdown("### 📈 15년간 주요 변화")
+        # 기간 중 변화 통계
+        st.markdown(f"### 📈 {len(years_long)}년간 주요 변화")
 
         col1, col2, col3 = st.columns(3)
 
         with col1:
-            st.metric("2010년", "880만명", "시작점")
-            st.metric("2019년", "1,750만명", "역대 최고")
-            st.metric("2024년", "1,637만명", "회복 완료")
+            st.metric(f"{first_year}년", f"{total_visitors_long[0] / 10000:,.0f}만명", "시작점")
+            st.metric(f"{peak_year}년", f"{peak_total / 10000:,.0f}만명", "역대 최고")
+            st.metric(f"{last_year}년", f"{last_total / 10000:,.0f}만명", f"역대 최고의 {last_total / peak_total * 100:.0f}%",
+                      delta_color="off")
+
+        china = countries_data.get('중국')
+        japan = countries_data.get('일본')
 
         with col2:
-            st.success("""
-            **🚀 중국 급증**
-            - 2010년: 188만명
-            - 2024년: 460만명
-            - 145.5% 증가
-            """)
+            if china:
+                st.success(f"""
+                **{'🚀 중국 증가' if china[-1] >= china[0] else '📉 중국 감소'}**
+                - {first_year}년: {china[0] / 10000:,.0f}만명
+                - {last_year}년: {china[-1] / 10000:,.0f}만명
+                - {(china[-1] / china[0] - 1) * 100:+.1f}%
+                """)
 
         with col3:
-            st.info("""
-            **🇯🇵 일본 안정**
-            - 2010년: 302만명
-            - 2024년: 322만명
-            - 안정적 유지
-            """)
+            if japan:
+                st.info(f"""
+                **🇯🇵 일본**
+                - {first_year}년: {japan[0] / 10000:,.0f}만명
+                - {last_year}년: {japan[-1] / 10000:,.0f}만명
+                - {(japan[-1] / japan[0] - 1) * 100:+.1f}%
+                """)
+
+    show_lazy_tabs("tourist_tabs", [
+        ("📈 연령대 분석", age_tab),
+        ("🌏 대륙별 분석", continent_tab),
+        ("👫 성별 분석", gender_tab),
+        ("📊 장기 추세", trend_tab)
+    ])
 
     # 종합 인사이트
     st.markdown("---")
     st.subheader("🎯 종합 분석 결과")
 
+    # 최근 두 해 증가 폭이 가장 큰 대륙/연령대, 증가율이 가장 큰 국가
+    continent_prev_year = list(next(iter(continent_data.values())).keys())[-2]
+    growth_continent = max(continent_data, key=lambda cont: continent_data[cont][continent_year] - continent_data[cont][continent_prev_year])
+    age_prev, age_last = [age_data[year] for year in list(age_data.keys())[-2:]]
+    growth_age = max(age_prev, key=lambda group: age_last.get(group, 0) - age_prev[group])
+    country_rates = {country: (values[-1] / values[-2] - 1) * 100 for country, values in countries_data.items() if values[-2]}
+    recovery = recovery_text(summary)
+
     col1, col2 = st.columns(2)
 
     with col1:
-        st.success("""
-        **🚀 완전한 회복 달성**
-        - 2024년 1,637만명 (역대 2위)
-        - 코로나19 이전 수준 완전 회복
-        - 아시아권 중심의 급속한 회복
-        - 젊은 층(21-40세) 증가 두드러짐
+        st.success(f"""
+        **🚀 관광객 회복**
+        - {last_year}년 {last_total / 10000:,.0f}만명 (역대 {total_rank}위)
+        {f"- {recovery}" if recovery else ""}
+        - {growth_continent} 증가 폭 최대 ({continent_prev_year}→{continent_year}년)
+        - {growth_age} 증가 폭 최대
         """)
 
     with col2:
-        st.info("""
-        **📊 지속적 특징**
-        - 여성 관광객 비중 높음 (56.5%)
-        - 아시아주 압도적 비중 (80.1%)
-        - 중국 관광객 급속한 회복
-        - 관광 시장 다변화 지속
+        growth_country = max(country_rates, key=country_rates.get) if country_rates else None
+        st.info(f"""
+        **📊 {last_year}년 특징**
+        - 여성 관광객 비율 {gender_data[last_gender_year]['여성비율']:.1f}%
+        - {top_continent} 비중 {top_share:.1f}% (1위)
+        {f"- {growth_country} 전년 대비 {country_rates[growth_country]:+.1f}% (주요국 중 최대)" if growth_country else ""}
         """)
 
+@chart('06.query')
+def draw_rental_query(data):
+    year, group_by, basis, labels, counts = data
+    fig, ax = plt.subplots(figsize=(14, 6))
+    if group_by == '대여소':
+        ax.barh(range(len(labels)), counts, color='#3498DB', alpha=0.8)
+        ax.set_yticks(range(len(labels)))
+        ax.set_yticklabels([label[:25] for label in labels], fontproperties=korean_font_prop, fontsize=9)
+        ax.invert_yaxis()
+        ax.set_xlabel(f'{basis}건수', fontproperties=korean_font_prop)
+    elif group_by == '일자':
+        ax.plot(pd.to_datetime(labels), counts, color='#3498DB', linewidth=2)
+        ax.set_ylabel(f'{basis}건수', fontproperties=korean_font_prop)
+    else:
+        ax.bar(range(len(labels)), counts, color='#3498DB', alpha=0.8)
+        ax.set_xticks(range(len(labels)))
+        ax.set_xticklabels(labels, fontproperties=korean_font_prop)
+        ax.set_ylabel(f'{basis}건수', fontproperties=korean_font_prop)
+    ax.set_title(f'{year}년 {group_by}별 {basis}건수', fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    return fig
+
+def show_rental_query():
+    st.header("🔎 대여이력 조회")
+
+    if not store_available():
+        st.info("변환된 대여이력이 없습니다. `python -m ddareungi.ingest --data-dir .. --store-dir data_store`로 먼저 변환하세요.")
+        return
+    fingerprint = store_fingerprint()
+    try:
+        engine = get_sql_engine(fingerprint)
+    except ImportError:
+        st.warning("조회 기능에는 duckdb 패키지가 필요합니다 (`pip install duckdb`).")
+        return
+
+    # 필터 → 값 바인딩 SQL (기간은 대여 월 기준 파티션이라 해당 월 파일만 읽음)
+    periods = available_months()
+    years = sorted({year for year, _ in periods})
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        year = st.selectbox("연도", years, index=len(years) - 1)
+        year_months = [month for y, month in periods if y == year]
+        months = st.multiselect("월", year_months, default=year_months, format_func=lambda month: f"{month}월")
+    with col2:
+        weekday_names = st.multiselect("요일", loaders.WEEKDAY_NAMES, default=loaders.WEEKDAY_NAMES)
+        hours = st.slider("시간대", 0, 23, (0, 23))
+    with col3:
+        basis = st.radio("기준", ['대여', '반납'], horizontal=True)
+        group_by = st.selectbox("묶음", ['대여소', '시간대', '요일', '일자', '월'])
+
+    col1, col2 = st.columns(2)
+    with col1:
+        station_keyword = st.text_input("대여소 (번호 또는 이름 일부)", placeholder="예: 207, 한강")
+    with col2:
+        user_types = st.multiselect("이용자종류", rental_user_types(fingerprint))
+
+    if not months or not weekday_names:
+        st.info("월과 요일을 하나 이상 선택하세요.")
+        return
+
+    start = time.perf_counter()
+    result = engine.rental_summary(
+        basis=basis, group_by=group_by, year=year,
+        months=None if months == year_months else months,
+        weekdays=None if len(weekday_names) == 7 else [loaders.WEEKDAY_NAMES.index(name) for name in weekday_names],
+        hours=None if hours == (0, 23) else hours,
+        station_keyword=station_keyword or None,
+        user_types=user_types or None
+    )
+    elapsed = time.perf_counter() - start
+    st.caption(f"{len(result):,}행 · {elapsed * 1000:,.0f}ms")
+
+    if result.empty:
+        st.info("조건에 맞는 대여이력이 없습니다.")
+        return
+
+    # 구분 라벨
+    if group_by == '대여소':
+        labels = [f"{key}. {name}" if name else str(key) for key, name in zip(result['대여소번호'], result['대여소명'])]
+    elif group_by == '요일':
+        labels = [loaders.WEEKDAY_NAMES[day] for day in result['구분']]
+    elif group_by == '시간대':
+        labels = [f"{hour}시" for hour in result['구분']]
+    elif group_by == '월':
+        labels = [f"{month}월" for month in result['구분']]
+    else:
+        labels = [str(day) for day in result['구분']]
+    counts = result['건수'].tolist()
+
+    show_figure('06.query', (year, group_by, basis, labels, counts))
+
+    display = result.drop(columns=['구분']) if group_by == '대여소' else result.assign(구분=labels)
+    st.dataframe(display, width="stretch", hide_index=True)
+
+@chart('07.ranking')
+def draw_period_ranking(data):
+    start, end, rank_by, labels, values = data
+    fig, ax = plt.subplots(figsize=(14, 6))
+    ax.barh(range(len(labels)), values, color='#3498DB', alpha=0.8)
+    ax.set_yticks(range(len(labels)))
+    ax.set_yticklabels([label[:25] for label in labels], fontproperties=korean_font_prop, fontsize=9)
+    ax.invert_yaxis()
+    ax.set_xlabel(rank_by, fontproperties=korean_font_prop)
+    ax.set_title(f'{start} ~ {end} {rank_by} 상위 10개 대여소', fontproperties=korean_font_prop,
+                 fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3, axis='x')
+    return fig
+
+def show_period_summary():
+    st.header("📅 기간별 대여소 집계")
+
+    index = load_daily_index_data()
+    if index is None:
+        st.info("일별 인덱스가 없습니다. `python -m ddareungi.daily_index --data-dir .. --store-dir data_store`로 먼저 만드세요.")
+        return
+
+    # 대여소별 일별 누적 건수라 기간을 바꿔도 원본을 읽지 않고 배열 두 번 조회로 계산
+    first_day, last_day = index.start.astype(object), index.end
+    default_range = index.coverage.get('rentals', (first_day, last_day))
+    start, end = st.slider("기간", min_value=first_day, max_value=last_day, value=default_range, format="YYYY-MM-DD")
+
+    query_start = time.perf_counter()
+    summary = index.range_summary(start, end)
+    elapsed = time.perf_counter() - query_start
+
+    totals = {label: int(summary[label].sum()) for label in MEASURES.values() if label in summary}
+    overlap = index.covered_range(['rentals', 'foreign_rentals'], start, end)
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("대여건수", f"{totals.get('대여건수', 0):,}건", f"{(end - start).days + 1:,}일")
+    with col2:
+        st.metric("반납건수", f"{totals.get('반납건수', 0):,}건")
+    with col3:
+        st.metric("외국인 대여건수", f"{totals.get('외국인대여건수', 0):,}건")
+    with col4:
+        if overlap is None:
+            st.metric("외국인 비중", "-", "겹치는 기간 없음")
+        else:
+            foreign_ratio = index.total('foreign_rentals', *overlap) / max(index.total('rentals', *overlap), 1) * 100
+            st.metric("외국인 비중", f"{foreign_ratio:.3f}%", f"{overlap[0]} ~ {overlap[1]} 기준")
+
+    coverage = ", ".join(f"{MEASURES[measure]} {first} ~ {last}" for measure, (first, last) in index.coverage.items())
+    st.caption(f"데이터 범위: {coverage} · 대여소 {len(summary):,}개 · {elapsed * 1000:,.1f}ms")
+
+    # 순위 (외국인 비율은 대여가 적은 대여소의 튀는 값을 빼고 계산)
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        rank_by = st.radio("순위 기준", list(MEASURES.values()) + ['외국인비율(%)'], horizontal=True)
+    with col2:
+        min_rentals = st.number_input("최소 대여건수 (비율)", min_value=0, value=100, step=50)
+    ranked = summary[summary['대여건수'] >= min_rentals] if rank_by == '외국인비율(%)' else summary
+    ranked = ranked[ranked[rank_by] > 0].sort_values([rank_by, '대여소번호'], ascending=[False, True], kind='stable').head(10)
+    if ranked.empty:
+        st.info("선택한 기간에 해당하는 대여소가 없습니다.")
+        return
+
+    labels = [f"{key}. {name}" if name else str(key) for key, name in zip(ranked['대여소번호'], ranked['대여소명'])]
+    values = ranked[rank_by].tolist()
+
+    show_figure('07.ranking', (start, end, rank_by, labels, values))
+    st.dataframe(ranked, width="stretch", hide_index=True)
+
+    show_area_summary(index, summary, start, end)
+
+@chart('07.clusters')
+def draw_area_clusters(data):
+    start, end, cluster_radius, measure, cluster_labels, cluster_values = data
+    fig, ax = plt.subplots(figsize=(14, 6))
+    ax.barh(range(len(cluster_labels)), cluster_values, color='#9B59B6', alpha=0.8)
+    ax.set_yticks(range(len(cluster_labels)))
+    ax.set_yticklabels([label[:30] for label in cluster_labels], fontproperties=korean_font_prop, fontsize=9)
+    ax.invert_yaxis()
+    ax.set_xlabel(measure, fontproperties=korean_font_prop)
+    ax.set_title(f'{start} ~ {end} 권역별 {measure} 상위 10개 (반경 {cluster_radius}m)',
+                 fontproperties=korean_font_prop, fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3, axis='x')
+    return fig
+
+def show_area_summary(index, summary, start, end):
+    st.subheader("🗺️ 권역별 집계")
+    station_index = load_station_index_data()
+    if station_index is None:
+        st.info(f"대여소 정보 파일(`{config.STATION_INFO_GLOB}`)이 없어 권역별 집계를 건너뜁니다.")
+        return
+
+    # 걸어서 닿는 거리의 대여소를 한 권역으로 묶어 같은 기간 합계를 다시 계산
+    measures = [label for label in MEASURES.values() if label in summary]
+    col1, col2 = st.columns(2)
+    with col1:
+        cluster_radius = st.slider("권역으로 묶는 거리 (m)", min_value=50, max_value=400,
+                                   value=DEFAULT_CLUSTER_RADIUS_M, step=25, key="area_cluster_radius")
+    with col2:
+        min_stations = st.number_input("권역 최소 대여소 수", min_value=1, value=2, step=1, key="area_min_stations")
+
+    query_start = time.perf_counter()
+    clusters = station_index.cluster_table(summary, measures, cluster_radius, min_stations=min_stations)
+    overlap = index.covered_range(['rentals', 'foreign_rentals'], start, end)
+    if overlap is not None:
+        # 외국인 비중은 기간 합계와 같게 두 데이터가 모두 있는 날짜만으로 계산
+        shares = station_index.cluster_table(index.range_summary(*overlap), ['대여건수', '외국인대여건수'], cluster_radius)
+        shares = shares.set_index('권역')
+        ratio = shares['외국인대여건수'] / shares['대여건수'].where(shares['대여건수'] > 0) * 100
+        clusters['외국인비율(%)'] = clusters['권역'].map(ratio).round(3)
+    elapsed = time.perf_counter() - query_start
+
+    missing = clusters.attrs.get('좌표없음', {})
+    st.caption(f"대여소 {len(station_index):,}개 → 권역 {station_index.clusters(cluster_radius).max() + 1:,}개 "
+               f"(대여소 {min_stations}개 이상 {len(clusters):,}개) · 좌표 없는 대여소 대여 {missing.get('대여건수', 0):,}건 제외 · "
+               f"{elapsed * 1000:,.1f}ms")
+    top_clusters = clusters[clusters[measures[0]] > 0].head(10)
+    if top_clusters.empty:
+        st.info("조건에 맞는 권역이 없습니다.")
+    else:
+        cluster_labels = [f"{label} 외 {count - 1}곳" if count > 1 else label
+                          for label, count in zip(top_clusters['대표대여소'], top_clusters['대여소수'])]
+        cluster_values = top_clusters[measures[0]].tolist()
+
+        show_figure('07.clusters', (start, end, cluster_radius, measures[0], cluster_labels, cluster_values))
+        st.dataframe(top_clusters.drop(columns=['권역', '위도', '경도']), width="stretch", hide_index=True)
+
+    # 반경 검색 (TOP5 대여소 먼저, 나머지는 기간 대여건수 순)
+    counts = summary.set_index('대여소번호')
+    ordered = summary.sort_values([measures[0], '대여소번호'], ascending=[False, True], kind='stable')['대여소번호']
+    station_ids = [station_id for station_id in TOP5_STATIONS.keys() if station_id in station_index]
+    station_ids += [station_id for station_id in ordered if station_id in station_index and station_id not in set(station_ids)]
+    if not station_ids:
+        return
+
+    def station_label(station_id):
+        position = station_index.position_of(station_id)
+        name = station_index.names[position]
+        return f"{station_id}번 {name}" if name else f"{station_id}번"
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        station_id = st.selectbox("기준 대여소", station_ids, format_func=station_label, key="area_station")
+    with col2:
+        radius = st.number_input("반경 (m)", min_value=50, max_value=3000, value=DEFAULT_RADIUS_M, step=50, key="area_radius")
+    nearby = station_index.nearby(station_id, radius)
+    for measure in measures:
+        nearby[measure] = nearby['대여소번호'].map(counts[measure]).fillna(0).astype(np.int64)
+
+    columns = st.columns(len(measures) + 1)
+    with columns[0]:
+        st.metric("반경 안 대여소", f"{len(nearby):,}개", f"{radius:,}m")
+    for column, measure in zip(columns[1:], measures):
+        with column:
+            own = int(counts[measure].get(station_id, 0))
+            st.metric(f"반경 {measure}", f"{int(nearby[measure].sum()):,}건", f"기준 대여소 {own:,}건", delta_color="off")
+    st.dataframe(nearby, width="stretch", hide_index=True)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file